@@ -0,0 +1,51 @@
+"""add price_coverage table
+
+Revision ID: a1f6c3d9e842
+Revises: e5b8f1a3c720
+Create Date: 2026-10-16 16:00:00.000000+00:00
+
+Seeds the table from price_history: consecutive closes at most a week apart
+(weekends and holidays) form one covered range.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f6c3d9e842'
+down_revision: Union[str, None] = 'e5b8f1a3c720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('price_coverage',
+    sa.Column('ticker', sa.String(length=50), nullable=False, comment='Asset ticker symbol (same format as price_history.ticker)'),
+    sa.Column('start_date', sa.Date(), nullable=False, comment='First covered date'),
+    sa.Column('end_date', sa.Date(), nullable=False, comment='Last covered date'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='When the range was last extended'),
+    sa.PrimaryKeyConstraint('ticker', 'start_date')
+    )
+    op.execute(
+        """
+        INSERT INTO price_coverage (ticker, start_date, end_date, updated_at)
+        SELECT ticker, MIN(date), MAX(date), NOW() AT TIME ZONE 'utc'
+        FROM (
+            SELECT ticker, date,
+                   SUM(new_range) OVER (PARTITION BY ticker ORDER BY date) AS range_id
+            FROM (
+                SELECT ticker, date,
+                       CASE WHEN date - LAG(date) OVER (PARTITION BY ticker ORDER BY date) <= 7
+                            THEN 0 ELSE 1 END AS new_range
+                FROM price_history
+            ) starts
+        ) ranges
+        GROUP BY ticker, range_id;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('price_coverage')
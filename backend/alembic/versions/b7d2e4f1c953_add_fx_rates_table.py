@@ -0,0 +1,34 @@
+"""add fx_rates table
+
+Revision ID: b7d2e4f1c953
+Revises: a1f6c3d9e842
+Create Date: 2026-10-16 18:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f1c953'
+down_revision: Union[str, None] = 'a1f6c3d9e842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fx_rates',
+    sa.Column('base', sa.String(length=3), nullable=False, comment='Base currency code'),
+    sa.Column('quote', sa.String(length=3), nullable=False, comment='Quote currency code'),
+    sa.Column('date', sa.Date(), nullable=False, comment='Rate date'),
+    sa.Column('rate', sa.Numeric(precision=20, scale=10), nullable=False, comment='Closing rate (units of quote per unit of base)'),
+    sa.Column('source', sa.String(length=20), nullable=False, comment='Data source'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='When the rate was last written'),
+    sa.PrimaryKeyConstraint('base', 'quote', 'date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('fx_rates')
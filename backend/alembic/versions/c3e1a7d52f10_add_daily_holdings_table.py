@@ -0,0 +1,49 @@
+"""add daily_holdings ledger table
+
+Revision ID: c3e1a7d52f10
+Revises: add_ticker_uniqueness
+Create Date: 2026-10-16 09:00:00.000000+00:00
+
+The ledger is populated lazily by HoldingsLedger the first time a snapshot
+or position recalculation runs, so this migration only creates the table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e1a7d52f10'
+down_revision: Union[str, None] = 'add_ticker_uniqueness'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_holdings',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('holding_date', sa.Date(), nullable=False, comment='Date the holding state applies to (end of day)'),
+    sa.Column('isin', sa.String(length=12), nullable=True, comment='ISIN of the holding (None for ticker-only holdings)'),
+    sa.Column('ticker', sa.String(length=50), nullable=False, comment='Ticker of the most recent transaction for this holding'),
+    sa.Column('quantity', sa.Numeric(precision=20, scale=8), nullable=False, comment='Number of shares held at end of day'),
+    sa.Column('cost_basis', sa.Numeric(precision=20, scale=8), nullable=False, comment='Cost basis in EUR (average cost method, same as positions)'),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('holding_date', 'isin', name='uix_daily_holding_date_isin')
+    )
+    op.create_index(op.f('ix_daily_holdings_holding_date'), 'daily_holdings', ['holding_date'], unique=False)
+    op.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uix_daily_holding_date_ticker_only
+        ON daily_holdings(holding_date, ticker)
+        WHERE isin IS NULL;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uix_daily_holding_date_ticker_only;")
+    op.drop_index(op.f('ix_daily_holdings_holding_date'), table_name='daily_holdings')
+    op.drop_table('daily_holdings')
+    op.execute("DELETE FROM system_state WHERE key = 'holdings_ledger_through';")
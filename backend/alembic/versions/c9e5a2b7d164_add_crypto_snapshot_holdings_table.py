@@ -0,0 +1,90 @@
+"""add crypto_snapshot_holdings table
+
+Revision ID: c9e5a2b7d164
+Revises: b7d2e4f1c953
+Create Date: 2026-10-16 20:00:00.000000+00:00
+
+Moves crypto_portfolio_snapshots.holdings_breakdown (a JSON string) into one
+row per asset, then drops the column. The downgrade rebuilds the JSON.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5a2b7d164'
+down_revision: Union[str, None] = 'b7d2e4f1c953'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('crypto_snapshot_holdings',
+    sa.Column('portfolio_id', sa.Integer(), nullable=False, comment='Associated crypto portfolio ID'),
+    sa.Column('snapshot_date', sa.Date(), nullable=False, comment='Date of the snapshot'),
+    sa.Column('symbol', sa.String(length=20), nullable=False, comment='Crypto symbol (e.g., BTC, ETH, ADA)'),
+    sa.Column('quantity', sa.Numeric(precision=20, scale=8), nullable=False, comment='Quantity held at the snapshot date'),
+    sa.Column('value_eur', sa.Numeric(precision=20, scale=2), nullable=False, comment='Holding value in EUR'),
+    sa.Column('value_usd', sa.Numeric(precision=20, scale=2), nullable=False, comment='Holding value in USD (0 if unavailable)'),
+    sa.ForeignKeyConstraint(
+        ['portfolio_id', 'snapshot_date'],
+        ['crypto_portfolio_snapshots.portfolio_id', 'crypto_portfolio_snapshots.snapshot_date'],
+        name='fk_crypto_snapshot_holdings_snapshot',
+        ondelete='CASCADE'
+    ),
+    sa.PrimaryKeyConstraint('portfolio_id', 'snapshot_date', 'symbol')
+    )
+    op.create_index(
+        'ix_crypto_snapshot_holdings_symbol_date',
+        'crypto_snapshot_holdings',
+        ['portfolio_id', 'symbol', 'snapshot_date'],
+        unique=False
+    )
+    op.execute(
+        """
+        INSERT INTO crypto_snapshot_holdings (portfolio_id, snapshot_date, symbol, quantity, value_eur, value_usd)
+        SELECT s.portfolio_id, s.snapshot_date, h.key,
+               (h.value->>'quantity')::numeric,
+               ROUND((h.value->>'value_eur')::numeric, 2),
+               ROUND(COALESCE((h.value->>'value_usd')::numeric, 0), 2)
+        FROM crypto_portfolio_snapshots s
+        CROSS JOIN LATERAL json_each(s.holdings_breakdown::json) h
+        WHERE s.holdings_breakdown IS NOT NULL AND s.holdings_breakdown <> '';
+        """
+    )
+    op.drop_column('crypto_portfolio_snapshots', 'holdings_breakdown')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'crypto_portfolio_snapshots',
+        sa.Column('holdings_breakdown', sa.String(length=2000), nullable=True, comment='JSON string of holdings breakdown by symbol')
+    )
+    op.execute(
+        """
+        UPDATE crypto_portfolio_snapshots s
+        SET holdings_breakdown = b.breakdown
+        FROM (
+            SELECT h.portfolio_id, h.snapshot_date,
+                   json_object_agg(h.symbol, json_build_object(
+                       'quantity', h.quantity::float,
+                       'value_eur', h.value_eur::float,
+                       'value_usd', h.value_usd::float,
+                       'percentage', CASE WHEN t.total > 0 THEN (h.value_eur / t.total * 100)::float ELSE 0 END
+                   ))::text AS breakdown
+            FROM crypto_snapshot_holdings h
+            JOIN (
+                SELECT portfolio_id, snapshot_date, SUM(value_eur) AS total
+                FROM crypto_snapshot_holdings
+                GROUP BY portfolio_id, snapshot_date
+            ) t ON t.portfolio_id = h.portfolio_id AND t.snapshot_date = h.snapshot_date
+            GROUP BY h.portfolio_id, h.snapshot_date
+        ) b
+        WHERE b.portfolio_id = s.portfolio_id AND b.snapshot_date = s.snapshot_date
+          AND length(b.breakdown) <= 2000;
+        """
+    )
+    op.drop_index('ix_crypto_snapshot_holdings_symbol_date', table_name='crypto_snapshot_holdings')
+    op.drop_table('crypto_snapshot_holdings')
@@ -0,0 +1,36 @@
+"""add dirty_metrics table
+
+Revision ID: d7a4c2e9b310
+Revises: c3e1a7d52f10
+Create Date: 2026-10-16 12:00:00.000000+00:00
+
+Existing cached metrics carry no recompute inputs yet, so the first metric
+run after this migration recomputes everything and later runs only the
+marked entries.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a4c2e9b310'
+down_revision: Union[str, None] = 'c3e1a7d52f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dirty_metrics',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('scope', sa.String(length=30), nullable=False, comment="Kind of metric owner (e.g., 'position', 'crypto_portfolio')"),
+    sa.Column('key', sa.String(length=100), nullable=False, comment='Owner identifier within the scope (ISIN or ticker, portfolio ID)'),
+    sa.Column('marked_at', sa.DateTime(), nullable=False, comment='When the owner was last marked as changed'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'key', name='uix_dirty_metric_scope_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dirty_metrics')
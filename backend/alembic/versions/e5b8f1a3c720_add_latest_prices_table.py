@@ -0,0 +1,54 @@
+"""add latest_prices table
+
+Revision ID: e5b8f1a3c720
+Revises: d7a4c2e9b310
+Create Date: 2026-10-16 14:00:00.000000+00:00
+
+Seeds the table from price_history so readers do not have to fall back to
+price_history until the next price update.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8f1a3c720'
+down_revision: Union[str, None] = 'd7a4c2e9b310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('latest_prices',
+    sa.Column('ticker', sa.String(length=50), nullable=False, comment='Asset ticker symbol (same format as price_history.ticker)'),
+    sa.Column('last_date', sa.Date(), nullable=False, comment='Date of the most recent close'),
+    sa.Column('last_close', sa.Numeric(precision=20, scale=8), nullable=False, comment='Most recent closing price'),
+    sa.Column('previous_date', sa.Date(), nullable=True, comment='Date of the close before last_date'),
+    sa.Column('previous_close', sa.Numeric(precision=20, scale=8), nullable=True, comment='Closing price before the most recent one'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='When the row was last refreshed from price_history'),
+    sa.PrimaryKeyConstraint('ticker')
+    )
+    op.execute(
+        """
+        INSERT INTO latest_prices (ticker, last_date, last_close, previous_date, previous_close, updated_at)
+        SELECT ticker,
+               MAX(date) FILTER (WHERE rn = 1),
+               MAX(close) FILTER (WHERE rn = 1),
+               MAX(date) FILTER (WHERE rn = 2),
+               MAX(close) FILTER (WHERE rn = 2),
+               NOW() AT TIME ZONE 'utc'
+        FROM (
+            SELECT ticker, date, close,
+                   ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+            FROM price_history
+        ) ranked
+        WHERE rn <= 2
+        GROUP BY ticker;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('latest_prices')
@@ -3,7 +3,6 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
-import yfinance as yf
 import logging
 import asyncio
 
@@ -13,6 +12,8 @@ from app.schemas.position import PositionResponse
 from app.schemas.transaction import TransactionResponse
 from app.schemas.price import PriceResponse
 from app.services.cache import cache
+from app.services.market_data import get_market_data_provider
+from app.services.provider_executor import provider_executor
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +48,7 @@ SEARCH_CACHE_TTL = 3600
 
 def _fetch_ticker_info_sync(ticker: str) -> dict | None:
     """
-    Synchronous function to fetch ticker info from Yahoo Finance.
+    Synchronous function to fetch ticker info from the market data provider.
 
     This is run in a thread pool to avoid blocking the event loop.
 
@@ -58,17 +59,13 @@ def _fetch_ticker_info_sync(ticker: str) -> dict | None:
         Dictionary with ticker info or None if error
     """
     try:
-        ticker_obj = yf.Ticker(ticker.upper())
-        info = ticker_obj.info
-
-        if info and info.get('symbol'):
-            ticker_name = info.get('longName') or info.get('shortName') or info.get('symbol')
-            ticker_type = info.get('quoteType', 'UNKNOWN')
+        info = get_market_data_provider().search(ticker)
 
+        if info:
             return {
-                "ticker": info['symbol'],
-                "name": ticker_name,
-                "type": ticker_type
+                "ticker": info['ticker'],
+                "name": info['name'],
+                "type": info['type']
             }
         return None
     except Exception as e:
@@ -115,7 +112,7 @@ async def search_assets(
     cache_key = f"asset_search:{q.upper()}"
 
     # Try to get from cache first
-    cached_result = cache.get(cache_key)
+    cached_result = await cache.get_async(cache_key)
     if cached_result is not None:
         logger.debug(f"Returning cached search results for {q}")
         # Apply limit to cached results to ensure consistency
@@ -132,13 +129,12 @@ async def search_assets(
                 search_results.append(item)
 
         # If we have fewer than 5 results, try to fetch additional info from yfinance
-        # using thread pool to avoid blocking the event loop
+        # on the provider executor to avoid blocking the event loop
         if len(search_results) < 5:
             try:
-                loop = asyncio.get_event_loop()
-                # Run yfinance call in thread pool with 5 second timeout
+                # Run yfinance call on the provider executor with 5 second timeout
                 ticker_info = await asyncio.wait_for(
-                    loop.run_in_executor(None, _fetch_ticker_info_sync, q),
+                    provider_executor.run(_fetch_ticker_info_sync, q),
                     timeout=5.0
                 )
 
@@ -155,7 +151,7 @@ async def search_assets(
         final_results = search_results[:10]
 
         # Cache the results for 1 hour
-        cache.set(cache_key, final_results, ttl_seconds=SEARCH_CACHE_TTL)
+        await cache.set_async(cache_key, final_results, ttl_seconds=SEARCH_CACHE_TTL)
 
         return final_results
 
@@ -5,11 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 import logging
-import yfinance as yf
 
 from app.database import get_db
 from app.models import Benchmark, Transaction
 from app.schemas.benchmark import BenchmarkCreate, BenchmarkResponse
+from app.services.cache_generations import CacheGenerations, BENCHMARK
+from app.services.market_data import get_market_data_provider
+from app.services.provider_executor import provider_executor
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,9 @@ async def set_benchmark(
     await db.commit()
     await db.refresh(benchmark)
 
+    # Cached performance responses embed the previous benchmark's closes
+    await CacheGenerations.bump_async(BENCHMARK)
+
     # Trigger historical price fetch for benchmark
     # Find earliest transaction date or use 1 year ago as fallback
     earliest_txn_result = await db.execute(
@@ -121,20 +126,16 @@ async def search_tickers(
         # If we have fewer than 5 results, try to fetch additional info from yfinance
         if len(search_results) < 5:
             try:
-                # Try to get info for the exact ticker query
-                ticker_obj = yf.Ticker(q.upper())
-                info = ticker_obj.info
-
-                if info and info.get('symbol'):
-                    ticker_name = info.get('longName') or info.get('shortName') or info.get('symbol')
-                    ticker_type = info.get('quoteType', 'UNKNOWN')
+                # Try to get info for the exact ticker query (blocking, so off the event loop)
+                info = await provider_executor.run(get_market_data_provider().search, q)
 
+                if info:
                     # Check if not already in results
-                    if not any(r['ticker'] == info['symbol'] for r in search_results):
+                    if not any(r['ticker'] == info['ticker'] for r in search_results):
                         search_results.append({
-                            "ticker": info['symbol'],
-                            "name": ticker_name,
-                            "type": ticker_type
+                            "ticker": info['ticker'],
+                            "name": info['name'],
+                            "type": info['type']
                         })
             except Exception as e:
                 logger.debug(f"Could not fetch ticker info for {q}: {str(e)}")
@@ -5,14 +5,16 @@ Comprehensive API for managing crypto portfolios, transactions, and analytics.
 Follows existing codebase patterns with proper error handling and async database sessions.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from typing import List, Optional
+import json
 import logging
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransactionType
 from app.schemas.crypto import (
     CryptoPortfolioCreate,
@@ -25,6 +27,7 @@ from app.schemas.crypto import (
     CryptoTransactionList,
     CryptoPortfolioMetrics,
     CryptoHolding,
+    CryptoPerformanceData,
     CryptoPortfolioPerformance,
     CryptoPriceData,
     CryptoHistoricalPrice,
@@ -32,7 +35,13 @@ from app.schemas.crypto import (
     CryptoPriceHistoryResponse,
 )
 from app.services.crypto_calculations import CryptoCalculationService
+from app.services.cache_generations import CacheGenerations, CRYPTO, FX, PRICES, crypto
+from app.services.crypto_price_resolver import CryptoPriceResolver
+from app.services.downsampling import MAX_POINTS, MIN_POINTS, RESOLUTION_PATTERN, downsample_indices, take
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_CRYPTO_PORTFOLIO
 from app.services.price_fetcher import PriceFetcher
+from app.services.redis_pools import redis_pools
+from app.services.tiered_cache import tiered_cache
 from app.tasks.blockchain_sync import sync_wallet_manually
 from app.config import settings
 
@@ -40,6 +49,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/crypto", tags=["crypto"])
 
+# Rendered /portfolios responses, served through the tiered (L1/L2) cache
+PORTFOLIO_LIST_CACHE_PREFIX = "api:crypto:portfolios"
+
+# Rendered /performance and /history series, per range and resolution
+PERFORMANCE_CACHE_PREFIX = "api:crypto:performance"
+HISTORY_CACHE_PREFIX = "api:crypto:history"
+
 
 async def _get_usd_to_eur_rate() -> Optional[Decimal]:
     """
@@ -104,6 +120,7 @@ async def create_crypto_portfolio(
         db.add(portfolio)
         await db.commit()
         await db.refresh(portfolio)
+        await CacheGenerations.bump_async(crypto(portfolio.id))
 
         # Backfill snapshots from first transaction date to today (or just today if no transactions yet)
         # Use a Celery task to backfill snapshots asynchronously (avoids sync/async issues)
@@ -149,8 +166,7 @@ async def create_crypto_portfolio(
 async def list_crypto_portfolios(
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     skip: int = Query(0, ge=0, description="Number of portfolios to skip"),
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of portfolios to return"),
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of portfolios to return")
 ):
     """
     List crypto portfolios with optional active-state filtering and pagination.
@@ -167,105 +183,128 @@ async def list_crypto_portfolios(
     Returns:
         CryptoPortfolioList: An object containing the list of portfolio responses with
         attached metrics and wallet sync status, and the total matching portfolio count.
+
+    The rendered list is served from the tiered cache; a stale list is returned
+    while one worker recomputes it.
     """
     try:
-        query = select(CryptoPortfolio)
+        cache_key = await CacheGenerations.key_async(
+            PORTFOLIO_LIST_CACHE_PREFIX, CRYPTO, PRICES, FX, parts=(is_active, skip, limit)
+        )
 
-        # Apply filters
-        if is_active is not None:
-            query = query.where(CryptoPortfolio.is_active == is_active)
+        async def load():
+            async with AsyncSessionLocal() as db:
+                return await _load_crypto_portfolio_list(db, is_active, skip, limit)
 
-        # Count total portfolios
-        count_query = select(func.count()).select_from(query.subquery())
-        total_count_result = await db.execute(count_query)
-        total_count = total_count_result.scalar()
+        return await tiered_cache.get_or_load(
+            cache_key, load, ttl_seconds=settings.portfolio_aggregator_cache_ttl
+        )
 
-        # Apply pagination
-        query = query.offset(skip).limit(limit)
-        result = await db.execute(query)
-        portfolios = result.scalars().all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list portfolios: {str(e)}")
 
-        # Calculate metrics for each portfolio
-        calc_service = CryptoCalculationService(db)
-        portfolio_responses = []
 
-        for portfolio in portfolios:
-            metrics = await calc_service.calculate_portfolio_metrics(portfolio.id)
+async def _load_crypto_portfolio_list(
+    db: AsyncSession,
+    is_active: Optional[bool],
+    skip: int,
+    limit: int
+) -> dict:
+    """Build the rendered portfolio list for list_crypto_portfolios."""
+    query = select(CryptoPortfolio)
 
-            # Get wallet sync status if wallet address is configured
-            wallet_sync_status = None
-            if portfolio.wallet_address:
-                try:
-                    # Get recent blockchain transaction count for sync status
-                    blockchain_tx_count = await db.execute(
-                        select(func.count(CryptoTransaction.id))
-                        .where(
-                            and_(
-                                CryptoTransaction.portfolio_id == portfolio.id,
-                                CryptoTransaction.exchange == 'Bitcoin Blockchain',
-                                CryptoTransaction.timestamp >= datetime.utcnow() - timedelta(days=7)
-                            )
+    # Apply filters
+    if is_active is not None:
+        query = query.where(CryptoPortfolio.is_active == is_active)
+
+    # Count total portfolios
+    count_query = select(func.count()).select_from(query.subquery())
+    total_count_result = await db.execute(count_query)
+    total_count = total_count_result.scalar()
+
+    # Apply pagination
+    query = query.offset(skip).limit(limit)
+    result = await db.execute(query)
+    portfolios = result.scalars().all()
+
+    # Calculate metrics for each portfolio
+    calc_service = CryptoCalculationService(db)
+    portfolio_responses = []
+
+    for portfolio in portfolios:
+        metrics = await calc_service.calculate_portfolio_metrics(portfolio.id)
+
+        # Get wallet sync status if wallet address is configured
+        wallet_sync_status = None
+        if portfolio.wallet_address:
+            try:
+                # Get recent blockchain transaction count for sync status
+                blockchain_tx_count = await db.execute(
+                    select(func.count(CryptoTransaction.id))
+                    .where(
+                        and_(
+                            CryptoTransaction.portfolio_id == portfolio.id,
+                            CryptoTransaction.exchange == 'Bitcoin Blockchain',
+                            CryptoTransaction.timestamp >= datetime.utcnow() - timedelta(days=7)
                         )
                     )
-                    recent_blockchain_txs = blockchain_tx_count.scalar() or 0
-
-                    wallet_sync_status = {
-                        "wallet_configured": True,
-                        "wallet_address": portfolio.wallet_address,
-                        "recent_blockchain_transactions": recent_blockchain_txs,
-                        "last_sync_check": datetime.utcnow().isoformat()
-                    }
-                except Exception as e:
-                    logger.warning(f"Failed to get wallet sync status for portfolio {portfolio.id}: {e}")
-                    wallet_sync_status = {
-                        "wallet_configured": True,
-                        "wallet_address": portfolio.wallet_address,
-                        "status": "error",
-                        "error": "Failed to check sync status"
-                    }
-            else:
+                )
+                recent_blockchain_txs = blockchain_tx_count.scalar() or 0
+
                 wallet_sync_status = {
-                    "wallet_configured": False
+                    "wallet_configured": True,
+                    "wallet_address": portfolio.wallet_address,
+                    "recent_blockchain_transactions": recent_blockchain_txs,
+                    "last_sync_check": datetime.utcnow().isoformat()
                 }
-
-            # Build portfolio response with currency-specific fields
-            base_currency_str = (
-                portfolio.base_currency.value if hasattr(portfolio.base_currency, 'value')
-                else str(portfolio.base_currency)
-            )
-            portfolio_dict = {
-                "id": portfolio.id,
-                "name": portfolio.name,
-                "description": portfolio.description,
-                "is_active": portfolio.is_active,
-                "base_currency": portfolio.base_currency,
-                "wallet_address": portfolio.wallet_address,
-                "created_at": portfolio.created_at,
-                "updated_at": portfolio.updated_at,
-                # Add currency-specific fields for frontend compatibility
-                "total_value_usd": metrics.total_value if metrics and base_currency_str == 'USD' else None,
-                "total_value_eur": metrics.total_value if metrics and base_currency_str == 'EUR' else None,
-                "total_profit_usd": metrics.total_profit_loss if metrics and base_currency_str == 'USD' else None,
-                "total_profit_eur": metrics.total_profit_loss if metrics and base_currency_str == 'EUR' else None,
-                "profit_percentage_usd": metrics.total_profit_loss_pct if metrics and base_currency_str == 'USD' else None,
-                "profit_percentage_eur": metrics.total_profit_loss_pct if metrics and base_currency_str == 'EUR' else None,
-                # Keep original fields for backward compatibility
-                "total_value": metrics.total_value if metrics else None,
-                "total_cost_basis": metrics.total_cost_basis if metrics else None,
-                "total_profit_loss": metrics.total_profit_loss if metrics else None,
-                "total_profit_loss_pct": metrics.total_profit_loss_pct if metrics else None,
-                "transaction_count": metrics.transaction_count if metrics else 0,
-                "wallet_sync_status": wallet_sync_status
+            except Exception as e:
+                logger.warning(f"Failed to get wallet sync status for portfolio {portfolio.id}: {e}")
+                wallet_sync_status = {
+                    "wallet_configured": True,
+                    "wallet_address": portfolio.wallet_address,
+                    "status": "error",
+                    "error": "Failed to check sync status"
+                }
+        else:
+            wallet_sync_status = {
+                "wallet_configured": False
             }
-            portfolio_responses.append(CryptoPortfolioResponse(**portfolio_dict))
 
-        return CryptoPortfolioList(
-            portfolios=portfolio_responses,
-            total_count=total_count
+        # Build portfolio response with currency-specific fields
+        base_currency_str = (
+            portfolio.base_currency.value if hasattr(portfolio.base_currency, 'value')
+            else str(portfolio.base_currency)
         )
+        portfolio_dict = {
+            "id": portfolio.id,
+            "name": portfolio.name,
+            "description": portfolio.description,
+            "is_active": portfolio.is_active,
+            "base_currency": portfolio.base_currency,
+            "wallet_address": portfolio.wallet_address,
+            "created_at": portfolio.created_at,
+            "updated_at": portfolio.updated_at,
+            # Add currency-specific fields for frontend compatibility
+            "total_value_usd": metrics.total_value if metrics and base_currency_str == 'USD' else None,
+            "total_value_eur": metrics.total_value if metrics and base_currency_str == 'EUR' else None,
+            "total_profit_usd": metrics.total_profit_loss if metrics and base_currency_str == 'USD' else None,
+            "total_profit_eur": metrics.total_profit_loss if metrics and base_currency_str == 'EUR' else None,
+            "profit_percentage_usd": metrics.total_profit_loss_pct if metrics and base_currency_str == 'USD' else None,
+            "profit_percentage_eur": metrics.total_profit_loss_pct if metrics and base_currency_str == 'EUR' else None,
+            # Keep original fields for backward compatibility
+            "total_value": metrics.total_value if metrics else None,
+            "total_cost_basis": metrics.total_cost_basis if metrics else None,
+            "total_profit_loss": metrics.total_profit_loss if metrics else None,
+            "total_profit_loss_pct": metrics.total_profit_loss_pct if metrics else None,
+            "transaction_count": metrics.transaction_count if metrics else 0,
+            "wallet_sync_status": wallet_sync_status
+        }
+        portfolio_responses.append(CryptoPortfolioResponse(**portfolio_dict))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list portfolios: {str(e)}")
+    return CryptoPortfolioList(
+        portfolios=portfolio_responses,
+        total_count=total_count
+    ).model_dump(mode="json")
 
 
 @router.get("/portfolios/{portfolio_id}", response_model=CryptoPortfolioResponse)
@@ -463,6 +502,7 @@ async def update_crypto_portfolio(
 
         await db.commit()
         await db.refresh(portfolio)
+        await CacheGenerations.bump_async(crypto(portfolio.id))
 
         return portfolio
 
@@ -498,6 +538,7 @@ async def delete_crypto_portfolio(
         # Delete portfolio (cascades to transactions)
         await db.delete(portfolio)
         await db.commit()
+        await CacheGenerations.bump_async(crypto(portfolio_id))
 
     except HTTPException:
         raise
@@ -584,8 +625,10 @@ the persisted CryptoTransaction with database-populated fields.
         )
 
         db.add(transaction)
+        await db.run_sync(MetricsDirtyTracker.mark, SCOPE_CRYPTO_PORTFOLIO, [portfolio_id])
         await db.commit()
         await db.refresh(transaction)
+        await CacheGenerations.bump_async(crypto(portfolio_id))
 
         return transaction
 
@@ -741,8 +784,10 @@ it will be normalized to upper-case.
 
         transaction.updated_at = datetime.utcnow()
 
+        await db.run_sync(MetricsDirtyTracker.mark, SCOPE_CRYPTO_PORTFOLIO, [transaction.portfolio_id])
         await db.commit()
         await db.refresh(transaction)
+        await CacheGenerations.bump_async(crypto(transaction.portfolio_id))
 
         return transaction
 
@@ -777,7 +822,9 @@ async def delete_crypto_transaction(
 
         # Delete transaction
         await db.delete(transaction)
+        await db.run_sync(MetricsDirtyTracker.mark, SCOPE_CRYPTO_PORTFOLIO, [transaction.portfolio_id])
         await db.commit()
+        await CacheGenerations.bump_async(crypto(transaction.portfolio_id))
 
     except HTTPException:
         raise
@@ -819,13 +866,11 @@ async def get_wallet_sync_status(
         # Check if wallet is currently syncing (Redis-based real-time status)
         logger.info(f"Checking Redis sync status for portfolio {portfolio_id}")
         try:
-            import redis
             import json
 
-            # Connect to Redis directly
-            redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+            redis_client = redis_pools.async_client()
             key = f"wallet_sync:{portfolio_id}"
-            value = redis_client.get(key)
+            value = await redis_client.get(key)
             logger.info(f"Redis key {key}: {value}")
 
             if value:
@@ -845,7 +890,7 @@ async def get_wallet_sync_status(
                 except json.JSONDecodeError:
                     logger.warning(f"Invalid sync status JSON for portfolio {portfolio_id}")
                     # Clear invalid data
-                    redis_client.delete(key)
+                    await redis_client.delete(key)
         except Exception as e:
             logger.error(f"Error checking Redis sync status for portfolio {portfolio_id}: {e}")
             # Continue with normal status checking if Redis fails
@@ -1031,10 +1076,59 @@ async def get_crypto_holding(
         raise HTTPException(status_code=500, detail=f"Failed to get holding: {str(e)}")
 
 
+def _performance_point_to_frontend(data_point, base_currency: str) -> dict:
+    """Convert a CryptoPerformanceData point to the float-based frontend format."""
+    return {
+        "date": data_point.date.isoformat() if hasattr(data_point.date, 'isoformat') else str(data_point.date),
+        "portfolio_value": float(data_point.portfolio_value) if data_point.portfolio_value else 0.0,
+        "cost_basis": float(data_point.cost_basis) if data_point.cost_basis else 0.0,
+        "profit_loss": float(data_point.profit_loss) if data_point.profit_loss else 0.0,
+        "profit_loss_pct": float(data_point.profit_loss_pct) if data_point.profit_loss_pct is not None else 0.0,
+        "currency": data_point.currency or base_currency
+    }
+
+
+def _downsample_performance(
+    performance_data: List[CryptoPerformanceData],
+    resolution: Optional[str],
+    max_points: Optional[int]
+) -> List[CryptoPerformanceData]:
+    """Thin daily performance points to resolution / max_points, selected on the portfolio value."""
+    if not (resolution or max_points):
+        return performance_data
+    indices = downsample_indices(
+        [p.date for p in performance_data], [p.portfolio_value for p in performance_data], max_points, resolution
+    )
+    return take(performance_data, indices)
+
+
+async def _stream_performance(portfolio_id: int, start_date: date, end_date: date, base_currency: str):
+    """
+    Yield NDJSON performance points as the sweep produces them.
+
+    The status line is already sent when a failure happens, so it is reported
+    as a final {"error": ...} record instead of silently ending the stream.
+    """
+    # The request-scoped session is closed before a streaming body runs
+    async with AsyncSessionLocal() as stream_db:
+        calc_service = CryptoCalculationService(stream_db)
+        try:
+            async for data_point in calc_service.iter_performance_history(
+                portfolio_id, start_date, end_date
+            ):
+                yield json.dumps(_performance_point_to_frontend(data_point, base_currency)) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming performance for portfolio {portfolio_id}: {e}")
+            yield json.dumps({"error": f"Failed to get portfolio performance: {str(e)}"}) + "\n"
+
+
 @router.get("/portfolios/{portfolio_id}/performance")
 async def get_crypto_portfolio_performance(
     portfolio_id: int,
     range: str = Query("1M", regex="^(1D|1W|1M|3M|6M|1Y|ALL)$", description="Time range for performance data"),
+    stream: bool = Query(False, description="Stream points as newline-delimited JSON while they are computed"),
+    resolution: Optional[str] = Query(None, pattern=RESOLUTION_PATTERN, description="Calendar bucketing (daily, weekly, monthly)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS, description="Downsample to at most this many points (LTTB)"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1042,6 +1136,13 @@ async def get_crypto_portfolio_performance(
 
     Parameters:
         range (str): Time window for performance. Allowed values: "1D", "1W", "1M", "3M", "6M", "1Y", "ALL".
+        stream (bool): If true, respond with application/x-ndjson, one point per line, emitted as the sweep produces them.
+            Streamed points are neither downsampled nor cached; a failure mid-stream ends it with an {"error": ...} line.
+        resolution (str): "weekly"/"monthly" keep the last point of each period (see app.services.downsampling).
+        max_points (int): Downsample to at most this many points, selected on the portfolio value.
+
+    Non-streamed responses are cached per range, resolution and the portfolio's
+    transaction/price/FX generations.
 
     Returns:
         List[dict]: A list of daily performance points with keys:
@@ -1090,28 +1191,33 @@ async def get_crypto_portfolio_performance(
 
         logger.info(f"API: Using date range {start_date} to {end_date} for performance calculation")
 
-        calc_service = CryptoCalculationService(db)
-        performance_data = await calc_service.calculate_performance_history(
-            portfolio_id, start_date, end_date
+        base_currency = portfolio.base_currency.value
+
+        if stream:
+            return StreamingResponse(
+                _stream_performance(portfolio_id, start_date, end_date, base_currency),
+                media_type="application/x-ndjson"
+            )
+
+        cache_key = await CacheGenerations.key_async(
+            PERFORMANCE_CACHE_PREFIX, crypto(portfolio_id), PRICES, FX,
+            parts=(portfolio_id, start_date, end_date, resolution, max_points)
         )
 
-        # If no performance data, return empty array
-        if not performance_data:
-            return []
+        async def load():
+            async with AsyncSessionLocal() as load_db:
+                performance_data = await CryptoCalculationService(load_db).calculate_performance_history(
+                    portfolio_id, start_date, end_date
+                )
+            performance_data = _downsample_performance(performance_data, resolution, max_points)
 
-        # Convert to frontend-compatible format
-        frontend_performance_data = []
-        for data_point in performance_data:
-            frontend_performance_data.append({
-                "date": data_point.date.isoformat() if hasattr(data_point.date, 'isoformat') else str(data_point.date),
-                "portfolio_value": float(data_point.portfolio_value) if data_point.portfolio_value else 0.0,
-                "cost_basis": float(data_point.cost_basis) if data_point.cost_basis else 0.0,
-                "profit_loss": float(data_point.profit_loss) if data_point.profit_loss else 0.0,
-                "profit_loss_pct": float(data_point.profit_loss_pct) if data_point.profit_loss_pct is not None else 0.0,
-                "currency": data_point.currency or portfolio.base_currency.value
-            })
+            # Convert to frontend-compatible format (empty array if no data)
+            return [
+                _performance_point_to_frontend(data_point, base_currency)
+                for data_point in performance_data
+            ]
 
-        return frontend_performance_data
+        return await tiered_cache.get_or_load(cache_key, load, ttl_seconds=settings.performance_cache_ttl)
 
     except HTTPException:
         raise
@@ -1124,6 +1230,8 @@ async def get_crypto_portfolio_history(
     portfolio_id: int,
     start_date: date = Query(..., description="Start date for performance data"),
     end_date: date = Query(..., description="End date for performance data"),
+    resolution: Optional[str] = Query(None, pattern=RESOLUTION_PATTERN, description="Calendar bucketing (daily, weekly, monthly)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS, description="Downsample to at most this many points (LTTB)"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1133,6 +1241,11 @@ async def get_crypto_portfolio_history(
         portfolio_id (int): ID of the portfolio to query.
         start_date (date): Inclusive start date for the performance range; must be on or before end_date.
         end_date (date): Inclusive end date for the performance range; must be on or after start_date.
+        resolution (str): "weekly"/"monthly" keep the last point of each period (see app.services.downsampling).
+        max_points (int): Downsample to at most this many points, selected on the portfolio value.
+
+    Summary metrics always cover the full daily series. Responses are cached
+    per range, resolution and the portfolio's transaction/price/FX generations.
 
     Returns:
         CryptoPortfolioPerformance: Object containing:
@@ -1162,33 +1275,16 @@ async def get_crypto_portfolio_history(
         if not portfolio:
             raise HTTPException(status_code=404, detail="Portfolio not found")
 
-        calc_service = CryptoCalculationService(db)
-        performance_data = await calc_service.calculate_performance_history(
-            portfolio_id, start_date, end_date
+        cache_key = await CacheGenerations.key_async(
+            HISTORY_CACHE_PREFIX, crypto(portfolio_id), PRICES, FX,
+            parts=(portfolio_id, start_date, end_date, resolution, max_points)
         )
 
-        # Calculate summary metrics
-        start_value = None
-        end_value = None
-        total_return = None
-        total_return_pct = None
-
-        if performance_data:
-            start_value = performance_data[0].portfolio_value
-            end_value = performance_data[-1].portfolio_value
-            total_return = end_value - start_value
-            total_return_pct = float(
-                (total_return / start_value) * 100
-            ) if start_value > 0 else 0
-
-        return CryptoPortfolioPerformance(
-            portfolio_id=portfolio_id,
-            performance_data=performance_data,
-            start_value=start_value,
-            end_value=end_value,
-            total_return=total_return,
-            total_return_pct=total_return_pct
-        )
+        async def load():
+            async with AsyncSessionLocal() as load_db:
+                return await _load_crypto_portfolio_history(load_db, portfolio_id, start_date, end_date, resolution, max_points)
+
+        return await tiered_cache.get_or_load(cache_key, load, ttl_seconds=settings.performance_cache_ttl)
 
     except HTTPException:
         raise
@@ -1196,6 +1292,100 @@ async def get_crypto_portfolio_history(
         raise HTTPException(status_code=500, detail=f"Failed to get portfolio history: {str(e)}")
 
 
+async def _load_crypto_portfolio_history(
+    db: AsyncSession,
+    portfolio_id: int,
+    start_date: date,
+    end_date: date,
+    resolution: Optional[str],
+    max_points: Optional[int]
+) -> dict:
+    """Compute the rendered /history response."""
+    calc_service = CryptoCalculationService(db)
+    performance_data = await calc_service.calculate_performance_history(
+        portfolio_id, start_date, end_date
+    )
+
+    # Calculate summary metrics
+    start_value = None
+    end_value = None
+    total_return = None
+    total_return_pct = None
+
+    if performance_data:
+        start_value = performance_data[0].portfolio_value
+        end_value = performance_data[-1].portfolio_value
+        total_return = end_value - start_value
+        total_return_pct = float(
+            (total_return / start_value) * 100
+        ) if start_value > 0 else 0
+
+    return CryptoPortfolioPerformance(
+        portfolio_id=portfolio_id,
+        performance_data=_downsample_performance(performance_data, resolution, max_points),
+        start_value=start_value,
+        end_value=end_value,
+        total_return=total_return,
+        total_return_pct=total_return_pct
+    ).model_dump(mode="json")
+
+
+@router.get("/portfolios/{portfolio_id}/allocation-history")
+async def get_crypto_allocation_history(
+    portfolio_id: int,
+    start_date: date = Query(..., description="Start date for allocation data"),
+    end_date: date = Query(..., description="End date for allocation data"),
+    symbol: Optional[str] = Query(None, description="Only return this asset's series"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Return per-asset values and allocation from the portfolio's daily snapshots.
+
+    Parameters:
+        portfolio_id (int): ID of the portfolio to query.
+        start_date (date): Inclusive start date; must be on or before end_date.
+        end_date (date): Inclusive end date.
+        symbol (Optional[str]): Restrict the response to one asset.
+
+    Returns:
+        List[dict]: One point per snapshot date and asset, ordered by date then symbol, with keys
+            `date` (ISO string), `symbol`, `quantity`, `value_eur`, `value_usd` and `percentage` (floats).
+
+    Raises:
+        HTTPException: 400 if start_date is after end_date; 404 if the portfolio does not exist;
+            500 if the allocation history cannot be retrieved.
+    """
+    try:
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="Start date must be before end date")
+
+        portfolio_result = await db.execute(
+            select(CryptoPortfolio.id).where(CryptoPortfolio.id == portfolio_id)
+        )
+        if portfolio_result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+
+        calc_service = CryptoCalculationService(db)
+        rows = await calc_service.get_allocation_history(portfolio_id, start_date, end_date, symbol)
+
+        return [
+            {
+                "date": row["date"].isoformat(),
+                "symbol": row["symbol"],
+                "quantity": float(row["quantity"]),
+                "value_eur": float(row["value_eur"]),
+                "value_usd": float(row["value_usd"]),
+                "percentage": float(row["percentage"]),
+            }
+            for row in rows
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get allocation history: {str(e)}")
+
+
 # Price Data Endpoints
 
 @router.get("/prices", response_model=CryptoPriceResponse)
@@ -1266,10 +1456,13 @@ async def get_crypto_price_history(
     start_date: date = Query(..., description="Start date for historical data"),
     end_date: date = Query(..., description="End date for historical data"),
     currency: str = Query("eur", pattern="^(eur|usd)$", description="Target currency"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve historical daily close prices for a cryptocurrency over a specified date range.
 
+    Closes are served from the local price history; only missing days are fetched from Yahoo Finance.
+
     Parameters:
         symbol (str): Crypto symbol (e.g., "BTC", "ETH").
         start_date (date): Start date for the historical range (inclusive).
@@ -1299,12 +1492,10 @@ async def get_crypto_price_history(
         if days_diff > 365:
             raise HTTPException(status_code=400, detail="Date range cannot exceed 365 days")
 
-        # Get historical prices from Yahoo Finance (USD)
-        price_fetcher = PriceFetcher()
-        yahoo_symbol = f"{symbol}-USD"
-        historical_prices = await price_fetcher.fetch_historical_prices(
-            yahoo_symbol, start_date=start_date, end_date=end_date
-        )
+        # Get historical USD prices (local first, missing days from Yahoo Finance)
+        resolver = CryptoPriceResolver(db)
+        history = await resolver.get_history([symbol.upper()], start_date, end_date, "USD")
+        historical_prices = history.get(symbol.upper(), [])
 
         conversion_rate = None
         if currency.upper() != "USD":
@@ -7,7 +7,7 @@ from datetime import date, timedelta
 from typing import List, Optional
 import logging
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.models import Position, PortfolioSnapshot, PriceHistory, CachedMetrics, Benchmark, StockSplit
 from app.schemas.portfolio import PortfolioOverview, PortfolioPerformance, PerformanceDataPoint
 from app.schemas.position import PositionResponse
@@ -15,15 +15,41 @@ from app.schemas.unified import (
     UnifiedHolding, UnifiedOverview, UnifiedMovers,
     UnifiedSummary, UnifiedPerformanceDataPoint, PaginatedUnifiedHolding
 )
+from app.services.asof_prices import PricePoint
+from app.services.cache import cache
+from app.services.cache_generations import (
+    CacheGenerations, BENCHMARK, CRYPTO, FX, METRICS, PRICES, SNAPSHOTS, TRANSACTIONS
+)
+from app.services.downsampling import MAX_POINTS, MIN_POINTS, RESOLUTION_PATTERN, downsample_indices, take
+from app.services.holdings_loader import HoldingsLoader
+from app.services.latest_prices import LatestPriceService
 from app.services.portfolio_aggregator import PortfolioAggregator
+from app.services.price_matrix import PriceMatrix, price_matrix
+from app.services.tiered_cache import tiered_cache
+from app.services.unified_performance import UnifiedPerformanceService
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
 
+# Rendered /holdings responses, keyed by cache generations
+HOLDINGS_CACHE_PREFIX = "portfolio:holdings"
+HOLDINGS_CACHE_TTL_SECONDS = 3600
+
+# Rendered unified responses, served through the tiered (L1/L2) cache
+UNIFIED_OVERVIEW_CACHE_PREFIX = "api:unified:overview"
+UNIFIED_SUMMARY_CACHE_PREFIX = "api:unified:summary"
+UNIFIED_CACHE_DOMAINS = (TRANSACTIONS, PRICES, FX, CRYPTO)
+
+# Rendered performance series (snapshots + the active benchmark's closes), per range and resolution
+PERFORMANCE_CACHE_PREFIX = "api:portfolio:performance"
+UNIFIED_PERFORMANCE_CACHE_PREFIX = "api:unified:performance"
+PERFORMANCE_CACHE_DOMAINS = (SNAPSHOTS, PRICES, BENCHMARK)
+
 
 def calculate_today_change(
     position_quantity: Decimal,
-    price_history: list[PriceHistory]
+    price_history: list[PriceHistory | PricePoint]
 ) -> tuple[Optional[Decimal], Optional[float]]:
     """
     Calculate today's change and percentage change for a position.
@@ -57,6 +83,26 @@ def calculate_today_change(
     return today_change, today_change_percent
 
 
+async def _benchmark_closes(
+    db: AsyncSession,
+    ticker: str,
+    dates: list[date]
+) -> list[tuple[date, Decimal]]:
+    """
+    Return the benchmark close stored on each of the given dates.
+
+    Dates without a stored close are omitted, so the result stays aligned 1:1
+    with the portfolio dates that do have a benchmark price.
+    """
+    series = (await price_matrix.get_many_async(db, [ticker]))[ticker]
+    dates = sorted(dates)
+    return [
+        (d, Decimal(str(close)))
+        for d, close in zip(dates, PriceMatrix.closes_on(series, dates))
+        if close is not None
+    ]
+
+
 def parse_time_range(range_str: str) -> tuple[Optional[date], Optional[date]]:
     """
     Convert time range string to start_date and end_date.
@@ -113,6 +159,10 @@ async def get_portfolio_overview(db: AsyncSession = Depends(get_db)):
             today_gain_loss_pct=None
         )
 
+    # Latest and previous close for every position in one query (use current_ticker)
+    today = date.today()
+    prices = await LatestPriceService.load_async(db, [position.current_ticker for position in positions])
+
     # Calculate total cost basis and current value
     total_cost_basis = Decimal("0")
     current_value = Decimal("0")
@@ -120,14 +170,7 @@ async def get_portfolio_overview(db: AsyncSession = Depends(get_db)):
     for position in positions:
         total_cost_basis += position.cost_basis
 
-        # Get latest price (use current_ticker)
-        price_result = await db.execute(
-            select(PriceHistory)
-            .where(PriceHistory.ticker == position.current_ticker)
-            .order_by(PriceHistory.date.desc())
-            .limit(1)
-        )
-        latest_price = price_result.scalar_one_or_none()
+        latest_price = prices.lookup(position.current_ticker, today)
 
         if latest_price:
             current_value += position.quantity * latest_price.close
@@ -149,14 +192,8 @@ async def get_portfolio_overview(db: AsyncSession = Depends(get_db)):
     total_previous_value = Decimal("0")
 
     for position in positions:
-        # Get latest and previous prices for each position
-        price_result = await db.execute(
-            select(PriceHistory)
-            .where(PriceHistory.ticker == position.current_ticker)
-            .order_by(PriceHistory.date.desc())
-            .limit(2)
-        )
-        price_history = price_result.scalars().all()
+        # Latest and previous prices for each position
+        price_history = prices.history(position.current_ticker, today, 2)
 
         if price_history and len(price_history) >= 2:
             latest_price = price_history[0]
@@ -191,76 +228,84 @@ async def get_portfolio_overview(db: AsyncSession = Depends(get_db)):
 
 @router.get("/holdings", response_model=List[PositionResponse])
 async def get_holdings(db: AsyncSession = Depends(get_db)):
-    """Get all current holdings/positions with calculated metrics."""
-    result = await db.execute(select(Position))
-    positions = result.scalars().all()
+    """
+    Get all current holdings/positions with calculated metrics.
 
-    response = []
+    Positions, prices and cached IRRs come from one query. The rendered response
+    is cached under the current transaction/price/metric generations, so repeated
+    dashboard refreshes are served from Redis until one of them changes.
+    """
+    cache_key = await CacheGenerations.key_async(HOLDINGS_CACHE_PREFIX, TRANSACTIONS, PRICES, METRICS)
+    if cache_key:
+        cached = await cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+
+    response = [
+        build_position_response(row.position, row.price_history, row.irr)
+        for row in await HoldingsLoader.load(db)
+    ]
 
-    for position in positions:
-        # Get latest and previous prices (use current_ticker)
-        price_result = await db.execute(
-            select(PriceHistory)
-            .where(PriceHistory.ticker == position.current_ticker)
-            .order_by(PriceHistory.date.desc())
-            .limit(2)  # Get latest and previous day's price
-        )
-        price_history = price_result.scalars().all()
-
-        # Get cached metrics (IRR, etc.) - use current_ticker for backwards compatibility
-        metrics_result = await db.execute(
-            select(CachedMetrics)
-            .where(
-                CachedMetrics.metric_type == "position_metrics",
-                CachedMetrics.metric_key == position.current_ticker
-            )
-        )
-        cached_metrics = metrics_result.scalar_one_or_none()
-
-        # Calculate current values
-        latest_price = price_history[0] if price_history else None
-        current_price = latest_price.close if latest_price else None
-        current_value = position.quantity * current_price if current_price else None
-        unrealized_gain = current_value - position.cost_basis if current_value else None
-        return_percentage = (
-            float((current_value - position.cost_basis) / position.cost_basis)
-            if current_value and position.cost_basis > 0
-            else None
+    if cache_key:
+        await cache.set_async(
+            cache_key,
+            [position.model_dump(mode="json") for position in response],
+            ttl_seconds=HOLDINGS_CACHE_TTL_SECONDS
         )
+    return response
 
-        # Calculate today's change using helper function
-        today_change, today_change_percent = calculate_today_change(
-            position.quantity,
-            price_history
-        )
 
-        # Get IRR from cached metrics
-        irr = None
-        if cached_metrics and cached_metrics.metric_value:
-            irr = cached_metrics.metric_value.get("irr")
-
-        response.append(
-            PositionResponse(
-                id=position.id,
-                ticker=position.current_ticker,  # Return current_ticker as 'ticker'
-                isin=position.isin,
-                description=position.description,
-                asset_type=position.asset_type.value,
-                quantity=position.quantity,
-                average_cost=position.average_cost,
-                cost_basis=position.cost_basis,
-                current_price=current_price,
-                current_value=current_value,
-                unrealized_gain=unrealized_gain,
-                return_percentage=return_percentage,
-                irr=irr,
-                today_change=today_change,
-                today_change_percent=today_change_percent,
-                last_calculated_at=position.last_calculated_at
-            )
-        )
+def build_position_response(
+    position: Position,
+    price_history: list[PriceHistory | PricePoint],
+    irr: Optional[float]
+) -> PositionResponse:
+    """
+    Build the holdings entry of a position.
 
-    return response
+    Args:
+        position: The position
+        price_history: Latest and previous close, latest first
+        irr: Cached IRR of the position, if any
+
+    Returns:
+        PositionResponse with current value, gains and today's change
+    """
+    # Calculate current values
+    latest_price = price_history[0] if price_history else None
+    current_price = latest_price.close if latest_price else None
+    current_value = position.quantity * current_price if current_price else None
+    unrealized_gain = current_value - position.cost_basis if current_value else None
+    return_percentage = (
+        float((current_value - position.cost_basis) / position.cost_basis)
+        if current_value and position.cost_basis > 0
+        else None
+    )
+
+    # Calculate today's change using helper function
+    today_change, today_change_percent = calculate_today_change(
+        position.quantity,
+        price_history
+    )
+
+    return PositionResponse(
+        id=position.id,
+        ticker=position.current_ticker,  # Return current_ticker as 'ticker'
+        isin=position.isin,
+        description=position.description,
+        asset_type=position.asset_type.value,
+        quantity=position.quantity,
+        average_cost=position.average_cost,
+        cost_basis=position.cost_basis,
+        current_price=current_price,
+        current_value=current_value,
+        unrealized_gain=unrealized_gain,
+        return_percentage=return_percentage,
+        irr=irr,
+        today_change=today_change,
+        today_change_percent=today_change_percent,
+        last_calculated_at=position.last_calculated_at
+    )
 
 
 @router.get("/performance", response_model=PortfolioPerformance)
@@ -268,16 +313,22 @@ async def get_performance(
     range: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: AsyncSession = Depends(get_db)
+    resolution: Optional[str] = Query(None, pattern=RESOLUTION_PATTERN, description="Calendar bucketing (daily, weekly, monthly)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS, description="Downsample to at most this many points (LTTB)")
 ):
     """
     Get portfolio performance data for charts.
 
+    Start/end values and changes always cover the full daily series; resolution
+    and max_points only thin out the returned points. Rendered responses are
+    cached per range, resolution and snapshot/price/benchmark generation.
+
     Args:
         range: Time range string (1D, 1W, 1M, 3M, 6M, 1Y, YTD, ALL). Takes precedence over start_date/end_date.
         start_date: Start date for custom range (used if range is not provided)
         end_date: End date for custom range (used if range is not provided)
-        db: Database session
+        resolution: Keep the last point of each week/month (see app.services.downsampling)
+        max_points: Maximum number of points per series
 
     Returns:
         PortfolioPerformance with portfolio_data and benchmark_data
@@ -286,6 +337,26 @@ async def get_performance(
     if range:
         start_date, end_date = parse_time_range(range)
 
+    cache_key = await CacheGenerations.key_async(
+        PERFORMANCE_CACHE_PREFIX, *PERFORMANCE_CACHE_DOMAINS,
+        parts=(start_date, end_date, resolution, max_points)
+    )
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return await _load_performance(db, start_date, end_date, resolution, max_points)
+
+    return await tiered_cache.get_or_load(cache_key, load, ttl_seconds=settings.performance_cache_ttl)
+
+
+async def _load_performance(
+    db: AsyncSession,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    resolution: Optional[str],
+    max_points: Optional[int]
+) -> dict:
+    """Compute the rendered /performance response."""
     # Build query for portfolio snapshots
     query = select(PortfolioSnapshot).order_by(PortfolioSnapshot.snapshot_date)
 
@@ -342,18 +413,10 @@ async def get_performance(
         snapshot_dates = [s.snapshot_date for s in snapshots]
 
         if snapshot_dates:
-            benchmark_query = select(PriceHistory).where(
-                PriceHistory.ticker == benchmark.ticker,
-                PriceHistory.date.in_(snapshot_dates)  # Only dates that have portfolio snapshots
-            ).order_by(PriceHistory.date)
-
-            benchmark_prices_result = await db.execute(benchmark_query)
-            benchmark_prices = benchmark_prices_result.scalars().all()
-
-            # Transform to performance data points
+            # Only dates that have portfolio snapshots
             benchmark_data = [
-                PerformanceDataPoint(date=p.date, value=p.close)
-                for p in benchmark_prices
+                PerformanceDataPoint(date=d, value=close)
+                for d, close in await _benchmark_closes(db, benchmark.ticker, snapshot_dates)
             ]
 
     # Calculate benchmark metrics
@@ -380,6 +443,15 @@ async def get_performance(
             else:
                 benchmark_change_pct = None
 
+    if resolution or max_points:
+        # Thin both series to the same dates, chosen on the portfolio values
+        indices = downsample_indices(
+            [p.date for p in portfolio_data], [p.value for p in portfolio_data], max_points, resolution
+        )
+        portfolio_data = take(portfolio_data, indices)
+        kept_dates = {p.date for p in portfolio_data}
+        benchmark_data = [p for p in benchmark_data if p.date in kept_dates]
+
     return PortfolioPerformance(
         portfolio_data=portfolio_data,
         benchmark_data=benchmark_data,
@@ -391,7 +463,7 @@ async def get_performance(
         benchmark_end_price=benchmark_end_price,
         benchmark_change_amount=benchmark_change_amount,
         benchmark_change_pct=benchmark_change_pct
-    )
+    ).model_dump(mode="json")
 
 
 @router.get("/positions/{identifier}")
@@ -425,13 +497,8 @@ async def get_position(
         raise HTTPException(status_code=404, detail="Position not found")
 
     # Get latest price and previous day's price
-    price_result = await db.execute(
-        select(PriceHistory)
-        .where(PriceHistory.ticker == position.current_ticker)
-        .order_by(PriceHistory.date.desc())
-        .limit(2)  # Get latest and previous day's price
-    )
-    price_history = price_result.scalars().all()
+    prices = await LatestPriceService.load_async(db, [position.current_ticker])
+    price_history = prices.history(position.current_ticker, date.today(), 2)
 
     # Get cached metrics
     metrics_result = await db.execute(
@@ -539,7 +606,7 @@ async def get_unified_holdings(
 
 
 @router.get("/unified-overview", response_model=UnifiedOverview)
-async def get_unified_overview(db: AsyncSession = Depends(get_db)):
+async def get_unified_overview():
     """
     Get aggregated portfolio overview combining traditional and crypto.
 
@@ -550,13 +617,17 @@ async def get_unified_overview(db: AsyncSession = Depends(get_db)):
     - traditional_profit, crypto_profit: breakdown by portfolio type
     - today_change, today_change_pct
 
+    Served from the tiered cache; a stale overview is returned while one
+    worker recomputes it.
+
     Returns:
         Unified overview metrics
     """
     try:
-        aggregator = PortfolioAggregator(db)
-        overview = await aggregator.get_unified_overview()
-        return overview
+        cache_key = await CacheGenerations.key_async(UNIFIED_OVERVIEW_CACHE_PREFIX, *UNIFIED_CACHE_DOMAINS)
+        return await tiered_cache.get_or_load(
+            cache_key, _load_unified_overview, ttl_seconds=settings.portfolio_aggregator_cache_ttl
+        )
     except Exception as e:
         logger.error(f"Error getting unified overview: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve unified overview")
@@ -566,17 +637,24 @@ async def get_unified_overview(db: AsyncSession = Depends(get_db)):
 async def get_unified_performance(
     range: Optional[str] = Query(None, description="Time range (1D, 1W, 1M, 3M, 6M, 1Y, YTD, ALL)"),
     days: Optional[int] = Query(None, ge=1, le=3650, description="Number of days of history (alternative to range)"),
-    db: AsyncSession = Depends(get_db)
+    resolution: Optional[str] = Query(None, pattern=RESOLUTION_PATTERN, description="Calendar bucketing (daily, weekly, monthly)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS, description="Downsample to at most this many points (LTTB)")
 ):
     """
     Get unified performance data combining traditional and crypto portfolios.
 
-    Merges daily snapshots from both portfolio systems into a single time-series.
+    Merges daily snapshots from both portfolio systems into a single time-series
+    with one point per day, carrying each side's last snapshot (and the last
+    benchmark close) forward across days without one. Built by a single query.
     Returns data matching frontend expectations with portfolio_data and benchmark_data.
 
+    Rendered responses are cached per range, resolution and snapshot/price/benchmark generation.
+
     Args:
         range: Time range string (1D, 1W, 1M, 3M, 6M, 1Y, YTD, ALL). Takes precedence over days.
         days: Number of days of history (1-3650, default 365) - used if range not provided
+        resolution: Keep the last point of each week/month (see app.services.downsampling)
+        max_points: Maximum number of points, selected on the combined total
 
     Returns:
         JSON object with portfolio_data and benchmark_data arrays
@@ -591,110 +669,69 @@ async def get_unified_performance(
             end_date = date.today()
             start_date = end_date - timedelta(days=days_to_fetch)
 
-        # Get traditional portfolio snapshots
-        query = select(PortfolioSnapshot).order_by(PortfolioSnapshot.snapshot_date)
-        if start_date:
-            query = query.where(PortfolioSnapshot.snapshot_date >= start_date)
-        if end_date:
-            query = query.where(PortfolioSnapshot.snapshot_date <= end_date)
-
-        result = await db.execute(query)
-        traditional_snapshots = result.scalars().all()
-
-        # Get crypto snapshots
-        from app.models import CryptoPortfolioSnapshot
-        crypto_query = select(CryptoPortfolioSnapshot).order_by(CryptoPortfolioSnapshot.snapshot_date)
-        if start_date:
-            crypto_query = crypto_query.where(CryptoPortfolioSnapshot.snapshot_date >= start_date)
-        if end_date:
-            crypto_query = crypto_query.where(CryptoPortfolioSnapshot.snapshot_date <= end_date)
-
-        crypto_result = await db.execute(crypto_query)
-        crypto_snapshots = crypto_result.scalars().all()
-
-        # Merge snapshots by date
-        snapshot_map: dict[date, dict] = {}
-
-        for snapshot in traditional_snapshots:
-            if snapshot.snapshot_date not in snapshot_map:
-                snapshot_map[snapshot.snapshot_date] = {
-                    "date": str(snapshot.snapshot_date),
-                    "total": Decimal("0"),
-                    "traditional": Decimal("0"),
-                    "crypto": Decimal("0")
-                }
-            snapshot_map[snapshot.snapshot_date]["traditional"] = snapshot.total_value or Decimal("0")
-            # Add to total
-            snapshot_map[snapshot.snapshot_date]["total"] = (
-                snapshot_map[snapshot.snapshot_date]["total"] +
-                (snapshot.total_value or Decimal("0"))
-            )
-
-        for snapshot in crypto_snapshots:
-            if snapshot.snapshot_date not in snapshot_map:
-                snapshot_map[snapshot.snapshot_date] = {
-                    "date": str(snapshot.snapshot_date),
-                    "total": Decimal("0"),
-                    "traditional": Decimal("0"),
-                    "crypto": Decimal("0")
-                }
-            # Use the correct value field based on portfolio base_currency
-            # If base_currency is EUR, use total_value_eur; if USD, use total_value_usd
-            crypto_val = (
-                snapshot.total_value_eur
-                if snapshot.base_currency == "EUR"
-                else snapshot.total_value_usd
-            ) or Decimal("0")
-            snapshot_map[snapshot.snapshot_date]["crypto"] += crypto_val
-            # Add to total
-            snapshot_map[snapshot.snapshot_date]["total"] = (
-                snapshot_map[snapshot.snapshot_date]["total"] + crypto_val
-            )
-
-        # Convert to sorted list
-        portfolio_data = [
-            {
-                "date": p["date"],
-                "total": str(p["total"]),
-                "traditional": str(p["traditional"]),
-                "crypto": str(p["crypto"])
-            }
-            for p in sorted(snapshot_map.values(), key=lambda x: x["date"])
-        ]
-
-        # Get benchmark data if configured (aligned with merged snapshot dates)
-        benchmark_data = []
-        benchmark_result = await db.execute(select(Benchmark).limit(1))
-        benchmark = benchmark_result.scalar_one_or_none()
-
-        if benchmark:
-            snapshot_dates = [date.fromisoformat(p["date"]) for p in portfolio_data]
-            if snapshot_dates:
-                benchmark_query = select(PriceHistory).where(
-                    PriceHistory.ticker == benchmark.ticker,
-                    PriceHistory.date.in_(snapshot_dates)
-                ).order_by(PriceHistory.date)
-
-                benchmark_prices_result = await db.execute(benchmark_query)
-                benchmark_prices = benchmark_prices_result.scalars().all()
-
-                benchmark_data = [
-                    {
-                        "date": str(p.date),
-                        "value": str(p.close)
-                    }
-                    for p in benchmark_prices
-                ]
-
-        return {
-            "portfolio_data": portfolio_data,
-            "benchmark_data": benchmark_data
-        }
+        cache_key = await CacheGenerations.key_async(
+            UNIFIED_PERFORMANCE_CACHE_PREFIX, *PERFORMANCE_CACHE_DOMAINS,
+            parts=(start_date, end_date, resolution, max_points)
+        )
+
+        async def load():
+            async with AsyncSessionLocal() as db:
+                return await _load_unified_performance(db, start_date, end_date, resolution, max_points)
+
+        return await tiered_cache.get_or_load(cache_key, load, ttl_seconds=settings.performance_cache_ttl)
     except Exception as e:
         logger.error(f"Error getting unified performance: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve unified performance")
 
 
+async def _load_unified_performance(
+    db: AsyncSession,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    resolution: Optional[str],
+    max_points: Optional[int]
+) -> dict:
+    """Compute the rendered /unified-performance response."""
+    benchmark_result = await db.execute(select(Benchmark).limit(1))
+    benchmark = benchmark_result.scalar_one_or_none()
+
+    # Merged, gap-filled and benchmark-aligned in one query (columnar)
+    series = await UnifiedPerformanceService.load_async(
+        db, start_date, end_date, benchmark.ticker if benchmark else None
+    )
+
+    columns = (series.dates, series.total, series.traditional, series.crypto, series.benchmark)
+    if resolution or max_points:
+        indices = downsample_indices(series.dates, series.total, max_points, resolution)
+        columns = tuple(take(column, indices) for column in columns)
+    dates, totals, traditional_values, crypto_values, benchmark_closes = columns
+
+    portfolio_data = [
+        {
+            "date": str(d),
+            "total": str(total),
+            "traditional": str(traditional),
+            "crypto": str(crypto)
+        }
+        for d, total, traditional, crypto in zip(dates, totals, traditional_values, crypto_values)
+    ]
+
+    # Days before the benchmark's first stored close have no benchmark point
+    benchmark_data = [
+        {
+            "date": str(d),
+            "value": str(close)
+        }
+        for d, close in zip(dates, benchmark_closes)
+        if close is not None
+    ]
+
+    return {
+        "portfolio_data": portfolio_data,
+        "benchmark_data": benchmark_data
+    }
+
+
 @router.get("/unified-movers", response_model=UnifiedMovers)
 async def get_unified_movers(
     top_n: int = Query(5, ge=1, le=50, description="Number of top gainers/losers"),
@@ -724,14 +761,14 @@ async def get_unified_movers(
 @router.get("/unified-summary", response_model=UnifiedSummary)
 async def get_unified_summary(
     holdings_limit: int = Query(20, ge=1, le=100, description="Max holdings to return"),
-    performance_days: int = Query(365, ge=1, le=3650, description="Days of performance history"),
-    db: AsyncSession = Depends(get_db)
+    performance_days: int = Query(365, ge=1, le=3650, description="Days of performance history")
 ):
     """
     Get complete unified summary combining all aggregated data.
 
     This is a convenience endpoint that returns overview, holdings (paginated),
     movers, and performance data in a single response to reduce API round trips.
+    Served from the tiered cache like /unified-overview.
 
     Args:
         holdings_limit: Maximum number of holdings to return (1-100, default 20)
@@ -741,40 +778,62 @@ async def get_unified_summary(
         Complete unified portfolio summary
     """
     try:
-        aggregator = PortfolioAggregator(db)
-        summary = await aggregator.get_unified_summary(
-            holdings_limit=holdings_limit,
-            performance_days=performance_days
+        cache_key = await CacheGenerations.key_async(
+            UNIFIED_SUMMARY_CACHE_PREFIX, *UNIFIED_CACHE_DOMAINS,
+            parts=(holdings_limit, performance_days)
         )
 
-        # Transform performance data to proper schema
-        perf_data = [
-            UnifiedPerformanceDataPoint(
-                date=p["date"],
-                value=p["value"],
-                crypto_value=p["crypto_value"],
-                traditional_value=p["traditional_value"]
-            )
-            for p in summary["performance_summary"]["data"]
-        ]
-
-        return UnifiedSummary(
-            overview=summary["overview"],
-            holdings=PaginatedUnifiedHolding(
-                items=summary["holdings"],
-                total=summary["holdings_total"],
-                skip=0,
-                limit=holdings_limit,
-                has_more=len(summary["holdings"]) < summary["holdings_total"]
-            ),
-            holdings_total=summary["holdings_total"],
-            movers=summary["movers"],
-            performance_summary={
-                "period_days": summary["performance_summary"]["period_days"],
-                "data_points": summary["performance_summary"]["data_points"],
-                "data": perf_data
-            }
+        async def load():
+            return await _load_unified_summary(holdings_limit, performance_days)
+
+        return await tiered_cache.get_or_load(
+            cache_key, load, ttl_seconds=settings.portfolio_aggregator_cache_ttl
         )
     except Exception as e:
         logger.error(f"Error getting unified summary: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve unified summary")
+
+
+async def _load_unified_overview() -> dict:
+    """Compute the rendered unified overview in its own session (it may outlive the request)."""
+    async with AsyncSessionLocal() as db:
+        overview = await PortfolioAggregator(db).get_unified_overview()
+    return UnifiedOverview(**overview).model_dump(mode="json")
+
+
+async def _load_unified_summary(holdings_limit: int, performance_days: int) -> dict:
+    """Compute the rendered unified summary in its own session (it may outlive the request)."""
+    async with AsyncSessionLocal() as db:
+        summary = await PortfolioAggregator(db).get_unified_summary(
+            holdings_limit=holdings_limit,
+            performance_days=performance_days
+        )
+
+    # Transform performance data to proper schema
+    perf_data = [
+        UnifiedPerformanceDataPoint(
+            date=p["date"],
+            value=p["value"],
+            crypto_value=p["crypto_value"],
+            traditional_value=p["traditional_value"]
+        )
+        for p in summary["performance_summary"]["data"]
+    ]
+
+    return UnifiedSummary(
+        overview=summary["overview"],
+        holdings=PaginatedUnifiedHolding(
+            items=summary["holdings"],
+            total=summary["holdings_total"],
+            skip=0,
+            limit=holdings_limit,
+            has_more=len(summary["holdings"]) < summary["holdings_total"]
+        ),
+        holdings_total=summary["holdings_total"],
+        movers=summary["movers"],
+        performance_summary={
+            "period_days": summary["performance_summary"]["period_days"],
+            "data_points": summary["performance_summary"]["data_points"],
+            "data": perf_data
+        }
+    ).model_dump(mode="json")
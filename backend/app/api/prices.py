@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, date, timedelta
 from typing import Optional
+import asyncio
 import logging
 
 from app.database import get_db
@@ -11,13 +12,15 @@ from app.models.position import Position
 from app.schemas.price import RealtimePriceResponse, RealtimePricesResponse
 from app.services.price_fetcher import PriceFetcher
 from app.services.price_history_manager import price_history_manager
+from app.services.provider_limiter import provider_limiters
+from app.services.quote_cache import quote_cache
 from app.services.system_state_manager import SystemStateManager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/prices", tags=["prices"])
 
-# Create a singleton instance of PriceFetcher to maintain cache across requests
+# Realtime quotes are cached in the shared quote cache, not on the fetcher
 _price_fetcher = PriceFetcher()
 
 
@@ -140,6 +143,50 @@ async def get_last_update(db: AsyncSession = Depends(get_db)):
         )
 
 
+@router.get("/quote-cache/stats")
+async def get_quote_cache_stats():
+    """
+    Get realtime quote cache counters.
+
+    Returns:
+        dict with keys:
+            - process: hits, misses, coalesced and provider_calls of this worker
+            - shared: the same counters summed over all processes (None without Redis)
+    """
+    try:
+        return await asyncio.to_thread(quote_cache.stats)
+    except Exception as e:
+        logger.error(f"Error retrieving quote cache stats: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve quote cache stats: {str(e)}"
+        )
+
+
+@router.get("/rate-limits/stats")
+async def get_rate_limit_stats():
+    """
+    Get outbound rate limiter counters per market-data provider.
+
+    Returns:
+        dict mapping each provider (e.g. "yahoo") to:
+            - process: acquired, waited, throttled, wait_seconds, max_wait_seconds
+              and current rate of this worker
+            - shared: acquired, waited, throttled, wait_seconds and current rate
+              over all processes (None without Redis)
+    """
+    try:
+        return await asyncio.to_thread(
+            lambda: {name: limiter.stats() for name, limiter in provider_limiters.items()}
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving rate limiter stats: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve rate limiter stats: {str(e)}"
+        )
+
+
 @router.get("/realtime", response_model=RealtimePricesResponse)
 async def get_realtime_prices(db: AsyncSession = Depends(get_db)):
     """
@@ -148,7 +195,7 @@ async def get_realtime_prices(db: AsyncSession = Depends(get_db)):
     This endpoint:
     - Queries all positions with non-zero quantity from the database
     - Fetches current prices in parallel using yfinance
-    - Uses 30-second caching to reduce API load
+    - Serves quotes from the quote cache shared by all workers (30 seconds by default)
     - Does NOT persist prices to the database (daily snapshots remain separate)
 
     Returns:
@@ -180,8 +227,8 @@ async def get_realtime_prices(db: AsyncSession = Depends(get_db)):
         # Prepare list of (ticker, isin) tuples
         tickers = [(pos.current_ticker, pos.isin) for pos in positions]
 
-        # Fetch prices in parallel (this runs synchronously but uses ThreadPoolExecutor internally)
-        price_results = _price_fetcher.fetch_realtime_prices_batch(tickers)
+        # Fetch prices in parallel (ThreadPoolExecutor internally), off the event loop
+        price_results = await asyncio.to_thread(_price_fetcher.fetch_realtime_prices_batch, tickers)
 
         # Convert to response models
         price_responses = [
@@ -12,7 +12,6 @@ from datetime import datetime
 import logging
 import asyncio
 import requests.exceptions
-import yfinance as yf
 
 from app.database import get_db
 from app.models import Transaction, TransactionType
@@ -23,9 +22,14 @@ from app.schemas.transaction import (
     TransactionImportSummary
 )
 from app.services.csv_parser import DirectaCSVParser
+from app.services.cache_generations import CacheGenerations, TRANSACTIONS
 from app.services.deduplication import DeduplicationService
 from app.services.position_manager import PositionManager
-from app.services.currency_converter import get_exchange_rate
+from app.services.holdings_ledger import HoldingsLedger
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_POSITION
+from app.services.currency_converter import get_exchange_rate_async
+from app.services.market_data import MarketDataError, get_market_data_provider
+from app.services.provider_executor import provider_executor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
@@ -42,21 +46,15 @@ async def fetch_ticker_metadata(ticker: str) -> Tuple[Optional[str], str]:
         Tuple of (isin, description). ISIN may be None if not found.
     """
     try:
-        # Run blocking yfinance call in executor with timeout
-        loop = asyncio.get_event_loop()
-
-        def get_info():
-            stock = yf.Ticker(ticker)
-            return stock.info
-
-        # Add timeout to prevent hanging
-        info = await asyncio.wait_for(loop.run_in_executor(None, get_info), timeout=5.0)
-
-        # Get ISIN from Yahoo Finance info
-        isin = info.get('isin')
+        # Run the blocking provider call on the provider executor with timeout
+        info = await asyncio.wait_for(
+            provider_executor.run(get_market_data_provider().search, ticker),
+            timeout=5.0
+        )
 
-        # Get description (prefer longName, fallback to shortName, then ticker)
-        description = info.get('longName') or info.get('shortName') or ticker
+        # Get ISIN and description (the provider prefers the long name), if found
+        isin = info.get('isin') if info else None
+        description = info['name'] if info else ticker
 
         logger.info(f"Fetched metadata for {ticker}: ISIN={isin}, Description={description}")
         return isin, description
@@ -67,6 +65,9 @@ async def fetch_ticker_metadata(ticker: str) -> Tuple[Optional[str], str]:
     except requests.exceptions.RequestException as e:
         logger.warning(f"Network error fetching metadata for {ticker}: {str(e)}. Using ticker as description.")
         return None, ticker
+    except MarketDataError as e:
+        logger.warning(f"No metadata for {ticker}: {str(e)}. Using ticker as description.")
+        return None, ticker
 
 
 @router.post("/import", response_model=TransactionImportSummary)
@@ -134,6 +135,16 @@ async def import_transactions(
                 affected_isins.add(txn_data["isin"])
                 imported_count += 1
 
+            # Holdings from the earliest imported date onward must be rebuilt
+            await db.run_sync(
+                HoldingsLedger.invalidate_from,
+                min(txn_data["operation_date"] for txn_data in new_transactions)
+            )
+            await db.run_sync(
+                MetricsDirtyTracker.mark,
+                SCOPE_POSITION,
+                [txn_data.get("isin") or txn_data["ticker"] for txn_data in new_transactions]
+            )
             await db.commit()
         except IntegrityError as e:
             await db.rollback()
@@ -162,6 +173,7 @@ async def import_transactions(
 
         # Detect and record any new splits
         await PositionManager.detect_and_record_splits(db)
+        await CacheGenerations.bump_async(TRANSACTIONS)
 
         # Trigger automatic backfill for historical data
         if imported_count > 0:
@@ -222,7 +234,7 @@ async def create_transaction(
         else:
             # For non-EUR currencies, fetch FX rate and convert
             try:
-                fx_rate = get_exchange_rate(transaction_data.currency, "EUR")
+                fx_rate = await get_exchange_rate_async(transaction_data.currency, "EUR")
                 if fx_rate is None:
                     raise HTTPException(
                         status_code=400,
@@ -292,6 +304,8 @@ async def create_transaction(
         )
 
         db.add(transaction)
+        await db.run_sync(HoldingsLedger.invalidate_from, transaction.operation_date)
+        await db.run_sync(MetricsDirtyTracker.mark, SCOPE_POSITION, [transaction.isin or transaction.ticker])
         await db.commit()
         await db.refresh(transaction)
 
@@ -305,6 +319,7 @@ async def create_transaction(
 
         # 12. Detect and record any new splits
         await PositionManager.detect_and_record_splits(db)
+        await CacheGenerations.bump_async(TRANSACTIONS)
 
         # 13. Trigger automatic backfill for historical data
         from app.tasks.auto_backfill import trigger_automatic_backfill
@@ -439,8 +454,10 @@ async def update_transaction(
     if not updates:
         return transaction
 
-    # Store original ISIN before applying updates for position recalculation
+    # Store original ISIN and date before applying updates for position recalculation
     original_isin = transaction.isin
+    original_ticker = transaction.ticker
+    original_operation_date = transaction.operation_date
 
     # Apply updates to the transaction object
     for field, value in updates.items():
@@ -458,7 +475,7 @@ async def update_transaction(
         else:
             # For non-EUR currencies, fetch FX rate and convert
             try:
-                fx_rate = get_exchange_rate(transaction.currency, "EUR")
+                fx_rate = await get_exchange_rate_async(transaction.currency, "EUR")
                 if fx_rate is None:
                     raise HTTPException(
                         status_code=400,
@@ -506,6 +523,17 @@ async def update_transaction(
     # Update timestamp
     transaction.updated_at = datetime.utcnow()
 
+    # Holdings change from whichever of the old and new dates comes first
+    await db.run_sync(
+        HoldingsLedger.invalidate_from,
+        min(original_operation_date, transaction.operation_date)
+    )
+    await db.run_sync(
+        MetricsDirtyTracker.mark,
+        SCOPE_POSITION,
+        [original_isin or original_ticker, transaction.isin or transaction.ticker]
+    )
+
     # Save changes
     await db.commit()
     await db.refresh(transaction)
@@ -527,6 +555,7 @@ async def update_transaction(
 
     # Detect and record any new splits
     await PositionManager.detect_and_record_splits(db)
+    await CacheGenerations.bump_async(TRANSACTIONS)
 
     # Trigger background tasks for historical data updates
     from app.tasks.auto_backfill import trigger_automatic_backfill
@@ -553,9 +582,12 @@ async def delete_transaction(
     isin = transaction.isin
     ticker = transaction.ticker
     await db.delete(transaction)
+    await db.run_sync(HoldingsLedger.invalidate_from, transaction.operation_date)
+    await db.run_sync(MetricsDirtyTracker.mark, SCOPE_POSITION, [isin or ticker])
     await db.commit()
 
     # Recalculate position
     await PositionManager.recalculate_position(db, isin=isin, ticker=ticker)
+    await CacheGenerations.bump_async(TRANSACTIONS)
 
     return {"message": "Transaction deleted successfully"}
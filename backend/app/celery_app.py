@@ -11,7 +11,10 @@ Scheduled tasks:
 """
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from app.config import settings
+from app.services.provider_executor import provider_executor
+from app.services.redis_pools import redis_pools
 
 # Create Celery instance
 celery_app = Celery(
@@ -114,5 +117,18 @@ celery_app.conf.update(
     },
 )
 
+
+@worker_process_shutdown.connect
+def close_redis_pools(**kwargs):
+    """Disconnect the shared Redis pools when a worker process exits."""
+    redis_pools.close()
+
+
+@worker_process_shutdown.connect
+def shutdown_provider_executor(**kwargs):
+    """Stop the provider thread pool when a worker process exits."""
+    provider_executor.shutdown()
+
+
 if __name__ == "__main__":
     celery_app.start()
@@ -3,7 +3,7 @@ Application configuration from environment variables.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, PositiveInt, PositiveFloat, NonNegativeInt, HttpUrl
-from typing import List
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -72,20 +72,15 @@ class Settings(BaseSettings):
         env="BLOCKCHAIN_MAX_PAGES_PER_SYNC",
         description="Maximum number of pages to fetch per sync (prevents infinite loops)"
     )
-    blockchain_delay_between_pages_seconds: PositiveInt = Field(
-        2,
-        env="BLOCKCHAIN_DELAY_BETWEEN_PAGES_SECONDS",
-        description="Delay between API requests when paginating (seconds)"
-    )
     blockchain_sync_days_back: PositiveInt = Field(
         7,
         env="BLOCKCHAIN_SYNC_DAYS_BACK",
         description="Number of days back to fetch transactions"
     )
     blockchain_rate_limit_requests_per_second: PositiveFloat = Field(
-        1.0,
+        0.1,
         env="BLOCKCHAIN_RATE_LIMIT_REQUESTS_PER_SECOND",
-        description="Rate limit for blockchain API requests per second"
+        description="Rate limit for blockchain API requests per second, shared by all processes"
     )
     blockchain_request_timeout_seconds: PositiveInt = Field(
         30,
@@ -154,6 +149,124 @@ class Settings(BaseSettings):
         description="Number of top gainers and losers to return"
     )
 
+    # Performance chart series (see app.services.downsampling)
+    performance_cache_ttl: PositiveInt = Field(
+        3600,
+        env="PERFORMANCE_CACHE_TTL",
+        description="Cache TTL for rendered performance series; data changes invalidate them earlier (seconds)"
+    )
+
+    # In-process close arrays (see app.services.price_matrix)
+    price_matrix_max_bytes: PositiveInt = Field(
+        64 * 1024 * 1024,
+        env="PRICE_MATRIX_MAX_BYTES",
+        description="Maximum size of the cached price series per worker (bytes)"
+    )
+
+    # Tiered (in-process + Redis) response cache settings
+    tiered_cache_l1_max_bytes: PositiveInt = Field(
+        32 * 1024 * 1024,
+        env="TIERED_CACHE_L1_MAX_BYTES",
+        description="Maximum serialized size of the in-process cache tier per worker (bytes)"
+    )
+    tiered_cache_stale_seconds: NonNegativeInt = Field(
+        300,
+        env="TIERED_CACHE_STALE_SECONDS",
+        description="How long an expired entry may still be served while it is refreshed (seconds)"
+    )
+    tiered_cache_lease_seconds: PositiveInt = Field(
+        30,
+        env="TIERED_CACHE_LEASE_SECONDS",
+        description="Lifetime of the cross-process lease held while recomputing an entry (seconds)"
+    )
+
+    # Outbound market-data rate limits shared by all processes (see app.services.provider_limiter)
+    yahoo_rate_limit_requests_per_second: PositiveFloat = Field(
+        5.0,
+        env="YAHOO_RATE_LIMIT_REQUESTS_PER_SECOND",
+        description="Maximum rate of Yahoo Finance requests per second"
+    )
+    yahoo_rate_limit_min_requests_per_second: PositiveFloat = Field(
+        0.5,
+        env="YAHOO_RATE_LIMIT_MIN_REQUESTS_PER_SECOND",
+        description="Lowest rate Yahoo Finance requests back off to after throttled responses"
+    )
+    yahoo_rate_limit_burst: PositiveInt = Field(
+        10,
+        env="YAHOO_RATE_LIMIT_BURST",
+        description="Yahoo Finance requests allowed back to back before the rate applies"
+    )
+
+    # Realtime quote cache shared by all processes (see app.services.quote_cache)
+    quote_cache_ttl_seconds: PositiveInt = Field(
+        30,
+        env="QUOTE_CACHE_TTL_SECONDS",
+        description="How long a realtime quote is served from the cache (seconds)"
+    )
+    quote_cache_lease_seconds: PositiveInt = Field(
+        10,
+        env="QUOTE_CACHE_LEASE_SECONDS",
+        description="Lifetime of the cross-process lease held while fetching a quote (seconds)"
+    )
+
+    # Shared Redis connection pools (see app.services.redis_pools)
+    redis_max_connections: PositiveInt = Field(
+        50,
+        env="REDIS_MAX_CONNECTIONS",
+        description="Maximum connections per Redis pool (one pool per process and client flavour)"
+    )
+    redis_pool_timeout_seconds: PositiveInt = Field(
+        5,
+        env="REDIS_POOL_TIMEOUT_SECONDS",
+        description="How long to wait for a free pooled Redis connection before failing (seconds)"
+    )
+
+    # Shared thread pool for blocking market-data calls (see app.services.provider_executor)
+    provider_executor_max_workers: PositiveInt = Field(
+        8,
+        env="PROVIDER_EXECUTOR_MAX_WORKERS",
+        description="Threads per process running blocking market-data provider calls"
+    )
+    provider_max_concurrency: PositiveInt = Field(
+        8,
+        env="PROVIDER_MAX_CONCURRENCY",
+        description="Maximum in-flight provider calls per event loop"
+    )
+
+    # Market data source (see app.services.market_data)
+    market_data_provider: Literal["yahoo", "fixture", "record", "replay"] = Field(
+        "yahoo",
+        env="MARKET_DATA_PROVIDER",
+        description="Market data provider: yahoo, fixture (offline), record (Yahoo to a cassette) or replay"
+    )
+    market_data_fixture_dir: Optional[str] = Field(
+        None,
+        env="MARKET_DATA_FIXTURE_DIR",
+        description="Directory of {symbol}.csv / {symbol}.parquet price fixtures for the fixture provider"
+    )
+    market_data_seed: int = Field(
+        42,
+        env="MARKET_DATA_SEED",
+        description="Seed for prices generated by the fixture provider"
+    )
+    market_data_latency_ms: NonNegativeInt = Field(
+        0,
+        env="MARKET_DATA_LATENCY_MS",
+        description="Latency added to each fixture provider call (milliseconds)"
+    )
+    market_data_error_rate: float = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        env="MARKET_DATA_ERROR_RATE",
+        description="Fraction of fixture provider calls that fail"
+    )
+    market_data_cassette: Optional[str] = Field(
+        None,
+        env="MARKET_DATA_CASSETTE",
+        description="JSON Lines cassette appended to by the record provider and read by the replay provider"
+    )
+
 
 # Global settings instance
 settings = Settings()
@@ -10,6 +10,8 @@ import time
 from typing import Dict, Any
 
 from app.config import settings
+from app.services.provider_executor import provider_executor
+from app.services.redis_pools import redis_pools
 from app.api import (
     transactions_router,
     portfolio_router,
@@ -186,6 +188,8 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("Shutting down Portfolio Tracker API")
+    provider_executor.shutdown()
+    await redis_pools.aclose()
 
 
 if __name__ == "__main__":
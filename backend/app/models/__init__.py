@@ -4,11 +4,16 @@ Models package - Import all database models for easy access.
 from app.models.transaction import Transaction, TransactionType
 from app.models.position import Position, AssetType
 from app.models.price_history import PriceHistory
+from app.models.price_coverage import PriceCoverage
+from app.models.latest_price import LatestPrice
+from app.models.fx_rate import FXRate
 from app.models.benchmark import Benchmark
 from app.models.portfolio_snapshot import PortfolioSnapshot
 from app.models.cached_metrics import CachedMetrics
 from app.models.stock_split import StockSplit
 from app.models.system_state import SystemState
+from app.models.daily_holding import DailyHolding
+from app.models.dirty_metric import DirtyMetric
 from app.models.crypto import (
     CryptoPortfolio,
     CryptoTransaction,
@@ -16,6 +21,7 @@ from app.models.crypto import (
     CryptoCurrency,
 )
 from app.models.crypto_portfolio_snapshot import CryptoPortfolioSnapshot
+from app.models.crypto_snapshot_holding import CryptoSnapshotHolding
 
 __all__ = [
     "Transaction",
@@ -23,14 +29,20 @@ __all__ = [
     "Position",
     "AssetType",
     "PriceHistory",
+    "PriceCoverage",
+    "LatestPrice",
+    "FXRate",
     "Benchmark",
     "PortfolioSnapshot",
     "CachedMetrics",
     "StockSplit",
     "SystemState",
+    "DailyHolding",
+    "DirtyMetric",
     "CryptoPortfolio",
     "CryptoTransaction",
     "CryptoTransactionType",
     "CryptoCurrency",
     "CryptoPortfolioSnapshot",
+    "CryptoSnapshotHolding",
 ]
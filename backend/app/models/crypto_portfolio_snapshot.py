@@ -14,7 +14,8 @@ class CryptoPortfolioSnapshot(Base):
     CryptoPortfolioSnapshot model storing daily crypto portfolio valuation snapshots.
 
     Similar to PortfolioSnapshot but specifically for crypto portfolios.
-    Used for crypto performance charts and historical tracking.
+    Used for crypto performance charts and historical tracking. The assets
+    held on each date are stored as CryptoSnapshotHolding rows.
     """
     __tablename__ = "crypto_portfolio_snapshots"
 
@@ -63,13 +64,6 @@ class CryptoPortfolioSnapshot(Base):
         comment="Portfolio base currency (EUR/USD)"
     )
 
-    # Holdings breakdown (JSON string of asset allocation)
-    holdings_breakdown: Mapped[str] = mapped_column(
-        String(2000),
-        nullable=True,
-        comment="JSON string of holdings breakdown by symbol"
-    )
-
     # Performance metrics
     total_return_pct: Mapped[Decimal] = mapped_column(
         Numeric(precision=10, scale=4),
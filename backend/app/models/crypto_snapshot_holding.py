@@ -0,0 +1,77 @@
+"""
+CryptoSnapshotHolding model - Per-asset rows of daily crypto portfolio snapshots.
+"""
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import String, Numeric, Date, ForeignKeyConstraint, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CryptoSnapshotHolding(Base):
+    """
+    CryptoSnapshotHolding model storing each asset held in a crypto portfolio snapshot.
+
+    One row per (portfolio, snapshot date, symbol), written in the same
+    statement as its CryptoPortfolioSnapshot and deleted with it. Replaces the
+    JSON holdings breakdown, so per-asset series and allocation over time are
+    indexed aggregate queries instead of decoding every snapshot.
+    """
+    __tablename__ = "crypto_snapshot_holdings"
+
+    # Snapshot identification (unique key of crypto_portfolio_snapshots)
+    portfolio_id: Mapped[int] = mapped_column(
+        primary_key=True,
+        comment="Associated crypto portfolio ID"
+    )
+
+    snapshot_date: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+        comment="Date of the snapshot"
+    )
+
+    symbol: Mapped[str] = mapped_column(
+        String(20),
+        primary_key=True,
+        comment="Crypto symbol (e.g., BTC, ETH, ADA)"
+    )
+
+    # Holding values
+    quantity: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=False,
+        comment="Quantity held at the snapshot date"
+    )
+
+    value_eur: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=2),
+        nullable=False,
+        comment="Holding value in EUR"
+    )
+
+    value_usd: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=2),
+        nullable=False,
+        comment="Holding value in USD (0 if unavailable)"
+    )
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['portfolio_id', 'snapshot_date'],
+            ['crypto_portfolio_snapshots.portfolio_id', 'crypto_portfolio_snapshots.snapshot_date'],
+            name='fk_crypto_snapshot_holdings_snapshot',
+            ondelete='CASCADE'
+        ),
+        # Per-asset series: one symbol of a portfolio over a date range
+        Index('ix_crypto_snapshot_holdings_symbol_date', 'portfolio_id', 'symbol', 'snapshot_date'),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"CryptoSnapshotHolding(portfolio_id={self.portfolio_id!r}, "
+            f"date={self.snapshot_date!r}, "
+            f"symbol={self.symbol!r}, "
+            f"value_eur={self.value_eur!r})"
+        )
@@ -0,0 +1,83 @@
+"""
+DailyHolding model - Day-by-day ledger of traditional holdings.
+"""
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import String, Numeric, Date, DateTime, UniqueConstraint, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DailyHolding(Base):
+    """
+    DailyHolding model storing the quantity and cost basis held at the end of each day.
+
+    Maintained incrementally by HoldingsLedger: each day's rows are derived from the
+    previous day's rows plus that day's transactions. Only non-empty holdings are
+    stored, so a day with no rows means nothing was held.
+
+    Holdings are keyed like positions: by ISIN, or by ticker when ISIN is NULL.
+    """
+    __tablename__ = "daily_holdings"
+
+    # Primary key
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+
+    holding_date: Mapped[date] = mapped_column(
+        Date,
+        nullable=False,
+        index=True,
+        comment="Date the holding state applies to (end of day)"
+    )
+
+    # Asset identification
+    isin: Mapped[str | None] = mapped_column(
+        String(12),
+        nullable=True,
+        comment="ISIN of the holding (None for ticker-only holdings)"
+    )
+    ticker: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="Ticker of the most recent transaction for this holding"
+    )
+
+    # Holding state
+    quantity: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=False,
+        comment="Number of shares held at end of day"
+    )
+
+    cost_basis: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=False,
+        comment="Cost basis in EUR (average cost method, same as positions)"
+    )
+
+    # Metadata
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+
+    __table_args__ = (
+        UniqueConstraint('holding_date', 'isin', name='uix_daily_holding_date_isin'),
+        Index(
+            'uix_daily_holding_date_ticker_only',
+            'holding_date', 'ticker',
+            unique=True,
+            postgresql_where=text('isin IS NULL')
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"DailyHolding(date={self.holding_date!r}, "
+            f"isin={self.isin!r}, "
+            f"ticker={self.ticker!r}, "
+            f"quantity={self.quantity!r}, "
+            f"cost_basis={self.cost_basis!r})"
+        )
@@ -0,0 +1,53 @@
+"""
+DirtyMetric model - Marks cached metrics whose inputs changed since they were calculated.
+"""
+from datetime import datetime
+from sqlalchemy import String, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DirtyMetric(Base):
+    """
+    DirtyMetric model recording a position or crypto portfolio that needs a full recompute.
+
+    Written by transaction writers through MetricsDirtyTracker and consumed by the
+    nightly metric tasks: marked entries have their metrics rebuilt from the
+    transaction history, all others only get a mark-to-market refresh. A row is
+    removed once a run that started after marked_at has recomputed it.
+    """
+    __tablename__ = "dirty_metrics"
+
+    # Primary key
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+
+    scope: Mapped[str] = mapped_column(
+        String(30),
+        nullable=False,
+        comment="Kind of metric owner (e.g., 'position', 'crypto_portfolio')"
+    )
+
+    key: Mapped[str] = mapped_column(
+        String(100),
+        nullable=False,
+        comment="Owner identifier within the scope (ISIN or ticker, portfolio ID)"
+    )
+
+    marked_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        comment="When the owner was last marked as changed"
+    )
+
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uix_dirty_metric_scope_key'),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"DirtyMetric(scope={self.scope!r}, "
+            f"key={self.key!r}, "
+            f"marked_at={self.marked_at!r})"
+        )
@@ -0,0 +1,71 @@
+"""
+FXRate model - Daily historical exchange rates per currency pair.
+"""
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import String, Numeric, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class FXRate(Base):
+    """
+    FXRate model storing one daily close per currency pair.
+
+    Pairs are stored once, in alphabetical order (EUR/USD, not USD/EUR): the
+    rate is how many units of quote equal 1 unit of base, and the reverse
+    direction is its inverse. Maintained by FXHistoryService, which downloads
+    each pair's missing days as one series instead of fetching a live rate per
+    converted row.
+    """
+    __tablename__ = "fx_rates"
+
+    # Currency pair (ISO codes, base < quote)
+    base: Mapped[str] = mapped_column(
+        String(3),
+        primary_key=True,
+        comment="Base currency code"
+    )
+
+    quote: Mapped[str] = mapped_column(
+        String(3),
+        primary_key=True,
+        comment="Quote currency code"
+    )
+
+    date: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+        comment="Rate date"
+    )
+
+    # 1 base = rate quote
+    rate: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=10),
+        nullable=False,
+        comment="Closing rate (units of quote per unit of base)"
+    )
+
+    # Metadata
+    source: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="yahoo",
+        comment="Data source"
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        comment="When the rate was last written"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"FXRate(base={self.base!r}, "
+            f"quote={self.quote!r}, "
+            f"date={self.date!r}, "
+            f"rate={self.rate!r})"
+        )
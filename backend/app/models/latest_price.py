@@ -0,0 +1,70 @@
+"""
+LatestPrice model - Latest and previous close per ticker, denormalized from PriceHistory.
+"""
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import String, Numeric, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class LatestPrice(Base):
+    """
+    LatestPrice model storing the two most recent closes of each ticker.
+
+    Maintained at ingestion time by LatestPriceService.refresh(), which every
+    PriceHistory writer calls in the same transaction as its inserts, so that
+    valuation endpoints can price the whole portfolio (and today's change)
+    with one primary-key read instead of probing PriceHistory per ticker.
+    """
+    __tablename__ = "latest_prices"
+
+    # Asset identification (one row per ticker)
+    ticker: Mapped[str] = mapped_column(
+        String(50),
+        primary_key=True,
+        comment="Asset ticker symbol (same format as price_history.ticker)"
+    )
+
+    # Latest close
+    last_date: Mapped[date] = mapped_column(
+        Date,
+        nullable=False,
+        comment="Date of the most recent close"
+    )
+
+    last_close: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=False,
+        comment="Most recent closing price"
+    )
+
+    # Close before the latest one (None if the ticker has a single close)
+    previous_date: Mapped[date | None] = mapped_column(
+        Date,
+        nullable=True,
+        comment="Date of the close before last_date"
+    )
+
+    previous_close: Mapped[Decimal | None] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=True,
+        comment="Closing price before the most recent one"
+    )
+
+    # Metadata
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        comment="When the row was last refreshed from price_history"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"LatestPrice(ticker={self.ticker!r}, "
+            f"last_date={self.last_date!r}, "
+            f"last_close={self.last_close!r}, "
+            f"previous_close={self.previous_close!r})"
+        )
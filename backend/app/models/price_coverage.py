@@ -0,0 +1,55 @@
+"""
+PriceCoverage model - Date ranges of PriceHistory already fetched per ticker.
+"""
+from datetime import datetime, date
+from sqlalchemy import String, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class PriceCoverage(Base):
+    """
+    PriceCoverage model storing the contiguous date ranges covered per ticker.
+
+    A range is covered when the provider has answered for it, including the
+    weekends, holidays and pre-listing days it has no prices for. Maintained
+    by PriceBackfillService so that backfills only request the missing
+    intervals; ranges of a ticker never overlap or touch.
+    """
+    __tablename__ = "price_coverage"
+
+    # Asset identification (same format as price_history.ticker)
+    ticker: Mapped[str] = mapped_column(
+        String(50),
+        primary_key=True,
+        comment="Asset ticker symbol (same format as price_history.ticker)"
+    )
+
+    # Covered range (inclusive)
+    start_date: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+        comment="First covered date"
+    )
+
+    end_date: Mapped[date] = mapped_column(
+        Date,
+        nullable=False,
+        comment="Last covered date"
+    )
+
+    # Metadata
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        comment="When the range was last extended"
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"PriceCoverage(ticker={self.ticker!r}, "
+            f"start_date={self.start_date!r}, "
+            f"end_date={self.end_date!r})"
+        )
@@ -0,0 +1,265 @@
+"""
+As-of price lookup service.
+
+Resolves "latest close at or before date D for ticker T" for a whole grid of
+tickers and dates with a single database round trip, replacing the per-row
+``ORDER BY date DESC LIMIT 1`` queries used by snapshots and valuations.
+
+Forward-fill semantics:
+- A lookup for (T, D) returns the last stored close for T dated on or before D.
+- With ``max_staleness_days`` set, a close older than that many days before D
+  is treated as missing instead of being carried forward.
+- Lookups that find nothing are reported by AsOfPriceGrid.missing().
+"""
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+from sqlalchemy import select, union_all, values, column, String, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import PriceHistory
+
+logger = logging.getLogger(__name__)
+
+
+class PricePoint(NamedTuple):
+    """A stored close (same attribute names as PriceHistory)."""
+    date: date
+    close: Decimal
+
+
+class AsOfPriceGrid:
+    """Per-ticker close series answering as-of lookups in memory."""
+
+    def __init__(
+        self,
+        series: Dict[str, List[Tuple[date, Decimal]]],
+        max_staleness_days: Optional[int] = None,
+    ):
+        """
+        Args:
+            series: Ticker -> [(date, close)] sorted by date ascending
+            max_staleness_days: Do not carry a close forward further than this
+        """
+        self.max_staleness_days = max_staleness_days
+        self._dates: Dict[str, List[date]] = {}
+        self._closes: Dict[str, List[Decimal]] = {}
+        self._ordinals: Dict[str, np.ndarray] = {}
+
+        for ticker, points in series.items():
+            self._dates[ticker] = [point_date for point_date, _ in points]
+            self._closes[ticker] = [close for _, close in points]
+            self._ordinals[ticker] = np.fromiter(
+                (point_date.toordinal() for point_date, _ in points),
+                dtype=np.int32,
+                count=len(points),
+            )
+
+    @property
+    def tickers(self) -> List[str]:
+        """Tickers with at least one stored close."""
+        return list(self._dates)
+
+    def lookup(self, ticker: str, as_of: date) -> Optional[PricePoint]:
+        """
+        Return the latest close on or before as_of.
+
+        Returns:
+            PricePoint, or None if there is no usable close
+        """
+        index = self._index(ticker, as_of)
+        if index is None:
+            return None
+        return PricePoint(self._dates[ticker][index], self._closes[ticker][index])
+
+    def price(self, ticker: str, as_of: date) -> Optional[Decimal]:
+        """Return the close from lookup(), or None."""
+        point = self.lookup(ticker, as_of)
+        return point.close if point else None
+
+    def history(self, ticker: str, as_of: date, count: int = 2) -> List[PricePoint]:
+        """
+        Return up to count closes on or before as_of, latest first.
+
+        Equivalent to ``ORDER BY date DESC LIMIT count`` restricted to as_of;
+        only the as-of close itself is subject to max_staleness_days.
+        """
+        index = self._index(ticker, as_of)
+        if index is None:
+            return []
+        dates = self._dates[ticker]
+        closes = self._closes[ticker]
+        return [
+            PricePoint(dates[i], closes[i])
+            for i in range(index, max(index - count, -1), -1)
+        ]
+
+    def lookup_many(self, ticker: str, as_of_dates: Sequence[date]) -> List[Optional[PricePoint]]:
+        """
+        Vectorized lookup() for many dates of one ticker (np.searchsorted).
+
+        Args:
+            ticker: Ticker symbol
+            as_of_dates: Dates to resolve (any order)
+
+        Returns:
+            List aligned with as_of_dates
+        """
+        ordinals = self._ordinals.get(ticker)
+        if ordinals is None or len(ordinals) == 0:
+            return [None] * len(as_of_dates)
+
+        targets = np.fromiter((d.toordinal() for d in as_of_dates), dtype=np.int32, count=len(as_of_dates))
+        indexes = np.searchsorted(ordinals, targets, side="right") - 1
+
+        valid = indexes >= 0
+        if self.max_staleness_days is not None:
+            safe = np.where(valid, indexes, 0)
+            valid &= (targets - ordinals[safe]) <= self.max_staleness_days
+
+        dates = self._dates[ticker]
+        closes = self._closes[ticker]
+        return [
+            PricePoint(dates[i], closes[i]) if ok else None
+            for i, ok in zip(indexes.tolist(), valid.tolist())
+        ]
+
+    def missing(self, tickers: Iterable[str], as_of_dates: Iterable[date]) -> List[Tuple[str, date]]:
+        """Return every (ticker, date) pair in the grid without a usable close."""
+        as_of_dates = list(as_of_dates)
+        missing = []
+        for ticker in tickers:
+            for as_of, point in zip(as_of_dates, self.lookup_many(ticker, as_of_dates)):
+                if point is None:
+                    missing.append((ticker, as_of))
+        return missing
+
+    def _index(self, ticker: str, as_of: date) -> Optional[int]:
+        """Position of the as-of close in the ticker's series, or None."""
+        dates = self._dates.get(ticker)
+        if not dates:
+            return None
+        index = bisect_right(dates, as_of) - 1
+        if index < 0:
+            return None
+        if self.max_staleness_days is not None and (as_of - dates[index]).days > self.max_staleness_days:
+            return None
+        return index
+
+
+class AsOfPriceService:
+    """Load as-of price grids from PriceHistory."""
+
+    @staticmethod
+    def load(
+        db: Session,
+        tickers: Iterable[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        lookback_rows: int = 1,
+        max_staleness_days: Optional[int] = None,
+    ) -> AsOfPriceGrid:
+        """
+        Load everything needed to resolve tickers x [start_date, end_date].
+
+        Args:
+            db: Synchronous database session
+            tickers: Tickers to load
+            start_date: Earliest as-of date that will be looked up
+            end_date: Latest as-of date (defaults to start_date)
+            lookback_rows: Closes to keep at or before start_date per ticker
+                (2 lets history() return the previous close for start_date)
+            max_staleness_days: See AsOfPriceGrid
+
+        Returns:
+            AsOfPriceGrid
+        """
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return AsOfPriceGrid({}, max_staleness_days)
+
+        query = AsOfPriceService._build_query(tickers, start_date, end_date or start_date, lookback_rows)
+        rows = db.execute(query).all()
+        return AsOfPriceService._to_grid(rows, max_staleness_days)
+
+    @staticmethod
+    async def load_async(
+        db: AsyncSession,
+        tickers: Iterable[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        lookback_rows: int = 1,
+        max_staleness_days: Optional[int] = None,
+    ) -> AsOfPriceGrid:
+        """Async variant of load() for API handlers."""
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return AsOfPriceGrid({}, max_staleness_days)
+
+        query = AsOfPriceService._build_query(tickers, start_date, end_date or start_date, lookback_rows)
+        result = await db.execute(query)
+        return AsOfPriceService._to_grid(result.all(), max_staleness_days)
+
+    @staticmethod
+    def load_latest(db: Session, tickers: Iterable[str], lookback_rows: int = 1) -> AsOfPriceGrid:
+        """Load the latest closes per ticker (as of today)."""
+        return AsOfPriceService.load(db, tickers, date.today(), lookback_rows=lookback_rows)
+
+    @staticmethod
+    async def load_latest_async(
+        db: AsyncSession,
+        tickers: Iterable[str],
+        lookback_rows: int = 1,
+    ) -> AsOfPriceGrid:
+        """Async variant of load_latest()."""
+        return await AsOfPriceService.load_async(db, tickers, date.today(), lookback_rows=lookback_rows)
+
+    @staticmethod
+    def _build_query(tickers: List[str], start_date: date, end_date: date, lookback_rows: int):
+        """
+        Build one statement returning the anchor and range closes for all tickers.
+
+        Anchors are the last lookback_rows closes at or before start_date, found
+        with a LATERAL index probe per ticker (uses ix_price_history_ticker_date).
+        The range part returns every close in (start_date, end_date].
+        """
+        ticker_values = values(column("ticker", String), name="asof_tickers").data(
+            [(ticker,) for ticker in tickers]
+        )
+
+        anchor = (
+            select(PriceHistory.date, PriceHistory.close)
+            .where(PriceHistory.ticker == ticker_values.c.ticker)
+            .where(PriceHistory.date <= start_date)
+            .order_by(PriceHistory.date.desc())
+            .limit(lookback_rows)
+            .lateral("asof_anchor")
+        )
+
+        anchors = (
+            select(ticker_values.c.ticker, anchor.c.date, anchor.c.close)
+            .select_from(ticker_values.join(anchor, true()))
+        )
+
+        in_range = (
+            select(PriceHistory.ticker, PriceHistory.date, PriceHistory.close)
+            .where(PriceHistory.ticker.in_(tickers))
+            .where(PriceHistory.date > start_date)
+            .where(PriceHistory.date <= end_date)
+        )
+
+        combined = union_all(anchors, in_range).subquery("asof_prices")
+        return select(combined).order_by(combined.c[0], combined.c[1])
+
+    @staticmethod
+    def _to_grid(rows, max_staleness_days: Optional[int]) -> AsOfPriceGrid:
+        """Group (ticker, date, close) rows into an AsOfPriceGrid."""
+        series: Dict[str, List[Tuple[date, Decimal]]] = {}
+        for ticker, price_date, close in rows:
+            series.setdefault(ticker, []).append((price_date, close))
+        return AsOfPriceGrid(series, max_staleness_days)
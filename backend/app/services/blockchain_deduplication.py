@@ -9,9 +9,8 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Set, Tuple
 import logging
-import redis
 
-from app.config import settings
+from app.services.redis_pools import redis_pools
 from app.database import SyncSessionLocal
 from sqlalchemy import text
 
@@ -47,7 +46,7 @@ class BlockchainDeduplicationService:
 
         # Initialize Redis connection
         try:
-            self._redis_client = redis.from_url(settings.redis_url, decode_responses=False)
+            self._redis_client = redis_pools.sync_client(decode_responses=False)
             self._redis_client.ping()
             logger.info("Blockchain deduplication: Connected to Redis")
         except Exception as e:
@@ -17,6 +17,8 @@ import pickle
 from urllib.parse import urljoin
 
 from app.config import settings
+from app.services.provider_limiter import blockchain_limiter, is_rate_limit_error
+from app.services.redis_pools import redis_pools
 from app.models.crypto import CryptoTransaction, CryptoTransactionType, CryptoCurrency
 
 logger = logging.getLogger(__name__)
@@ -48,13 +50,13 @@ class BlockchainFetcherService:
         and creates HTTP session for API requests.
         """
         self._session = requests.Session()
-        self._last_request_time = 0
+        self._limiter = blockchain_limiter
         self._redis_client = None
 
         # Initialize blockchain.info API configuration
         self.api_config = {
             'base_url': str(settings.blockchain_com_api_url),
-            'rate_limit': 0.1,  # Enforce blockchain.info rate limit: 1 request per 10 seconds
+            'rate_limit': blockchain_limiter.rate,  # requests per second, shared by all processes
             'timeout': settings.blockchain_request_timeout_seconds,
             'max_retries': settings.blockchain_max_retries
         }
@@ -62,11 +64,10 @@ class BlockchainFetcherService:
         # Configure pagination limits from settings
         self.max_transactions_per_request = settings.blockchain_max_transactions_per_request
         self.max_pages_per_sync = settings.blockchain_max_pages_per_sync
-        self.delay_between_pages = settings.blockchain_delay_between_pages_seconds
 
         # Initialize Redis connection
         try:
-            self._redis_client = redis.from_url(settings.redis_url, decode_responses=False)
+            self._redis_client = redis_pools.sync_client(decode_responses=False)
             self._redis_client.ping()
             logger.info("Blockchain fetcher: Connected to Redis")
         except Exception as e:
@@ -83,7 +84,6 @@ class BlockchainFetcherService:
     # These will be set from configuration
     max_transactions_per_request = 50  # Default overridden in __init__
     max_pages_per_sync = 1000  # Safety limit to prevent infinite loops (~50k transactions per wallet)
-    delay_between_pages = 0.2  # Default overridden in __init__
 
     def _get_cache_key(self, prefix: str, *args) -> str:
         """
@@ -213,21 +213,12 @@ class BlockchainFetcherService:
 
     def _rate_limit(self) -> None:
         """
-        Enforces rate limiting for blockchain.info API based on the configured requests-per-second.
+        Enforces the blockchain.info rate limit before a request.
 
-        Ensures at least 1 / rate_limit seconds elapse between consecutive requests
-        by sleeping when needed, and updates the last-request timestamp.
+        Takes a token from the blockchain.info bucket shared by all processes,
+        sleeping until one is available.
         """
-        current_time = time.time()
-        time_since_last = current_time - self._last_request_time
-        rate_limit_delay = 1.0 / self.api_config['rate_limit']
-
-        if time_since_last < rate_limit_delay:
-            sleep_time = rate_limit_delay - time_since_last
-            logger.debug(f"Rate limiting blockchain.info API: sleeping for {sleep_time:.3f} seconds")
-            time.sleep(sleep_time)
-
-        self._last_request_time = time.time()
+        self._limiter.acquire()
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """
@@ -253,10 +244,13 @@ class BlockchainFetcherService:
                 response.raise_for_status()
 
                 data = response.json()
+                self._limiter.succeeded()
                 logger.debug("Blockchain.info API response received successfully")
                 return data
 
             except requests.exceptions.RequestException as e:
+                if is_rate_limit_error(e):
+                    self._limiter.throttled()
                 wait_time = 2 ** attempt  # Exponential backoff
                 logger.warning(
                     f"Blockchain.info API request failed (attempt {attempt + 1}/{self.api_config['max_retries']}): {e}. "
@@ -579,9 +573,6 @@ class BlockchainFetcherService:
                 offset += self.max_transactions_per_request
                 page_num += 1
 
-                # Add configurable delay between pages to respect rate limits
-                time.sleep(self.delay_between_pages)
-
             # Check if we hit the safety limit
             if page_num > self.max_pages_per_sync:
                 logger.warning(
@@ -2,12 +2,14 @@
 Cache service for application data.
 
 Provides Redis-backed caching with TTL support for frequently accessed data.
+Both the blocking methods and their *_async counterparts use the shared pools
+of redis_pools; coroutines should use the async ones.
 """
 import json
 import logging
 from typing import Any, Optional
-import redis
-from app.config import settings
+import redis.asyncio as aioredis
+from app.services.redis_pools import redis_pools
 
 logger = logging.getLogger(__name__)
 
@@ -15,18 +17,13 @@ logger = logging.getLogger(__name__)
 class CacheService:
     """Manage application-level caching with Redis."""
 
+    # Keys fetched per SCAN call and unlinked per UNLINK call in clear_pattern()
+    SCAN_BATCH_SIZE = 500
+
     def __init__(self):
-        """Initialize Redis connection from environment variables."""
+        """Borrow the shared Redis client and check the connection."""
         try:
-            # Parse Redis URL: redis://[password@]host[:port]/[db]
-            self.redis_client = redis.from_url(
-                settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_keepalive=True,
-                socket_keepalive_options={1: 1},
-            )
+            self.redis_client = redis_pools.sync_client()
             # Test connection
             self.redis_client.ping()
             self.available = True
@@ -99,10 +96,56 @@ class CacheService:
             logger.debug(f"Cache delete error for key {key}: {str(e)}")
             return False
 
+    def async_client(self) -> aioredis.Redis:
+        """Return the non-blocking client of the running event loop."""
+        return redis_pools.async_client()
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Non-blocking get(); call from coroutines."""
+        if not self.available:
+            return None
+
+        try:
+            value = await self.async_client().get(key)
+            if value is None:
+                return None
+            return json.loads(value)
+        except Exception as e:
+            logger.debug(f"Cache get error for key {key}: {str(e)}")
+            return None
+
+    async def set_async(self, key: str, value: Any, ttl_seconds: int = 3600) -> bool:
+        """Non-blocking set(); call from coroutines."""
+        if not self.available:
+            return False
+
+        try:
+            serialized = json.dumps(value)
+            await self.async_client().setex(key, ttl_seconds, serialized)
+            return True
+        except Exception as e:
+            logger.debug(f"Cache set error for key {key}: {str(e)}")
+            return False
+
+    async def delete_async(self, key: str) -> bool:
+        """Non-blocking delete(); call from coroutines."""
+        if not self.available:
+            return False
+
+        try:
+            return await self.async_client().delete(key) > 0
+        except Exception as e:
+            logger.debug(f"Cache delete error for key {key}: {str(e)}")
+            return False
+
     def clear_pattern(self, pattern: str) -> int:
         """
         Delete all keys matching a pattern.
 
+        Walks the keyspace with SCAN and unlinks matches in batches, so Redis is
+        never blocked the way KEYS blocks it. Routine invalidation should bump a
+        cache generation instead (see cache_generations); this is for maintenance.
+
         Args:
             pattern: Redis key pattern (e.g., "asset_search:*")
 
@@ -113,10 +156,16 @@ class CacheService:
             return 0
 
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=self.SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= self.SCAN_BATCH_SIZE:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
+            return deleted
         except Exception as e:
             logger.debug(f"Cache clear_pattern error for {pattern}: {str(e)}")
             return 0
@@ -0,0 +1,188 @@
+"""
+Cache generation counters - O(1) invalidation for Redis-cached responses.
+
+Each data domain has a generation counter in one Redis hash. Cached entries
+embed the generations of the domains they depend on in their key, e.g.
+"portfolio:holdings:g=3.17.2". Writers bump a domain after committing a change
+(one HINCRBY); readers then build a new key, miss and recompute, while entries
+under older generations are never read again and simply expire by TTL. No
+KEYS/SCAN over the keyspace is needed to invalidate.
+
+Domains:
+    TRANSACTIONS      traditional transactions and the positions derived from them
+    PRICES            PriceHistory / latest_prices rows
+    METRICS           CachedMetrics written by the metric tasks
+    FX                exchange rates
+    SNAPSHOTS         portfolio_snapshots / crypto_portfolio_snapshots rows
+    BENCHMARK         the active benchmark row
+    crypto(id)        one crypto portfolio's transactions (also bumps CRYPTO)
+    CRYPTO            any crypto portfolio
+
+Usage:
+    key = CacheGenerations.key("portfolio:holdings", TRANSACTIONS, PRICES, METRICS)
+    ...
+    CacheGenerations.bump(PRICES)
+
+Coroutines use get_async()/key_async(), which read the generations without
+blocking the event loop.
+
+Without Redis there are no generations; key() returns None and callers skip
+caching.
+"""
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from app.services.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS = "transactions"
+PRICES = "prices"
+METRICS = "metrics"
+FX = "fx"
+CRYPTO = "crypto"
+SNAPSHOTS = "snapshots"
+BENCHMARK = "benchmark"
+
+ALL_DOMAINS = (TRANSACTIONS, PRICES, METRICS, FX, CRYPTO, SNAPSHOTS, BENCHMARK)
+
+
+def crypto(portfolio_id: object) -> str:
+    """Return the generation domain of one crypto portfolio."""
+    return f"{CRYPTO}:{portfolio_id}"
+
+
+class CacheGenerations:
+    """Read and bump per-domain cache generations."""
+
+    # Redis hash mapping domain -> generation
+    KEY = "cache:generations"
+
+    @staticmethod
+    def get(*domains: str) -> Optional[Dict[str, int]]:
+        """
+        Return the current generation of each domain (0 if never bumped).
+
+        Args:
+            domains: Generation domains
+
+        Returns:
+            Dict domain -> generation, or None if Redis is unavailable
+        """
+        if not cache.available:
+            return None
+        if not domains:
+            return {}
+        try:
+            values = cache.redis_client.hmget(CacheGenerations.KEY, list(domains))
+        except Exception as e:
+            logger.debug(f"Cache generation read failed for {domains}: {e}")
+            return None
+        return {domain: int(value or 0) for domain, value in zip(domains, values)}
+
+    @staticmethod
+    async def get_async(*domains: str) -> Optional[Dict[str, int]]:
+        """Non-blocking get(); call from coroutines."""
+        if not cache.available:
+            return None
+        if not domains:
+            return {}
+        try:
+            values = await cache.async_client().hmget(CacheGenerations.KEY, list(domains))
+        except Exception as e:
+            logger.debug(f"Cache generation read failed for {domains}: {e}")
+            return None
+        return {domain: int(value or 0) for domain, value in zip(domains, values)}
+
+    @staticmethod
+    def key(prefix: str, *domains: str, parts: Iterable[object] = ()) -> Optional[str]:
+        """
+        Build a cache key embedding the current generations of domains.
+
+        Read the key before loading the data it caches: a write landing in
+        between bumps a generation, so the stale result is stored under a key
+        nobody reads anymore.
+
+        Args:
+            prefix: Key prefix (e.g. "portfolio:holdings")
+            domains: Domains the cached value depends on
+            parts: Extra key components (e.g. request parameters)
+
+        Returns:
+            Cache key, or None if Redis is unavailable
+        """
+        return CacheGenerations._format_key(prefix, domains, parts, CacheGenerations.get(*domains))
+
+    @staticmethod
+    async def key_async(prefix: str, *domains: str, parts: Iterable[object] = ()) -> Optional[str]:
+        """Non-blocking key(); call from coroutines."""
+        generations = await CacheGenerations.get_async(*domains)
+        return CacheGenerations._format_key(prefix, domains, parts, generations)
+
+    @staticmethod
+    def _format_key(
+        prefix: str,
+        domains: Iterable[str],
+        parts: Iterable[object],
+        generations: Optional[Dict[str, int]]
+    ) -> Optional[str]:
+        if generations is None:
+            return None
+        components: List[str] = [prefix, *(str(part) for part in parts)]
+        components.append("g=" + ".".join(str(generations[domain]) for domain in domains))
+        return ":".join(components)
+
+    @staticmethod
+    def bump(*domains: str) -> bool:
+        """
+        Invalidate every cached entry depending on domains.
+
+        Call after the change has committed. Bumping crypto(id) also bumps
+        CRYPTO, so aggregates over all portfolios are invalidated too.
+
+        Args:
+            domains: Domains that changed
+
+        Returns:
+            True if the generations were bumped, False if Redis is unavailable
+        """
+        if not cache.available or not domains:
+            return False
+
+        expanded = CacheGenerations._expand(domains)
+        try:
+            pipe = cache.redis_client.pipeline(transaction=False)
+            for domain in expanded:
+                pipe.hincrby(CacheGenerations.KEY, domain, 1)
+            pipe.execute()
+            logger.debug(f"Bumped cache generations: {expanded}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to bump cache generations {expanded}: {e}")
+            return False
+
+    @staticmethod
+    async def bump_async(*domains: str) -> bool:
+        """Non-blocking bump(); call from coroutines."""
+        if not cache.available or not domains:
+            return False
+
+        expanded = CacheGenerations._expand(domains)
+        try:
+            pipe = cache.async_client().pipeline(transaction=False)
+            for domain in expanded:
+                pipe.hincrby(CacheGenerations.KEY, domain, 1)
+            await pipe.execute()
+            logger.debug(f"Bumped cache generations: {expanded}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to bump cache generations {expanded}: {e}")
+            return False
+
+    @staticmethod
+    def _expand(domains: Iterable[str]) -> List[str]:
+        """Add CRYPTO to any crypto(id) bump, sorted for a stable command order."""
+        expanded = set(domains)
+        if any(domain.startswith(f"{CRYPTO}:") for domain in expanded):
+            expanded.add(CRYPTO)
+        return sorted(expanded)
@@ -5,10 +5,9 @@ Implements IRR, TWR, and portfolio metrics as per PRD Section 5.
 """
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Sequence, Tuple, Optional
 import numpy as np
 import numpy_financial as npf
-from scipy.optimize import newton
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +16,19 @@ logger = logging.getLogger(__name__)
 class FinancialCalculations:
     """Financial calculations for portfolio metrics."""
 
+    # XIRR solver settings
+    IRR_GUESS = 0.1
+    IRR_TOLERANCE = 1e-6
+    IRR_MAX_ITERATIONS = 100
+    # Plausible IRR range (-99% to +9900%); roots outside it are rejected
+    IRR_MIN = -0.99
+    IRR_MAX = 99.0
+    # Rates evaluated at once to bracket a root when Newton fails
+    IRR_BRACKET_GRID = np.concatenate([
+        np.linspace(-0.99, 1.0, 200, endpoint=False),
+        np.geomspace(1.0, 99.0, 100),
+    ])
+
     @staticmethod
     def calculate_irr(
         cash_flows: List[Tuple[date, Decimal]],
@@ -41,49 +53,151 @@ class FinancialCalculations:
         if not cash_flows:
             return None
 
+        return FinancialCalculations.calculate_irr_batch(
+            [(cash_flows, current_value)], current_date
+        )[0]
+
+    @staticmethod
+    def calculate_irr_batch(
+        positions: Sequence[Tuple[List[Tuple[date, Decimal]], Decimal]],
+        current_date: date = None
+    ) -> List[Optional[float]]:
+        """
+        Calculate XIRR for many positions at once.
+
+        Cash flows are packed into zero-padded (positions x flows) arrays and
+        solved together: a vectorized Newton iteration first, then, for every
+        position where Newton diverged or left the plausible range, the XNPV is
+        evaluated on a grid of rates to bracket a root that is refined by
+        vectorized bisection.
+
+        Args:
+            positions: (cash_flows, current_value) per position, as for calculate_irr
+            current_date: Date for the current values (defaults to today)
+
+        Returns:
+            Annual IRR as decimal per position (None where no root exists in range)
+        """
         if current_date is None:
             current_date = date.today()
 
-        try:
-            # Prepare arrays for XIRR calculation
-            dates = [cf[0] for cf in cash_flows] + [current_date]
-            amounts = [float(cf[1]) for cf in cash_flows] + [float(current_value)]
+        results: List[Optional[float]] = [None] * len(positions)
+        rows = [i for i, (cash_flows, _) in enumerate(positions) if cash_flows]
+        if not rows:
+            return results
+
+        width = max(len(positions[i][0]) for i in rows) + 1
+        amounts = np.zeros((len(rows), width))
+        years = np.zeros((len(rows), width))
 
-            # Convert dates to number of days from first date
+        for row, i in enumerate(rows):
+            cash_flows, current_value = positions[i]
+            dates = [cf[0] for cf in cash_flows] + [current_date]
             first_date = min(dates)
-            days = [(d - first_date).days for d in dates]
-            years = [d / 365.25 for d in days]
-
-            # Calculate IRR using Newton's method
-            # XIRR formula: NPV = sum(amount / (1 + rate)^year) = 0
-
-            def xnpv(rate: float, values: List[float], dates: List[float]) -> float:
-                """Calculate XNPV for given rate."""
-                return sum(v / (1 + rate) ** d for v, d in zip(values, dates))
-
-            def xnpv_derivative(rate: float, values: List[float], dates: List[float]) -> float:
-                """Calculate derivative of XNPV."""
-                return sum(-d * v / (1 + rate) ** (d + 1) for v, d in zip(values, dates))
-
-            # Use Newton's method to find IRR
-            irr = newton(
-                func=lambda r: xnpv(r, amounts, years),
-                x0=0.1,  # Initial guess: 10%
-                fprime=lambda r: xnpv_derivative(r, amounts, years),
-                maxiter=100,
-                tol=1e-6
-            )
-
-            # Sanity check: IRR between -100% and +10000%
-            if irr < -0.99 or irr > 99:
-                logger.warning(f"IRR calculation returned extreme value: {irr}")
-                return None
+            amounts[row, :len(dates)] = [float(cf[1]) for cf in cash_flows] + [float(current_value)]
+            years[row, :len(dates)] = [(d - first_date).days / 365.25 for d in dates]
 
-            return float(irr)
+        rates, solved = FinancialCalculations._xirr_newton(amounts, years)
 
-        except (RuntimeError, ValueError, ZeroDivisionError) as e:
-            logger.warning(f"IRR calculation failed: {str(e)}")
-            return None
+        in_range = solved & (rates >= FinancialCalculations.IRR_MIN) & (rates <= FinancialCalculations.IRR_MAX)
+        retry = np.flatnonzero(~in_range)
+        if len(retry):
+            rates[retry], in_range[retry] = FinancialCalculations._xirr_bracketed(amounts[retry], years[retry])
+
+        for row, i in enumerate(rows):
+            if in_range[row]:
+                results[i] = float(rates[row])
+            else:
+                logger.warning(f"IRR calculation found no root in range for position {i}")
+
+        return results
+
+    @staticmethod
+    def _xnpv(rates: np.ndarray, amounts: np.ndarray, years: np.ndarray) -> np.ndarray:
+        """
+        XNPV of each position at each rate.
+
+        Args:
+            rates: (positions x k) rates
+            amounts: (positions x flows) cash flows
+            years: (positions x flows) year fractions from the first flow
+
+        Returns:
+            (positions x k) XNPV values
+        """
+        with np.errstate(all="ignore"):
+            discount = (1.0 + rates[:, :, None]) ** -years[:, None, :]
+            return (amounts[:, None, :] * discount).sum(axis=2)
+
+    @staticmethod
+    def _xirr_newton(amounts: np.ndarray, years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Newton's method on all positions simultaneously.
+
+        Returns:
+            (rates, converged) arrays; diverged positions have converged=False
+        """
+        count = amounts.shape[0]
+        rates = np.full(count, FinancialCalculations.IRR_GUESS)
+        converged = np.zeros(count, dtype=bool)
+        active = np.ones(count, dtype=bool)
+
+        for _ in range(FinancialCalculations.IRR_MAX_ITERATIONS):
+            idx = np.flatnonzero(active)
+            if not len(idx):
+                break
+
+            base = 1.0 + rates[idx, None]
+            with np.errstate(all="ignore"):
+                discount = base ** -years[idx]
+                value = (amounts[idx] * discount).sum(axis=1)
+                derivative = (-years[idx] * amounts[idx] * discount / base).sum(axis=1)
+                step = value / derivative
+                new_rates = rates[idx] - step
+
+            diverged = ~np.isfinite(new_rates) | (new_rates <= -1.0)
+            done = ~diverged & (np.abs(step) < FinancialCalculations.IRR_TOLERANCE)
+
+            rates[idx] = np.where(diverged, rates[idx], new_rates)
+            converged[idx[done]] = True
+            active[idx[done | diverged]] = False
+
+        return rates, converged
+
+    @staticmethod
+    def _xirr_bracketed(amounts: np.ndarray, years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bracket a root on IRR_BRACKET_GRID and refine it by bisection.
+
+        Returns:
+            (rates, found) arrays; found=False where XNPV never changes sign
+        """
+        count = amounts.shape[0]
+        grid = np.broadcast_to(FinancialCalculations.IRR_BRACKET_GRID, (count, len(FinancialCalculations.IRR_BRACKET_GRID)))
+        values = FinancialCalculations._xnpv(grid, amounts, years)
+
+        signs = np.sign(values)
+        crossing = (signs[:, :-1] * signs[:, 1:] <= 0) & np.isfinite(values[:, :-1]) & np.isfinite(values[:, 1:])
+        found = crossing.any(axis=1)
+        first = crossing.argmax(axis=1)
+
+        rows = np.arange(count)
+        low = grid[rows, first].copy()
+        high = grid[rows, np.minimum(first + 1, grid.shape[1] - 1)].copy()
+        low_value = values[rows, first]
+
+        while True:
+            width = high - low
+            if not (found & (width > FinancialCalculations.IRR_TOLERANCE)).any():
+                break
+            mid = (low + high) / 2
+            mid_value = FinancialCalculations._xnpv(mid[:, None], amounts, years)[:, 0]
+            same_side = np.sign(mid_value) == np.sign(low_value)
+            low = np.where(same_side, mid, low)
+            low_value = np.where(same_side, mid_value, low_value)
+            high = np.where(same_side, high, mid)
+
+        return (low + high) / 2, found
 
     @staticmethod
     def calculate_twr(
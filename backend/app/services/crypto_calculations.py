@@ -10,26 +10,148 @@ Provides comprehensive portfolio calculations for crypto assets including:
 """
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple, Any
-from collections import defaultdict
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict, deque
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-import numpy_financial as npf
+from sqlalchemy import select, func, and_
 
 from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransactionType
+from app.models.crypto_portfolio_snapshot import CryptoPortfolioSnapshot
+from app.models.crypto_snapshot_holding import CryptoSnapshotHolding
 from app.schemas.crypto import (
     CryptoPortfolioMetrics,
     CryptoHolding,
     CryptoPerformanceData,
     CryptoCurrency
 )
+from app.services.calculations import FinancialCalculations
+from app.services.crypto_price_resolver import CryptoPriceResolver
 from app.services.price_fetcher import PriceFetcher
+from app.services.provider_executor import provider_executor
 
 logger = logging.getLogger(__name__)
 
 
+class _FifoBook:
+    """FIFO lots of a single symbol, with cached quantity and cost basis."""
+
+    __slots__ = ("lots", "quantity", "cost_basis")
+
+    def __init__(self):
+        self.lots: Deque[List[Decimal]] = deque()
+        self.quantity = Decimal("0")
+        self.cost_basis = Decimal("0")
+
+    def apply(self, tx: CryptoTransaction) -> None:
+        """
+        Apply one transaction with the same FIFO rule as _calculate_holdings.
+
+        Quantity and cost basis are running totals adjusted by each lot added or
+        consumed, so a transaction costs O(lots consumed), not O(open lots).
+        """
+        if tx.transaction_type in [CryptoTransactionType.BUY, CryptoTransactionType.TRANSFER_IN]:
+            self.lots.append([tx.quantity, tx.price_at_execution])
+            self.quantity += tx.quantity
+            self.cost_basis += tx.quantity * tx.price_at_execution
+        elif tx.transaction_type in [CryptoTransactionType.SELL, CryptoTransactionType.TRANSFER_OUT]:
+            remaining = tx.quantity
+            while remaining > 0 and self.lots:
+                lot = self.lots[0]
+                consumed = min(lot[0], remaining)
+                self.quantity -= consumed
+                self.cost_basis -= consumed * lot[1]
+                remaining -= consumed
+                if consumed == lot[0]:
+                    self.lots.popleft()
+                else:
+                    lot[0] -= consumed
+
+            if not self.lots:
+                # Nothing left open: drop any residue of the running totals
+                self.quantity = Decimal("0")
+                self.cost_basis = Decimal("0")
+
+
+def sweep_performance(
+    transactions: List[CryptoTransaction],
+    prices: Dict[str, List[Dict]],
+    start_date: date,
+    end_date: date,
+    currency: str
+) -> Iterator[CryptoPerformanceData]:
+    """
+    Walk start_date..end_date once, applying transactions as their dates pass.
+
+    Holdings are updated incrementally (FIFO per symbol) and each symbol's
+    price is forward-filled with a moving index into its date-sorted series,
+    so the sweep is O(days x symbols + transactions + prices).
+
+    Parameters:
+        transactions: Portfolio transactions ordered by timestamp.
+        prices: Symbol -> price records with 'date' and 'price' keys.
+        start_date: Inclusive first date.
+        end_date: Inclusive last date.
+        currency: Currency code attached to each point.
+
+    Yields:
+        CryptoPerformanceData for each date with a non-zero value or cost basis.
+    """
+    series = {
+        symbol: sorted(((p['date'], p['price']) for p in points), key=lambda p: p[0])
+        for symbol, points in prices.items()
+    }
+    price_index = {symbol: 0 for symbol in series}
+    last_price: Dict[str, Any] = {}
+
+    books: Dict[str, _FifoBook] = {}
+    tx_index = 0
+    current_date = start_date
+
+    while current_date <= end_date:
+        while tx_index < len(transactions) and transactions[tx_index].timestamp.date() <= current_date:
+            tx = transactions[tx_index]
+            tx_index += 1
+            books.setdefault(tx.symbol, _FifoBook()).apply(tx)
+
+        # Advance each price cursor to the last point on or before current_date
+        for symbol, points in series.items():
+            i = price_index[symbol]
+            while i < len(points) and points[i][0] <= current_date:
+                last_price[symbol] = points[i][1]
+                i += 1
+            price_index[symbol] = i
+
+        portfolio_value = Decimal("0")
+        cost_basis = Decimal("0")
+        for symbol, book in books.items():
+            if book.quantity <= 0:
+                continue
+            cost_basis += book.cost_basis
+            price = last_price.get(symbol)
+            if price is not None:
+                portfolio_value += book.quantity * price
+
+        profit_loss = portfolio_value - cost_basis
+        profit_loss_pct = float(
+            (profit_loss / cost_basis) * 100
+        ) if cost_basis > 0 else 0
+
+        # Only emit days with some portfolio value or cost basis
+        if portfolio_value > 0 or cost_basis > 0:
+            yield CryptoPerformanceData(
+                date=current_date,
+                portfolio_value=portfolio_value,
+                cost_basis=cost_basis,
+                profit_loss=profit_loss,
+                profit_loss_pct=profit_loss_pct,
+                currency=currency
+            )
+
+        current_date += timedelta(days=1)
+
+
 class CryptoCalculationService:
     """Service for calculating crypto portfolio metrics."""
 
@@ -355,120 +477,151 @@ class CryptoCalculationService:
             List[CryptoPerformanceData]: One entry per calendar date from start_date to end_date containing portfolio value, cost basis, profit/loss, and profit/loss percentage for that date.
         """
         try:
-            # Adjust end_date to exclude today and yesterday (likely no market data)
-            today = date.today()
-            original_end_date = end_date
-            if end_date >= today:
-                # If end_date is today or future, set it to two days ago to ensure data availability
-                end_date = today - timedelta(days=2)
-                logger.info(f"Adjusted end_date from {original_end_date} to {end_date} for data availability")
-
-            # Get all transactions up to end_date
-            transactions_result = await self.db.execute(
-                select(CryptoTransaction)
-                .where(
-                    CryptoTransaction.portfolio_id == portfolio_id,
-                    CryptoTransaction.timestamp <= datetime.combine(end_date, datetime.max.time())
-                )
-                .order_by(CryptoTransaction.timestamp)
-            )
-            transactions = transactions_result.scalars().all()
-
-            # Get portfolio base currency
-            portfolio_result = await self.db.execute(
-                select(CryptoPortfolio).where(CryptoPortfolio.id == portfolio_id)
-            )
-            portfolio = portfolio_result.scalar_one_or_none()
-
-            if not portfolio:
-                return []
+            return [
+                point
+                async for point in self.iter_performance_history(portfolio_id, start_date, end_date)
+            ]
+        except Exception as e:
+            logger.error(f"Error calculating performance history for portfolio {portfolio_id}: {e}")
+            return []
 
-            base_currency = portfolio.base_currency.value
+    async def get_allocation_history(
+        self,
+        portfolio_id: int,
+        start_date: date,
+        end_date: date,
+        symbol: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the per-asset values stored with the portfolio's daily snapshots.
 
-            # Calculate holdings up to end_date to determine which symbols we need
-            holdings = await self._calculate_holdings(transactions)
-            symbols = list(holdings.keys())
+        One query over crypto_snapshot_holdings (primary key or symbol index),
+        joined with the snapshot totals for the allocation percentages.
 
-            # If no symbols, return empty performance data
-            if not symbols:
-                return []
+        Parameters:
+            portfolio_id (int): ID of the crypto portfolio.
+            start_date (date): Inclusive start date.
+            end_date (date): Inclusive end date.
+            symbol (Optional[str]): Restrict to one asset (its value series).
 
-            # Fetch historical prices for the entire date range to enable forward-filling
-            all_historical_prices = {}
-            if symbols:
-                # Get prices for the full date range (we'll need these for forward-filling)
-                all_historical_prices = await self._get_historical_prices(
-                    symbols,
-                    start_date,
-                    end_date,
-                    base_currency
+        Returns:
+            List[Dict[str, Any]]: Rows ordered by date then symbol with keys `date`, `symbol`,
+            `quantity`, `value_eur`, `value_usd` and `percentage` (share of the snapshot's EUR value).
+        """
+        percentage = func.coalesce(
+            CryptoSnapshotHolding.value_eur * 100 / func.nullif(CryptoPortfolioSnapshot.total_value_eur, 0),
+            0
+        )
+        query = (
+            select(
+                CryptoSnapshotHolding.snapshot_date,
+                CryptoSnapshotHolding.symbol,
+                CryptoSnapshotHolding.quantity,
+                CryptoSnapshotHolding.value_eur,
+                CryptoSnapshotHolding.value_usd,
+                percentage.label("percentage")
+            )
+            .join(
+                CryptoPortfolioSnapshot,
+                and_(
+                    CryptoPortfolioSnapshot.portfolio_id == CryptoSnapshotHolding.portfolio_id,
+                    CryptoPortfolioSnapshot.snapshot_date == CryptoSnapshotHolding.snapshot_date
                 )
+            )
+            .where(
+                CryptoSnapshotHolding.portfolio_id == portfolio_id,
+                CryptoSnapshotHolding.snapshot_date >= start_date,
+                CryptoSnapshotHolding.snapshot_date <= end_date
+            )
+            .order_by(CryptoSnapshotHolding.snapshot_date, CryptoSnapshotHolding.symbol)
+        )
+        if symbol:
+            query = query.where(CryptoSnapshotHolding.symbol == symbol.upper())
+
+        result = await self.db.execute(query)
+        return [
+            {
+                "date": row.snapshot_date,
+                "symbol": row.symbol,
+                "quantity": row.quantity,
+                "value_eur": row.value_eur,
+                "value_usd": row.value_usd,
+                "percentage": row.percentage,
+            }
+            for row in result.all()
+        ]
 
-            # Generate daily performance data
-            performance_data = []
-            current_date = start_date
-
-            # Keep track of the last known prices for forward-filling
-            last_known_prices = {}
-
-            while current_date <= end_date:
-                # Filter transactions up to current date
-                transactions_up_to_date = [
-                    tx for tx in transactions
-                    if tx.timestamp.date() <= current_date
-                ]
-
-                # Calculate holdings up to current date
-                holdings = await self._calculate_holdings(transactions_up_to_date)
+    async def iter_performance_history(
+        self,
+        portfolio_id: int,
+        start_date: date,
+        end_date: date
+    ) -> AsyncIterator[CryptoPerformanceData]:
+        """
+        Streaming variant of calculate_performance_history.
 
-                # Calculate portfolio value
-                portfolio_value = Decimal("0")
-                cost_basis = sum(h['cost_basis'] for h in holdings.values())
+        Loads transactions and prices once, then yields each day's point as the
+        sweep reaches it, so callers can start emitting before the range is done.
+        Errors propagate to the caller.
 
-                # For each symbol, try to get price for current date, or use last known price
-                for symbol, holding_data in holdings.items():
-                    symbol_prices = all_historical_prices.get(symbol, [])
-
-                    # Try to find price for current date
-                    current_price = None
-                    if symbol_prices:
-                        for price_data in symbol_prices:
-                            if price_data['date'] == current_date:
-                                current_price = price_data['price']
-                                break
-
-                    # If no price for current date, use last known price (forward-fill)
-                    if current_price is None and symbol in last_known_prices:
-                        current_price = last_known_prices[symbol]
-
-                    # If we found a price (current or forward-filled), use it
-                    if current_price is not None:
-                        portfolio_value += holding_data['quantity'] * current_price
-                        last_known_prices[symbol] = current_price
-
-                profit_loss = portfolio_value - cost_basis
-                profit_loss_pct = float(
-                    (profit_loss / cost_basis) * 100
-                ) if cost_basis > 0 else 0
-
-                # Only add performance data if we have some portfolio value or cost basis
-                if portfolio_value > 0 or cost_basis > 0:
-                    performance_data.append(CryptoPerformanceData(
-                        date=current_date,
-                        portfolio_value=portfolio_value,
-                        cost_basis=cost_basis,
-                        profit_loss=profit_loss,
-                        profit_loss_pct=profit_loss_pct,
-                        currency=base_currency
-                    ))
-
-                current_date += timedelta(days=1)
-
-            return performance_data
+        Parameters:
+            portfolio_id (int): ID of the crypto portfolio to evaluate.
+            start_date (date): Inclusive start date for the performance series.
+            end_date (date): Inclusive end date for the performance series.
 
-        except Exception as e:
-            logger.error(f"Error calculating performance history for portfolio {portfolio_id}: {e}")
-            return []
+        Yields:
+            CryptoPerformanceData for each date with a non-zero value or cost basis.
+        """
+        # Adjust end_date to exclude today and yesterday (likely no market data)
+        today = date.today()
+        original_end_date = end_date
+        if end_date >= today:
+            # If end_date is today or future, set it to two days ago to ensure data availability
+            end_date = today - timedelta(days=2)
+            logger.info(f"Adjusted end_date from {original_end_date} to {end_date} for data availability")
+
+        # Get all transactions up to end_date
+        transactions_result = await self.db.execute(
+            select(CryptoTransaction)
+            .where(
+                CryptoTransaction.portfolio_id == portfolio_id,
+                CryptoTransaction.timestamp <= datetime.combine(end_date, datetime.max.time())
+            )
+            .order_by(CryptoTransaction.timestamp)
+        )
+        transactions = transactions_result.scalars().all()
+
+        # Get portfolio base currency
+        portfolio_result = await self.db.execute(
+            select(CryptoPortfolio).where(CryptoPortfolio.id == portfolio_id)
+        )
+        portfolio = portfolio_result.scalar_one_or_none()
+
+        if not portfolio:
+            return
+
+        base_currency = portfolio.base_currency.value
+
+        # Calculate holdings up to end_date to determine which symbols we need
+        holdings = await self._calculate_holdings(transactions)
+        symbols = list(holdings.keys())
+
+        # If no symbols, there is no performance data
+        if not symbols:
+            return
+
+        # Get prices for the full date range (forward-filled during the sweep)
+        all_historical_prices = await self._get_historical_prices(
+            symbols,
+            start_date,
+            end_date,
+            base_currency
+        )
+
+        for point in sweep_performance(
+            transactions, all_historical_prices, start_date, end_date, base_currency
+        ):
+            yield point
 
     async def _calculate_holdings(self, transactions: List[CryptoTransaction]) -> Dict[str, Dict]:
         """
@@ -568,8 +721,8 @@ class CryptoCalculationService:
                 # Construct ticker with target currency
                 yahoo_symbol = f"{symbol}-{currency.upper()}"
 
-                # Use Yahoo Finance to fetch current price
-                price_data = price_fetcher.fetch_realtime_price(yahoo_symbol)
+                # Served from the shared quote cache; the provider call blocks, so run it on the provider executor
+                price_data = await provider_executor.run(price_fetcher.fetch_realtime_price, yahoo_symbol)
 
                 if price_data and price_data.get('current_price'):
                     price = price_data['current_price']
@@ -597,13 +750,13 @@ class CryptoCalculationService:
         currency: str
     ) -> Dict[str, List[Dict]]:
         """
-        Fetch historical price series for multiple symbols from Yahoo Finance and convert prices to the requested currency.
+        Load historical price series for multiple symbols in the requested currency.
 
         Parameters:
             symbols (List[str]): Crypto symbols to fetch (e.g., "BTC", "ETH").
             start_date (date): Inclusive start date for historical data.
             end_date (date): Inclusive end date for historical data.
-            currency (str): Target currency for returned prices; case-insensitive. If 'EUR', USD prices are converted to EUR using the service's USD→EUR rate; otherwise prices are returned in USD.
+            currency (str): Currency of the stored series to read (e.g. 'EUR' reads BTC-EUR); case-insensitive.
 
         Returns:
             Dict[str, List[Dict]]: Mapping from symbol to a list of price records. Each record contains:
@@ -611,49 +764,42 @@ class CryptoCalculationService:
                 - 'symbol' (str): The original symbol.
                 - 'price' (Decimal/float): Price in the requested currency.
                 - 'currency' (str): Currency code of 'price' ('EUR' or 'USD').
-                - 'price_usd' (Decimal/float): The original USD close price from the source.
+                - 'price_usd' (Decimal/float): The close when the series is in USD, else None.
                 - 'timestamp' (datetime): Retrieval timestamp (UTC).
                 - 'source' (str): Data source identifier ('yahoo').
 
         Notes:
-            If no data is available for the requested range, tries to fetch a wider range to get some data.
+            Prices are served from the local PriceHistory table; only missing days are fetched
+            from Yahoo Finance (see CryptoPriceResolver).
         """
-        prices = {}
-        price_fetcher = PriceFetcher()
-
-        # Fetch prices in target currency using currency-aware tickers
-        for symbol in symbols:
-            try:
-                # Construct ticker with target currency
-                yahoo_symbol = f"{symbol}-{currency.upper()}"
-
-                # Use Yahoo Finance to fetch historical prices
-                price_data = await PriceFetcher.fetch_historical_prices(
-                    yahoo_symbol,
-                    start_date=start_date,
-                    end_date=end_date
-                )
+        resolver = CryptoPriceResolver(self.db)
+        try:
+            history = await resolver.get_history(symbols, start_date, end_date, currency)
+        except Exception as e:
+            logger.warning(f"Error getting historical prices for {symbols} in {currency.upper()}: {e}")
+            return {}
 
-                if price_data:
-                    # Format to match expected structure
-                    formatted_data = []
-                    for data_point in price_data:
-                        formatted_data.append({
-                            'date': data_point['date'],
-                            'symbol': symbol,
-                            'price': data_point['close'],
-                            'currency': currency.upper(),
-                            'price_usd': data_point.get('price_usd', data_point['close']),
-                            'timestamp': datetime.utcnow(),
-                            'source': 'yahoo'
-                        })
+        is_usd = currency.upper() == "USD"
+        prices = {}
+        for symbol, points in history.items():
+            # Format to match expected structure
+            prices[symbol] = [
+                {
+                    'date': data_point['date'],
+                    'symbol': symbol,
+                    'price': data_point['close'],
+                    'currency': currency.upper(),
+                    # Only a USD series carries a USD close; EUR closes are not relabelled
+                    'price_usd': data_point['close'] if is_usd else None,
+                    'timestamp': datetime.utcnow(),
+                    'source': data_point['source']
+                }
+                for data_point in points
+            ]
+            logger.info(f"Found {len(points)} price points for {symbol} in {currency.upper()}")
 
-                    prices[symbol] = formatted_data
-                    logger.info(f"Found {len(formatted_data)} price points for {symbol} in {currency.upper()}")
-                else:
-                    logger.warning(f"No historical data available for {symbol}-{currency.upper()}")
-            except Exception as e:
-                logger.warning(f"Error getting historical prices for {symbol}-{currency.upper()}: {e}")
+        for symbol in set(symbols) - set(prices):
+            logger.warning(f"No historical data available for {symbol}-{currency.upper()}")
 
         return prices
 
@@ -684,7 +830,7 @@ class CryptoCalculationService:
         """
         Compute the portfolio's internal rate of return (IRR) from transaction cash flows and current value.
 
-        Builds cash flows from transactions (treats BUY as cash outflow, SELL as cash inflow, skips transfers), appends the provided current_value as the final cash inflow dated today, and computes the IRR on the resulting ordered cash flows.
+        Builds cash flows from transactions (treats BUY as cash outflow, SELL as cash inflow, skips transfers), appends the provided current_value as the final cash inflow dated today, and computes the date-aware XIRR (FinancialCalculations.calculate_irr).
 
         Parameters:
             transactions (List[CryptoTransaction]): Chronological list of portfolio transactions used to build cash flows.
@@ -694,41 +840,26 @@ class CryptoCalculationService:
             Optional[float]: IRR expressed as a percentage (e.g., 12.5 for 12.5%), or `None` if there are no cash flows or the IRR cannot be computed.
         """
         try:
-            # Prepare cash flows
+            # Prepare dated cash flows
             cash_flows = []
-            dates = []
 
-            # Add transactions
             for tx in transactions:
                 if tx.transaction_type == CryptoTransactionType.BUY:
-                    cash_flows.append(-float(tx.total_amount))
+                    cash_flows.append((tx.timestamp.date(), -tx.total_amount))
                 elif tx.transaction_type == CryptoTransactionType.SELL:
-                    cash_flows.append(float(tx.total_amount))
-                else:
-                    continue  # Skip transfers for IRR calculation
-
-                dates.append(tx.timestamp.date())
+                    cash_flows.append((tx.timestamp.date(), tx.total_amount))
+                # Skip transfers for IRR calculation
 
             if not cash_flows:
                 return None
 
-            # Add current value
-            cash_flows.append(float(current_value))
-            dates.append(date.today())
-
-            # Sort by date
-            sorted_data = sorted(zip(dates, cash_flows), key=lambda x: x[0])
-            sorted_dates = [d for d, _ in sorted_data]
-            sorted_flows = [cf for _, cf in sorted_data]
-
-            # Calculate IRR using numpy_financial
-            try:
-                irr_decimal = npf.irr(sorted_flows)
-                irr_percentage = irr_decimal * 100
-                return irr_percentage
-            except Exception as e:
-                logger.warning(f"Error calculating IRR: {e}")
-                return None
+            # Date-aware XIRR with the current value as the final inflow today
+            irr_decimal = FinancialCalculations.calculate_irr(
+                cash_flows=cash_flows,
+                current_value=current_value,
+                current_date=date.today()
+            )
+            return irr_decimal * 100 if irr_decimal is not None else None
 
         except Exception as e:
             logger.error(f"Error in IRR calculation: {e}")
@@ -0,0 +1,244 @@
+"""
+Local-first historical price resolver for crypto symbols.
+
+Serves daily closes from the PriceHistory table (tickers stored as
+"<SYMBOL>-<CURRENCY>", e.g. BTC-EUR) and only goes to Yahoo Finance for the
+calendar days that are missing locally:
+
+- A ticker with no local rows in the requested range is fetched in a single
+  call covering its gaps, persisted, and returned in the same request.
+- A ticker with partial coverage is served from the database right away and
+  its gaps are handed to the backfill_crypto_prices Celery task.
+
+Each gap is attempted at most once per GAP_RETRY_SECONDS (tracked in Redis),
+so days Yahoo cannot provide (e.g. before a coin was listed) do not trigger a
+fetch on every request. Without Redis the attempts are remembered per process.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models import PriceHistory
+from app.services.cache import cache
+from app.services.cache_generations import CacheGenerations, PRICES
+from app.services.latest_prices import LatestPriceService
+from app.services.price_fetcher import PriceFetcher
+from app.services.price_matrix import price_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def missing_ranges(present: Iterable[date], start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """
+    Return the inclusive (start, end) runs of calendar days absent from present.
+
+    Args:
+        present: Dates that already have a close
+        start_date: First date of the window
+        end_date: Last date of the window
+
+    Returns:
+        Sorted list of contiguous missing ranges
+    """
+    present = set(present)
+    ranges: List[Tuple[date, date]] = []
+    run_start: Optional[date] = None
+    current = start_date
+
+    while current <= end_date:
+        if current in present:
+            if run_start is not None:
+                ranges.append((run_start, current - timedelta(days=1)))
+                run_start = None
+        elif run_start is None:
+            run_start = current
+        current += timedelta(days=1)
+
+    if run_start is not None:
+        ranges.append((run_start, end_date))
+    return ranges
+
+
+class CryptoPriceResolver:
+    """Resolve crypto close history from PriceHistory, filling gaps from Yahoo."""
+
+    # Do not retry the same gap more often than this
+    GAP_RETRY_SECONDS = 6 * 3600
+
+    # Fallback attempt log (gap key -> monotonic time) when Redis is unavailable
+    _local_attempts: Dict[str, float] = {}
+
+    def __init__(self, db: AsyncSession):
+        """
+        Args:
+            db: Async database session used for reads; fetched closes are
+                written through a session of their own
+        """
+        self.db = db
+
+    async def get_history(
+        self,
+        symbols: Iterable[str],
+        start_date: date,
+        end_date: date,
+        currency: str,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Return daily closes per symbol for [start_date, end_date].
+
+        Args:
+            symbols: Crypto symbols (e.g. "BTC")
+            start_date: Inclusive start date
+            end_date: Inclusive end date
+            currency: Quote currency of the stored ticker (e.g. "EUR")
+
+        Returns:
+            Dict symbol -> [{'date', 'close', 'source'}] sorted by date. Symbols
+            without any data are omitted.
+        """
+        currency = currency.upper()
+        tickers = {f"{symbol}-{currency}": symbol for symbol in sorted(set(symbols))}
+        if not tickers:
+            return {}
+
+        history = await self._load_local(list(tickers), start_date, end_date)
+
+        # Today's close is not final yet, so it never counts as a gap
+        gap_end = min(end_date, date.today() - timedelta(days=1))
+        blocking: Dict[str, List[Tuple[date, date]]] = {}
+        background: Dict[str, List[Tuple[date, date]]] = {}
+
+        for ticker in tickers:
+            rows = history.get(ticker, [])
+            gaps = [
+                gap for gap in missing_ranges((row['date'] for row in rows), start_date, gap_end)
+                if await self._claim_gap(ticker, gap)
+            ]
+            if not gaps:
+                continue
+            if rows:
+                background[ticker] = gaps
+            else:
+                blocking[ticker] = gaps
+
+        if blocking:
+            await self._fetch_and_store(blocking)
+            history.update(await self._load_local(list(blocking), start_date, end_date))
+
+        for ticker, gaps in background.items():
+            self._schedule_backfill(tickers[ticker], currency, gaps)
+
+        return {tickers[ticker]: rows for ticker, rows in history.items() if rows}
+
+    async def _load_local(self, tickers: List[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        """Load stored closes for tickers in one query."""
+        result = await self.db.execute(
+            select(PriceHistory.ticker, PriceHistory.date, PriceHistory.close, PriceHistory.source)
+            .where(
+                PriceHistory.ticker.in_(tickers),
+                PriceHistory.date >= start_date,
+                PriceHistory.date <= end_date
+            )
+            .order_by(PriceHistory.ticker, PriceHistory.date)
+        )
+
+        history: Dict[str, List[Dict]] = {}
+        for ticker, price_date, close, source in result.all():
+            history.setdefault(ticker, []).append({'date': price_date, 'close': close, 'source': source})
+        return history
+
+    async def _fetch_and_store(self, gaps_by_ticker: Dict[str, List[Tuple[date, date]]]) -> None:
+        """
+        Fetch each ticker's gap span in one Yahoo call and persist the closes.
+
+        The closes are written and committed through a dedicated session, so the
+        caller's (request-scoped) session is never committed from a read path.
+        """
+        rows_by_ticker: Dict[str, List[Dict]] = {}
+
+        for ticker, gaps in gaps_by_ticker.items():
+            span_start, span_end = gaps[0][0], gaps[-1][1]
+            try:
+                prices = await PriceFetcher.fetch_historical_prices(
+                    ticker,
+                    start_date=span_start,
+                    end_date=span_end
+                )
+            except Exception as e:
+                logger.warning(f"Error fetching historical prices for {ticker}: {e}")
+                continue
+
+            rows = [
+                {
+                    'ticker': ticker,
+                    'date': p['date'],
+                    'open': p.get('open', p['close']),
+                    'high': p.get('high', p['close']),
+                    'low': p.get('low', p['close']),
+                    'close': p['close'],
+                    'volume': p.get('volume', 0) or 0,
+                    'source': p.get('source', 'yahoo'),
+                }
+                for p in prices or []
+                if p.get('close') is not None and span_start <= p['date'] <= span_end
+            ]
+            if not rows:
+                logger.warning(f"No historical data available for {ticker} between {span_start} and {span_end}")
+                continue
+            rows_by_ticker[ticker] = rows
+
+        if not rows_by_ticker:
+            return
+
+        fetched = list(rows_by_ticker)
+        async with AsyncSessionLocal() as write_db:
+            for ticker, rows in rows_by_ticker.items():
+                await write_db.execute(
+                    pg_insert(PriceHistory).values(rows).on_conflict_do_nothing(constraint='uix_ticker_date')
+                )
+                logger.info(f"Stored {len(rows)} missing price points for {ticker}")
+            await write_db.run_sync(LatestPriceService.refresh, fetched)
+            await write_db.commit()
+
+        price_matrix.invalidate(fetched)
+        await CacheGenerations.bump_async(PRICES)
+
+    @staticmethod
+    def _schedule_backfill(symbol: str, currency: str, gaps: List[Tuple[date, date]]) -> None:
+        """Queue one background backfill covering all gaps of a ticker."""
+        try:
+            from app.tasks.update_crypto_prices import backfill_crypto_prices
+            backfill_crypto_prices.delay(
+                symbol,
+                gaps[0][0].isoformat(),
+                (gaps[-1][1] + timedelta(days=1)).isoformat(),
+                currency
+            )
+            logger.info(f"Scheduled price backfill for {symbol}-{currency}: {len(gaps)} gaps from {gaps[0][0]}")
+        except Exception as e:
+            logger.error(f"Failed to schedule price backfill for {symbol}-{currency}: {e}")
+
+    @classmethod
+    async def _claim_gap(cls, ticker: str, gap: Tuple[date, date]) -> bool:
+        """Return True if this gap has not been attempted recently, and mark it as attempted."""
+        key = f"crypto_price_gap:{ticker}:{gap[0].isoformat()}:{gap[1].isoformat()}"
+        if cache.available:
+            # One atomic SET NX EX, so concurrent workers cannot both claim the gap
+            try:
+                return bool(await cache.async_client().set(key, "1", nx=True, ex=cls.GAP_RETRY_SECONDS))
+            except Exception as e:
+                logger.debug(f"Gap claim failed for {key}: {e}")
+                return True
+
+        now = time.monotonic()
+        attempted_at = cls._local_attempts.get(key)
+        if attempted_at is not None and now - attempted_at < cls.GAP_RETRY_SECONDS:
+            return False
+        cls._local_attempts[key] = now
+        return True
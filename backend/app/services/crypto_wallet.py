@@ -18,6 +18,8 @@ from sqlalchemy import select, func, and_, or_
 from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransactionType, CryptoCurrency
 from app.services.blockchain_fetcher import blockchain_fetcher
 from app.services.blockchain_deduplication import blockchain_deduplication
+from app.services.cache_generations import CacheGenerations, crypto
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_CRYPTO_PORTFOLIO
 
 logger = logging.getLogger(__name__)
 
@@ -440,7 +442,11 @@ class CryptoWalletService:
                     continue
 
             # Commit all transactions
+            if imported_count:
+                await self.db.run_sync(MetricsDirtyTracker.mark, SCOPE_CRYPTO_PORTFOLIO, [portfolio_id])
             await self.db.commit()
+            if imported_count:
+                await CacheGenerations.bump_async(crypto(portfolio_id))
 
             return {
                 "success": True,
@@ -7,16 +7,11 @@ Uses Yahoo Finance as the primary data source via the PriceFetcher service.
 from decimal import Decimal
 from typing import Optional
 import logging
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 from app.services.price_fetcher import PriceFetcher
 
 logger = logging.getLogger(__name__)
 
-# Thread pool executor for running sync functions in async contexts
-_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="currency_converter")
-
 
 def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
     """
@@ -36,6 +31,8 @@ def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
     Raises:
         ValueError: If the exchange rate cannot be fetched or is invalid.
 
+    This call blocks; coroutines should await get_exchange_rate_async instead.
+
     Example:
         >>> rate = get_exchange_rate("USD", "EUR")
         >>> # If rate is 0.92, then 1 USD = 0.92 EUR
@@ -52,16 +49,7 @@ def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
         # Note: Yahoo Finance uses base/quote format, so we need to call it with from_currency as base
         logger.info(f"Fetching exchange rate: {from_currency} -> {to_currency}")
 
-        # Check if we're in an async context
-        try:
-            loop = asyncio.get_running_loop()
-            # We're in an async context - submit to executor to run in a separate thread
-            # This avoids "Cannot run the event loop while another loop is running" error
-            future = _executor.submit(_fetch_rate_sync, from_currency, to_currency)
-            rate = future.result(timeout=30)  # concurrent.futures.Future supports timeout
-        except RuntimeError:
-            # No running loop, safe to use synchronous call directly
-            rate = _fetch_rate_sync(from_currency, to_currency)
+        rate = _fetch_rate_sync(from_currency, to_currency)
 
         if rate is None:
             raise ValueError(f"Failed to fetch exchange rate for {from_currency}/{to_currency}")
@@ -74,9 +62,40 @@ def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
         raise ValueError(f"Failed to fetch exchange rate for {from_currency}/{to_currency}: {e}")
 
 
+async def get_exchange_rate_async(from_currency: str, to_currency: str) -> Decimal:
+    """
+    Non-blocking get_exchange_rate for coroutines.
+
+    Parameters:
+        from_currency (str): Source currency code (e.g., "USD", "EUR", "GBP").
+        to_currency (str): Target currency code (e.g., "USD", "EUR", "GBP").
+
+    Returns:
+        Decimal: Exchange rate where 1 unit of from_currency equals this many units of to_currency.
+
+    Raises:
+        ValueError: If the exchange rate cannot be fetched or is invalid.
+    """
+    if from_currency == to_currency:
+        logger.debug(f"Same currency conversion requested: {from_currency}")
+        return Decimal("1.0")
+
+    logger.info(f"Fetching exchange rate: {from_currency} -> {to_currency}")
+    rate = await _fetch_rate_async(from_currency, to_currency)
+
+    if rate is None:
+        logger.error(f"Error fetching exchange rate {from_currency}/{to_currency}")
+        raise ValueError(f"Failed to fetch exchange rate for {from_currency}/{to_currency}")
+
+    logger.info(f"Exchange rate {from_currency}/{to_currency}: {rate}")
+    return rate
+
+
 def _fetch_rate_sync(from_currency: str, to_currency: str) -> Optional[Decimal]:
     """
-    Synchronous version of the rate fetch function for use in ThreadPoolExecutor.
+    Internal blocking helper to fetch exchange rate from Yahoo Finance.
+
+    Runs on the shared provider executor.
 
     Parameters:
         from_currency (str): Source currency code.
@@ -86,16 +105,7 @@ def _fetch_rate_sync(from_currency: str, to_currency: str) -> Optional[Decimal]:
         Optional[Decimal]: Exchange rate or None if unavailable.
     """
     try:
-        # Create a new event loop in this thread
-        import asyncio
-        new_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(new_loop)
-        try:
-            result = new_loop.run_until_complete(_fetch_rate_async(from_currency, to_currency))
-            return result
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
+        return PriceFetcher.fetch_fx_rate_sync(base=from_currency, quote=to_currency)
     except Exception as e:
         logger.error(f"Error in sync rate fetch: {e}")
         return None
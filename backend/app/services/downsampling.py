@@ -0,0 +1,156 @@
+"""
+Downsampling of daily time series for charts.
+
+Long ranges (ALL is thousands of daily points) are reduced before they are
+serialized:
+
+    resolution  calendar bucketing: "weekly"/"monthly" keep the last point of
+                each ISO week / month (the period close), plus the first point
+                so the range still starts where it did
+    max_points  LTTB (largest-triangle-three-buckets): keeps the points that
+                preserve the visual shape, always including the first and last
+
+Both return indices into the original series, so every column of a multi-
+column series (values, cost basis, benchmark, ...) is reduced consistently.
+
+Usage:
+    indices = downsample_indices(dates, values, max_points=500, resolution="weekly")
+    points = take(points, indices)
+"""
+from datetime import date
+from typing import List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+RESOLUTIONS = (DAILY, WEEKLY, MONTHLY)
+
+# Query parameter pattern for endpoints accepting a resolution
+RESOLUTION_PATTERN = f"^({'|'.join(RESOLUTIONS)})$"
+
+# LTTB needs the two endpoints plus at least one bucket
+MIN_POINTS = 3
+# Upper bound of max_points query parameters (~13 years of daily points)
+MAX_POINTS = 5000
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], max_points: int) -> np.ndarray:
+    """
+    Select at most max_points indices of (x, y) with largest-triangle-three-buckets.
+
+    The points between the first and last are split into max_points - 2
+    buckets; from each bucket the point forming the largest triangle with the
+    previously selected point and the average of the next bucket is kept.
+
+    Args:
+        x: Ascending x coordinates (e.g. date ordinals)
+        y: Values
+        max_points: Maximum number of points to keep (>= 3)
+
+    Returns:
+        Ascending array of selected indices
+    """
+    n = len(y)
+    if max_points < MIN_POINTS or n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i is [edges[i], edges[i + 1]); n > max_points keeps every bucket non-empty
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The last bucket looks ahead to the final point only
+        next_start, next_end = (end, edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Twice the triangle areas; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def calendar_bucket_indices(dates: Sequence[date], resolution: str) -> np.ndarray:
+    """
+    Select the first point and the last point of each calendar period.
+
+    Args:
+        dates: Ascending dates
+        resolution: "daily", "weekly" (ISO weeks) or "monthly"
+
+    Returns:
+        Ascending array of selected indices
+
+    Raises:
+        ValueError: If resolution is not one of RESOLUTIONS
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected one of {', '.join(RESOLUTIONS)}")
+
+    n = len(dates)
+    if resolution == DAILY or n <= 1:
+        return np.arange(n)
+
+    if resolution == WEEKLY:
+        ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=n)
+        # date.fromordinal(1) is a Monday, so this numbers ISO weeks
+        periods = (ordinals - 1) // 7
+    else:
+        periods = np.fromiter((d.year * 12 + d.month for d in dates), dtype=np.int64, count=n)
+
+    is_period_close = np.empty(n, dtype=bool)
+    is_period_close[:-1] = periods[1:] != periods[:-1]
+    is_period_close[-1] = True
+    is_period_close[0] = True
+    return np.flatnonzero(is_period_close)
+
+
+def downsample_indices(
+    dates: Sequence[date],
+    values: Sequence[float],
+    max_points: Optional[int] = None,
+    resolution: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Select the indices to keep from a daily series.
+
+    Calendar bucketing is applied first; if more than max_points remain, LTTB
+    reduces them further (over the date axis, so irregular gaps are honoured).
+
+    Args:
+        dates: Ascending dates
+        values: Value driving the LTTB selection (e.g. total portfolio value)
+        max_points: Maximum number of points, or None for no limit
+        resolution: Calendar resolution, or None for daily
+
+    Returns:
+        Ascending array of selected indices
+    """
+    indices = calendar_bucket_indices(dates, resolution or DAILY)
+    if max_points is None or len(indices) <= max_points:
+        return indices
+
+    ordinals = np.fromiter((dates[i].toordinal() for i in indices), dtype=np.float64, count=len(indices))
+    y = np.asarray([float(values[i]) for i in indices], dtype=np.float64)
+    return indices[lttb_indices(ordinals, y, max_points)]
+
+
+def take(items: Sequence[T], indices: np.ndarray) -> List[T]:
+    """Return the items at indices, in order."""
+    return [items[i] for i in indices]
@@ -0,0 +1,428 @@
+"""
+FX history - Stored daily exchange rates with vectorized as-of conversion.
+
+Historical conversions used the current rate (FXRateService) or a live rate
+fetched per backfill (PriceHistoryManager), which was both slow and wrong for
+past dates. Now:
+
+- fx_rates holds one daily close per currency pair, stored once in
+  alphabetical order (EUR/USD); the reverse direction is the inverse.
+- sync() downloads only the days a pair is missing, all pairs with the same
+  missing span in one multi-symbol request, and writes them with bulk upserts.
+- Each pair is preloaded into an FXSeries: a dense array with one
+  forward-filled rate per calendar day, so an as-of lookup is an index
+  computation and convert_series() converts a whole price column at once.
+
+Series are cached per process like price_matrix: sync() bumps a per-pair
+version in Redis so other processes reload the pair on their next read, and
+without Redis cached series expire after FALLBACK_TTL_SECONDS.
+
+Usage:
+    closes_eur = fx_history.convert_series(db, closes, dates, "USD", "EUR")
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SyncSessionLocal
+from app.models import FXRate
+from app.services.cache import cache
+from app.services.cache_generations import CacheGenerations, FX
+from app.services.price_fetcher import PriceFetcher
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+# Default depth of a pair's history when it is first synced
+HISTORY_YEARS = 5
+
+
+class FXSeries(NamedTuple):
+    """Daily rates of one pair, forward-filled over every calendar day."""
+    start: int  # date.toordinal() of rates[0]
+    rates: np.ndarray  # float64, one rate per day from start
+
+    @property
+    def first_date(self) -> date:
+        return date.fromordinal(self.start)
+
+    @property
+    def last_date(self) -> date:
+        return date.fromordinal(self.start + len(self.rates) - 1)
+
+    def rates_on(self, dates: Sequence[date]) -> np.ndarray:
+        """
+        Return the rate as of each date.
+
+        Dates before the first stored day use the first rate, dates after the
+        last stored day use the last rate.
+        """
+        offsets = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)) - self.start
+        return self.rates[np.clip(offsets, 0, len(self.rates) - 1)]
+
+    def rate_on(self, day: date) -> float:
+        """Return the rate as of a single date."""
+        return float(self.rates[min(max(day.toordinal() - self.start, 0), len(self.rates) - 1)])
+
+    def inverse(self) -> "FXSeries":
+        """Series of the reverse direction."""
+        return FXSeries(self.start, 1.0 / self.rates)
+
+    @classmethod
+    def from_rows(cls, days: Sequence[date], rates: Sequence[float]) -> "FXSeries":
+        """Build a series from stored (date ascending) rates, filling the days in between."""
+        ordinals = np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+        values = np.asarray(rates, dtype=np.float64)
+        # Index of the last stored rate on or before each calendar day
+        filled = np.zeros(ordinals[-1] - ordinals[0] + 1, dtype=np.int64)
+        filled[ordinals - ordinals[0]] = np.arange(len(ordinals))
+        np.maximum.accumulate(filled, out=filled)
+        return cls(int(ordinals[0]), values[filled])
+
+
+class _SyncAttempt(NamedTuple):
+    at: float  # time.monotonic()
+    start_date: date
+    complete: bool  # the synced series covered start_date and was fresh
+
+
+class FXHistoryService:
+    """Keep fx_rates up to date and serve preloaded per-pair series."""
+
+    # Redis hash mapping "BASEQUOTE" -> version, bumped by sync()
+    VERSIONS_KEY = "fx_history:versions"
+
+    # Lifetime of a cached series when versions cannot be checked in Redis
+    FALLBACK_TTL_SECONDS = 300
+
+    # A series is up to date when it reaches this close to today (weekends)
+    STALE_DAYS = 3
+
+    # Minimum delay before a process retries syncing a pair the provider could not complete
+    SYNC_RETRY_SECONDS = 3600
+
+    INSERT_BATCH_SIZE = 5000  # rows per INSERT statement
+
+    def __init__(self, price_fetcher: Optional[PriceFetcher] = None):
+        self.price_fetcher = price_fetcher or PriceFetcher()
+        self._series: Dict[Pair, Optional[FXSeries]] = {}
+        self._versions: Dict[Pair, Optional[str]] = {}
+        self._loaded_at: Dict[Pair, float] = {}
+        self._sync_attempts: Dict[Pair, _SyncAttempt] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical_pair(base: str, quote: str) -> Pair:
+        """Return the stored (alphabetical) order of a currency pair."""
+        first, second = sorted((base.upper(), quote.upper()))
+        return first, second
+
+    @staticmethod
+    def pair_symbol(pair: Pair) -> str:
+        """Yahoo Finance symbol of a stored pair (e.g. EURUSD=X)."""
+        return f"{pair[0]}{pair[1]}=X"
+
+    # Download
+
+    def sync(
+        self,
+        db: Session,
+        pairs: Iterable[Pair],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[Pair, int]:
+        """
+        Download the days missing from fx_rates for pairs and commit.
+
+        A pair without stored rates, or with rates starting after start_date,
+        is downloaded over the whole range; otherwise only from its last
+        stored day (re-fetched, it may have been written before the close).
+
+        Args:
+            db: Synchronous database session
+            pairs: (base, quote) pairs in either direction
+            start_date: Inclusive start (defaults to HISTORY_YEARS ago)
+            end_date: Inclusive end (defaults to today)
+
+        Returns:
+            Dict mapping stored pairs to the number of rates written
+        """
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=HISTORY_YEARS * 365)
+        pairs = sorted({self.canonical_pair(*pair) for pair in pairs if pair[0].upper() != pair[1].upper()})
+        if not pairs:
+            return {}
+
+        bounds = {
+            (base, quote): (first, last)
+            for base, quote, first, last in db.execute(
+                select(FXRate.base, FXRate.quote, func.min(FXRate.date), func.max(FXRate.date))
+                .where(tuple_(FXRate.base, FXRate.quote).in_(pairs))
+                .group_by(FXRate.base, FXRate.quote)
+            ).all()
+        }
+
+        # Missing span -> pairs; pairs sharing a span share one download
+        groups: Dict[Tuple[date, date], List[Pair]] = {}
+        for pair in pairs:
+            first, last = bounds.get(pair, (None, None))
+            if first is None or start_date < first:
+                span = (start_date, end_date)
+            elif last < end_date:
+                span = (last, end_date)
+            else:
+                continue
+            groups.setdefault(span, []).append(pair)
+
+        now = datetime.utcnow()
+        rows = []
+        for (span_start, span_end), span_pairs in groups.items():
+            logger.info(f"Downloading FX history for {len(span_pairs)} pairs ({span_start} to {span_end})")
+            fetched = self.price_fetcher.fetch_historical_prices_batch_sync(
+                [(self.pair_symbol(pair), None) for pair in span_pairs], span_start, span_end
+            )
+            for pair in span_pairs:
+                rows.extend(
+                    {
+                        "base": pair[0],
+                        "quote": pair[1],
+                        "date": record["date"],
+                        "rate": record["close"],
+                        "source": record.get("source", "yahoo"),
+                        "updated_at": now,
+                    }
+                    for record in fetched.get(self.pair_symbol(pair), [])
+                    if record.get("close")
+                )
+
+        written = self.upsert_rates(db, rows)
+        db.commit()
+        if written:
+            self.invalidate(written)
+            CacheGenerations.bump(FX)
+        logger.info(f"FX history sync wrote {len(rows)} rates for {len(written)} of {len(pairs)} pairs")
+        return written
+
+    @classmethod
+    def upsert_rates(cls, db: Session, rows: List[Dict]) -> Dict[Pair, int]:
+        """
+        Write fx_rates rows in bulk, overwriting stored days. The caller commits.
+
+        Returns:
+            Dict mapping stored pairs to the number of rows written
+        """
+        # One row per (base, quote, date): ON CONFLICT DO UPDATE cannot touch a row twice
+        rows = list({(row["base"], row["quote"], row["date"]): row for row in rows}.values())
+
+        written: Dict[Pair, int] = {}
+        for start in range(0, len(rows), cls.INSERT_BATCH_SIZE):
+            batch = rows[start:start + cls.INSERT_BATCH_SIZE]
+            stmt = pg_insert(FXRate).values(batch)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["base", "quote", "date"],
+                set_={
+                    "rate": stmt.excluded.rate,
+                    "source": stmt.excluded.source,
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            ))
+            for row in batch:
+                pair = (row["base"], row["quote"])
+                written[pair] = written.get(pair, 0) + 1
+        return written
+
+    # Series
+
+    def series(
+        self,
+        db: Session,
+        base: str,
+        quote: str,
+        start_date: Optional[date] = None
+    ) -> Optional[FXSeries]:
+        """
+        Return the rate series of base -> quote, syncing it first if needed.
+
+        The pair is synced when it has no stored rates, starts more than
+        STALE_DAYS after start_date or ends more than STALE_DAYS before today
+        (at most once per pair and SYNC_RETRY_SECONDS per process, so pairs
+        the provider cannot complete do not trigger a download on every call;
+        only a complete sync lets an earlier start_date sync again within the
+        window).
+        The sync commits in its own session; the caller's transaction is left
+        untouched.
+
+        Args:
+            db: Synchronous database session (read only)
+            base: Currency converted from
+            quote: Currency converted to
+            start_date: First date the caller needs rates for
+
+        Returns:
+            FXSeries (1 base = rate quote), or None if no rates are available
+        """
+        pair = self.canonical_pair(base, quote)
+        series = self._load(db, pair)
+
+        wanted_start = start_date or date.today()
+        if self._is_missing(series, wanted_start) and self._should_sync(pair, wanted_start):
+            sync_db = SyncSessionLocal()
+            try:
+                self.sync(sync_db, [pair], start_date=min(wanted_start, series.first_date) if series else start_date)
+            except Exception as e:
+                sync_db.rollback()
+                logger.warning(f"FX history sync failed for {pair[0]}/{pair[1]}: {e}")
+            else:
+                series = self._load(db, pair)
+                if not self._is_missing(series, wanted_start):
+                    self._sync_completed(pair)
+            finally:
+                sync_db.close()
+
+        if series is None:
+            return None
+        return series if pair == (base.upper(), quote.upper()) else series.inverse()
+
+    def rate_on(self, db: Session, base: str, quote: str, day: date) -> Optional[float]:
+        """Return the base -> quote rate as of day, or None if no rates are available."""
+        if base.upper() == quote.upper():
+            return 1.0
+        series = self.series(db, base, quote, start_date=day)
+        return series.rate_on(day) if series is not None else None
+
+    def convert_series(
+        self,
+        db: Session,
+        values: Sequence[float],
+        dates: Sequence[date],
+        from_currency: str,
+        to_currency: str
+    ) -> np.ndarray:
+        """
+        Convert a column of amounts, each at the rate as of its date.
+
+        Args:
+            db: Synchronous database session
+            values: Amounts in from_currency
+            dates: Date of each amount (any order)
+            from_currency: Source currency code
+            to_currency: Target currency code
+
+        Returns:
+            float64 array of amounts in to_currency
+
+        Raises:
+            ValueError: If no rates are available for the pair
+        """
+        amounts = np.asarray(values, dtype=np.float64)
+        if from_currency.upper() == to_currency.upper() or not len(dates):
+            return amounts
+
+        series = self.series(db, from_currency, to_currency, start_date=min(dates))
+        if series is None:
+            raise ValueError(f"No FX history available for {from_currency}/{to_currency}")
+        return amounts * series.rates_on(dates)
+
+    def invalidate(self, pairs: Iterable[Pair]) -> None:
+        """Drop cached series of pairs here and in other processes."""
+        pairs = sorted(set(pairs))
+        with self._lock:
+            for pair in pairs:
+                self._series.pop(pair, None)
+                self._versions.pop(pair, None)
+                self._loaded_at.pop(pair, None)
+
+        if pairs and cache.available:
+            try:
+                pipe = cache.redis_client.pipeline(transaction=False)
+                for pair in pairs:
+                    pipe.hincrby(self.VERSIONS_KEY, "".join(pair), 1)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to publish FX history invalidation for {pairs}: {e}")
+
+    def clear(self) -> None:
+        """Drop every cached series and sync attempt in this process."""
+        with self._lock:
+            self._series.clear()
+            self._versions.clear()
+            self._loaded_at.clear()
+            self._sync_attempts.clear()
+
+    def _is_missing(self, series: Optional[FXSeries], start_date: date) -> bool:
+        """Whether series lacks rates from start_date or is behind today."""
+        return (
+            series is None
+            or series.first_date > start_date + timedelta(days=self.STALE_DAYS)
+            or series.last_date < date.today() - timedelta(days=self.STALE_DAYS)
+        )
+
+    def _should_sync(self, pair: Pair, start_date: date) -> bool:
+        """
+        Record a sync attempt of pair from start_date, unless one was made recently.
+
+        A recent failed or incomplete attempt blocks every retry of the pair;
+        a recent complete one only those not reaching further back.
+        """
+        now = time.monotonic()
+        with self._lock:
+            attempt = self._sync_attempts.get(pair)
+            if attempt is not None and now - attempt.at < self.SYNC_RETRY_SECONDS:
+                if not attempt.complete or start_date >= attempt.start_date:
+                    return False
+            self._sync_attempts[pair] = _SyncAttempt(now, start_date, False)
+            return True
+
+    def _sync_completed(self, pair: Pair) -> None:
+        """Mark the pair's recorded attempt as complete."""
+        with self._lock:
+            attempt = self._sync_attempts.get(pair)
+            if attempt is not None:
+                self._sync_attempts[pair] = attempt._replace(complete=True)
+
+    def _load(self, db: Session, pair: Pair) -> Optional[FXSeries]:
+        """Return the cached series of a stored pair, reloading it if outdated."""
+        version = self._remote_version(pair)
+        now = time.monotonic()
+        with self._lock:
+            if pair in self._series:
+                if version is not None and version == self._versions.get(pair):
+                    return self._series[pair]
+                if version is None and now - self._loaded_at[pair] <= self.FALLBACK_TTL_SECONDS:
+                    return self._series[pair]
+
+        rows = db.execute(
+            select(FXRate.date, FXRate.rate)
+            .where(FXRate.base == pair[0], FXRate.quote == pair[1])
+            .order_by(FXRate.date)
+        ).all()
+        series = FXSeries.from_rows([row[0] for row in rows], [float(row[1]) for row in rows]) if rows else None
+
+        with self._lock:
+            self._series[pair] = series
+            self._versions[pair] = version
+            self._loaded_at[pair] = now
+        logger.debug(f"FX history loaded {pair[0]}/{pair[1]} ({len(rows)} rates)")
+        return series
+
+    def _remote_version(self, pair: Pair) -> Optional[str]:
+        """Fetch the pair's version from Redis ("0" if never bumped), or None if unavailable."""
+        if not cache.available:
+            return None
+        try:
+            return cache.redis_client.hget(self.VERSIONS_KEY, "".join(pair)) or "0"
+        except Exception as e:
+            logger.debug(f"FX history version check failed: {e}")
+            return None
+
+
+# Process-wide instance
+fx_history = FXHistoryService()
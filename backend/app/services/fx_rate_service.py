@@ -8,6 +8,8 @@ Supports multiple rate providers with fallback strategies:
 - Primary: Yahoo Finance via PriceFetcher
 - Fallback: Hardcoded reasonable estimates
 
+Historical rates come from the daily series stored in fx_rates (fx_history).
+
 Uses Redis for caching with configurable TTL to minimize API calls.
 """
 from decimal import Decimal
@@ -15,13 +17,12 @@ from typing import Optional, Dict, Tuple
 from datetime import datetime, timedelta, date
 import logging
 
-try:
-    import redis
-    redis_available = True
-except ImportError:
-    redis_available = False
-
+from app.database import SyncSessionLocal
 from app.services.price_fetcher import PriceFetcher
+from app.services.fx_history import fx_history
+from app.services.provider_executor import provider_executor
+from app.services.cache_generations import CacheGenerations, FX
+from app.services.redis_pools import redis_pools
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -51,20 +52,20 @@ class FXRateService:
     def __init__(self):
         """Initialize FX Rate Service."""
         self.price_fetcher = PriceFetcher()
-        self._redis_client = None
-        self._redis_initialized = False
 
     @property
     def redis_client(self):
-        """Lazy initialize Redis client for caching."""
-        if redis_available and not self._redis_initialized:
-            try:
-                self._redis_client = redis.from_url(settings.redis_url, decode_responses=True)
-                self._redis_initialized = True
-            except Exception as e:
-                logger.warning(f"Failed to initialize Redis client for FX rates: {e}")
-                self._redis_initialized = True  # Mark as attempted
-        return self._redis_client
+        """
+        Shared non-blocking Redis client of the running event loop.
+
+        Not stored on the instance: the service is a singleton and Celery tasks
+        run it under short-lived event loops.
+        """
+        try:
+            return redis_pools.async_client()
+        except Exception as e:
+            logger.warning(f"Failed to get Redis client for FX rates: {e}")
+            return None
 
     async def get_current_fx_rate(
         self,
@@ -152,8 +153,9 @@ class FXRateService:
         Get historical exchange rate for a specific date.
 
         Used for performance calculations where historical FX rates are needed.
-        Currently uses current rates as fallback since Yahoo Finance API
-        access to historical rates is limited.
+        Reads the daily rates stored in fx_rates (see fx_history), syncing the
+        pair first if it is missing; the current rate is only used when no
+        history is available.
 
         Args:
             from_currency: Source currency code
@@ -182,9 +184,17 @@ class FXRateService:
             )
             return cached_rate
 
-        # Note: Yahoo Finance doesn't provide easy historical rate access through PriceFetcher
-        # For now, we use current rates as approximation
-        # In production, consider using a dedicated FX API (e.g., OpenExchangeRates, ECB)
+        try:
+            stored_rate = await provider_executor.run(
+                self._get_stored_historical_rate, from_currency, to_currency, rate_date
+            )
+        except Exception as e:
+            logger.warning(f"Error reading FX history for {from_currency}/{to_currency}: {e}")
+            stored_rate = None
+        if stored_rate is not None:
+            await self._cache_historical_rate(from_currency, to_currency, rate_date, stored_rate)
+            return stored_rate
+
         logger.debug(
             f"Historical rate unavailable for {rate_date}, "
             f"falling back to current rate for {from_currency}/{to_currency}"
@@ -310,6 +320,30 @@ class FXRateService:
             )
             return None
 
+    @staticmethod
+    def _get_stored_historical_rate(
+        from_currency: str,
+        to_currency: str,
+        rate_date: date
+    ) -> Optional[Decimal]:
+        """
+        Read the rate as of rate_date from fx_rates (blocking).
+
+        Args:
+            from_currency: Source currency code
+            to_currency: Target currency code
+            rate_date: Date of the rate
+
+        Returns:
+            Decimal rate or None if the pair has no stored history
+        """
+        db = SyncSessionLocal()
+        try:
+            rate = fx_history.rate_on(db, from_currency, to_currency, rate_date)
+        finally:
+            db.close()
+        return Decimal(str(rate)) if rate is not None else None
+
     def _get_fallback_rate(self, from_currency: str, to_currency: str) -> Optional[Decimal]:
         """
         Get fallback exchange rate from hardcoded defaults.
@@ -357,8 +391,10 @@ class FXRateService:
                 to_currency=to_currency
             )
             ttl_seconds = settings.fx_cache_ttl_hours * 3600
-            self.redis_client.setex(cache_key, ttl_seconds, str(rate))
+            await self.redis_client.setex(cache_key, ttl_seconds, str(rate))
             logger.debug(f"Cached FX rate {cache_key} = {rate} (TTL: {ttl_seconds}s)")
+            # Responses converted with the previous rate are now stale
+            await CacheGenerations.bump_async(FX)
         except Exception as e:
             logger.warning(f"Failed to cache FX rate: {e}")
 
@@ -389,7 +425,7 @@ class FXRateService:
             )
             # Historical rates cached longer (7 days)
             ttl_seconds = 7 * 24 * 3600
-            self.redis_client.setex(cache_key, ttl_seconds, str(rate))
+            await self.redis_client.setex(cache_key, ttl_seconds, str(rate))
             logger.debug(
                 f"Cached historical FX rate {cache_key} = {rate} (TTL: {ttl_seconds}s)"
             )
@@ -415,7 +451,7 @@ class FXRateService:
                 from_currency=from_currency,
                 to_currency=to_currency
             )
-            cached_value = self.redis_client.get(cache_key)
+            cached_value = await self.redis_client.get(cache_key)
             if cached_value:
                 return Decimal(cached_value)
         except Exception as e:
@@ -449,7 +485,7 @@ class FXRateService:
                 to_currency=to_currency,
                 rate_date=rate_date.isoformat()
             )
-            cached_value = self.redis_client.get(cache_key)
+            cached_value = await self.redis_client.get(cache_key)
             if cached_value:
                 return Decimal(cached_value)
         except Exception as e:
@@ -0,0 +1,311 @@
+"""
+Holdings ledger service - Maintains the daily_holdings table.
+
+The ledger stores, for every day, the quantity and cost basis of each holding.
+Each day is derived from the previous day's rows plus that day's transactions,
+so advancing the ledger by one day costs O(holdings + that day's transactions)
+regardless of how much history exists.
+
+Cost basis uses the average cost method (sells reduce cost proportionally),
+the same rule PositionManager applies to positions.
+
+All methods take a synchronous Session and never commit; the caller owns the
+transaction. Async callers use AsyncSession.run_sync, e.g.:
+
+    await db.run_sync(HoldingsLedger.invalidate_from, operation_date)
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import select, delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.models import DailyHolding, SystemState, Transaction, TransactionType
+
+logger = logging.getLogger(__name__)
+
+# (isin, None) for ISIN-based holdings, (None, ticker) for ticker-only holdings
+HoldingKey = Tuple[Optional[str], Optional[str]]
+
+
+def holding_key(isin: Optional[str], ticker: Optional[str]) -> HoldingKey:
+    """Return the ledger key for a holding, mirroring position identity rules."""
+    return (isin, None) if isin else (None, ticker)
+
+
+def apply_transaction(state: Dict[str, object], txn: Transaction) -> None:
+    """
+    Apply a single transaction to a holding state in place.
+
+    Args:
+        state: Dict with ticker, quantity and cost_basis
+        txn: Transaction (or any object with the same attributes)
+    """
+    if txn.transaction_type == TransactionType.BUY:
+        state["quantity"] += txn.quantity
+        state["cost_basis"] += txn.amount_eur + txn.fees
+    else:  # SELL
+        # Reduce cost basis proportionally, as in FinancialCalculations.calculate_cost_basis
+        if state["quantity"] > 0:
+            avg_cost = state["cost_basis"] / state["quantity"]
+            state["cost_basis"] -= avg_cost * txn.quantity
+        # An oversell closes the holding instead of going short
+        state["quantity"] = max(state["quantity"] - txn.quantity, Decimal("0"))
+        state["cost_basis"] = max(state["cost_basis"], Decimal("0"))
+
+    if state["quantity"] == 0:
+        # Fully closed: drop rounding residue from the proportional reduction
+        state["cost_basis"] = Decimal("0")
+
+    state["ticker"] = txn.ticker
+
+
+def replay_holdings(
+    state: Dict[HoldingKey, Dict[str, object]],
+    transactions: Sequence[Transaction],
+    start_date: date,
+    end_date: date,
+) -> Iterator[Tuple[date, Dict[HoldingKey, Dict[str, object]]]]:
+    """
+    Walk each day from start_date to end_date, applying that day's transactions.
+
+    Args:
+        state: Holdings at the end of the day before start_date (mutated in place)
+        transactions: Transactions dated start_date..end_date, in ledger order
+        start_date: First day to produce
+        end_date: Last day to produce
+
+    Yields:
+        (day, state) after applying the day's transactions. Closed holdings are
+        removed from state. The same dict is yielded every day, so consumers must
+        copy what they need before advancing the iterator.
+    """
+    txn_index = 0
+    current = start_date
+
+    while current <= end_date:
+        while txn_index < len(transactions) and transactions[txn_index].operation_date <= current:
+            txn = transactions[txn_index]
+            txn_index += 1
+
+            key = holding_key(txn.isin, txn.ticker)
+            holding = state.setdefault(key, {
+                "ticker": txn.ticker,
+                "quantity": Decimal("0"),
+                "cost_basis": Decimal("0"),
+            })
+            apply_transaction(holding, txn)
+
+            if holding["quantity"] == 0:
+                del state[key]
+
+        yield current, state
+        current += timedelta(days=1)
+
+
+class HoldingsLedger:
+    """Maintain and query the daily holdings ledger."""
+
+    # SystemState key holding the last date the ledger is materialized through
+    THROUGH_STATE_KEY = "holdings_ledger_through"
+
+    # Transaction-scoped advisory lock serializing ledger writers
+    ADVISORY_LOCK_ID = 731_001
+
+    # Rows per INSERT statement when materializing days
+    INSERT_BATCH_SIZE = 1000
+
+    @staticmethod
+    def get_through_date(db: Session) -> Optional[date]:
+        """
+        Return the last date the ledger has been materialized through.
+
+        Args:
+            db: Synchronous database session
+
+        Returns:
+            The date, or None if the ledger has never been built
+        """
+        value = db.execute(
+            select(SystemState.value).where(SystemState.key == HoldingsLedger.THROUGH_STATE_KEY)
+        ).scalar_one_or_none()
+        return date.fromisoformat(value) if value else None
+
+    @staticmethod
+    def invalidate_from(db: Session, from_date: date) -> None:
+        """
+        Discard ledger days from from_date onward after a transaction change.
+
+        Must be called by every writer that inserts, edits or deletes a
+        transaction dated from_date. The discarded days are rebuilt by the
+        next advance_to call.
+
+        Args:
+            db: Synchronous database session
+            from_date: Earliest operation date affected by the change
+        """
+        HoldingsLedger._lock(db)
+
+        through = HoldingsLedger.get_through_date(db)
+        if through is None or from_date > through:
+            return
+
+        db.execute(delete(DailyHolding).where(DailyHolding.holding_date >= from_date))
+        HoldingsLedger._set_through_date(db, from_date - timedelta(days=1))
+        logger.info(f"Holdings ledger invalidated from {from_date}")
+
+    @staticmethod
+    def advance_to(db: Session, target_date: date) -> int:
+        """
+        Materialize ledger days up to and including target_date.
+
+        Starts from the last materialized day (or from the first transaction
+        when the ledger is empty) and applies only the transactions after it.
+
+        Args:
+            db: Synchronous database session
+            target_date: Last day to materialize
+
+        Returns:
+            Number of ledger rows written
+        """
+        HoldingsLedger._lock(db)
+
+        through = HoldingsLedger.get_through_date(db)
+        if through is not None and through >= target_date:
+            return 0
+
+        state: Dict[HoldingKey, Dict[str, object]] = {}
+        if through is None:
+            start_date = db.execute(select(func.min(Transaction.operation_date))).scalar()
+            if start_date is None or start_date > target_date:
+                HoldingsLedger._set_through_date(db, target_date)
+                return 0
+        else:
+            start_date = through + timedelta(days=1)
+            for row in HoldingsLedger._load_day(db, through):
+                state[holding_key(row.isin, row.ticker)] = {
+                    "ticker": row.ticker,
+                    "quantity": row.quantity,
+                    "cost_basis": row.cost_basis,
+                }
+
+        transactions = db.execute(
+            select(Transaction)
+            .where(Transaction.operation_date >= start_date)
+            .where(Transaction.operation_date <= target_date)
+            .order_by(Transaction.operation_date, Transaction.id)
+        ).scalars().all()
+
+        rows_written = 0
+        batch: List[dict] = []
+        for day, holdings in replay_holdings(state, transactions, start_date, target_date):
+            for (isin, _), holding in holdings.items():
+                batch.append({
+                    "holding_date": day,
+                    "isin": isin,
+                    "ticker": holding["ticker"],
+                    "quantity": holding["quantity"],
+                    "cost_basis": holding["cost_basis"],
+                    "created_at": datetime.utcnow(),
+                })
+            if len(batch) >= HoldingsLedger.INSERT_BATCH_SIZE:
+                db.execute(insert(DailyHolding), batch)
+                rows_written += len(batch)
+                batch = []
+
+        if batch:
+            db.execute(insert(DailyHolding), batch)
+            rows_written += len(batch)
+
+        HoldingsLedger._set_through_date(db, target_date)
+        logger.info(
+            f"Holdings ledger advanced {start_date} -> {target_date}: "
+            f"{len(transactions)} transactions, {rows_written} rows"
+        )
+        return rows_written
+
+    @staticmethod
+    def get_holdings_as_of(db: Session, as_of: date) -> List[DailyHolding]:
+        """
+        Return the open holdings (quantity > 0) at the end of a day.
+
+        Advances the ledger first if as_of has not been materialized yet.
+
+        Args:
+            db: Synchronous database session
+            as_of: Day to read
+
+        Returns:
+            List of DailyHolding rows for that day
+        """
+        HoldingsLedger.advance_to(db, as_of)
+        return [row for row in HoldingsLedger._load_day(db, as_of) if row.quantity > 0]
+
+    @staticmethod
+    def get_holdings_between(
+        db: Session,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[date, List[Tuple[Optional[str], str, Decimal, Decimal]]]:
+        """
+        Return open holdings for every day in a range in one query.
+
+        Args:
+            db: Synchronous database session
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+
+        Returns:
+            Dict mapping day -> [(isin, ticker, quantity, cost_basis)]
+        """
+        HoldingsLedger.advance_to(db, end_date)
+
+        rows = db.execute(
+            select(
+                DailyHolding.holding_date,
+                DailyHolding.isin,
+                DailyHolding.ticker,
+                DailyHolding.quantity,
+                DailyHolding.cost_basis,
+            )
+            .where(DailyHolding.holding_date >= start_date)
+            .where(DailyHolding.holding_date <= end_date)
+            .where(DailyHolding.quantity > 0)
+            .order_by(DailyHolding.holding_date, DailyHolding.id)
+        ).all()
+
+        holdings_by_date: Dict[date, List[Tuple[Optional[str], str, Decimal, Decimal]]] = {}
+        for holding_date, isin, ticker, quantity, cost_basis in rows:
+            holdings_by_date.setdefault(holding_date, []).append((isin, ticker, quantity, cost_basis))
+        return holdings_by_date
+
+    @staticmethod
+    def _load_day(db: Session, day: date) -> Iterable[DailyHolding]:
+        """Load all ledger rows for one day."""
+        return db.execute(
+            select(DailyHolding)
+            .where(DailyHolding.holding_date == day)
+            .order_by(DailyHolding.id)
+        ).scalars().all()
+
+    @staticmethod
+    def _set_through_date(db: Session, through: date) -> None:
+        """Record the materialized-through date without committing."""
+        state = db.execute(
+            select(SystemState).where(SystemState.key == HoldingsLedger.THROUGH_STATE_KEY)
+        ).scalar_one_or_none()
+
+        if state:
+            state.value = through.isoformat()
+            state.updated_at = datetime.utcnow()
+        else:
+            db.add(SystemState(key=HoldingsLedger.THROUGH_STATE_KEY, value=through.isoformat()))
+        db.flush()
+
+    @staticmethod
+    def _lock(db: Session) -> None:
+        """Serialize ledger writers until the current transaction ends."""
+        db.execute(select(func.pg_advisory_xact_lock(HoldingsLedger.ADVISORY_LOCK_ID)))
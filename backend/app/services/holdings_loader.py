@@ -0,0 +1,86 @@
+"""
+Holdings loader - Positions with their latest prices and cached IRR in one query.
+
+Joins positions to latest_prices (last and previous close) and to the cached
+position metrics, so valuing every holding costs a single round trip instead
+of a price query and a CachedMetrics lookup per position. Positions whose
+ticker has no latest_prices row yet are priced from PriceHistory with one
+extra query.
+"""
+from datetime import date
+from typing import List, NamedTuple, Optional
+import logging
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CachedMetrics, LatestPrice, Position
+from app.services.asof_prices import AsOfPriceService, PricePoint
+
+logger = logging.getLogger(__name__)
+
+
+class HoldingRow(NamedTuple):
+    """A position with its prices (latest first, at most 2) and cached IRR."""
+    position: Position
+    price_history: List[PricePoint]
+    irr: Optional[float]
+
+
+class HoldingsLoader:
+    """Load all positions with prices and cached metrics."""
+
+    @staticmethod
+    async def load(db: AsyncSession) -> List[HoldingRow]:
+        """
+        Load every position with its latest/previous close and cached IRR.
+
+        Args:
+            db: Async database session
+
+        Returns:
+            List of HoldingRow, one per position
+        """
+        result = await db.execute(HoldingsLoader._build_query())
+
+        rows = []
+        for position, last_date, last_close, previous_date, previous_close, irr in result.all():
+            price_history = []
+            if last_date is not None:
+                price_history.append(PricePoint(last_date, last_close))
+                if previous_date is not None:
+                    price_history.append(PricePoint(previous_date, previous_close))
+            rows.append(HoldingRow(position, price_history, irr))
+
+        missing = sorted({row.position.current_ticker for row in rows if not row.price_history})
+        if missing:
+            today = date.today()
+            prices = await AsOfPriceService.load_latest_async(db, missing, lookback_rows=2)
+            rows = [
+                row._replace(price_history=prices.history(row.position.current_ticker, today, 2))
+                if not row.price_history else row
+                for row in rows
+            ]
+        return rows
+
+    @staticmethod
+    def _build_query():
+        return (
+            select(
+                Position,
+                LatestPrice.last_date,
+                LatestPrice.last_close,
+                LatestPrice.previous_date,
+                LatestPrice.previous_close,
+                CachedMetrics.metric_value["irr"].as_float(),
+            )
+            .outerjoin(LatestPrice, LatestPrice.ticker == Position.current_ticker)
+            # Cached metrics are keyed by current_ticker for backwards compatibility
+            .outerjoin(
+                CachedMetrics,
+                and_(
+                    CachedMetrics.metric_type == "position_metrics",
+                    CachedMetrics.metric_key == Position.current_ticker
+                )
+            )
+        )
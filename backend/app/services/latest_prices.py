@@ -0,0 +1,196 @@
+"""
+Latest price service - Maintains and reads the latest_prices table.
+
+latest_prices holds the last two closes of every ticker. Writers refresh the
+rows of the tickers they touched, in the same transaction as their
+PriceHistory inserts:
+
+    LatestPriceService.refresh(db, updated_tickers)
+    db.commit()
+    price_matrix.invalidate(updated_tickers)
+
+Async callers use AsyncSession.run_sync(LatestPriceService.refresh, tickers).
+
+A refresh recomputes the rows from PriceHistory (two index probes per ticker),
+so backfills of older dates and corrections of existing closes are handled
+the same way as new daily closes.
+
+Readers get an AsOfPriceGrid with (at most) the previous and latest close per
+ticker, i.e. the same answers as AsOfPriceService.load_latest(lookback_rows=2).
+Tickers without a latest_prices row (e.g. written by a path that predates the
+table) are loaded from PriceHistory instead.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+import logging
+
+from sqlalchemy import select, values, column, literal, String, DateTime, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import LatestPrice, PriceHistory
+from app.services.asof_prices import AsOfPriceGrid, AsOfPriceService
+
+logger = logging.getLogger(__name__)
+
+
+class LatestPriceService:
+    """Service for the denormalized latest/previous close table."""
+
+    @staticmethod
+    def refresh(db: Session, tickers: Iterable[str]) -> None:
+        """
+        Recompute the latest_prices rows of tickers from PriceHistory.
+
+        Flushes pending PriceHistory objects first (sessions do not autoflush)
+        but does not commit; call it before the commit of the PriceHistory writes.
+
+        Args:
+            db: Synchronous database session
+            tickers: Tickers whose PriceHistory rows changed
+        """
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return
+
+        db.flush()
+        db.execute(LatestPriceService._build_refresh(tickers, datetime.utcnow()))
+        logger.debug(f"Refreshed latest prices for {len(tickers)} tickers")
+
+    @staticmethod
+    def load(db: Session, tickers: Iterable[str]) -> AsOfPriceGrid:
+        """
+        Load the latest and previous close of tickers.
+
+        Args:
+            db: Synchronous database session
+            tickers: Tickers to load
+
+        Returns:
+            AsOfPriceGrid answering lookup()/price()/history(count=2) as of today
+        """
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return AsOfPriceGrid({})
+
+        rows = db.execute(LatestPriceService._build_load(tickers)).all()
+        series = LatestPriceService._to_series(rows)
+
+        missing = [t for t in tickers if t not in series]
+        if missing:
+            fallback = AsOfPriceService.load_latest(db, missing, lookback_rows=2)
+            series.update(LatestPriceService._grid_series(fallback, missing))
+        return AsOfPriceGrid(series)
+
+    @staticmethod
+    async def load_async(db: AsyncSession, tickers: Iterable[str]) -> AsOfPriceGrid:
+        """Async variant of load() for API handlers."""
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return AsOfPriceGrid({})
+
+        result = await db.execute(LatestPriceService._build_load(tickers))
+        series = LatestPriceService._to_series(result.all())
+
+        missing = [t for t in tickers if t not in series]
+        if missing:
+            fallback = await AsOfPriceService.load_latest_async(db, missing, lookback_rows=2)
+            series.update(LatestPriceService._grid_series(fallback, missing))
+        return AsOfPriceGrid(series)
+
+    @staticmethod
+    def _build_refresh(tickers: List[str], now: datetime):
+        """
+        Build one INSERT ... SELECT ... ON CONFLICT statement for all tickers.
+
+        The last close and the close before it are each found with a LATERAL
+        index probe on ix_price_history_ticker_date.
+        """
+        ticker_values = values(column("ticker", String), name="latest_tickers").data(
+            [(ticker,) for ticker in tickers]
+        )
+
+        last = (
+            select(PriceHistory.date, PriceHistory.close)
+            .where(PriceHistory.ticker == ticker_values.c.ticker)
+            .order_by(PriceHistory.date.desc())
+            .limit(1)
+            .lateral("latest_last")
+        )
+        previous = (
+            select(PriceHistory.date, PriceHistory.close)
+            .where(PriceHistory.ticker == ticker_values.c.ticker)
+            .where(PriceHistory.date < last.c.date)
+            .order_by(PriceHistory.date.desc())
+            .limit(1)
+            .lateral("latest_previous")
+        )
+
+        source = (
+            select(
+                ticker_values.c.ticker,
+                last.c.date,
+                last.c.close,
+                previous.c.date,
+                previous.c.close,
+                literal(now, DateTime),
+            )
+            .select_from(
+                ticker_values
+                .join(last, true())
+                .outerjoin(previous, true())
+            )
+        )
+
+        stmt = pg_insert(LatestPrice).from_select(
+            ["ticker", "last_date", "last_close", "previous_date", "previous_close", "updated_at"],
+            source,
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=["ticker"],
+            set_={
+                "last_date": stmt.excluded.last_date,
+                "last_close": stmt.excluded.last_close,
+                "previous_date": stmt.excluded.previous_date,
+                "previous_close": stmt.excluded.previous_close,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+
+    @staticmethod
+    def _build_load(tickers: List[str]):
+        return (
+            select(
+                LatestPrice.ticker,
+                LatestPrice.last_date,
+                LatestPrice.last_close,
+                LatestPrice.previous_date,
+                LatestPrice.previous_close,
+            )
+            .where(LatestPrice.ticker.in_(tickers))
+        )
+
+    @staticmethod
+    def _to_series(rows) -> Dict[str, List[Tuple[date, Decimal]]]:
+        """Turn latest_prices rows into ascending (date, close) series."""
+        series: Dict[str, List[Tuple[date, Decimal]]] = {}
+        for ticker, last_date, last_close, previous_date, previous_close in rows:
+            points = []
+            if previous_date is not None:
+                points.append((previous_date, previous_close))
+            points.append((last_date, last_close))
+            series[ticker] = points
+        return series
+
+    @staticmethod
+    def _grid_series(grid: AsOfPriceGrid, tickers: List[str]) -> Dict[str, List[Tuple[date, Decimal]]]:
+        """Extract ascending series for tickers from a fallback grid."""
+        today = date.today()
+        series = {}
+        for ticker in tickers:
+            history = grid.history(ticker, today, 2)
+            if history:
+                series[ticker] = [(point.date, point.close) for point in reversed(history)]
+        return series
@@ -0,0 +1,287 @@
+"""
+Market data providers - One interface for quotes, history, FX rates and search.
+
+PriceFetcher and the search endpoints used to call yfinance directly, so
+ingestion, snapshots and endpoints could not run (or be benchmarked) without
+the network. They now go through the active MarketDataProvider:
+
+- YahooProvider: Yahoo Finance via yfinance, paced by yahoo_limiter (default).
+- FixtureProvider: deterministic and offline. Serves CSV/Parquet fixtures
+  ({symbol}.csv or {symbol}.parquet in a directory) and generates a seeded
+  geometric Brownian motion for anything else, with optional latency and
+  error injection (see app.services.market_data_fixtures).
+- RecordingProvider / ReplayProvider: record another provider's answers to a
+  JSON cassette and play them back later.
+
+Provider methods block; callers run them on the shared provider executor.
+They raise on errors and return None or empty results when there is no data.
+
+The provider is selected with MARKET_DATA_PROVIDER (yahoo, fixture, record or
+replay) and can be swapped at runtime with set_market_data_provider().
+
+Usage:
+    provider = get_market_data_provider()
+    prices = provider.history(["AAPL", "MSFT"], date(2024, 1, 1), date(2024, 6, 30))
+    rate = provider.fx_rate("EUR", "USD")
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Protocol, Sequence
+import logging
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+from app.config import settings
+from app.services.provider_limiter import is_rate_limit_error, yahoo_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataError(Exception):
+    """Raised by providers when market data cannot be served."""
+
+
+class MarketDataProvider(Protocol):
+    """
+    Source of market data.
+
+    Price records are dicts with keys date, open, high, low, close (Decimal),
+    volume (int) and source.
+    """
+
+    name: str
+
+    def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Return {"current_price", "previous_close"} for a symbol, or None."""
+        ...
+
+    def history(self, symbols: Sequence[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        """Return daily price records per symbol, oldest first (end_date inclusive)."""
+        ...
+
+    def fx_rate(self, base: str, quote: str) -> Optional[Decimal]:
+        """Return units of quote per unit of base, or None."""
+        ...
+
+    def search(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return {"ticker", "name", "type", "isin"} for a symbol, or None."""
+        ...
+
+
+class YahooProvider:
+    """Market data from Yahoo Finance (yfinance), paced by yahoo_limiter."""
+
+    name = "yahoo"
+
+    def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        yahoo_limiter.acquire()
+        try:
+            stock = yf.Ticker(symbol)
+            try:
+                current_price = stock.fast_info.get('lastPrice')
+                previous_close = stock.fast_info.get('previousClose')
+            except Exception:
+                # Fallback to intraday history if fast_info fails
+                logger.debug(f"fast_info failed for {symbol}, falling back to history")
+                hist = stock.history(period="1d", interval="1m")
+                if hist.empty:
+                    logger.debug(f"No real-time data for {symbol}")
+                    return None
+                current_price = float(hist['Close'].iloc[-1])
+                info = stock.info
+                previous_close = info.get('previousClose', info.get('regularMarketPreviousClose'))
+        except Exception as e:
+            if is_rate_limit_error(e):
+                yahoo_limiter.throttled()
+            raise
+
+        if current_price is None or previous_close is None:
+            return None
+        yahoo_limiter.succeeded()
+        return {"current_price": current_price, "previous_close": previous_close}
+
+    def history(self, symbols: Sequence[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        yahoo_limiter.acquire()
+        try:
+            frame = yf.download(
+                symbols,
+                start=start_date,
+                end=end_date + timedelta(days=1),  # yfinance end date is exclusive
+                group_by="ticker",
+                auto_adjust=True,
+                actions=False,
+                threads=True,
+                progress=False,
+                multi_level_index=True
+            )
+        except Exception as e:
+            if is_rate_limit_error(e):
+                yahoo_limiter.throttled()
+            raise
+
+        if frame is None or frame.empty:
+            # yf.download reports per-symbol failures (including 429s) as missing
+            # data, so several symbols without any data are treated as throttled
+            if len(symbols) > 1:
+                yahoo_limiter.throttled()
+            return {}
+        yahoo_limiter.succeeded()
+
+        # yfinance upper-cases symbols; key the result by the requested spelling
+        requested = {symbol.upper(): symbol for symbol in symbols}
+        return {
+            requested.get(symbol.upper(), symbol): records
+            for symbol, records in self.frame_to_prices(frame).items()
+        }
+
+    def fx_rate(self, base: str, quote: str) -> Optional[Decimal]:
+        # Yahoo Finance FX ticker format: EURUSD=X
+        fx_ticker = f"{base}{quote}=X"
+        yahoo_limiter.acquire()
+        try:
+            hist = yf.Ticker(fx_ticker).history(period="1d")
+        except Exception as e:
+            if is_rate_limit_error(e):
+                yahoo_limiter.throttled()
+            raise
+
+        if hist.empty:
+            # FX pairs always trade, so an empty answer means Yahoo is throttling
+            logger.warning(f"No FX rate data for {fx_ticker}")
+            yahoo_limiter.throttled()
+            return None
+        yahoo_limiter.succeeded()
+        return Decimal(str(hist.iloc[-1]["Close"]))
+
+    def search(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        yahoo_limiter.acquire()
+        try:
+            info = yf.Ticker(query.upper()).info
+        except Exception as e:
+            if is_rate_limit_error(e):
+                yahoo_limiter.throttled()
+            raise
+        yahoo_limiter.succeeded()
+
+        if not info or not info.get('symbol'):
+            return None
+        return {
+            "ticker": info['symbol'],
+            "name": info.get('longName') or info.get('shortName') or info['symbol'],
+            "type": info.get('quoteType', 'UNKNOWN'),
+            "isin": info.get('isin'),
+        }
+
+    @staticmethod
+    def frame_to_prices(frame: Optional[pd.DataFrame], source: str = "yahoo") -> Dict[str, List[Dict]]:
+        """
+        Convert a multi-ticker yf.download() frame into price records.
+
+        The frame has one row per date and (symbol, field) columns. It is stacked
+        into one row per (date, symbol) and converted column-wise; rows without a
+        close are dropped, missing open/high/low fall back to the close and missing
+        volume to 0.
+
+        Args:
+            frame: DataFrame returned by yf.download(..., group_by="ticker")
+            source: Value for the records' source key
+
+        Returns:
+            Dict mapping each symbol to its price records, oldest first
+        """
+        if frame is None or frame.empty or not isinstance(frame.columns, pd.MultiIndex):
+            return {}
+
+        stacked = frame.stack(level=0, future_stack=True).dropna(subset=["Close"])
+        if stacked.empty:
+            return {}
+        stacked = stacked.rename_axis(["date", "symbol"]).reset_index().sort_values(["symbol", "date"])
+
+        close = stacked["Close"]
+        columns = {
+            "open": stacked["Open"].fillna(close),
+            "high": stacked["High"].fillna(close),
+            "low": stacked["Low"].fillna(close),
+            "close": close,
+        }
+        decimals = {name: [Decimal(value) for value in column.astype(str)] for name, column in columns.items()}
+        volumes = (
+            stacked["Volume"].fillna(0).astype("int64").tolist()
+            if "Volume" in stacked else [0] * len(stacked)
+        )
+        dates = pd.to_datetime(stacked["date"]).dt.date.tolist()
+
+        prices: Dict[str, List[Dict]] = {}
+        for i, symbol in enumerate(stacked["symbol"].tolist()):
+            prices.setdefault(symbol, []).append({
+                "date": dates[i],
+                "open": decimals["open"][i],
+                "high": decimals["high"][i],
+                "low": decimals["low"][i],
+                "close": decimals["close"][i],
+                "volume": volumes[i],
+                "source": source
+            })
+        return prices
+
+
+def create_market_data_provider(kind: Optional[str] = None) -> MarketDataProvider:
+    """
+    Build a provider from settings.
+
+    Args:
+        kind: yahoo, fixture, record or replay (default MARKET_DATA_PROVIDER)
+
+    Returns:
+        The provider
+
+    Raises:
+        ValueError: Unknown kind, or record/replay without a cassette path
+    """
+    from app.services.market_data_fixtures import FixtureProvider, RecordingProvider, ReplayProvider
+
+    kind = (kind or settings.market_data_provider).lower()
+    if kind == "yahoo":
+        return YahooProvider()
+    if kind == "fixture":
+        return FixtureProvider(
+            fixture_dir=settings.market_data_fixture_dir,
+            seed=settings.market_data_seed,
+            latency_seconds=settings.market_data_latency_ms / 1000,
+            error_rate=settings.market_data_error_rate
+        )
+    if kind in ("record", "replay"):
+        if not settings.market_data_cassette:
+            raise ValueError(f"MARKET_DATA_CASSETTE is required for the {kind} market data provider")
+        if kind == "record":
+            return RecordingProvider(YahooProvider(), settings.market_data_cassette)
+        return ReplayProvider(settings.market_data_cassette)
+    raise ValueError(f"Unknown market data provider: {kind}")
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Return the process-wide provider, creating it from settings on first use."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_market_data_provider()
+                logger.info(f"Using {_provider.name} market data provider")
+    return _provider
+
+
+def set_market_data_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Replace the process-wide provider (None recreates it from settings on next use)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
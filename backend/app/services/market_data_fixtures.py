@@ -0,0 +1,389 @@
+"""
+Offline market data providers - Fixtures, generated prices and record/replay.
+
+FixtureProvider answers every MarketDataProvider call without the network:
+
+- History comes from {symbol}.csv or {symbol}.parquet in fixture_dir when the
+  file exists (columns date, open, high, low, close and optionally volume;
+  Parquet needs pyarrow). Other symbols get a geometric Brownian motion
+  seeded by (seed, symbol), so every run and every process sees the same
+  prices. Stocks trade on business days; crypto (BTC-USD) and FX (EURUSD=X)
+  every day.
+- Quotes are the last two closes up to today, FX rates the last close of the
+  pair (the inverse pair is consistent) and search echoes the symbol.
+- latency_seconds is slept before each call and error_rate of the calls
+  raise MarketDataError, to measure throughput and retries under load.
+
+RecordingProvider wraps another provider and appends its answers to a JSON
+Lines cassette (one {"key", "value"} object per line, later lines win);
+ReplayProvider serves a cassette and raises MarketDataError for calls that
+were not recorded. History is recorded per symbol, so a replay may batch
+symbols differently from the recording.
+
+Usage:
+    provider = FixtureProvider(seed=7, latency_seconds=0.05, error_rate=0.01)
+    set_market_data_provider(provider)
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_data import MarketDataError, MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+# Quote currencies of Yahoo crypto symbols (BTC-USD)
+CRYPTO_QUOTES = {"USD", "EUR", "GBP", "USDT", "BTC"}
+
+
+def _is_daily_symbol(symbol: str) -> bool:
+    """Crypto pairs (BTC-USD) and FX pairs (EURUSD=X) trade every day."""
+    return symbol.endswith("=X") or ("-" in symbol and symbol.rsplit("-", 1)[1] in CRYPTO_QUOTES)
+
+
+def _frame_to_records(frame: pd.DataFrame, source: str) -> List[Dict]:
+    """Convert a date-indexed open/high/low/close/volume frame into price records."""
+    decimals = {
+        field: [Decimal(value) for value in frame[field].round(6).astype(str)]
+        for field in PRICE_FIELDS
+    }
+    volumes = frame["volume"].astype("int64").tolist()
+    return [
+        {
+            "date": day,
+            "open": decimals["open"][i],
+            "high": decimals["high"][i],
+            "low": decimals["low"][i],
+            "close": decimals["close"][i],
+            "volume": volumes[i],
+            "source": source
+        }
+        for i, day in enumerate(frame.index)
+    ]
+
+
+class FixtureProvider:
+    """Deterministic offline market data from fixtures or a seeded GBM generator."""
+
+    name = "fixture"
+
+    # First generated trading day; generated series always start here so that a
+    # symbol's prices do not depend on the requested range
+    EPOCH = date(2000, 1, 3)
+
+    def __init__(
+        self,
+        fixture_dir: Optional[str] = None,
+        seed: int = 42,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        drift: float = 0.05,
+        volatility: float = 0.25
+    ):
+        """
+        Args:
+            fixture_dir: Directory with {symbol}.csv / {symbol}.parquet files
+            seed: Seed for generated prices and injected errors
+            latency_seconds: Delay added to every call
+            error_rate: Fraction of calls (0-1) that raise MarketDataError
+            drift: Annual drift of generated stock and crypto prices
+            volatility: Annual volatility of generated stock and crypto prices
+        """
+        self.fixture_dir = Path(fixture_dir) if fixture_dir else None
+        self.seed = seed
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.drift = drift
+        self.volatility = volatility
+
+        self._lock = threading.Lock()
+        self._errors = random.Random(seed)
+        # Symbol -> full date-indexed frame (fixture file or generated series)
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    # MarketDataProvider
+
+    def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        self._simulate("quote", symbol)
+        closes = self._frame(symbol, date.today())["close"]
+        closes = closes[closes.index <= date.today()]
+        if len(closes) < 2:
+            return None
+        return {"current_price": float(closes.iloc[-1]), "previous_close": float(closes.iloc[-2])}
+
+    def history(self, symbols: Sequence[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        self._simulate("history", *symbols)
+        prices = {}
+        for symbol in symbols:
+            frame = self._frame(symbol, end_date)
+            frame = frame[(frame.index >= start_date) & (frame.index <= end_date)]
+            if not frame.empty:
+                prices[symbol] = _frame_to_records(frame, self.name)
+        return prices
+
+    def fx_rate(self, base: str, quote: str) -> Optional[Decimal]:
+        self._simulate("fx_rate", base, quote)
+        if base == quote:
+            return Decimal("1")
+
+        # Generate one series per unordered pair so EUR/USD and USD/EUR agree
+        first, second = sorted((base, quote))
+        closes = self._frame(f"{first}{second}=X", date.today())["close"]
+        closes = closes[closes.index <= date.today()]
+        if closes.empty:
+            return None
+        rate = float(closes.iloc[-1])
+        if base != first:
+            rate = 1 / rate
+        return Decimal(str(round(rate, 6)))
+
+    def search(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        self._simulate("search", query)
+        symbol = query.strip().upper()
+        if not symbol:
+            return None
+        return {"ticker": symbol, "name": f"{symbol} (fixture)", "type": "EQUITY", "isin": None}
+
+    # Simulation
+
+    def _simulate(self, method: str, *args: str) -> None:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        if self.error_rate > 0:
+            with self._lock:
+                failed = self._errors.random() < self.error_rate
+            if failed:
+                raise MarketDataError(f"Injected {method} failure for {', '.join(args)}")
+
+    # Price series
+
+    def _frame(self, symbol: str, end_date: date) -> pd.DataFrame:
+        with self._lock:
+            frame = self._frames.get(symbol)
+        if frame is not None and (frame.attrs.get("fixture") or frame.index[-1] >= end_date):
+            return frame
+
+        frame = self._load_fixture(symbol)
+        if frame is None:
+            frame = self._generate(symbol, max(end_date, date.today()))
+        with self._lock:
+            self._frames[symbol] = frame
+        return frame
+
+    def _load_fixture(self, symbol: str) -> Optional[pd.DataFrame]:
+        if self.fixture_dir is None:
+            return None
+
+        csv_path = self.fixture_dir / f"{symbol}.csv"
+        parquet_path = self.fixture_dir / f"{symbol}.parquet"
+        if csv_path.exists():
+            frame = pd.read_csv(csv_path)
+        elif parquet_path.exists():
+            frame = pd.read_parquet(parquet_path)
+        else:
+            return None
+
+        frame.columns = [str(column).lower() for column in frame.columns]
+        frame["date"] = pd.to_datetime(frame["date"]).dt.date
+        frame = frame.dropna(subset=["close"]).set_index("date").sort_index()
+        for field in ("open", "high", "low"):
+            frame[field] = frame[field].fillna(frame["close"]) if field in frame else frame["close"]
+        frame["volume"] = frame["volume"].fillna(0) if "volume" in frame else 0
+        frame = frame[list(PRICE_FIELDS) + ["volume"]]
+        # Fixtures are complete as loaded; never regenerated for later end dates
+        frame.attrs["fixture"] = True
+        logger.debug(f"Loaded {len(frame)} fixture prices for {symbol}")
+        return frame
+
+    def _generate(self, symbol: str, end_date: date) -> pd.DataFrame:
+        """Geometric Brownian motion from EPOCH to end_date, seeded by (seed, symbol)."""
+        is_fx = symbol.endswith("=X")
+        if _is_daily_symbol(symbol):
+            days = pd.date_range(self.EPOCH, end_date, freq="D")
+            periods_per_year = 365
+        else:
+            days = pd.bdate_range(self.EPOCH, end_date)
+            periods_per_year = 252
+        count = len(days)
+
+        # One generator per component, so extending the range keeps earlier values
+        symbol_seed = zlib.crc32(f"{self.seed}:{symbol}".encode())
+
+        def rng(component: int) -> np.random.Generator:
+            return np.random.default_rng([symbol_seed, component])
+
+        volatility = 0.08 if is_fx else self.volatility
+        drift = 0.0 if is_fx else self.drift
+        start_price = 0.5 + rng(0).random() if is_fx else 10 + 490 * rng(0).random()
+
+        step = math.sqrt(1 / periods_per_year)
+        log_returns = (
+            (drift - volatility ** 2 / 2) / periods_per_year
+            + volatility * step * rng(1).standard_normal(count)
+        )
+        close = start_price * np.exp(np.cumsum(log_returns))
+        open_ = np.concatenate(([start_price], close[:-1]))
+        spread = np.abs(rng(2).standard_normal(count)) * volatility * step / 2
+        volume = np.zeros(count, dtype="int64") if is_fx else rng(3).integers(100_000, 10_000_000, count)
+
+        return pd.DataFrame(
+            {
+                "open": open_,
+                "high": np.maximum(open_, close) * (1 + spread),
+                "low": np.minimum(open_, close) * (1 - spread),
+                "close": close,
+                "volume": volume,
+            },
+            index=pd.Index(days.date, name="date")
+        )
+
+
+# Cassette encoding
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$decimal" in value:
+            return Decimal(value["$decimal"])
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _cassette_key(method: str, *args: Any) -> str:
+    return json.dumps([method, _encode(list(args))])
+
+
+def _load_cassette(path: Path) -> Dict[str, Any]:
+    entries: Dict[str, Any] = {}
+    if not path.exists():
+        return entries
+    with path.open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "entries" in item:
+                # Cassettes written as a single {"version": 1, "entries": {...}} document
+                entries.update(item["entries"])
+            else:
+                entries[item["key"]] = item["value"]
+    return entries
+
+
+class RecordingProvider:
+    """Forward calls to another provider and record its answers to a JSON cassette."""
+
+    name = "record"
+
+    def __init__(self, provider: MarketDataProvider, path: str):
+        """
+        Args:
+            provider: Provider whose answers are recorded
+            path: Cassette file; existing entries are kept and extended
+        """
+        self.provider = provider
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        result = self.provider.quote(symbol)
+        self._record({_cassette_key("quote", symbol): result})
+        return result
+
+    def history(self, symbols: Sequence[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        prices = self.provider.history(symbols, start_date, end_date)
+        self._record({
+            _cassette_key("history", symbol, start_date, end_date): prices.get(symbol, [])
+            for symbol in symbols
+        })
+        return prices
+
+    def fx_rate(self, base: str, quote: str) -> Optional[Decimal]:
+        result = self.provider.fx_rate(base, quote)
+        self._record({_cassette_key("fx_rate", base, quote): result})
+        return result
+
+    def search(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        result = self.provider.search(query)
+        self._record({_cassette_key("search", query): result})
+        return result
+
+    def _record(self, entries: Dict[str, Any]) -> None:
+        """Append one line per answer, so each call writes only its own answers."""
+        lines = "".join(
+            json.dumps({"key": key, "value": _encode(value)}) + "\n" for key, value in entries.items()
+        )
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(lines)
+
+
+class ReplayProvider:
+    """Serve answers recorded by RecordingProvider."""
+
+    name = "replay"
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Cassette file written by RecordingProvider
+        """
+        self.path = Path(path)
+        self._entries = _load_cassette(self.path)
+        logger.info(f"Loaded {len(self._entries)} recorded market data answers from {self.path}")
+
+    def quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        return self._replay("quote", symbol)
+
+    def history(self, symbols: Sequence[str], start_date: date, end_date: date) -> Dict[str, List[Dict]]:
+        prices = {}
+        for symbol in symbols:
+            records = self._replay("history", symbol, start_date, end_date)
+            if records:
+                prices[symbol] = records
+        return prices
+
+    def fx_rate(self, base: str, quote: str) -> Optional[Decimal]:
+        return self._replay("fx_rate", base, quote)
+
+    def search(self, query: str) -> Optional[Dict[str, Optional[str]]]:
+        return self._replay("search", query)
+
+    def _replay(self, method: str, *args: Any) -> Any:
+        key = _cassette_key(method, *args)
+        if key not in self._entries:
+            raise MarketDataError(f"No recorded {method} answer for {key}")
+        return _decode(self._entries[key])
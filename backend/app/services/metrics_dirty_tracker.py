@@ -0,0 +1,116 @@
+"""
+Metrics dirty tracker - Records which metric owners need a full recompute.
+
+Transaction writers mark the positions (by ISIN, or ticker when ISIN is NULL)
+and crypto portfolios (by ID) they touched. The nightly metric tasks rebuild
+only the marked entries from their transaction history and give every other
+entry a mark-to-market refresh from the inputs cached with its metrics, so a
+run costs O(changed owners) transaction replays instead of O(all owners).
+
+New prices need no mark: the mark-to-market refresh of every entry already
+revalues it at the latest close.
+
+All methods take a synchronous Session and never commit; the caller owns the
+transaction, so a mark is only visible once the edit that caused it commits.
+Async callers use AsyncSession.run_sync, e.g.:
+
+    await db.run_sync(MetricsDirtyTracker.mark, SCOPE_POSITION, [isin])
+"""
+from datetime import datetime
+from typing import Iterable, Set
+import logging
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import DirtyMetric
+
+logger = logging.getLogger(__name__)
+
+# Traditional positions, keyed by ISIN (ticker for ticker-only positions)
+SCOPE_POSITION = "position"
+
+# Crypto portfolios, keyed by str(portfolio_id)
+SCOPE_CRYPTO_PORTFOLIO = "crypto_portfolio"
+
+
+class MetricsDirtyTracker:
+    """Service for marking and consuming dirty metric owners."""
+
+    @staticmethod
+    def mark(db: Session, scope: str, keys: Iterable[object]) -> None:
+        """
+        Mark owners as changed.
+
+        Re-marking an already dirty owner moves its marked_at forward, so an
+        edit that lands while a metric run is in progress is kept for the next run.
+
+        Args:
+            db: Database session
+            scope: SCOPE_POSITION or SCOPE_CRYPTO_PORTFOLIO
+            keys: Owner identifiers (None values are ignored)
+        """
+        keys = sorted({str(key) for key in keys if key is not None})
+        if not keys:
+            return
+
+        now = datetime.utcnow()
+        stmt = pg_insert(DirtyMetric).values(
+            [{"scope": scope, "key": key, "marked_at": now} for key in keys]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uix_dirty_metric_scope_key",
+                set_={"marked_at": stmt.excluded.marked_at}
+            )
+        )
+        logger.debug(f"Marked {len(keys)} {scope} metrics as dirty")
+
+    @staticmethod
+    def pending(db: Session, scope: str) -> Set[str]:
+        """
+        Return the keys currently marked in a scope.
+
+        Args:
+            db: Database session
+            scope: SCOPE_POSITION or SCOPE_CRYPTO_PORTFOLIO
+
+        Returns:
+            Set of marked owner identifiers
+        """
+        return set(
+            db.execute(
+                select(DirtyMetric.key).where(DirtyMetric.scope == scope)
+            ).scalars().all()
+        )
+
+    @staticmethod
+    def clear(db: Session, scope: str, keys: Iterable[str], through: datetime) -> int:
+        """
+        Remove marks consumed by a metric run.
+
+        Only marks made at or before through (the start of the run) are removed;
+        owners re-marked during the run stay dirty.
+
+        Args:
+            db: Database session
+            scope: SCOPE_POSITION or SCOPE_CRYPTO_PORTFOLIO
+            keys: Owner identifiers that were recomputed
+            through: When the run read the pending marks
+
+        Returns:
+            Number of marks removed
+        """
+        keys = sorted({str(key) for key in keys})
+        if not keys:
+            return 0
+
+        result = db.execute(
+            delete(DirtyMetric).where(
+                DirtyMetric.scope == scope,
+                DirtyMetric.key.in_(keys),
+                DirtyMetric.marked_at <= through
+            )
+        )
+        return result.rowcount
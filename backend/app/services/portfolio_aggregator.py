@@ -19,21 +19,19 @@ import logging
 import json
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.sql import text as sql_text
 
-try:
-    import redis
-    redis_available = True
-except ImportError:
-    redis_available = False
-
 from app.models import (
-    Position, PortfolioSnapshot, PriceHistory, CryptoPortfolio,
+    Position, PortfolioSnapshot, CryptoPortfolio,
     CryptoPortfolioSnapshot
 )
+from app.services.asof_prices import PricePoint
+from app.services.cache_generations import CacheGenerations, TRANSACTIONS, PRICES, FX, CRYPTO
+from app.services.latest_prices import LatestPriceService
 from app.services.crypto_calculations import CryptoCalculationService
 from app.services.price_fetcher import PriceFetcher
+from app.services.redis_pools import redis_pools
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -79,89 +77,60 @@ class PortfolioAggregator:
 
     @property
     def redis_client(self):
-        """Lazy initialize Redis client for caching."""
-        if redis_available and not self._redis_initialized:
+        """Lazily borrow the shared non-blocking Redis client for caching."""
+        if not self._redis_initialized:
             try:
-                self._redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self._redis_client = redis_pools.async_client()
                 self._redis_initialized = True
             except Exception as e:
                 logger.warning(f"Failed to initialize Redis client: {e}")
                 self._redis_initialized = True  # Mark as attempted
         return self._redis_client
 
-    async def _get_cache(self, key: str) -> Optional[Dict[str, Any]]:
+    async def _get_cache(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
         """Get cached value from Redis with graceful fallback."""
-        if not self.redis_client:
+        if not self.redis_client or not key:
             return None
         try:
-            cached = self.redis_client.get(key)
+            cached = await self.redis_client.get(key)
             if cached:
                 return json.loads(cached)
         except Exception as e:
             logger.warning(f"Cache get failed for {key}: {e}")
         return None
 
-    async def _set_cache(self, key: str, value: Dict[str, Any], ttl_seconds: int = 60) -> None:
+    async def _set_cache(self, key: Optional[str], value: Dict[str, Any], ttl_seconds: int = 60) -> None:
         """Set cached value in Redis with graceful fallback."""
-        if not self.redis_client:
+        if not self.redis_client or not key:
             return
         try:
-            self.redis_client.setex(key, ttl_seconds, json.dumps(value, default=str))
+            await self.redis_client.setex(key, ttl_seconds, json.dumps(value, default=str))
         except Exception as e:
             logger.warning(f"Cache set failed for {key}: {e}")
 
-    async def _get_latest_prices_batch(self, tickers: List[str]) -> Dict[str, List[PriceHistory]]:
+    async def _get_latest_prices_batch(self, tickers: List[str]) -> Dict[str, List[PricePoint]]:
         """
         Batch load the latest 2 prices for multiple tickers (eliminates N+1 queries).
 
-        Uses database-level window functions (ROW_NUMBER) to efficiently filter prices
-        server-side instead of loading all prices and filtering in Python.
+        Reads the latest_prices table (one primary-key lookup per ticker), which
+        price ingestion keeps up to date.
 
         Args:
             tickers: List of ticker symbols to fetch prices for
 
         Returns:
-            Dictionary mapping ticker -> list of PriceHistory records (latest first, max 2 per ticker)
+            Dictionary mapping ticker -> list of price points (latest first, max 2 per ticker)
         """
         if not tickers:
             return {}
 
-        # Use window function at database level for efficiency
-        # ROW_NUMBER() assigns a number to each price within its ticker group
-        # We filter to keep only rows 1-2 (latest 2 prices per ticker)
-        from sqlalchemy.orm import aliased
-        from sqlalchemy import CTE
-
-        # Create a CTE with row numbers
-        rn_cte = select(
-            PriceHistory,
-            func.row_number().over(
-                partition_by=PriceHistory.ticker,
-                order_by=PriceHistory.date.desc()
-            ).label('rn')
-        ).where(
-            PriceHistory.ticker.in_(tickers)
-        ).cte()
-
-        # Select only rows where rn <= 2
-        result = await self.db.execute(
-            select(rn_cte).where(rn_cte.c.rn <= 2)
-        )
-        rows = result.all()
-
-        # Group results by ticker
-        prices_by_ticker: Dict[str, List[PriceHistory]] = {}
-        for row in rows:
-            # Extract PriceHistory object from the row tuple
-            price_obj = row[0]
-            ticker = price_obj.ticker
-
-            if ticker not in prices_by_ticker:
-                prices_by_ticker[ticker] = []
+        today = date.today()
+        prices = await LatestPriceService.load_async(self.db, tickers)
 
-            prices_by_ticker[ticker].append(price_obj)
-
-        return prices_by_ticker
+        return {
+            ticker: prices.history(ticker, today, 2)
+            for ticker in prices.tickers
+        }
 
     async def get_unified_holdings(self) -> List[Dict[str, Any]]:
         """
@@ -211,7 +180,7 @@ class PortfolioAggregator:
             Dictionary with aggregated metrics
         """
         # Check cache first
-        cache_key = "unified:overview"
+        cache_key = await CacheGenerations.key_async("unified:overview", TRANSACTIONS, PRICES, FX, CRYPTO)
         cached = await self._get_cache(cache_key)
         if cached:
             logger.debug("Returning cached unified overview")
@@ -325,7 +294,9 @@ class PortfolioAggregator:
             top_n = settings.portfolio_aggregator_top_movers
 
         # Check cache first
-        cache_key = f"unified:movers:{top_n}"
+        cache_key = await CacheGenerations.key_async(
+            "unified:movers", TRANSACTIONS, PRICES, FX, CRYPTO, parts=(top_n,)
+        )
         cached = await self._get_cache(cache_key)
         if cached:
             logger.debug(f"Returning cached unified movers (top {top_n})")
@@ -13,6 +13,7 @@ import logging
 
 from app.models import Transaction, Position, AssetType, TransactionType
 from app.services.calculations import FinancialCalculations
+from app.services.holdings_ledger import apply_transaction
 from app.services.split_detector import SplitDetector
 
 logger = logging.getLogger(__name__)
@@ -84,21 +85,13 @@ class PositionManager:
                 await db.commit()
             return None
 
-        # Convert to list of dicts for calculations
-        txn_dicts = [
-            {
-                "transaction_type": t.transaction_type.value,
-                "quantity": t.quantity,
-                "amount_eur": t.amount_eur,
-                "fees": t.fees,
-                "price_per_share": t.price_per_share,
-                "operation_date": t.operation_date
-            }
-            for t in transactions
-        ]
-
-        # Calculate position metrics
-        quantity = FinancialCalculations.calculate_position_quantity(txn_dicts)
+        # Replay this holding's transactions with the ledger's rule, so positions
+        # and snapshots share one cost basis. The ledger itself is advanced by the
+        # snapshot task, never inside a request.
+        holding = {"ticker": transactions[-1].ticker, "quantity": Decimal("0"), "cost_basis": Decimal("0")}
+        for txn in transactions:
+            apply_transaction(holding, txn)
+        quantity = holding["quantity"]
 
         # If quantity is zero or negative, position is closed
         if quantity <= 0:
@@ -113,11 +106,11 @@ class PositionManager:
             position = result.scalar_one_or_none()
             if position:
                 await db.delete(position)
-                await db.commit()
+            await db.commit()
             return None
 
-        average_cost = FinancialCalculations.calculate_average_cost(txn_dicts)
-        cost_basis = FinancialCalculations.calculate_cost_basis(txn_dicts)
+        cost_basis = holding["cost_basis"]
+        average_cost = cost_basis / quantity
 
         # Get current ticker (most recent transaction's ticker)
         current_ticker = transactions[-1].ticker
@@ -0,0 +1,323 @@
+"""
+Price backfill - Coverage-aware, batched PriceHistory backfills.
+
+Backfills used to download the whole requested range (5 years by default) for
+each ticker on every run and then probe PriceHistory once per row. Now:
+
+- price_coverage holds the date ranges each ticker already covers. A backfill
+  requests only each ticker's missing span (first to last uncovered day), and
+  tickers with the same span share multi-ticker downloads.
+- Rows are written with one INSERT ... ON CONFLICT statement per
+  INSERT_BATCH_SIZE rows: DO NOTHING keeps stored closes, DO UPDATE (force)
+  overwrites them.
+- Answered spans are merged into price_coverage, so re-running a backfill on
+  a fully populated database only requests the days since the last run.
+
+Coverage stops SETTLE_DAYS before today, so the latest closes are requested
+again until they are final. Spans for which a ticker returned no prices are
+not recorded (the provider may have been throttling). A span that ends right
+before a covered range is extended ANCHOR_DAYS into it, so that spans without
+trading days (e.g. before the listing date) still get an answer and are
+recorded once.
+
+Usage:
+    results = price_backfill.backfill(db, {"AAPL": ("AAPL", None)}, start, end)
+"""
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import Boolean, delete, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import PriceCoverage, PriceHistory
+from app.services.cache_generations import CacheGenerations, PRICES
+from app.services.latest_prices import LatestPriceService
+from app.services.price_fetcher import PriceFetcher
+from app.services.price_matrix import price_matrix
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[date, date]
+
+ONE_DAY = timedelta(days=1)
+
+# Per-ticker backfill status
+UP_TO_DATE = "up_to_date"
+FETCHED = "fetched"
+NO_DATA = "no_data"
+
+
+class PriceBackfillService:
+    """Fetch only the uncovered PriceHistory ranges and write them in bulk."""
+
+    ANCHOR_DAYS = 7  # days a span is extended into the covered range after it
+    SETTLE_DAYS = 1  # the most recent days are never recorded as covered
+    INSERT_BATCH_SIZE = 5000  # rows per INSERT statement
+
+    def __init__(self, price_fetcher: Optional[PriceFetcher] = None):
+        self.price_fetcher = price_fetcher or PriceFetcher()
+
+    # Coverage
+
+    @staticmethod
+    def load_coverage(db: Session, tickers: Iterable[str]) -> Dict[str, List[Span]]:
+        """
+        Load the covered ranges of tickers.
+
+        Args:
+            db: Synchronous database session
+            tickers: Tickers in price_history format
+
+        Returns:
+            Dict mapping each ticker with coverage to its ranges, in date order
+        """
+        tickers = sorted(set(tickers))
+        if not tickers:
+            return {}
+
+        rows = db.execute(
+            select(PriceCoverage.ticker, PriceCoverage.start_date, PriceCoverage.end_date)
+            .where(PriceCoverage.ticker.in_(tickers))
+            .order_by(PriceCoverage.ticker, PriceCoverage.start_date)
+        ).all()
+
+        coverage: Dict[str, List[Span]] = {}
+        for ticker, start_date, end_date in rows:
+            coverage.setdefault(ticker, []).append((start_date, end_date))
+        return coverage
+
+    @classmethod
+    def missing_span(cls, covered: List[Span], start_date: date, end_date: date) -> Optional[Span]:
+        """
+        Return the span to request so that [start_date, end_date] becomes covered.
+
+        Args:
+            covered: Covered ranges in date order, not overlapping
+            start_date: Inclusive start of the wanted range
+            end_date: Inclusive end of the wanted range
+
+        Returns:
+            (first uncovered day, last uncovered day), extended by ANCHOR_DAYS
+            when it ends right before a covered range; None if fully covered
+        """
+        first_missing = last_missing = None
+        cursor = start_date
+        for range_start, range_end in covered:
+            if cursor > end_date or range_start > end_date:
+                break
+            if range_end < cursor:
+                continue
+            if range_start > cursor:
+                first_missing = first_missing or cursor
+                last_missing = range_start - ONE_DAY
+            cursor = max(cursor, range_end + ONE_DAY)
+        if cursor <= end_date:
+            first_missing = first_missing or cursor
+            last_missing = end_date
+
+        if first_missing is None:
+            return None
+        if any(range_start == last_missing + ONE_DAY for range_start, _ in covered):
+            last_missing = min(end_date, last_missing + timedelta(days=cls.ANCHOR_DAYS))
+        return first_missing, last_missing
+
+    @staticmethod
+    def merge_ranges(ranges: Iterable[Span]) -> List[Span]:
+        """Merge overlapping and adjacent ranges."""
+        merged: List[Span] = []
+        for start_date, end_date in sorted(ranges):
+            if merged and start_date <= merged[-1][1] + ONE_DAY:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+            else:
+                merged.append((start_date, end_date))
+        return merged
+
+    @classmethod
+    def record_coverage(cls, db: Session, spans: Dict[str, Span]) -> None:
+        """
+        Merge answered spans into price_coverage. The caller commits.
+
+        Args:
+            db: Synchronous database session
+            spans: Ticker -> answered (start, end) span
+        """
+        if not spans:
+            return
+
+        existing = cls.load_coverage(db, spans)
+        now = datetime.utcnow()
+        rows = []
+        stale = []
+        for ticker, span in spans.items():
+            ranges = existing.get(ticker, [])
+            merged = cls.merge_ranges(ranges + [span])
+            starts = {start_date for start_date, _ in merged}
+            stale.extend((ticker, start_date) for start_date, _ in ranges if start_date not in starts)
+            rows.extend(
+                {"ticker": ticker, "start_date": start_date, "end_date": end_date, "updated_at": now}
+                for start_date, end_date in merged
+            )
+
+        if stale:
+            db.execute(
+                delete(PriceCoverage)
+                .where(tuple_(PriceCoverage.ticker, PriceCoverage.start_date).in_(stale))
+            )
+        stmt = pg_insert(PriceCoverage).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["ticker", "start_date"],
+            set_={
+                "end_date": func.greatest(PriceCoverage.end_date, stmt.excluded.end_date),
+                "updated_at": stmt.excluded.updated_at,
+            }
+        ))
+
+    # Writing
+
+    @classmethod
+    def upsert_prices(cls, db: Session, rows: List[Dict], overwrite: bool = False) -> Dict[str, Tuple[int, int]]:
+        """
+        Write PriceHistory rows in bulk. The caller commits.
+
+        Args:
+            db: Synchronous database session
+            rows: Dicts with keys ticker, date, open, high, low, close, volume, source
+            overwrite: Update stored (ticker, date) rows instead of skipping them
+
+        Returns:
+            Dict mapping tickers with writes to (rows added, rows updated)
+        """
+        # One row per (ticker, date): ON CONFLICT DO UPDATE cannot touch a row twice
+        rows = list({(row["ticker"], row["date"]): row for row in rows}.values())
+
+        written: Dict[str, Tuple[int, int]] = {}
+        for start in range(0, len(rows), cls.INSERT_BATCH_SIZE):
+            stmt = pg_insert(PriceHistory).values(rows[start:start + cls.INSERT_BATCH_SIZE])
+            if overwrite:
+                stmt = stmt.on_conflict_do_update(
+                    constraint='uix_ticker_date',
+                    set_={
+                        "open": stmt.excluded.open,
+                        "high": stmt.excluded.high,
+                        "low": stmt.excluded.low,
+                        "close": stmt.excluded.close,
+                        "volume": stmt.excluded.volume,
+                        "source": stmt.excluded.source,
+                    }
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(constraint='uix_ticker_date')
+
+            # xmax is 0 for freshly inserted rows and set for updated ones
+            inserted = literal_column("xmax = 0", Boolean).label("inserted")
+            for ticker, was_inserted in db.execute(stmt.returning(PriceHistory.ticker, inserted)).all():
+                added, updated = written.get(ticker, (0, 0))
+                written[ticker] = (added + 1, updated) if was_inserted else (added, updated + 1)
+        return written
+
+    # Backfill
+
+    def backfill(
+        self,
+        db: Session,
+        tickers: Dict[str, Tuple[str, Optional[str]]],
+        start_date: date,
+        end_date: date,
+        force: bool = False,
+        transform: Optional[Callable[[str, List[Dict]], List[Dict]]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Backfill PriceHistory for tickers over [start_date, end_date] and commit.
+
+        Args:
+            db: Synchronous database session
+            tickers: Stored ticker -> (ticker to fetch, ISIN for resolution)
+            start_date: Inclusive start date
+            end_date: Inclusive end date
+            force: Request the whole range and overwrite stored rows
+            transform: Optional fn(stored ticker, records) -> records applied
+                before writing (e.g. a currency conversion)
+
+        Returns:
+            Per stored ticker: added, updated and skipped row counts and status
+            (up_to_date, fetched or no_data)
+        """
+        if force:
+            spans = {ticker: (start_date, end_date) for ticker in tickers}
+        else:
+            coverage = self.load_coverage(db, tickers)
+            spans = {}
+            for ticker in tickers:
+                span = self.missing_span(coverage.get(ticker, []), start_date, end_date)
+                if span is not None:
+                    spans[ticker] = span
+
+        results = {
+            ticker: {"added": 0, "updated": 0, "skipped": 0, "status": UP_TO_DATE}
+            for ticker in tickers
+        }
+        logger.info(f"Backfilling {len(spans)} of {len(tickers)} tickers ({start_date} to {end_date})")
+
+        # Span -> fetch request -> stored tickers; tickers sharing a span share downloads
+        groups: Dict[Span, Dict[Tuple[str, Optional[str]], List[str]]] = {}
+        for ticker, span in spans.items():
+            groups.setdefault(span, {}).setdefault(tickers[ticker], []).append(ticker)
+
+        settled = date.today() - timedelta(days=self.SETTLE_DAYS)
+        rows: List[Dict] = []
+        received: Dict[str, int] = {}
+        answered: Dict[str, Span] = {}
+        for (span_start, span_end), requests in groups.items():
+            fetched = self.price_fetcher.fetch_historical_prices_batch_sync(list(requests), span_start, span_end)
+
+            for (fetch_ticker, _), stored_tickers in requests.items():
+                records = fetched.get(fetch_ticker)
+                for ticker in stored_tickers:
+                    if not records:
+                        results[ticker]["status"] = NO_DATA
+                        continue
+
+                    results[ticker]["status"] = FETCHED
+                    ticker_records = transform(ticker, records) if transform else records
+                    received[ticker] = len(ticker_records)
+                    rows.extend(
+                        {
+                            "ticker": ticker,
+                            "date": record["date"],
+                            "open": record["open"],
+                            "high": record["high"],
+                            "low": record["low"],
+                            "close": record["close"],
+                            "volume": record.get("volume") or 0,
+                            "source": record.get("source", "yahoo"),
+                        }
+                        for record in ticker_records
+                    )
+                    if min(span_end, settled) >= span_start:
+                        answered[ticker] = (span_start, min(span_end, settled))
+
+        written = self.upsert_prices(db, rows, overwrite=force)
+        for ticker, count in received.items():
+            added, updated = written.get(ticker, (0, 0))
+            results[ticker].update(added=added, updated=updated, skipped=count - added - updated)
+        self.record_coverage(db, answered)
+
+        changed = sorted(written)
+        if changed:
+            LatestPriceService.refresh(db, changed)
+        db.commit()
+        if changed:
+            price_matrix.invalidate(changed)
+            CacheGenerations.bump(PRICES)
+
+        logger.info(
+            f"Backfill received {len(rows)} price rows, {len(changed)} tickers changed; "
+            f"{len(tickers) - len(spans)} tickers already covered"
+        )
+        return results
+
+
+# Global backfill service instance
+price_backfill = PriceBackfillService()
@@ -7,102 +7,80 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 import logging
-import yfinance as yf
-from time import sleep
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from concurrent.futures import as_completed
 
+from app.services.market_data import get_market_data_provider
+from app.services.provider_executor import provider_executor
+from app.services.quote_cache import quote_cache
 from app.services.ticker_mapper import TickerMapper
 
 logger = logging.getLogger(__name__)
 
 
-class RealtimePriceCache:
-    """Simple in-memory cache for real-time prices with 30-second TTL."""
-
-    def __init__(self, ttl_seconds: int = 30):
-        self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, Tuple[Dict, datetime]] = {}
-        self._lock = threading.Lock()
-
-    def get(self, ticker: str) -> Optional[Dict]:
-        """Get cached price if not expired."""
-        with self._lock:
-            if ticker in self._cache:
-                price_data, timestamp = self._cache[ticker]
-                age = (datetime.utcnow() - timestamp).total_seconds()
-                if age < self.ttl_seconds:
-                    logger.debug(f"Cache hit for {ticker} (age: {age:.1f}s)")
-                    return price_data
-                else:
-                    logger.debug(f"Cache expired for {ticker} (age: {age:.1f}s)")
-                    del self._cache[ticker]
-        return None
-
-    def set(self, ticker: str, price_data: Dict) -> None:
-        """Store price data in cache."""
-        with self._lock:
-            self._cache[ticker] = (price_data, datetime.utcnow())
-            logger.debug(f"Cached price for {ticker}")
-
-    def clear(self) -> None:
-        """Clear all cached data."""
-        with self._lock:
-            self._cache.clear()
-            logger.debug("Price cache cleared")
-
-
 class PriceFetcher:
-    """Fetch prices from Yahoo Finance API."""
-
-    # Real-time price fetching configuration
-    REALTIME_RATE_LIMIT_DELAY = 0.15  # seconds between Yahoo Finance requests
-    REALTIME_CACHE_TTL = 30  # seconds
-    REALTIME_MAX_WORKERS = 5  # concurrent threads for batch fetching
-
-    def __init__(self):
-        """Initialize price fetcher with real-time cache."""
-        self._realtime_cache = RealtimePriceCache(ttl_seconds=self.REALTIME_CACHE_TTL)
+    """
+    Fetch prices from Yahoo Finance API.
+
+    Data comes from the active market data provider (Yahoo Finance unless
+    MARKET_DATA_PROVIDER selects an offline one, see app.services.market_data).
+    Provider calls block, so they live in the private _fetch_* methods. The
+    async methods run them on the shared provider executor and the sync
+    wrappers submit them to it, so neither blocks an event loop nor creates
+    threads or loops per call.
+    """
+
+    # Historical batch fetching configuration
+    HISTORY_BATCH_SIZE = 100  # symbols per multi-ticker Yahoo Finance download
+    LATEST_PRICE_LOOKBACK_DAYS = 7  # covers weekends and holidays
+    DEFAULT_HISTORY_DAYS = 30  # range fetched when no start date is given
 
     @staticmethod
     async def fetch_stock_price(ticker: str) -> Optional[Dict[str, Decimal]]:
         """
         Fetch the latest OHLCV price for a stock or ETF from Yahoo Finance.
 
+        Parameters:
+            ticker (str): The Yahoo Finance ticker symbol to query.
+
+        Returns:
+            Optional[Dict]: See _fetch_stock_price.
+        """
+        return await provider_executor.run(PriceFetcher._fetch_stock_price, ticker)
+
+    @staticmethod
+    def _fetch_stock_price(ticker: str) -> Optional[Dict[str, Decimal]]:
+        """
+        Fetch the latest OHLCV price for a stock or ETF (blocking).
+
         Parameters:
             ticker (str): The Yahoo Finance ticker symbol to query.
 
         Returns:
             Optional[Dict[str, Decimal | int | str]]: A dictionary with keys:
+                - `date` (date): The latest trading date.
                 - `open` (Decimal): Opening price for the latest trading period.
                 - `high` (Decimal): Highest price for the latest trading period.
                 - `low` (Decimal): Lowest price for the latest trading period.
                 - `close` (Decimal): Closing price for the latest trading period.
                 - `volume` (int): Traded volume for the latest trading period.
-                - `source` (str): Data source identifier (always "yahoo").
+                - `source` (str): Data source identifier (the provider name).
             Returns `None` if no data is available or an error occurs.
         """
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="1d")
-
-            if hist.empty:
-                logger.warning(f"No price data for {ticker} from Yahoo Finance")
+            today = date.today()
+            prices = get_market_data_provider().history(
+                [ticker], today - timedelta(days=PriceFetcher.LATEST_PRICE_LOOKBACK_DAYS), today
+            )
+            records = prices.get(ticker)
+
+            if not records:
+                logger.warning(f"No price data for {ticker}")
                 return None
 
-            latest = hist.iloc[-1]
-
-            return {
-                "open": Decimal(str(latest["Open"])),
-                "high": Decimal(str(latest["High"])),
-                "low": Decimal(str(latest["Low"])),
-                "close": Decimal(str(latest["Close"])),
-                "volume": int(latest["Volume"]),
-                "source": "yahoo"
-            }
+            return records[-1]
 
         except Exception as e:
-            logger.error(f"Error fetching price for {ticker} from Yahoo Finance: {str(e)}")
+            logger.error(f"Error fetching price for {ticker}: {str(e)}")
             return None
 
 
@@ -123,21 +101,23 @@ class PriceFetcher:
         Returns:
             List[Dict]: A list of price records, each containing keys `date`, `open`, `high`, `low`, `close`, `volume`, and `source`; returns an empty list if no data is available or on failure.
         """
-        return await PriceFetcher._fetch_stock_historical(ticker, start_date, end_date)
+        return await provider_executor.run(
+            PriceFetcher._fetch_stock_historical, ticker, start_date, end_date
+        )
 
     @staticmethod
-    async def _fetch_stock_historical(
+    def _fetch_stock_historical(
         ticker: str,
         start_date: date,
         end_date: date
     ) -> List[Dict]:
         """
-        Retrieve historical OHLCV records for a ticker between two dates.
+        Retrieve historical OHLCV records for a ticker between two dates (blocking).
 
         Parameters:
             ticker (str): Ticker symbol to query on Yahoo Finance.
-            start_date (date): Inclusive start date for the historical range.
-            end_date (date): Exclusive end date for the historical range.
+            start_date (date): Inclusive start date (default: DEFAULT_HISTORY_DAYS before end_date).
+            end_date (date): Inclusive end date (default: today).
 
         Returns:
             List[Dict]: A list of price records. Each record contains:
@@ -147,29 +127,18 @@ class PriceFetcher:
                 - `low` (Decimal): Lowest price.
                 - `close` (Decimal): Closing price.
                 - `volume` (int): Traded volume.
-                - `source` (str): Data source identifier ("yahoo").
+                - `source` (str): Data source identifier (the provider name).
             Returns an empty list if no data is available or an error occurs.
         """
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=PriceFetcher.DEFAULT_HISTORY_DAYS)
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start_date, end=end_date)
+            prices = get_market_data_provider().history([ticker], start_date, end_date).get(ticker)
 
-            if hist.empty:
+            if not prices:
                 logger.warning(f"No historical data for {ticker}")
                 return []
 
-            prices = []
-            for idx, row in hist.iterrows():
-                prices.append({
-                    "date": idx.date(),
-                    "open": Decimal(str(row["Open"])),
-                    "high": Decimal(str(row["High"])),
-                    "low": Decimal(str(row["Low"])),
-                    "close": Decimal(str(row["Close"])),
-                    "volume": int(row["Volume"]),
-                    "source": "yahoo"
-                })
-
             return prices
 
         except Exception as e:
@@ -182,6 +151,34 @@ class PriceFetcher:
         """
         Fetch the FX exchange rate for a currency pair from Yahoo Finance.
 
+        Parameters:
+        	base (str): Base currency code (default "EUR").
+        	quote (str): Quote currency code (default "USD").
+
+        Returns:
+        	Decimal: Units of `quote` per unit of `base`, or `None` if the rate is unavailable.
+        """
+        return await provider_executor.run(PriceFetcher._fetch_fx_rate, base, quote)
+
+    @staticmethod
+    def fetch_fx_rate_sync(base: str = "EUR", quote: str = "USD") -> Optional[Decimal]:
+        """
+        Synchronous fetch_fx_rate (for Celery tasks and other sync code).
+
+        Parameters:
+        	base (str): Base currency code (default "EUR").
+        	quote (str): Quote currency code (default "USD").
+
+        Returns:
+        	Decimal: Units of `quote` per unit of `base`, or `None` if the rate is unavailable.
+        """
+        return provider_executor.call(PriceFetcher._fetch_fx_rate, base, quote)
+
+    @staticmethod
+    def _fetch_fx_rate(base: str, quote: str) -> Optional[Decimal]:
+        """
+        Fetch the FX exchange rate for a currency pair (blocking).
+
         Parameters:
         	base (str): Base currency code (default "EUR").
         	quote (str): Quote currency code (default "USD").
@@ -190,18 +187,13 @@ class PriceFetcher:
         	Decimal: Exchange rate expressing how many units of `quote` equal one unit of `base` (e.g., 1.10 for EUR/USD), or `None` if the rate is unavailable.
         """
         try:
-            # Yahoo Finance FX ticker format: EURUSD=X
-            fx_ticker = f"{base}{quote}=X"
-            fx_data = yf.Ticker(fx_ticker)
-            hist = fx_data.history(period="1d")
+            rate = get_market_data_provider().fx_rate(base, quote)
 
-            if hist.empty:
-                logger.warning(f"No FX rate data for {fx_ticker}")
+            if rate is None:
+                logger.warning(f"No FX rate data for {base}/{quote}")
                 return None
 
-            rate = Decimal(str(hist.iloc[-1]["Close"]))
-            logger.info(f"Fetched FX rate {fx_ticker}: {rate}")
-
+            logger.info(f"Fetched FX rate {base}/{quote}: {rate}")
             return rate
 
         except Exception as e:
@@ -214,7 +206,7 @@ class PriceFetcher:
 
         If ISIN is provided, resolves to correct Yahoo Finance ticker.
 
-        Runs in a separate thread to avoid event loop conflicts when called from async contexts.
+        Runs on the shared provider executor.
 
         Args:
             ticker: Asset ticker symbol (broker format)
@@ -223,26 +215,12 @@ class PriceFetcher:
         Returns:
             Dict with OHLCV data or None
         """
-        import asyncio
-
         try:
             # Resolve ticker using ISIN if provided
             resolved_ticker = TickerMapper.resolve_ticker(ticker, isin) if isin else ticker
             logger.info(f"Fetching price for {ticker} (resolved: {resolved_ticker})")
 
-            # Run in a separate thread to avoid event loop conflicts
-            def run_async_in_new_loop():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    return loop.run_until_complete(PriceFetcher.fetch_stock_price(resolved_ticker))
-                finally:
-                    loop.close()
-
-            # Use ThreadPoolExecutor to run in a separate thread
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_async_in_new_loop)
-                return future.result()
+            return provider_executor.call(PriceFetcher._fetch_stock_price, resolved_ticker)
 
         except Exception as e:
             logger.error(f"Error fetching latest price for {ticker}: {str(e)}")
@@ -260,7 +238,7 @@ class PriceFetcher:
 
         If ISIN is provided, resolves to correct Yahoo Finance ticker.
 
-        Runs in a separate thread to avoid event loop conflicts when called from async contexts.
+        Runs on the shared provider executor.
 
         Args:
             ticker: Asset ticker symbol (broker format)
@@ -271,39 +249,72 @@ class PriceFetcher:
         Returns:
             List of price dictionaries with keys: date, open, high, low, close, volume, source
         """
-        import asyncio
-
         try:
             # Resolve ticker using ISIN if provided
             resolved_ticker = TickerMapper.resolve_ticker(ticker, isin) if isin else ticker
             logger.info(f"Fetching historical prices for {ticker} (resolved: {resolved_ticker})")
 
-            # Run in a separate thread to avoid event loop conflicts
-            def run_async_in_new_loop():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    return loop.run_until_complete(
-                        PriceFetcher.fetch_historical_prices(resolved_ticker, start_date, end_date)
-                    )
-                finally:
-                    loop.close()
-
-            # Use ThreadPoolExecutor to run in a separate thread
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_async_in_new_loop)
-                return future.result()
+            return provider_executor.call(
+                PriceFetcher._fetch_stock_historical, resolved_ticker, start_date, end_date
+            )
 
         except Exception as e:
             logger.error(f"Error fetching historical prices for {ticker}: {str(e)}")
             return []
 
+    def fetch_historical_prices_batch_sync(
+        self,
+        tickers: List[Tuple[str, Optional[str]]],
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, List[Dict]]:
+        """
+        Fetch historical prices for many tickers with multi-ticker downloads.
+
+        Tickers are resolved like fetch_historical_prices_sync and downloaded
+        HISTORY_BATCH_SIZE symbols per Yahoo Finance request, so the number of
+        requests no longer grows with the number of tickers.
+
+        Args:
+            tickers: List of (ticker, isin) pairs in broker format
+            start_date: Inclusive start date
+            end_date: Inclusive end date
+
+        Returns:
+            Dict mapping each broker ticker that has data to its price dictionaries
+            (keys: date, open, high, low, close, volume, source)
+        """
+        # Resolved symbol -> broker tickers (several broker tickers may share a symbol)
+        symbols: Dict[str, List[str]] = {}
+        for ticker, isin in tickers:
+            resolved_ticker = TickerMapper.resolve_ticker(ticker, isin) if isin else ticker
+            symbols.setdefault(resolved_ticker.upper(), []).append(ticker)
+
+        names = list(symbols)
+        provider = get_market_data_provider()
+        prices: Dict[str, List[Dict]] = {}
+        for start in range(0, len(names), self.HISTORY_BATCH_SIZE):
+            chunk = names[start:start + self.HISTORY_BATCH_SIZE]
+            logger.info(f"Downloading historical prices for {len(chunk)} symbols ({start_date} to {end_date})")
+
+            try:
+                chunk_prices = provider.history(chunk, start_date, end_date)
+            except Exception as e:
+                logger.error(f"Error downloading historical prices for {len(chunk)} symbols: {str(e)}")
+                continue
+
+            for symbol, records in chunk_prices.items():
+                for ticker in symbols.get(symbol.upper(), []):
+                    prices[ticker] = records
+
+        return prices
+
     def fetch_realtime_price(self, ticker: str, isin: Optional[str] = None) -> Optional[Dict]:
         """
         Fetch near real-time price for a single ticker using yfinance.
 
         Uses fast_info for quick intraday price retrieval.
-        Results are cached for 30 seconds to reduce API load.
+        Results are cached in the shared quote cache (30 seconds by default).
 
         Gracefully falls back from ISIN to ticker if resolution fails.
 
@@ -316,12 +327,12 @@ class PriceFetcher:
                           change_amount, change_percent, timestamp
             None if price cannot be fetched
         """
-        # Check cache first
-        cache_key = f"{ticker}:{isin or 'none'}"
-        cached = self._realtime_cache.get(cache_key)
-        if cached:
-            return cached
+        # Quotes are shared by every process; concurrent misses make one provider call
+        cache_key = f"{ticker}:{isin}" if isin else ticker
+        return quote_cache.get_or_fetch(cache_key, lambda: self._fetch_realtime_price(ticker, isin))
 
+    def _fetch_realtime_price(self, ticker: str, isin: Optional[str]) -> Optional[Dict]:
+        """Fetch a realtime quote from Yahoo Finance, bypassing the quote cache."""
         try:
             # Resolve ticker using ISIN if provided
             resolved_ticker = TickerMapper.resolve_ticker(ticker, isin) if isin else ticker
@@ -356,12 +367,6 @@ class PriceFetcher:
                 "timestamp": datetime.utcnow()
             }
 
-            # Cache the result
-            self._realtime_cache.set(cache_key, result)
-
-            # Rate limiting
-            sleep(self.REALTIME_RATE_LIMIT_DELAY)
-
             return result
 
         except Exception as e:
@@ -379,34 +384,14 @@ class PriceFetcher:
         Returns:
             Tuple of (price_data dict or None, fallback_used boolean)
         """
+        provider = get_market_data_provider()
+
         # Try resolved ticker first
         try:
-            stock = yf.Ticker(resolved_ticker)
-
-            # Try to get current price from fast_info
-            try:
-                current_price = stock.fast_info.get('lastPrice')
-                previous_close = stock.fast_info.get('previousClose')
-            except Exception:
-                # Fallback to regular history if fast_info fails
-                logger.debug(f"fast_info failed for {resolved_ticker}, falling back to history")
-                hist = stock.history(period="1d", interval="1m")
-                if hist.empty:
-                    logger.debug(f"No real-time data for {resolved_ticker}")
-                    current_price = None
-                    previous_close = None
-                else:
-                    current_price = float(hist['Close'].iloc[-1])
-                    # Get previous close from info
-                    info = stock.info
-                    previous_close = info.get('previousClose', info.get('regularMarketPreviousClose'))
-
-            if current_price is not None and previous_close is not None:
+            price_data = provider.quote(resolved_ticker)
+            if price_data is not None:
                 logger.debug(f"Successfully fetched price for {resolved_ticker}")
-                return {
-                    "current_price": current_price,
-                    "previous_close": previous_close
-                }, False
+                return price_data, False
 
             # If we got here, resolved ticker didn't work
             logger.warning(f"Missing price data for {resolved_ticker}, trying fallback {fallback_ticker}")
@@ -417,29 +402,10 @@ class PriceFetcher:
         # Try fallback ticker if different and we haven't already
         if fallback_ticker != resolved_ticker:
             try:
-                stock = yf.Ticker(fallback_ticker)
-
-                # Try to get current price from fast_info
-                try:
-                    current_price = stock.fast_info.get('lastPrice')
-                    previous_close = stock.fast_info.get('previousClose')
-                except Exception:
-                    logger.debug(f"fast_info failed for {fallback_ticker}, falling back to history")
-                    hist = stock.history(period="1d", interval="1m")
-                    if hist.empty:
-                        logger.debug(f"No real-time data for {fallback_ticker}")
-                        return None, True
-                    current_price = float(hist['Close'].iloc[-1])
-                    # Get previous close from info
-                    info = stock.info
-                    previous_close = info.get('previousClose', info.get('regularMarketPreviousClose'))
-
-                if current_price is not None and previous_close is not None:
+                price_data = provider.quote(fallback_ticker)
+                if price_data is not None:
                     logger.info(f"Successfully fetched price using fallback ticker {fallback_ticker}")
-                    return {
-                        "current_price": current_price,
-                        "previous_close": previous_close
-                    }, True
+                    return price_data, True
 
                 logger.warning(f"Missing price data for fallback {fallback_ticker}")
                 return None, True
@@ -469,22 +435,22 @@ class PriceFetcher:
         logger.info(f"Fetching real-time prices for {len(tickers)} tickers")
 
         results = []
-        with ThreadPoolExecutor(max_workers=self.REALTIME_MAX_WORKERS) as executor:
-            # Submit all tasks
-            future_to_ticker = {
-                executor.submit(self.fetch_realtime_price, ticker, isin): (ticker, isin)
-                for ticker, isin in tickers
-            }
-
-            # Collect results as they complete
-            for future in as_completed(future_to_ticker):
-                ticker, isin = future_to_ticker[future]
-                try:
-                    price_data = future.result()
-                    if price_data:
-                        results.append(price_data)
-                except Exception as e:
-                    logger.error(f"Error fetching price for {ticker}: {str(e)}")
+        futures = provider_executor.map(
+            self.fetch_realtime_price,
+            [ticker for ticker, _ in tickers],
+            [isin for _, isin in tickers]
+        )
+        future_to_ticker = dict(zip(futures, (ticker for ticker, _ in tickers)))
+
+        # Collect results as they complete
+        for future in as_completed(future_to_ticker):
+            ticker = future_to_ticker[future]
+            try:
+                price_data = future.result()
+                if price_data:
+                    results.append(price_data)
+            except Exception as e:
+                logger.error(f"Error fetching price for {ticker}: {str(e)}")
 
         logger.info(f"Successfully fetched {len(results)} out of {len(tickers)} real-time prices")
         return results
@@ -12,6 +12,7 @@ import logging
 import asyncio
 
 from .price_fetcher import PriceFetcher
+from .provider_executor import provider_executor
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +53,7 @@ class UnifiedPriceFetcher:
                     yahoo_symbol = f"{ticker}-EUR"
                 else:
                     yahoo_symbol = f"{ticker}-USD"
-                result = await asyncio.to_thread(self.yahoo_fetcher.fetch_realtime_price, yahoo_symbol)
+                result = await provider_executor.run(self.yahoo_fetcher.fetch_realtime_price, yahoo_symbol)
                 if result and result.get("current_price"):
                     # Set the correct currency based on what we fetched
                     if currency.lower() == "eur":
@@ -285,8 +286,8 @@ class UnifiedPriceFetcher:
 
         # Test crypto via Yahoo Finance (both USD and EUR)
         try:
-            crypto_result_usd = await asyncio.to_thread(self.yahoo_fetcher.fetch_realtime_price, 'BTC-USD')
-            crypto_result_eur = await asyncio.to_thread(self.yahoo_fetcher.fetch_realtime_price, 'BTC-EUR')
+            crypto_result_usd = await provider_executor.run(self.yahoo_fetcher.fetch_realtime_price, 'BTC-USD')
+            crypto_result_eur = await provider_executor.run(self.yahoo_fetcher.fetch_realtime_price, 'BTC-EUR')
             results['yahoo_finance_crypto'] = crypto_result_usd is not None and crypto_result_eur is not None
         except Exception as e:
             logger.error(f"Yahoo Finance crypto test failed: {e}")
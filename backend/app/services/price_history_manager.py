@@ -8,18 +8,25 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Set
 import logging
-from sqlalchemy import select, func, and_
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
 
 from app.database import SyncSessionLocal
 from app.models.position import Position
 from app.models.crypto import CryptoTransaction, CryptoTransactionType
 from app.models import PriceHistory
+from app.services.price_backfill import NO_DATA, PriceBackfillService
 from app.services.price_fetcher import PriceFetcher
 from app.services.currency_converter import get_exchange_rate
+from app.services.fx_history import fx_history
 
 logger = logging.getLogger(__name__)
 
+# Default history depth
+HISTORY_YEARS = 5
+
+# Symbols stored without the Yahoo Finance -USD suffix
+CRYPTO_SYMBOLS = {'BTC', 'ETH', 'LTC', 'BCH', 'XRP', 'ADA', 'DOT', 'LINK', 'BNB', 'USDT', 'USDC'}
+
 
 class PriceHistoryManager:
     """
@@ -34,6 +41,7 @@ class PriceHistoryManager:
 
     def __init__(self):
         self.price_fetcher = PriceFetcher()
+        self.backfill_service = PriceBackfillService(self.price_fetcher)
 
     def get_all_active_symbols(self) -> Set[str]:
         """
@@ -79,6 +87,29 @@ class PriceHistoryManager:
         finally:
             db.close()
 
+    @staticmethod
+    def _yahoo_symbol(symbol: str) -> str:
+        """Map a stored symbol to its Yahoo Finance ticker (SYMBOL-USD for crypto)."""
+        if symbol in CRYPTO_SYMBOLS:
+            return f"{symbol}-USD"
+        return symbol
+
+    @staticmethod
+    def _to_eur(records: List[Dict], closes_eur: List[Decimal]) -> List[Dict]:
+        """Attach EUR closes to USD records; open/high/low are stored as the converted close."""
+        converted = []
+        for price_data, price_eur in zip(records, closes_eur):
+            converted.append({
+                'date': price_data['date'],
+                'open': price_eur,
+                'high': price_eur,
+                'low': price_eur,
+                'close': price_eur,
+                'volume': price_data.get('volume', 0),
+                'source': price_data.get('source', 'yahoo')
+            })
+        return converted
+
     def fetch_and_store_complete_history(
         self,
         symbol: str,
@@ -96,112 +127,79 @@ class PriceHistoryManager:
         Returns:
             Dict with counts: {'added': X, 'updated': Y, 'skipped': Z}
         """
+        return self.fetch_and_store_history([symbol], start_date, force_update)[symbol]
+
+    def fetch_and_store_history(
+        self,
+        symbols: List[str],
+        start_date: Optional[date] = None,
+        force_update: bool = False
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Fetch and store historical data for several symbols.
+
+        Only the date ranges missing from price_coverage are downloaded (all of
+        them with force_update), with multi-ticker requests, and written with
+        bulk upserts (see PriceBackfillService).
+
+        Args:
+            symbols: Ticker symbols to fetch
+            start_date: Optional start date (defaults to 5 years ago)
+            force_update: Whether to re-download the range and overwrite existing data
+
+        Returns:
+            Dict mapping symbol to counts: {'added': X, 'updated': Y, 'skipped': Z, 'status': S}
+        """
         if start_date is None:
             # Fetch up to 5 years of history by default
-            start_date = date.today() - timedelta(days=5 * 365)
+            start_date = date.today() - timedelta(days=HISTORY_YEARS * 365)
 
         end_date = date.today()
 
-        logger.info(f"Fetching complete price history for {symbol} from {start_date} to {end_date}")
+        logger.info(f"Fetching price history for {len(symbols)} symbols from {start_date} to {end_date}")
 
         db = SyncSessionLocal()
-        try:
-            # Check what data we already have
-            existing_result = db.execute(
-                select(PriceHistory)
-                .where(
-                    and_(
-                        PriceHistory.ticker == symbol,
-                        PriceHistory.date >= start_date,
-                        PriceHistory.date <= end_date
-                    )
+
+        def convert(symbol: str, records: List[Dict]) -> List[Dict]:
+            # Each close at the USD->EUR rate of its day, one vectorized conversion per symbol
+            try:
+                closes = fx_history.convert_series(
+                    db,
+                    [float(record['close']) for record in records],
+                    [record['date'] for record in records],
+                    "USD",
+                    "EUR"
                 )
-                .order_by(PriceHistory.date)
-            )
-            existing_records = existing_result.scalars().all()
-            existing_dates = {record.date for record in existing_records}
-
-            # Fetch historical data from Yahoo Finance
-            yahoo_symbol = symbol
-            # For crypto, Yahoo Finance uses SYMBOL-USD format
-            if symbol in ['BTC', 'ETH', 'LTC', 'BCH', 'XRP', 'ADA', 'DOT', 'LINK', 'BNB', 'USDT', 'USDC']:
-                yahoo_symbol = f"{symbol}-USD"
-
-            historical_data = self.price_fetcher.fetch_historical_prices_sync(
-                ticker=yahoo_symbol,
-                start_date=start_date,
-                end_date=end_date
+                return self._to_eur(records, [Decimal(str(round(close, 8))) for close in closes])
+            except ValueError as e:
+                logger.warning(f"No USD->EUR history for {symbol}: {e}. Using the current rate.")
+            try:
+                rate = get_exchange_rate("USD", "EUR")
+            except Exception as e:
+                logger.warning(f"Failed to get USD->EUR rate for {symbol}: {e}. Using fallback.")
+                rate = Decimal("0.92")  # Fallback rate
+            return self._to_eur(records, [price_data['close'] * rate for price_data in records])
+
+        try:
+            results = self.backfill_service.backfill(
+                db,
+                {symbol: (self._yahoo_symbol(symbol), None) for symbol in symbols},
+                start_date,
+                end_date,
+                force=force_update,
+                transform=convert
             )
 
-            if not historical_data:
-                logger.warning(f"No historical data returned for {symbol}")
-                return {'added': 0, 'updated': 0, 'skipped': 0}
-
-            added = 0
-            updated = 0
-            skipped = 0
-
-            for price_data in historical_data:
-                price_date = price_data['date']
-
-                # Skip if we already have this data and not forcing update
-                if not force_update and price_date in existing_dates:
-                    skipped += 1
-                    continue
-
-                # Convert to EUR if needed
-                price_usd = price_data['close']
-                try:
-                    usd_to_eur_rate = get_exchange_rate("USD", "EUR")
-                    price_eur = price_usd * usd_to_eur_rate
-                except Exception as e:
-                    logger.warning(f"Failed to get USD->EUR rate for {symbol}: {e}. Using fallback.")
-                    price_eur = price_usd * Decimal("0.92")  # Fallback rate
-
-                # Check if record exists
-                existing = db.execute(
-                    select(PriceHistory)
-                    .where(
-                        and_(
-                            PriceHistory.ticker == symbol,
-                            PriceHistory.date == price_date
-                        )
-                    )
-                ).scalar_one_or_none()
-
-                if existing:
-                    # Update existing record
-                    existing.open = price_eur
-                    existing.high = price_eur
-                    existing.low = price_eur
-                    existing.close = price_eur
-                    existing.volume = price_data.get('volume', 0)
-                    existing.source = "yahoo"
-                    updated += 1
+            for symbol, result in results.items():
+                if result['status'] == NO_DATA:
+                    logger.warning(f"No historical data returned for {symbol}")
                 else:
-                    # Create new record
-                    price_record = PriceHistory(
-                        ticker=symbol,
-                        date=price_date,
-                        open=price_eur,
-                        high=price_eur,
-                        low=price_eur,
-                        close=price_eur,
-                        volume=price_data.get('volume', 0),
-                        source="yahoo"
-                    )
-                    db.add(price_record)
-                    added += 1
-
-            # Commit all changes
-            db.commit()
-
-            logger.info(f"Price history update for {symbol}: {added} added, {updated} updated, {skipped} skipped")
-            return {'added': added, 'updated': updated, 'skipped': skipped}
+                    logger.debug(f"Price history update for {symbol}: {result}")
+            return results
 
         except Exception as e:
             db.rollback()
-            logger.error(f"Error fetching price history for {symbol}: {e}")
+            logger.error(f"Error fetching price history for {len(symbols)} symbols: {e}")
             raise
         finally:
             db.close()
@@ -230,18 +228,11 @@ class PriceHistoryManager:
 
         logger.info(f"Updating price history for {len(symbols)} symbols")
 
-        results = {}
-        for symbol in symbols:
-            try:
-                results[symbol] = self.fetch_and_store_complete_history(symbol, force_update=force_update)
-                # Rate limiting between symbols
-                import time
-                time.sleep(0.2)  # 200ms delay between symbols
-            except Exception as e:
-                logger.error(f"Failed to update {symbol}: {e}")
-                results[symbol] = {'added': 0, 'updated': 0, 'skipped': 0, 'error': str(e)}
-
-        return results
+        try:
+            return self.fetch_and_store_history(symbols, force_update=force_update)
+        except Exception as e:
+            logger.error(f"Failed to update {len(symbols)} symbols: {e}")
+            return {symbol: {'added': 0, 'updated': 0, 'skipped': 0, 'error': str(e)} for symbol in symbols}
 
     def get_price_history(
         self,
@@ -335,7 +326,8 @@ class PriceHistoryManager:
         """
         Ensure we have complete price history coverage for all symbols.
 
-        Checks for gaps in historical data and fills them if needed.
+        Fills every gap in the last 5 years recorded in price_coverage; symbols
+        that are already covered cost no provider call.
 
         Args:
             symbols: Optional list of symbols to check (defaults to all active symbols)
@@ -346,34 +338,16 @@ class PriceHistoryManager:
         if symbols is None:
             symbols = list(self.get_all_active_symbols())
 
-        results = {}
-        five_years_ago = date.today() - timedelta(days=5 * 365)
-
-        for symbol in symbols:
-            try:
-                date_range = self.get_date_range_for_symbol(symbol)
-
-                if not date_range:
-                    # No data at all, fetch everything
-                    logger.info(f"No historical data for {symbol}, fetching complete history")
-                    self.fetch_and_store_complete_history(symbol)
-                    results[symbol] = True
-                else:
-                    # Check if we have full coverage
-                    if date_range['earliest'] <= five_years_ago:
-                        results[symbol] = True
-                        logger.info(f"Complete coverage for {symbol}")
-                    else:
-                        # Fill the gap
-                        logger.info(f"Filling historical gap for {symbol}")
-                        self.fetch_and_store_complete_history(symbol)
-                        results[symbol] = True
+        if not symbols:
+            return {}
 
-            except Exception as e:
-                logger.error(f"Error ensuring coverage for {symbol}: {e}")
-                results[symbol] = False
+        try:
+            results = self.fetch_and_store_history(symbols)
+        except Exception as e:
+            logger.error(f"Error ensuring coverage for {len(symbols)} symbols: {e}")
+            return {symbol: False for symbol in symbols}
 
-        return results
+        return {symbol: result['status'] != NO_DATA for symbol, result in results.items()}
 
 
 # Create a singleton instance
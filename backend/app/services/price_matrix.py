@@ -0,0 +1,304 @@
+"""
+In-process columnar price cache.
+
+Keeps each ticker's close history as two NumPy arrays (int32 day ordinals and
+float64 closes) so valuation paths can slice arrays instead of querying
+PriceHistory and materializing ORM rows with Decimals on every call.
+
+Series are loaded lazily, all missing tickers in one query. Every writer that
+inserts or updates PriceHistory rows calls price_matrix.invalidate(tickers):
+this drops the local copy and bumps a per-ticker version in Redis, so other
+processes (API workers, Celery workers) reload the ticker on their next read.
+When Redis is unavailable, cached series expire after FALLBACK_TTL_SECONDS.
+
+The cache is an LRU bounded by the size of the arrays (plus a fixed overhead
+per ticker), so a worker that touches many tickers keeps only the recently
+used ones.
+"""
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import PriceHistory
+from app.services.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSeries(NamedTuple):
+    """Close history of one ticker, sorted by date ascending."""
+    ordinals: np.ndarray  # int32 date.toordinal()
+    closes: np.ndarray  # float64
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+
+EMPTY_SERIES = PriceSeries(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64))
+
+
+class _Entry(NamedTuple):
+    series: PriceSeries
+    version: Optional[str]
+    loaded_at: float
+    size: int
+
+
+def _to_ordinals(dates: Sequence[date]) -> np.ndarray:
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int32, count=len(dates))
+
+
+class PriceMatrix:
+    """Lazily loaded per-ticker close arrays shared by a process."""
+
+    # Redis hash mapping ticker -> version, bumped by invalidate()
+    VERSIONS_KEY = "price_matrix:versions"
+
+    # Lifetime of a cached series when versions cannot be checked in Redis
+    FALLBACK_TTL_SECONDS = 300
+
+    # Accounted per cached ticker on top of its arrays (key, tuples, array headers)
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: Bound on the size of the cached series
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, db: Session, tickers: Iterable[str]) -> Dict[str, PriceSeries]:
+        """
+        Return series for tickers, loading stale or missing ones in one query.
+
+        Args:
+            db: Synchronous database session
+            tickers: Ticker symbols
+
+        Returns:
+            Dict ticker -> PriceSeries (EMPTY_SERIES for tickers without prices)
+        """
+        tickers = sorted({t for t in tickers if t})
+        versions = self._remote_versions(tickers)
+        stale = self._stale(tickers, versions)
+        loaded = {}
+        if stale:
+            rows = db.execute(self._build_query(stale)).all()
+            loaded = self._store(stale, rows, versions)
+        return self._collect(tickers, loaded)
+
+    async def get_many_async(self, db: AsyncSession, tickers: Iterable[str]) -> Dict[str, PriceSeries]:
+        """Async variant of get_many() for API handlers (versions are read without blocking)."""
+        tickers = sorted({t for t in tickers if t})
+        versions = await self._remote_versions_async(tickers)
+        stale = self._stale(tickers, versions)
+        loaded = {}
+        if stale:
+            result = await db.execute(self._build_query(stale))
+            loaded = self._store(stale, result.all(), versions)
+        return self._collect(tickers, loaded)
+
+    def get(self, db: Session, ticker: str) -> PriceSeries:
+        """Return the series for a single ticker."""
+        return self.get_many(db, [ticker]).get(ticker, EMPTY_SERIES)
+
+    def invalidate(self, tickers: Iterable[str]) -> None:
+        """
+        Mark tickers as changed after PriceHistory rows were written.
+
+        Call after the writing transaction has committed, so that readers
+        reloading on the new version see the new rows.
+
+        Args:
+            tickers: Tickers whose price rows changed
+        """
+        tickers = sorted({t for t in tickers if t})
+        if not tickers:
+            return
+
+        with self._lock:
+            for ticker in tickers:
+                self._remove(ticker)
+
+        if cache.available:
+            try:
+                pipe = cache.redis_client.pipeline(transaction=False)
+                for ticker in tickers:
+                    pipe.hincrby(self.VERSIONS_KEY, ticker, 1)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to publish price matrix invalidation for {tickers}: {e}")
+
+        logger.debug(f"Price matrix invalidated for {len(tickers)} tickers")
+
+    def clear(self) -> None:
+        """Drop every cached series in this process."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def closes_on(series: PriceSeries, dates: Sequence[date]) -> List[Optional[float]]:
+        """
+        Return the close stored exactly on each date (None where there is none).
+
+        Args:
+            series: Ticker series
+            dates: Dates to read (any order)
+        """
+        if not len(series) or not dates:
+            return [None] * len(dates)
+        targets = _to_ordinals(dates)
+        indexes = np.searchsorted(series.ordinals, targets, side="left")
+        safe = np.minimum(indexes, len(series) - 1)
+        found = series.ordinals[safe] == targets
+        closes = series.closes[safe]
+        return [float(c) if ok else None for c, ok in zip(closes.tolist(), found.tolist())]
+
+    @staticmethod
+    def closes_as_of(series: PriceSeries, dates: Sequence[date]) -> np.ndarray:
+        """
+        Return the last close on or before each date (NaN before the first close).
+
+        Args:
+            series: Ticker series
+            dates: Dates to read (any order)
+        """
+        result = np.full(len(dates), np.nan, dtype=np.float64)
+        if not len(series) or not dates:
+            return result
+        indexes = np.searchsorted(series.ordinals, _to_ordinals(dates), side="right") - 1
+        valid = indexes >= 0
+        result[valid] = series.closes[indexes[valid]]
+        return result
+
+    @staticmethod
+    def slice(series: PriceSeries, start_date: Optional[date], end_date: Optional[date]) -> PriceSeries:
+        """Return the part of a series dated within [start_date, end_date] (views, no copy)."""
+        lo = 0 if start_date is None else int(np.searchsorted(series.ordinals, start_date.toordinal(), side="left"))
+        hi = len(series) if end_date is None else int(np.searchsorted(series.ordinals, end_date.toordinal(), side="right"))
+        return PriceSeries(series.ordinals[lo:hi], series.closes[lo:hi])
+
+    @staticmethod
+    def _build_query(tickers: List[str]):
+        return (
+            select(PriceHistory.ticker, PriceHistory.date, PriceHistory.close)
+            .where(PriceHistory.ticker.in_(tickers))
+            .order_by(PriceHistory.ticker, PriceHistory.date)
+        )
+
+    def _remote_versions(self, tickers: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """Fetch current ticker versions from Redis, or None if unavailable."""
+        if not tickers or not cache.available:
+            return None
+        try:
+            return dict(zip(tickers, cache.redis_client.hmget(self.VERSIONS_KEY, tickers)))
+        except Exception as e:
+            logger.debug(f"Price matrix version check failed: {e}")
+            return None
+
+    async def _remote_versions_async(self, tickers: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """Non-blocking _remote_versions(); call from coroutines."""
+        if not tickers or not cache.available:
+            return None
+        try:
+            return dict(zip(tickers, await cache.async_client().hmget(self.VERSIONS_KEY, tickers)))
+        except Exception as e:
+            logger.debug(f"Price matrix version check failed: {e}")
+            return None
+
+    def _stale(self, tickers: List[str], versions: Optional[Dict[str, Optional[str]]]) -> List[str]:
+        """Tickers that are not cached or whose cached copy is outdated."""
+        now = time.monotonic()
+        with self._lock:
+            stale = []
+            for ticker in tickers:
+                entry = self._entries.get(ticker)
+                if entry is None:
+                    stale.append(ticker)
+                elif versions is not None:
+                    if versions.get(ticker) != entry.version:
+                        stale.append(ticker)
+                elif now - entry.loaded_at > self.FALLBACK_TTL_SECONDS:
+                    stale.append(ticker)
+            return stale
+
+    def _store(
+        self,
+        tickers: List[str],
+        rows: Sequence[Tuple[str, date, object]],
+        versions: Optional[Dict[str, Optional[str]]],
+    ) -> Dict[str, PriceSeries]:
+        """Convert (ticker, date, close) rows to arrays, cache and return them."""
+        grouped: Dict[str, Tuple[List[date], List[float]]] = {t: ([], []) for t in tickers}
+        for ticker, price_date, close in rows:
+            dates, closes = grouped[ticker]
+            dates.append(price_date)
+            closes.append(float(close))
+
+        loaded = {
+            ticker: PriceSeries(_to_ordinals(dates), np.asarray(closes, dtype=np.float64))
+            for ticker, (dates, closes) in grouped.items()
+        }
+
+        now = time.monotonic()
+        with self._lock:
+            for ticker, series in loaded.items():
+                version = versions.get(ticker) if versions else None
+                size = series.ordinals.nbytes + series.closes.nbytes + self.ENTRY_OVERHEAD_BYTES
+                self._put(ticker, _Entry(series, version, now, size))
+
+        logger.debug(f"Price matrix loaded {len(tickers)} tickers ({len(rows)} rows)")
+        return loaded
+
+    def _collect(
+        self, tickers: List[str], loaded: Optional[Dict[str, PriceSeries]] = None
+    ) -> Dict[str, PriceSeries]:
+        """Return cached series, preferring just-loaded ones (they may not fit the cache)."""
+        loaded = loaded or {}
+        result = {}
+        with self._lock:
+            for ticker in tickers:
+                if ticker in loaded:
+                    result[ticker] = loaded[ticker]
+                    continue
+                entry = self._entries.get(ticker)
+                if entry is None:
+                    result[ticker] = EMPTY_SERIES
+                else:
+                    self._entries.move_to_end(ticker)
+                    result[ticker] = entry.series
+        return result
+
+    def _put(self, ticker: str, entry: _Entry) -> None:
+        """Cache entry, evicting least recently used tickers; caller holds the lock."""
+        self._remove(ticker)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[ticker] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _remove(self, ticker: str) -> None:
+        """Drop ticker from the cache; caller holds the lock."""
+        entry = self._entries.pop(ticker, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+# Process-wide instance
+price_matrix = PriceMatrix(max_bytes=settings.price_matrix_max_bytes)
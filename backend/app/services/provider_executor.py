@@ -0,0 +1,159 @@
+"""
+Provider executor - One long-lived, bounded thread pool for blocking provider calls.
+
+yfinance is a blocking library. PriceFetcher used to bridge it in two ways:
+its "async" methods ran the blocking calls directly on the event loop
+(stalling FastAPI), and its sync wrappers created a new single-thread
+ThreadPoolExecutor plus a new event loop on every call (currency_converter did
+the same with its own four-thread pool).
+
+Blocking provider calls now all run on this process-wide pool:
+
+- run(): awaitable; offloads the call to the pool. An asyncio.Semaphore per
+  event loop caps the calls a loop has in flight.
+- call(): for sync code; submits to the same pool and waits. When already on a
+  pool thread it runs inline, so nested calls cannot deadlock the pool.
+- map(): sync fan-out over the pool, e.g. a batch of realtime quotes.
+
+Shut the pool down on exit: provider_executor.shutdown() in the FastAPI
+shutdown handler and when a Celery worker process exits.
+
+Usage:
+    price = await provider_executor.run(fetch_blocking, "AAPL")
+    price = provider_executor.call(fetch_blocking, "AAPL")
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+import asyncio
+import logging
+import threading
+import weakref
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_thread_state = threading.local()
+
+
+def _mark_pool_thread() -> None:
+    _thread_state.in_pool = True
+
+
+class ProviderExecutor:
+    """Bounded thread pool for blocking provider calls, shared by async and sync code."""
+
+    def __init__(self, max_workers: int, max_concurrency: int):
+        """
+        Args:
+            max_workers: Threads in the pool
+            max_concurrency: In-flight calls allowed per event loop
+        """
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Semaphores are bound to the loop that first uses them
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="provider",
+                        initializer=_mark_pool_thread
+                    )
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    @staticmethod
+    def in_pool_thread() -> bool:
+        """Return True when called from one of the pool's threads."""
+        return getattr(_thread_state, "in_pool", False)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking call on the pool without blocking the event loop.
+
+        Args:
+            fn: Blocking callable
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            fn's return value (its exceptions propagate)
+        """
+        async with self._semaphore():
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(), partial(fn, *args, **kwargs)
+            )
+
+    def call(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+        """
+        Run a blocking call on the pool from sync code and wait for it.
+
+        Args:
+            fn: Blocking callable
+            *args, **kwargs: Arguments for fn
+            timeout: Seconds to wait for the result (None waits indefinitely)
+
+        Returns:
+            fn's return value (its exceptions propagate)
+        """
+        if self.in_pool_thread():
+            return fn(*args, **kwargs)
+        return self._pool().submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def map(self, fn: Callable[..., T], *iterables: Iterable[Any]) -> List[Future]:
+        """
+        Submit fn for each set of arguments and return the futures, in order.
+
+        Runs inline (returning completed futures) when already on a pool thread.
+
+        Args:
+            fn: Blocking callable
+            *iterables: Argument iterables, zipped like the builtin map()
+
+        Returns:
+            One future per call
+        """
+        if not self.in_pool_thread():
+            pool = self._pool()
+            return [pool.submit(fn, *args) for args in zip(*iterables)]
+
+        futures = []
+        for args in zip(*iterables):
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            futures.append(future)
+        return futures
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the pool; it is recreated on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.debug("Provider executor shut down")
+
+
+# Global executor instance
+provider_executor = ProviderExecutor(
+    max_workers=settings.provider_executor_max_workers,
+    max_concurrency=settings.provider_max_concurrency
+)
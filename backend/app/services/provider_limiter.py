@@ -0,0 +1,338 @@
+"""
+Provider limiter - Adaptive token buckets for outbound market-data calls.
+
+Throttling used to be a set of fixed sleeps after each Yahoo Finance or
+blockchain.info call. They slowed every loop down when the provider was idle,
+yet did nothing about bursts from several processes at once. Outbound calls
+now take a token from a bucket per provider first:
+
+- The bucket lives in Redis, so the API workers and Celery processes share one
+  budget per provider. A Lua script refills it and reserves a token atomically;
+  the caller sleeps for the returned wait (zero while tokens are available).
+- The refill rate adapts (AIMD): a throttled response (HTTP 429 or an empty
+  answer) multiplies the rate by decrease_factor, each successful call adds
+  increase_step back, up to the configured rate.
+
+Without Redis each process keeps its own bucket with the same behaviour.
+
+Acquired, waited and throttled counters, the total and longest wait and the
+current rate are kept per process and, with Redis, summed across processes
+(see stats()).
+
+Usage:
+    yahoo_limiter.acquire()
+    try:
+        data = call_yahoo()
+    except Exception as e:
+        if is_rate_limit_error(e):
+            yahoo_limiter.throttled()
+        raise
+    yahoo_limiter.succeeded()
+"""
+from typing import Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from app.services.cache import cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Refill the bucket, reserve one token and return the wait before using it.
+# Tokens may go negative: later callers queue behind earlier reservations.
+# Returns {wait_seconds, rate} as strings (Lua numbers are truncated otherwise).
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local rate = tonumber(state[3]) or tonumber(ARGV[1])
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now), 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('HINCRBY', KEYS[2], 'acquired', 1)
+if wait > 0 then
+    redis.call('HINCRBY', KEYS[2], 'waited', 1)
+    redis.call('HINCRBYFLOAT', KEYS[2], 'wait_seconds', tostring(wait))
+end
+return {tostring(wait), tostring(rate)}
+"""
+
+# Adjust the refill rate: ARGV[4] is 'decrease' (multiply by ARGV[5], drop
+# unused tokens) or 'increase' (add ARGV[5]), clamped to [ARGV[2], ARGV[3]].
+_ADJUST_SCRIPT = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+if ARGV[4] == 'decrease' then
+    rate = math.max(tonumber(ARGV[2]), rate * tonumber(ARGV[5]))
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+    if tokens == nil or tokens > 0 then
+        redis.call('HSET', KEYS[1], 'tokens', '0')
+    end
+    redis.call('HINCRBY', KEYS[2], 'throttled', 1)
+else
+    rate = math.min(tonumber(ARGV[3]), rate + tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return tostring(rate)
+"""
+
+ACQUIRED = "acquired"
+WAITED = "waited"
+THROTTLED = "throttled"
+WAIT_SECONDS = "wait_seconds"
+MAX_WAIT_SECONDS = "max_wait_seconds"
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if a provider error means the request was rate limited (HTTP 429)."""
+    return (
+        type(error).__name__ == "YFRateLimitError"
+        or getattr(getattr(error, "response", None), "status_code", None) == 429
+        or "Too Many Requests" in str(error)
+    )
+
+
+class ProviderRateLimiter:
+    """Redis-backed token bucket with an AIMD-adapted refill rate for one provider."""
+
+    KEY_PREFIX = "provider_limit:"
+    STATS_PREFIX = "provider_limit:stats:"
+
+    def __init__(
+        self,
+        provider: str,
+        rate: float,
+        burst: int,
+        min_rate: float,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None
+    ):
+        """
+        Args:
+            provider: Provider name, part of the Redis keys (e.g. "yahoo")
+            rate: Configured (and maximum) refill rate in requests per second
+            burst: Bucket capacity, i.e. requests allowed back to back
+            min_rate: Lowest rate the limiter backs off to
+            decrease_factor: Rate multiplier applied on a throttled response
+            increase_step: Rate added per successful call (default rate / 20)
+        """
+        self.provider = provider
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else rate / 20
+
+        self.key = self.KEY_PREFIX + provider
+        self.stats_key = self.STATS_PREFIX + provider
+        # Idle buckets are full again after burst / min_rate seconds; keep them a bit longer
+        self.key_ttl = int(burst / self.min_rate) + 60
+
+        self._lock = threading.Lock()
+        # Last rate seen in Redis, or the local bucket's rate without Redis
+        self._current_rate = rate
+        # Local bucket used when Redis is unavailable
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._stats: Dict[str, float] = {
+            ACQUIRED: 0, WAITED: 0, THROTTLED: 0, WAIT_SECONDS: 0.0, MAX_WAIT_SECONDS: 0.0
+        }
+
+    # Acquiring
+
+    def acquire(self) -> float:
+        """
+        Wait until a request to the provider may be made.
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Wait, without blocking the event loop, until a request may be made.
+
+        Returns:
+            Seconds waited
+        """
+        wait = None
+        if cache.available:
+            try:
+                reply = await cache.async_client().eval(
+                    _ACQUIRE_SCRIPT, 2, self.key, self.stats_key,
+                    self.rate, self.burst, self.key_ttl
+                )
+                wait = self._apply_reply(reply)
+            except Exception as e:
+                logger.debug(f"Shared rate limit for {self.provider} failed, using local bucket: {e}")
+        if wait is None:
+            wait = self._reserve_local()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _reserve(self) -> float:
+        if cache.available:
+            try:
+                reply = cache.redis_client.eval(
+                    _ACQUIRE_SCRIPT, 2, self.key, self.stats_key,
+                    self.rate, self.burst, self.key_ttl
+                )
+                return self._apply_reply(reply)
+            except Exception as e:
+                logger.debug(f"Shared rate limit for {self.provider} failed, using local bucket: {e}")
+        return self._reserve_local()
+
+    def _apply_reply(self, reply) -> float:
+        wait, rate = float(reply[0]), float(reply[1])
+        with self._lock:
+            self._current_rate = rate
+        self._record_wait(wait)
+        return wait
+
+    def _reserve_local(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._updated_at) * self._current_rate
+            self._tokens = min(self.burst, self._tokens + refill) - 1
+            self._updated_at = now
+            wait = -self._tokens / self._current_rate if self._tokens < 0 else 0.0
+        self._record_wait(wait)
+        return wait
+
+    def _record_wait(self, wait: float) -> None:
+        with self._lock:
+            self._stats[ACQUIRED] += 1
+            if wait > 0:
+                self._stats[WAITED] += 1
+                self._stats[WAIT_SECONDS] += wait
+                self._stats[MAX_WAIT_SECONDS] = max(self._stats[MAX_WAIT_SECONDS], wait)
+        if wait > 1:
+            logger.debug(f"Rate limited {self.provider} request, waiting {wait:.2f}s")
+
+    # Feedback
+
+    def succeeded(self) -> None:
+        """Record a successful call (additive increase of the rate)."""
+        if self._current_rate >= self.rate:
+            return
+        self._adjust("increase", self.increase_step)
+
+    def throttled(self) -> None:
+        """Record a throttled call, i.e. HTTP 429 or an empty answer (multiplicative decrease)."""
+        with self._lock:
+            self._stats[THROTTLED] += 1
+        logger.warning(f"{self.provider} throttled a request, backing off")
+        self._adjust("decrease", self.decrease_factor)
+
+    async def succeeded_async(self) -> None:
+        """Non-blocking succeeded()."""
+        if self._current_rate >= self.rate:
+            return
+        await self._adjust_async("increase", self.increase_step)
+
+    async def throttled_async(self) -> None:
+        """Non-blocking throttled()."""
+        with self._lock:
+            self._stats[THROTTLED] += 1
+        logger.warning(f"{self.provider} throttled a request, backing off")
+        await self._adjust_async("decrease", self.decrease_factor)
+
+    def _adjust_args(self, mode: str, amount: float) -> tuple:
+        return (
+            _ADJUST_SCRIPT, 2, self.key, self.stats_key,
+            self.rate, self.min_rate, self.rate, mode, amount, self.key_ttl
+        )
+
+    def _adjust(self, mode: str, amount: float) -> None:
+        if cache.available:
+            try:
+                rate = float(cache.redis_client.eval(*self._adjust_args(mode, amount)))
+                with self._lock:
+                    self._current_rate = rate
+                return
+            except Exception as e:
+                logger.debug(f"Shared rate adjustment for {self.provider} failed: {e}")
+        self._adjust_local(mode, amount)
+
+    async def _adjust_async(self, mode: str, amount: float) -> None:
+        if cache.available:
+            try:
+                rate = float(await cache.async_client().eval(*self._adjust_args(mode, amount)))
+                with self._lock:
+                    self._current_rate = rate
+                return
+            except Exception as e:
+                logger.debug(f"Shared rate adjustment for {self.provider} failed: {e}")
+        self._adjust_local(mode, amount)
+
+    def _adjust_local(self, mode: str, amount: float) -> None:
+        with self._lock:
+            if mode == "decrease":
+                self._current_rate = max(self.min_rate, self._current_rate * amount)
+                self._tokens = min(self._tokens, 0.0)
+            else:
+                self._current_rate = min(self.rate, self._current_rate + amount)
+
+    # Metrics
+
+    def stats(self) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Return the limiter counters.
+
+        Returns:
+            Dict with "process" (this process) and "shared" (all processes, None
+            without Redis) counters: acquired, waited, throttled, wait_seconds,
+            plus max_wait_seconds (process only) and the current rate
+        """
+        with self._lock:
+            process = dict(self._stats, rate=self._current_rate)
+
+        shared = None
+        if cache.available:
+            try:
+                values = cache.redis_client.hgetall(self.stats_key)
+                rate = cache.redis_client.hget(self.key, "rate")
+                shared = {
+                    ACQUIRED: int(values.get(ACQUIRED, 0)),
+                    WAITED: int(values.get(WAITED, 0)),
+                    THROTTLED: int(values.get(THROTTLED, 0)),
+                    WAIT_SECONDS: float(values.get(WAIT_SECONDS, 0)),
+                    "rate": float(rate) if rate is not None else self.rate,
+                }
+            except Exception as e:
+                logger.debug(f"Rate limiter stats read failed for {self.provider}: {e}")
+        return {"process": process, "shared": shared}
+
+
+# Global limiter instances, one per provider
+yahoo_limiter = ProviderRateLimiter(
+    provider="yahoo",
+    rate=settings.yahoo_rate_limit_requests_per_second,
+    burst=settings.yahoo_rate_limit_burst,
+    min_rate=settings.yahoo_rate_limit_min_requests_per_second
+)
+
+blockchain_limiter = ProviderRateLimiter(
+    provider="blockchain.info",
+    rate=settings.blockchain_rate_limit_requests_per_second,
+    burst=1,
+    min_rate=settings.blockchain_rate_limit_requests_per_second / 4
+)
+
+provider_limiters = {
+    limiter.provider: limiter for limiter in (yahoo_limiter, blockchain_limiter)
+}
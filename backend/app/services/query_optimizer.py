@@ -14,7 +14,8 @@ from sqlalchemy.orm import selectinload
 from functools import wraps
 
 from app.services.cache import cache
-from app.services.cache_decorators import cache_result, cache_manager
+from app.services.cache_decorators import cache_manager
+from app.services.cache_generations import CacheGenerations, TRANSACTIONS, PRICES
 from app.models import Position, Transaction, PriceHistory, PortfolioSnapshot
 
 logger = logging.getLogger(__name__)
@@ -54,7 +55,7 @@ class QueryOptimizer:
         self.query_stats['total_queries'] += 1
 
         # Check cache first
-        cached_result = cache.get(cache_key)
+        cached_result = await cache.get_async(cache_key)
         if cached_result is not None:
             self.query_stats['cache_hits'] += 1
             logger.debug(f"Cache hit for query: {cache_key}")
@@ -74,7 +75,7 @@ class QueryOptimizer:
             logger.debug(f"Query executed in {query_duration:.3f}s: {cache_key}")
 
             # Cache the result
-            cache.set(cache_key, result, ttl_seconds=ttl_seconds)
+            await cache.set_async(cache_key, result, ttl_seconds=ttl_seconds)
             return result
 
         except Exception as e:
@@ -105,10 +106,13 @@ class QueryOptimizer:
         logger.debug(f"Batch loading {len(position_ids)} positions with prices")
 
         # Create cache key
-        cache_key = f"batch_positions_prices:{hash(tuple(sorted(position_ids)))}:{price_days}"
+        cache_key = await CacheGenerations.key_async(
+            "batch_positions_prices", TRANSACTIONS, PRICES,
+            parts=(hash(tuple(sorted(position_ids))), price_days)
+        )
 
         # Check cache first
-        cached_result = cache.get(cache_key)
+        cached_result = await cache.get_async(cache_key) if cache_key else None
         if cached_result:
             return cached_result
 
@@ -155,7 +159,8 @@ class QueryOptimizer:
             result[position.id] = position_data
 
         # Cache result with 5-minute TTL
-        cache.set(cache_key, result, ttl_seconds=300)
+        if cache_key:
+            await cache.set_async(cache_key, result, ttl_seconds=300)
         return result
 
     async def get_portfolio_overview_optimized(
@@ -173,10 +178,12 @@ class QueryOptimizer:
         Returns:
             Portfolio overview data
         """
-        cache_key = f"portfolio_overview:{user_id or 'default'}"
+        cache_key = await CacheGenerations.key_async(
+            "portfolio_overview", TRANSACTIONS, PRICES, parts=(user_id or 'default',)
+        )
 
         # Try cache first
-        cached_result = cache.get(cache_key)
+        cached_result = await cache.get_async(cache_key) if cache_key else None
         if cached_result:
             return cached_result
 
@@ -222,7 +229,8 @@ class QueryOptimizer:
             }
 
             # Cache with 5-minute TTL
-            cache.set(cache_key, result, ttl_seconds=300)
+            if cache_key:
+                await cache.set_async(cache_key, result, ttl_seconds=300)
             return result
 
         except Exception as e:
@@ -251,10 +259,12 @@ class QueryOptimizer:
             List of positions
         """
         # Create cache key
-        cache_key = f"holdings:{limit}:{offset}:{sort_by}:{sort_direction}"
+        cache_key = await CacheGenerations.key_async(
+            "holdings", TRANSACTIONS, PRICES, parts=(limit, offset, sort_by, sort_direction)
+        )
 
         # Check cache first
-        cached_result = cache.get(cache_key)
+        cached_result = await cache.get_async(cache_key) if cache_key else None
         if cached_result:
             return cached_result
 
@@ -284,7 +294,8 @@ class QueryOptimizer:
         holdings = result.scalars().all()
 
         # Cache with 1-minute TTL for frequently changing data
-        cache.set(cache_key, holdings, ttl_seconds=60)
+        if cache_key:
+            await cache.set_async(cache_key, holdings, ttl_seconds=60)
         return holdings
 
     def get_query_stats(self) -> Dict:
@@ -309,24 +320,19 @@ class QueryOptimizer:
         """
         Clear cache entries related to a specific position.
 
+        The optimizer's entries are keyed by the transactions generation, so this
+        retires every position's entries with one bump.
+
         Args:
             position_id: Position ID to clear cache for
 
         Returns:
             True if cache was cleared, False otherwise
         """
-        patterns = [
-            f"batch_positions_prices:*{position_id}*",
-            f"portfolio_overview:*{position_id}*",
-            f"holdings:*{position_id}*",
-        ]
-
-        total_cleared = 0
-        for pattern in patterns:
-            count = cache.clear_pattern(pattern)
-            total_cleared += count
-
-        return total_cleared > 0
+        cleared = CacheGenerations.bump(TRANSACTIONS)
+        if cleared:
+            logger.debug(f"Invalidated query cache for position {position_id}")
+        return cleared
 
     async def invalidate_portfolio_cache_on_transaction(
         self,
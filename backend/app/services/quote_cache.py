@@ -0,0 +1,277 @@
+"""
+Quote cache - Realtime quotes shared by every API worker and Celery process.
+
+PriceFetcher used to keep a per-instance dict of recent quotes, so every new
+PriceFetcher (and every process) fetched the same quotes from Yahoo again.
+Quotes now live in Redis for ttl_seconds, and fetches are single-flight per
+symbol: concurrent misses for e.g. BTC-EUR make exactly one provider call.
+
+- In-process, the first caller of a key fetches; other threads wait for its
+  result.
+- Across processes, a Redis SET NX lease lets one process fetch; the others
+  poll Redis for the quote it stores, and fetch themselves only if it does not
+  appear within wait_seconds.
+
+Without Redis, quotes are cached in a per-process dict with the same TTL.
+
+Hit, miss, coalesced and provider-call counters are kept per process and,
+when Redis is available, summed across processes (see stats()).
+
+Usage:
+    quote = quote_cache.get_or_fetch("BTC-EUR", lambda: fetch_from_yahoo("BTC-EUR"))
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+import json
+import logging
+import threading
+import time
+
+from app.services.cache import cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Deletes a lease only if it is still held by the caller's token
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Quote fields restored to Decimal / datetime when read back from Redis
+DECIMAL_FIELDS = ("current_price", "previous_close", "change_amount", "change_percent")
+DATETIME_FIELDS = ("timestamp",)
+
+HITS = "hits"
+MISSES = "misses"
+COALESCED = "coalesced"
+PROVIDER_CALLS = "provider_calls"
+
+
+class _Flight:
+    """One in-process fetch that other callers of the same key wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class QuoteCache:
+    """Redis-backed realtime quote cache with per-symbol single-flight fetches."""
+
+    KEY_PREFIX = "quote:"
+    LEASE_PREFIX = "quote:lease:"
+    STATS_KEY = "quote:stats"
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        lease_seconds: int,
+        wait_seconds: float = 5.0,
+        poll_seconds: float = 0.05
+    ):
+        """
+        Args:
+            ttl_seconds: How long a quote is served from the cache
+            lease_seconds: Lifetime of the cross-process fetch lease
+            wait_seconds: How long to wait for another fetch before fetching anyway
+            poll_seconds: Redis polling interval while another process fetches
+        """
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        # Fallback storage when Redis is unavailable: key -> (expires_at, quote)
+        self._local: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._stats: Dict[str, int] = {HITS: 0, MISSES: 0, COALESCED: 0, PROVIDER_CALLS: 0}
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached quote of key, fetching it on a miss.
+
+        Args:
+            key: Quote key (e.g. "BTC-EUR")
+            fetch: Provider call returning the quote, or None if unavailable
+
+        Returns:
+            Quote dict, or None if it could not be fetched
+        """
+        quote = self._get(key)
+        if quote is not None:
+            self._count(HITS)
+            return quote
+        self._count(MISSES)
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not leader:
+            if flight.done.wait(self.wait_seconds):
+                self._count(COALESCED)
+                return flight.result
+            logger.debug(f"Fetch of quote {key} is slow, fetching it as well")
+            return self._fetch_with_lease(key, fetch)
+
+        try:
+            flight.result = self._fetch_with_lease(key, fetch)
+            return flight.result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Return the cache counters.
+
+        Returns:
+            Dict with "process" (this process) and "shared" (all processes, None
+            without Redis) counters: hits, misses, coalesced, provider_calls
+        """
+        with self._lock:
+            process = dict(self._stats)
+
+        shared = None
+        if cache.available:
+            try:
+                values = cache.redis_client.hgetall(self.STATS_KEY)
+                shared = {name: int(values.get(name, 0)) for name in process}
+            except Exception as e:
+                logger.debug(f"Quote cache stats read failed: {e}")
+        return {"process": process, "shared": shared}
+
+    def clear_local(self) -> None:
+        """Drop the quotes cached in this process (Redis entries expire by TTL)."""
+        with self._lock:
+            self._local.clear()
+
+    # Fetching
+
+    def _fetch_with_lease(
+        self,
+        key: str,
+        fetch: Callable[[], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch key unless another process holds its lease."""
+        token = uuid4().hex
+        if not self._acquire_lease(key, token):
+            quote = self._wait_for_quote(key)
+            if quote is not None:
+                self._count(COALESCED)
+                return quote
+            logger.debug(f"Lease holder of quote {key} did not finish in time, fetching anyway")
+
+        try:
+            self._count(PROVIDER_CALLS)
+            quote = fetch()
+            if quote is not None:
+                self._set(key, quote)
+            return quote
+        finally:
+            self._release_lease(key, token)
+
+    def _wait_for_quote(self, key: str) -> Optional[Dict[str, Any]]:
+        """Poll Redis until another process has stored key."""
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_seconds)
+            quote = self._get(key)
+            if quote is not None:
+                return quote
+        return None
+
+    def _acquire_lease(self, key: str, token: str) -> bool:
+        """Take the cross-process fetch lease; True also when Redis is unavailable."""
+        if not cache.available:
+            return True
+        try:
+            return bool(cache.redis_client.set(
+                self.LEASE_PREFIX + key, token, nx=True, ex=self.lease_seconds
+            ))
+        except Exception as e:
+            logger.debug(f"Quote cache lease failed for {key}: {e}")
+            return True
+
+    def _release_lease(self, key: str, token: str) -> None:
+        if not cache.available:
+            return
+        try:
+            cache.redis_client.eval(_RELEASE_LEASE_SCRIPT, 1, self.LEASE_PREFIX + key, token)
+        except Exception as e:
+            logger.debug(f"Quote cache lease release failed for {key}: {e}")
+
+    # Storage
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not cache.available:
+            with self._lock:
+                entry = self._local.get(key)
+                if entry is None:
+                    return None
+                if time.time() >= entry[0]:
+                    del self._local[key]
+                    return None
+                return entry[1]
+        try:
+            payload = cache.redis_client.get(self.KEY_PREFIX + key)
+            return _decode(payload) if payload is not None else None
+        except Exception as e:
+            logger.debug(f"Quote cache get failed for {key}: {e}")
+            return None
+
+    def _set(self, key: str, quote: Dict[str, Any]) -> None:
+        if not cache.available:
+            with self._lock:
+                self._local[key] = (time.time() + self.ttl_seconds, quote)
+            return
+        try:
+            cache.redis_client.setex(self.KEY_PREFIX + key, self.ttl_seconds, _encode(quote))
+        except Exception as e:
+            logger.debug(f"Quote cache set failed for {key}: {e}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+        if not cache.available:
+            return
+        try:
+            cache.redis_client.hincrby(self.STATS_KEY, name, 1)
+        except Exception as e:
+            logger.debug(f"Quote cache counter update failed for {name}: {e}")
+
+
+def _encode(quote: Dict[str, Any]) -> str:
+    return json.dumps(quote, default=str)
+
+
+def _decode(payload: str) -> Dict[str, Any]:
+    quote = json.loads(payload)
+    for field in DECIMAL_FIELDS:
+        if quote.get(field) is not None:
+            quote[field] = Decimal(quote[field])
+    for field in DATETIME_FIELDS:
+        if quote.get(field) is not None:
+            quote[field] = datetime.fromisoformat(quote[field])
+    return quote
+
+
+# Global quote cache instance
+quote_cache = QuoteCache(
+    ttl_seconds=settings.quote_cache_ttl_seconds,
+    lease_seconds=settings.quote_cache_lease_seconds
+)
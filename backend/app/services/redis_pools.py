@@ -0,0 +1,143 @@
+"""
+Redis pool registry - One shared connection pool per process and client flavour.
+
+Services used to call redis.from_url() themselves (per request, in the case of
+PortfolioAggregator), each opening its own pool. They now borrow clients from
+the registry instead:
+
+- sync_client(): blocking client for Celery tasks and other sync code.
+- async_client(): redis.asyncio client for coroutines, so a Redis round trip
+  no longer stalls the event loop.
+
+Pools are created lazily on first use. Async pools are bound to the event loop
+that created them, so there is one per running loop: the FastAPI process has a
+single loop and therefore a single pool, while code run through asyncio.run()
+in a Celery task gets a short-lived pool that is dropped with its loop.
+
+Close the pools on shutdown: await redis_pools.aclose() in the FastAPI
+shutdown handler, redis_pools.close() when a Celery worker process exits.
+
+Usage:
+    client = redis_pools.async_client()
+    value = await client.get(key)
+"""
+from typing import Dict, Tuple
+import asyncio
+import logging
+import threading
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisPoolRegistry:
+    """Lazily created, process-wide Redis connection pools."""
+
+    def __init__(self, url: str, max_connections: int, timeout_seconds: int):
+        """
+        Args:
+            url: Redis URL (redis://[password@]host[:port]/[db])
+            max_connections: Connection limit of each pool
+            timeout_seconds: How long a caller waits for a free connection
+        """
+        self.url = url
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+
+        self._lock = threading.Lock()
+        # decode_responses -> (pool, client)
+        self._sync: Dict[bool, Tuple[redis.BlockingConnectionPool, redis.Redis]] = {}
+        # event loop -> decode_responses -> (pool, client)
+        self._async: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _pool_options(self, decode_responses: bool) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "timeout": self.timeout_seconds,
+            "decode_responses": decode_responses,
+            "encoding": "utf-8",
+            "socket_connect_timeout": 5,
+            "socket_keepalive": True,
+            "health_check_interval": 30,
+        }
+
+    def sync_client(self, decode_responses: bool = True) -> redis.Redis:
+        """
+        Return the process-wide blocking client.
+
+        Args:
+            decode_responses: Return str instead of bytes
+
+        Returns:
+            Redis client backed by the shared sync pool
+        """
+        entry = self._sync.get(decode_responses)
+        if entry is None:
+            with self._lock:
+                entry = self._sync.get(decode_responses)
+                if entry is None:
+                    pool = redis.BlockingConnectionPool.from_url(
+                        self.url, **self._pool_options(decode_responses)
+                    )
+                    entry = (pool, redis.Redis(connection_pool=pool))
+                    self._sync[decode_responses] = entry
+                    logger.debug(f"Created sync Redis pool (decode_responses={decode_responses})")
+        return entry[1]
+
+    def async_client(self, decode_responses: bool = True) -> aioredis.Redis:
+        """
+        Return the asyncio client of the running event loop.
+
+        Must be called from a coroutine (or code running in the event loop).
+
+        Args:
+            decode_responses: Return str instead of bytes
+
+        Returns:
+            redis.asyncio client backed by the loop's shared pool
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._async.setdefault(loop, {})
+        entry = clients.get(decode_responses)
+        if entry is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                self.url, **self._pool_options(decode_responses)
+            )
+            entry = (pool, aioredis.Redis(connection_pool=pool))
+            clients[decode_responses] = entry
+            logger.debug(f"Created async Redis pool (decode_responses={decode_responses})")
+        return entry[1]
+
+    async def aclose(self) -> None:
+        """Disconnect the async pools of the running loop and the sync pools."""
+        clients = self._async.pop(asyncio.get_running_loop(), {})
+        for pool, _ in clients.values():
+            try:
+                await pool.disconnect()
+            except Exception as e:
+                logger.debug(f"Failed to disconnect async Redis pool: {e}")
+        self.close()
+
+    def close(self) -> None:
+        """Disconnect the sync pools."""
+        with self._lock:
+            entries = list(self._sync.values())
+            self._sync.clear()
+        for pool, _ in entries:
+            try:
+                pool.disconnect()
+            except Exception as e:
+                logger.debug(f"Failed to disconnect sync Redis pool: {e}")
+
+
+# Global registry instance
+redis_pools = RedisPoolRegistry(
+    url=settings.redis_url,
+    max_connections=settings.redis_max_connections,
+    timeout_seconds=settings.redis_pool_timeout_seconds
+)
@@ -0,0 +1,355 @@
+"""
+Tiered cache - In-process LRU (L1) in front of Redis (L2) for API responses.
+
+get_or_load() serves an entry from L1 without a Redis round trip or JSON
+decode, falls back to L2, and only calls the loader on a miss in both:
+
+- Single-flight: concurrent misses for one key share one load in-process, and
+  a Redis SET NX lease lets only one process load it; the others wait for the
+  leaseholder's result to appear in L2.
+- Stale-while-revalidate: an entry past its TTL is still served for
+  stale_seconds while one background task reloads it.
+- Every write publishes the key on a pub/sub channel so other workers drop
+  their L1 copy and pick up the new value from L2.
+
+L2 reads, writes and leases go through the non-blocking client; only the
+eviction listener runs on the blocking client, in its own thread.
+
+Entries must be JSON-serializable (e.g. model_dump(mode="json")). Background
+reloads outlive the request, so loaders must open their own database session.
+Keys normally embed cache generations (see cache_generations), which makes an
+invalidation a plain miss.
+
+Usage:
+    key = CacheGenerations.key("unified:overview", TRANSACTIONS, PRICES)
+    return await tiered_cache.get_or_load(key, load_overview, ttl_seconds=60)
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from app.services.cache import cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Deletes a lease only if it is still held by the caller's token
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    fresh_until: float
+    expires_at: float
+
+
+class TieredCache:
+    """Two-tier response cache with single-flight loads and stale-while-revalidate."""
+
+    EVICT_CHANNEL = "cache:l1:evict"
+    LEASE_PREFIX = "cache:lease:"
+
+    def __init__(
+        self,
+        max_bytes: int,
+        stale_seconds: int,
+        lease_seconds: int,
+        wait_seconds: float = 5.0,
+        poll_seconds: float = 0.05
+    ):
+        """
+        Args:
+            max_bytes: Bound on the serialized size of L1 entries
+            stale_seconds: How long an expired entry may be served while reloading
+            lease_seconds: Lifetime of the cross-process loading lease
+            wait_seconds: How long to wait for another process's load before loading anyway
+            poll_seconds: L2 polling interval while waiting
+        """
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+
+        self._l1: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._l1_bytes = 0
+        # L1 is also touched by the pub/sub thread
+        self._lock = threading.Lock()
+
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._instance_id = uuid4().hex
+        self._subscribed = False
+        self._pubsub_thread = None
+
+    async def get_or_load(
+        self,
+        key: Optional[str],
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int
+    ) -> Any:
+        """
+        Return the cached value of key, loading it on a miss.
+
+        Args:
+            key: Cache key, or None to bypass the cache (e.g. Redis unavailable)
+            loader: Coroutine function computing the value
+            ttl_seconds: How long a loaded value is fresh
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        if key is None:
+            return await loader()
+
+        self._ensure_subscribed()
+
+        entry = self._l1_get(key)
+        if entry is None:
+            entry = await self._l2_get(key)
+            if entry is not None:
+                self._l1_put(key, entry)
+
+        if entry is not None:
+            if time.time() >= entry.fresh_until:
+                self._reload_in_background(key, loader, ttl_seconds)
+            return entry.value
+
+        return await self._load_once(key, loader, ttl_seconds, background=False)
+
+    async def invalidate(self, key: str) -> None:
+        """Drop key from both tiers in every worker."""
+        self._l1_evict(key)
+        if cache.available:
+            try:
+                await cache.async_client().delete(key)
+            except Exception as e:
+                logger.debug(f"Tiered cache delete failed for {key}: {e}")
+        await self._publish_evict(key)
+
+    def clear_local(self) -> None:
+        """Drop every L1 entry of this worker."""
+        with self._lock:
+            self._l1.clear()
+            self._l1_bytes = 0
+
+    # Loading
+
+    async def _load_once(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int,
+        background: bool
+    ) -> Any:
+        """Run at most one load of key per process; other callers share its result."""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            value = await asyncio.shield(pending)
+            if value is not None or background:
+                return value
+            # A background reload deferred to another process; load (or wait) ourselves
+            return await self._load_once(key, loader, ttl_seconds, background)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load_with_lease(key, loader, ttl_seconds, background)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _load_with_lease(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int,
+        background: bool
+    ) -> Any:
+        """Load key unless another process holds its lease."""
+        token = uuid4().hex
+        if not await self._acquire_lease(key, token):
+            if background:
+                # Another process is already reloading this entry
+                return None
+            entry = await self._wait_for_fresh(key)
+            if entry is not None:
+                self._l1_put(key, entry)
+                return entry.value
+            logger.debug(f"Lease holder of {key} did not finish in time, loading anyway")
+
+        try:
+            value = await loader()
+            await self._store(key, value, ttl_seconds)
+            return value
+        finally:
+            await self._release_lease(key, token)
+
+    def _reload_in_background(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int
+    ) -> None:
+        """Start one background reload of a stale entry."""
+        if key in self._inflight:
+            return
+        task = asyncio.get_running_loop().create_task(self._reload(key, loader, ttl_seconds))
+        # Keep a reference until done so the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reload(self, key: str, loader: Callable[[], Awaitable[Any]], ttl_seconds: int) -> None:
+        try:
+            await self._load_once(key, loader, ttl_seconds, background=True)
+        except Exception as e:
+            logger.warning(f"Background reload of {key} failed, serving stale value: {e}")
+
+    async def _wait_for_fresh(self, key: str) -> Optional[_Entry]:
+        """Poll L2 until another process has stored a fresh value of key."""
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_seconds)
+            entry = await self._l2_get(key)
+            if entry is not None and time.time() < entry.fresh_until:
+                return entry
+        return None
+
+    async def _acquire_lease(self, key: str, token: str) -> bool:
+        """Take the cross-process loading lease; True also when Redis is unavailable."""
+        if not cache.available:
+            return True
+        try:
+            return bool(await cache.async_client().set(
+                self.LEASE_PREFIX + key, token, nx=True, ex=self.lease_seconds
+            ))
+        except Exception as e:
+            logger.debug(f"Tiered cache lease failed for {key}: {e}")
+            return True
+
+    async def _release_lease(self, key: str, token: str) -> None:
+        if not cache.available:
+            return
+        try:
+            await cache.async_client().eval(_RELEASE_LEASE_SCRIPT, 1, self.LEASE_PREFIX + key, token)
+        except Exception as e:
+            logger.debug(f"Tiered cache lease release failed for {key}: {e}")
+
+    # Tiers
+
+    async def _store(self, key: str, value: Any, ttl_seconds: int) -> None:
+        """Write a loaded value to both tiers and evict it from other workers' L1."""
+        fresh_until = time.time() + ttl_seconds
+        payload = json.dumps({"value": value, "fresh_until": fresh_until}, default=str)
+        self._l1_put(key, _Entry(value, len(payload), fresh_until, fresh_until + self.stale_seconds))
+
+        if not cache.available:
+            return
+        try:
+            await cache.async_client().setex(key, ttl_seconds + self.stale_seconds, payload)
+        except Exception as e:
+            logger.debug(f"Tiered cache set failed for {key}: {e}")
+            return
+        await self._publish_evict(key)
+
+    async def _l2_get(self, key: str) -> Optional[_Entry]:
+        if not cache.available:
+            return None
+        try:
+            payload = await cache.async_client().get(key)
+            if payload is None:
+                return None
+            data = json.loads(payload)
+        except Exception as e:
+            logger.debug(f"Tiered cache get failed for {key}: {e}")
+            return None
+        fresh_until = data["fresh_until"]
+        return _Entry(data["value"], len(payload), fresh_until, fresh_until + self.stale_seconds)
+
+    def _l1_get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry.expires_at:
+                self._l1_remove(key)
+                return None
+            self._l1.move_to_end(key)
+            return entry
+
+    def _l1_put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._l1_remove(key)
+            if entry.size > self.max_bytes:
+                return
+            self._l1[key] = entry
+            self._l1_bytes += entry.size
+            while self._l1_bytes > self.max_bytes:
+                _, evicted = self._l1.popitem(last=False)
+                self._l1_bytes -= evicted.size
+
+    def _l1_evict(self, key: str) -> None:
+        with self._lock:
+            self._l1_remove(key)
+
+    def _l1_remove(self, key: str) -> None:
+        """Remove key from L1; caller holds the lock."""
+        entry = self._l1.pop(key, None)
+        if entry is not None:
+            self._l1_bytes -= entry.size
+
+    # Cross-worker L1 eviction
+
+    def _ensure_subscribed(self) -> None:
+        """Start listening for evictions from other workers (once per process)."""
+        if self._subscribed or not cache.available:
+            return
+        with self._lock:
+            if self._subscribed:
+                return
+            self._subscribed = True
+        try:
+            pubsub = cache.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.EVICT_CHANNEL: self._on_evict_message})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            logger.warning(f"Tiered cache eviction subscription failed, L1 relies on TTLs: {e}")
+
+    async def _publish_evict(self, key: str) -> None:
+        if not cache.available:
+            return
+        try:
+            await cache.async_client().publish(self.EVICT_CHANNEL, f"{self._instance_id}:{key}")
+        except Exception as e:
+            logger.debug(f"Tiered cache eviction publish failed for {key}: {e}")
+
+    def _on_evict_message(self, message: Dict[str, Any]) -> None:
+        sender, _, key = str(message.get("data", "")).partition(":")
+        if key and sender != self._instance_id:
+            self._l1_evict(key)
+
+
+# Global tiered cache instance
+tiered_cache = TieredCache(
+    max_bytes=settings.tiered_cache_l1_max_bytes,
+    stale_seconds=settings.tiered_cache_stale_seconds,
+    lease_seconds=settings.tiered_cache_lease_seconds
+)
@@ -0,0 +1,219 @@
+"""
+Unified performance service - Merged traditional + crypto value series in SQL.
+
+One statement produces the whole series:
+
+    days         generate_series over [lo, hi], one row per calendar day
+    traditional  portfolio_snapshots left-joined to the days and forward-filled
+    crypto       each crypto portfolio's snapshots forward-filled, summed per day
+    benchmark    the benchmark's PriceHistory closes forward-filled
+
+Forward-fill uses the gaps-and-islands idiom: a running count() of the
+non-null values numbers each "island" (a stored value and the empty days after
+it), and max() over the island spreads the value across it. Days before the
+first stored value in the range take the last value before the range (an index
+probe), so ranges starting on a weekend or between snapshots are not zero.
+
+lo is the later of start_date and the first snapshot, hi the earlier of
+end_date and the last snapshot, so the series spans the stored history within
+the requested range. The result is one row of arrays (a column per series),
+which keeps the work in Python to zipping them however long the history is.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+import logging
+
+from sqlalchemy import Date, DateTime, and_, case, cast, func, literal, null, select, text, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CryptoPortfolio, CryptoPortfolioSnapshot, PortfolioSnapshot, PriceHistory
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedSeries(NamedTuple):
+    """Columnar unified performance series (one entry per calendar day)."""
+    dates: List[date]
+    traditional: List[Decimal]
+    crypto: List[Decimal]
+    total: List[Decimal]
+    benchmark: List[Optional[Decimal]]
+
+
+EMPTY_SERIES = UnifiedSeries([], [], [], [], [])
+
+
+class UnifiedPerformanceService:
+    """Load the merged, gap-filled performance series."""
+
+    @staticmethod
+    async def load_async(
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        benchmark_ticker: Optional[str] = None,
+    ) -> UnifiedSeries:
+        """
+        Load the unified series for [start_date, end_date] in one query.
+
+        Args:
+            db: Async database session
+            start_date: First day (None for the first snapshot)
+            end_date: Last day (None for the last snapshot)
+            benchmark_ticker: Ticker of the benchmark to align, if any
+
+        Returns:
+            UnifiedSeries; benchmark entries are None before its first close
+        """
+        query = UnifiedPerformanceService._build_query(start_date, end_date, benchmark_ticker)
+        row = (await db.execute(query)).one()
+        if not row.dates:
+            return EMPTY_SERIES
+        return UnifiedSeries(row.dates, row.traditional, row.crypto, row.total, row.benchmark)
+
+    @staticmethod
+    def _build_query(start_date: Optional[date], end_date: Optional[date], benchmark_ticker: Optional[str]):
+        """Build the single statement described in the module docstring."""
+        first_snapshot = func.least(
+            select(func.min(PortfolioSnapshot.snapshot_date)).scalar_subquery(),
+            select(func.min(CryptoPortfolioSnapshot.snapshot_date)).scalar_subquery(),
+        )
+        last_snapshot = func.greatest(
+            select(func.max(PortfolioSnapshot.snapshot_date)).scalar_subquery(),
+            select(func.max(CryptoPortfolioSnapshot.snapshot_date)).scalar_subquery(),
+        )
+        # greatest()/least() ignore NULL arguments, so open bounds just drop out
+        bounds = select(
+            func.greatest(literal(start_date, Date), first_snapshot).label("lo"),
+            func.least(literal(end_date, Date), last_snapshot).label("hi"),
+        ).cte("bounds")
+        lo = select(bounds.c.lo).scalar_subquery()
+
+        days = select(
+            cast(
+                func.generate_series(cast(bounds.c.lo, DateTime), cast(bounds.c.hi, DateTime), text("interval '1 day'")),
+                Date
+            ).label("day")
+        ).cte("days")
+
+        # Traditional: a single snapshot per day
+        traditional_rows = (
+            select(
+                days.c.day,
+                PortfolioSnapshot.total_value.label("value"),
+                func.count(PortfolioSnapshot.total_value).over(order_by=days.c.day).label("grp"),
+            )
+            .select_from(days.outerjoin(PortfolioSnapshot, PortfolioSnapshot.snapshot_date == days.c.day))
+        ).cte("traditional_rows")
+        traditional_seed = (
+            select(PortfolioSnapshot.total_value)
+            .where(PortfolioSnapshot.snapshot_date < lo)
+            .order_by(PortfolioSnapshot.snapshot_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        traditional = select(
+            traditional_rows.c.day,
+            func.coalesce(
+                func.max(traditional_rows.c.value).over(partition_by=traditional_rows.c.grp),
+                traditional_seed,
+                0
+            ).label("value"),
+        ).cte("traditional")
+
+        # Crypto: filled per portfolio (they may snapshot on different days), then summed
+        crypto_value = case(
+            (CryptoPortfolioSnapshot.base_currency == "EUR", CryptoPortfolioSnapshot.total_value_eur),
+            else_=CryptoPortfolioSnapshot.total_value_usd
+        )
+        crypto_rows = (
+            select(
+                days.c.day,
+                CryptoPortfolio.id.label("portfolio_id"),
+                crypto_value.label("value"),
+                func.count(crypto_value).over(partition_by=CryptoPortfolio.id, order_by=days.c.day).label("grp"),
+            )
+            .select_from(
+                days.join(CryptoPortfolio, true()).outerjoin(
+                    CryptoPortfolioSnapshot,
+                    and_(
+                        CryptoPortfolioSnapshot.portfolio_id == CryptoPortfolio.id,
+                        CryptoPortfolioSnapshot.snapshot_date == days.c.day
+                    )
+                )
+            )
+        ).cte("crypto_rows")
+        crypto_seed = (
+            select(crypto_value)
+            .where(CryptoPortfolioSnapshot.portfolio_id == crypto_rows.c.portfolio_id)
+            .where(CryptoPortfolioSnapshot.snapshot_date < lo)
+            .order_by(CryptoPortfolioSnapshot.snapshot_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        crypto_filled = select(
+            crypto_rows.c.day,
+            func.coalesce(
+                func.max(crypto_rows.c.value).over(
+                    partition_by=(crypto_rows.c.portfolio_id, crypto_rows.c.grp)
+                ),
+                # COALESCE is lazy: only days before the first snapshot in range probe for a seed
+                crypto_seed,
+                0
+            ).label("value"),
+        ).cte("crypto_filled")
+        crypto = (
+            select(crypto_filled.c.day, func.sum(crypto_filled.c.value).label("value"))
+            .group_by(crypto_filled.c.day)
+        ).cte("crypto")
+
+        columns = [
+            func.array_agg(aggregate_order_by(days.c.day, days.c.day)).label("dates"),
+            func.array_agg(aggregate_order_by(traditional.c.value, days.c.day)).label("traditional"),
+            func.array_agg(aggregate_order_by(func.coalesce(crypto.c.value, 0), days.c.day)).label("crypto"),
+            func.array_agg(
+                aggregate_order_by(traditional.c.value + func.coalesce(crypto.c.value, 0), days.c.day)
+            ).label("total"),
+        ]
+        source = (
+            days.join(traditional, traditional.c.day == days.c.day)
+            .outerjoin(crypto, crypto.c.day == days.c.day)
+        )
+
+        if benchmark_ticker:
+            benchmark_rows = (
+                select(
+                    days.c.day,
+                    PriceHistory.close.label("value"),
+                    func.count(PriceHistory.close).over(order_by=days.c.day).label("grp"),
+                )
+                .select_from(
+                    days.outerjoin(
+                        PriceHistory,
+                        and_(PriceHistory.ticker == benchmark_ticker, PriceHistory.date == days.c.day)
+                    )
+                )
+            ).cte("benchmark_rows")
+            benchmark_seed = (
+                select(PriceHistory.close)
+                .where(PriceHistory.ticker == benchmark_ticker)
+                .where(PriceHistory.date < lo)
+                .order_by(PriceHistory.date.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+            benchmark = select(
+                benchmark_rows.c.day,
+                func.coalesce(
+                    func.max(benchmark_rows.c.value).over(partition_by=benchmark_rows.c.grp),
+                    benchmark_seed
+                ).label("value"),
+            ).cte("benchmark")
+            columns.append(func.array_agg(aggregate_order_by(benchmark.c.value, days.c.day)).label("benchmark"))
+            source = source.join(benchmark, benchmark.c.day == days.c.day)
+        else:
+            columns.append(func.array_agg(null()).label("benchmark"))
+
+        return select(*columns).select_from(source)
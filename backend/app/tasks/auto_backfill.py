@@ -7,14 +7,12 @@ from celery import shared_task, chain
 from datetime import date, timedelta
 from decimal import Decimal
 from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
 import logging
-import time
 
 from app.celery_app import celery_app
 from app.database import SyncSessionLocal
-from app.models import Transaction, PriceHistory
-from app.services.price_fetcher import PriceFetcher
+from app.models import Transaction
+from app.services.price_backfill import NO_DATA, UP_TO_DATE, price_backfill
 from app.services.ticker_mapper import TickerMapper
 
 logger = logging.getLogger(__name__)
@@ -113,12 +111,12 @@ def backfill_historical_prices_for_all_tickers(self, start_date: str, end_date:
 
     Steps:
     1. Query Transaction table for unique tickers and their ISINs
-    2. For each ticker:
-       - Fetch historical price data from start_date to end_date
-       - Use PriceFetcher.fetch_historical_prices_sync()
-       - Save to PriceHistory table
-       - Skip if price already exists (idempotency)
-       - Add 0.5s delay between tickers (rate limiting)
+    2. Backfill them with PriceBackfillService:
+       - Only date ranges missing from price_coverage are fetched, so a rerun
+         on a fully populated database costs at most one small request batch
+       - Tickers sharing a missing span share multi-ticker downloads
+       - Prices are written with bulk INSERT ... ON CONFLICT DO NOTHING
+         (existing prices are kept, idempotency)
     3. Log progress and errors
 
     Args:
@@ -131,7 +129,6 @@ def backfill_historical_prices_for_all_tickers(self, start_date: str, end_date:
     logger.info(f"Starting historical price backfill from {start_date} to {end_date}")
 
     db = SyncSessionLocal()
-    price_fetcher = PriceFetcher()
 
     try:
         # Parse dates
@@ -157,88 +154,18 @@ def backfill_historical_prices_for_all_tickers(self, start_date: str, end_date:
 
         logger.info(f"Found {len(ticker_isin_pairs)} unique tickers to process")
 
-        # Track results
-        tickers_processed = 0
-        prices_added = 0
-        prices_skipped = 0
-        failures = []
-
-        for ticker, isin in ticker_isin_pairs:
-            try:
-                logger.info(f"Processing {ticker} (ISIN: {isin})...")
-
-                # Fetch historical prices
-                historical_prices = price_fetcher.fetch_historical_prices_sync(
-                    ticker=ticker,
-                    isin=isin,
-                    start_date=start,
-                    end_date=end
-                )
-
-                if not historical_prices:
-                    logger.warning(f"No historical data available for {ticker}")
-                    failures.append({
-                        "ticker": ticker,
-                        "reason": "No data available from API"
-                    })
-                    continue
-
-                # Save each price record
-                for price_data in historical_prices:
-                    try:
-                        # Check if price already exists (idempotency)
-                        existing = db.execute(
-                            select(PriceHistory)
-                            .where(
-                                PriceHistory.ticker == ticker,
-                                PriceHistory.date == price_data["date"]
-                            )
-                        ).scalar_one_or_none()
-
-                        if existing:
-                            prices_skipped += 1
-                            continue
-
-                        # Create new price record
-                        price_record = PriceHistory(
-                            ticker=ticker,
-                            date=price_data["date"],
-                            open=price_data["open"],
-                            high=price_data["high"],
-                            low=price_data["low"],
-                            close=price_data["close"],
-                            volume=price_data["volume"],
-                            source=price_data.get("source", "yahoo")
-                        )
-
-                        db.add(price_record)
-                        prices_added += 1
-
-                    except IntegrityError:
-                        # Race condition: another process already added this price
-                        db.rollback()
-                        prices_skipped += 1
-                        continue
-
-                # Commit all prices for this ticker
-                db.commit()
-
-                tickers_processed += 1
-                logger.info(
-                    f"✓ {ticker}: Added {len(historical_prices)} price records "
-                    f"(total added: {prices_added}, skipped: {prices_skipped})"
-                )
-
-                # Rate limiting: 0.5s delay between tickers
-                time.sleep(0.5)
-
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Error processing {ticker}: {str(e)}")
-                failures.append({
-                    "ticker": ticker,
-                    "reason": str(e)
-                })
+        tickers = {ticker: (ticker, isin) for ticker, isin in ticker_isin_pairs}
+        results = price_backfill.backfill(db, tickers, start, end)
+
+        failures = [
+            {"ticker": ticker, "reason": "No data available from API"}
+            for ticker, ticker_result in results.items()
+            if ticker_result["status"] == NO_DATA
+        ]
+        tickers_processed = len(results) - len(failures)
+        tickers_up_to_date = sum(1 for r in results.values() if r["status"] == UP_TO_DATE)
+        prices_added = sum(r["added"] for r in results.values())
+        prices_skipped = sum(r["skipped"] for r in results.values())
 
         # Summary
         summary = {
@@ -246,15 +173,17 @@ def backfill_historical_prices_for_all_tickers(self, start_date: str, end_date:
             "start_date": start_date,
             "end_date": end_date,
             "tickers_processed": tickers_processed,
+            "tickers_up_to_date": tickers_up_to_date,
             "prices_added": prices_added,
             "prices_skipped": prices_skipped,
-            "total_tickers": len(ticker_isin_pairs),
+            "total_tickers": len(tickers),
             "failures": failures
         }
 
         logger.info(
             f"Historical price backfill complete: "
-            f"{tickers_processed}/{len(ticker_isin_pairs)} tickers processed, "
+            f"{tickers_processed}/{len(tickers)} tickers processed "
+            f"({tickers_up_to_date} already covered), "
             f"{prices_added} prices added, {prices_skipped} skipped, "
             f"{len(failures)} failures"
         )
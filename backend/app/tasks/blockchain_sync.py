@@ -11,9 +11,7 @@ from sqlalchemy import select, func, and_, or_
 from sqlalchemy.exc import IntegrityError
 from typing import Optional
 import logging
-import time
 import json
-import redis
 
 from app.celery_app import celery_app
 from app.database import SyncSessionLocal
@@ -21,18 +19,19 @@ from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransact
 from app.models.price_history import PriceHistory
 from app.services.blockchain_fetcher import blockchain_fetcher
 from app.services.blockchain_deduplication import blockchain_deduplication
+from app.services.cache_generations import CacheGenerations, crypto
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_CRYPTO_PORTFOLIO
 from app.services.price_fetcher import PriceFetcher
+from app.services.redis_pools import redis_pools
 from app.config import settings
 from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
-# Redis client for sync status tracking
-redis_client = redis.from_url(settings.redis_url, decode_responses=True)
-
 def set_syncing_status(portfolio_id: int, task_id: str):
     """Set wallet syncing status in Redis"""
     key = f"wallet_sync:{portfolio_id}"
+    redis_client = redis_pools.sync_client()
     value = {
         "status": "syncing",
         "task_id": task_id,
@@ -44,12 +43,14 @@ def set_syncing_status(portfolio_id: int, task_id: str):
 def clear_syncing_status(portfolio_id: int):
     """Clear wallet syncing status from Redis"""
     key = f"wallet_sync:{portfolio_id}"
+    redis_client = redis_pools.sync_client()
     redis_client.delete(key)
     logger.info(f"Cleared sync status for portfolio {portfolio_id}")
 
 def get_syncing_status(portfolio_id: int) -> Optional[dict]:
     """Get wallet syncing status from Redis"""
     key = f"wallet_sync:{portfolio_id}"
+    redis_client = redis_pools.sync_client()
     value = redis_client.get(key)
     if value:
         try:
@@ -75,8 +76,7 @@ def get_usd_to_eur_rate() -> Optional[Decimal]:
 
         # Get EUR/USD rate from Yahoo Finance (EURUSD=X)
         # This gives us 1 EUR = X USD, so we need to invert it
-        import asyncio
-        eur_usd_rate = asyncio.run(price_fetcher.fetch_fx_rate("EUR", "USD"))
+        eur_usd_rate = price_fetcher.fetch_fx_rate_sync("EUR", "USD")
 
         if eur_usd_rate and eur_usd_rate > 0:
             usd_to_eur_rate = Decimal("1") / eur_usd_rate
@@ -220,9 +220,6 @@ def _sync_bitcoin_wallets_impl():
                     f"failed {wallet_result.get('transactions_failed', 0)}"
                 )
 
-                # Rate limiting between wallets
-                time.sleep(2)
-
             except Exception as e:
                 logger.error(f"Failed to sync wallet {portfolio.wallet_address}: {e}")
                 wallet_results.append({
@@ -521,7 +518,11 @@ def sync_single_wallet(
         if total_processed > 0 or portfolio.wallet_last_sync_time is None:
             try:
                 portfolio.wallet_last_sync_time = datetime.utcnow()
+                if transactions_added:
+                    MetricsDirtyTracker.mark(db_session, SCOPE_CRYPTO_PORTFOLIO, [portfolio_id])
                 db_session.commit()
+                if transactions_added:
+                    CacheGenerations.bump(crypto(portfolio_id))
                 logger.info(f"Updated wallet_last_sync_time for portfolio {portfolio_id} to {portfolio.wallet_last_sync_time}")
             except Exception as e:
                 db_session.rollback()
@@ -14,6 +14,8 @@ from app.celery_app import celery_app
 from app.database import SyncSessionLocal
 from app.models import CachedMetrics
 from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransactionType
+from app.services.calculations import FinancialCalculations
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_CRYPTO_PORTFOLIO
 from app.services.price_fetcher import PriceFetcher
 from sqlalchemy.dialects.postgresql import insert
 
@@ -68,6 +70,49 @@ def _calculate_holdings_from_transactions(transactions):
     return holdings
 
 
+def _holdings_to_basis(holdings) -> dict:
+    """Serialize holdings for storage in CachedMetrics.metric_value (exact Decimal strings)."""
+    return {
+        symbol: {"quantity": str(holding["quantity"]), "total_cost": str(holding["total_cost"])}
+        for symbol, holding in holdings.items()
+    }
+
+
+def _holdings_from_basis(metric_value):
+    """
+    Restore holdings stored by _holdings_to_basis().
+
+    Returns:
+        dict: Holdings keyed by symbol, or None if the cached value has no (valid) basis
+    """
+    basis = (metric_value or {}).get("basis")
+    if basis is None:
+        return None
+
+    try:
+        return {
+            symbol: {
+                "quantity": Decimal(holding["quantity"]),
+                "total_cost": Decimal(holding["total_cost"]),
+            }
+            for symbol, holding in basis.items()
+        }
+    except (KeyError, TypeError, AttributeError, ArithmeticError) as e:
+        logger.warning(f"Ignoring invalid cached crypto basis: {e}")
+        return None
+
+
+def _fetch_eurusd_rate(price_fetcher):
+    """Fetch EURUSD (USD per EUR), or None if unavailable. Convert USD->EUR by dividing."""
+    eurusd = price_fetcher.fetch_realtime_price("EURUSD=X")
+    if eurusd and eurusd.get("current_price"):
+        try:
+            return Decimal(str(eurusd["current_price"]))
+        except Exception:
+            return None
+    return None
+
+
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
@@ -82,8 +127,10 @@ def calculate_crypto_metrics(self):
 
     Performs portfolio-level metric computation, upserts each portfolio's metrics into CachedMetrics with a 24-hour expiry, computes and upserts global metrics, cleans up expired cached entries, and aggregates success/failure counts.
 
+    Only portfolios marked by MetricsDirtyTracker (or without a cached holdings basis) replay their transactions; the others are revalued at current prices from the basis cached with their metrics. Global metrics are aggregated from the per-portfolio results of the same run.
+
     Returns:
-        dict: Summary with keys "status", "calculated" (number cached), "failed" (number failed), "total_portfolios", and optionally "failed_portfolios" (list of failed portfolio names).
+        dict: Summary with keys "status", "calculated" (number cached), "failed" (number failed), "total_portfolios", "recomputed" and "refreshed" (portfolios replayed vs. revalued), and optionally "failed_portfolios" (list of failed portfolio names).
     """
     logger.info("Starting crypto metric calculation task")
 
@@ -113,14 +160,39 @@ def calculate_crypto_metrics(self):
         calculated = 0
         failed = 0
         failed_portfolios = []
+        recomputed = 0
+        refreshed = 0
+        portfolio_results = []
 
         # Calculate expiry (24 hours from now)
         expires_at = datetime.utcnow() + timedelta(hours=24)
 
+        # Marks read now are cleared per portfolio; later marks survive for the next run
+        run_started = datetime.utcnow()
+        dirty_ids = MetricsDirtyTracker.pending(db, SCOPE_CRYPTO_PORTFOLIO)
+        cached_values = dict(
+            db.execute(
+                select(CachedMetrics.metric_key, CachedMetrics.metric_value)
+                .where(CachedMetrics.metric_type == "crypto_portfolio_metrics")
+            ).all()
+        )
+
+        # One fetcher and one EURUSD quote for the whole run
+        price_fetcher = PriceFetcher()
+        eurusd_rate = _fetch_eurusd_rate(price_fetcher)
+
         for portfolio in active_portfolios:
             try:
+                key = str(portfolio.id)
+                holdings = None if key in dirty_ids else _holdings_from_basis(cached_values.get(key))
+
                 # Calculate portfolio metrics
-                metrics = calculate_crypto_portfolio_metrics(db, portfolio.id)
+                if holdings is None:
+                    metrics = calculate_crypto_portfolio_metrics(db, portfolio.id, price_fetcher, eurusd_rate)
+                    recomputed += 1
+                else:
+                    metrics = _portfolio_metrics_from_holdings(portfolio, holdings, price_fetcher, eurusd_rate)
+                    refreshed += 1
 
                 if not metrics:
                     logger.warning(f"Could not calculate metrics for crypto portfolio {portfolio.name}")
@@ -144,8 +216,11 @@ def calculate_crypto_metrics(self):
                     }
                 )
                 db.execute(stmt)
+                if key in dirty_ids:
+                    MetricsDirtyTracker.clear(db, SCOPE_CRYPTO_PORTFOLIO, [key], run_started)
                 db.commit()
 
+                portfolio_results.append(metrics)
                 calculated += 1
                 logger.info(f"Cached metrics for crypto portfolio {portfolio.name}")
 
@@ -157,7 +232,7 @@ def calculate_crypto_metrics(self):
 
         # Calculate global crypto metrics (across all portfolios)
         try:
-            global_metrics = calculate_global_crypto_metrics(db)
+            global_metrics = calculate_global_crypto_metrics(db, portfolio_results)
 
             if global_metrics:
                 # Atomic upsert (PostgreSQL)
@@ -204,7 +279,9 @@ def calculate_crypto_metrics(self):
             "status": "success",
             "calculated": calculated,
             "failed": failed,
-            "total_portfolios": len(active_portfolios)
+            "total_portfolios": len(active_portfolios),
+            "recomputed": recomputed,
+            "refreshed": refreshed
         }
 
         if failed_portfolios:
@@ -212,7 +289,7 @@ def calculate_crypto_metrics(self):
 
         logger.info(
             f"Crypto metric calculation complete: {calculated} calculated, {failed} failed "
-            f"out of {len(active_portfolios)} portfolios"
+            f"out of {len(active_portfolios)} portfolios ({recomputed} recomputed, {refreshed} refreshed)"
         )
 
         return summary
@@ -225,7 +302,7 @@ def calculate_crypto_metrics(self):
         db.close()
 
 
-def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
+def calculate_crypto_portfolio_metrics(db, portfolio_id: int, price_fetcher=None, eurusd_rate=None) -> dict:
     """
     Compute portfolio-level crypto metrics for the specified portfolio.
 
@@ -233,6 +310,8 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
 
     Parameters:
         portfolio_id (int): ID of the crypto portfolio to compute metrics for.
+        price_fetcher (PriceFetcher, optional): Fetcher to reuse; a new one is created if None.
+        eurusd_rate (Decimal, optional): EURUSD rate to reuse; fetched if None.
 
     Returns:
         dict or None: Metrics dictionary when the portfolio is found and active, otherwise `None`.
@@ -250,6 +329,7 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
             - num_positions: number of active positions
             - base_currency: portfolio base currency code
             - calculated_at: ISO8601 UTC timestamp of calculation
+            - basis: per-symbol quantity and total_cost as Decimal strings (for mark-to-market refreshes)
     """
     # Get portfolio
     portfolio = db.execute(
@@ -279,14 +359,36 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
             "asset_allocation": {},
             "num_positions": 0,
             "base_currency": portfolio.base_currency.value,
-            "calculated_at": datetime.utcnow().isoformat()
+            "calculated_at": datetime.utcnow().isoformat(),
+            "basis": {}
         }
 
     # Get current holdings using helper function
     holdings = _calculate_holdings_from_transactions(transactions)
 
+    # Reuse one fetcher per portfolio
+    if price_fetcher is None:
+        price_fetcher = PriceFetcher()
+        eurusd_rate = _fetch_eurusd_rate(price_fetcher)
+
+    return _portfolio_metrics_from_holdings(portfolio, holdings, price_fetcher, eurusd_rate)
+
+
+def _portfolio_metrics_from_holdings(portfolio, holdings, price_fetcher, eurusd_rate) -> dict:
+    """
+    Value holdings at realtime prices and build the portfolio metrics dictionary.
+
+    Parameters:
+        portfolio (CryptoPortfolio): The portfolio the holdings belong to.
+        holdings (dict): Holdings keyed by symbol with quantity and total_cost.
+        price_fetcher (PriceFetcher): Fetcher used for realtime quotes.
+        eurusd_rate (Decimal | None): USD per EUR; a fixed fallback rate is used if None.
+
+    Returns:
+        dict: Metrics as described in calculate_crypto_portfolio_metrics.
+    """
     # Recalculate total cost basis from holdings
-    total_cost_basis = sum(holding["total_cost"] for holding in holdings.values())
+    total_cost_basis = sum((holding["total_cost"] for holding in holdings.values()), Decimal("0"))
 
     # Get current prices and calculate values
     total_value_eur = Decimal("0")
@@ -294,18 +396,6 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
     asset_allocation = {}
     current_holdings = {}
 
-    # Reuse one fetcher per portfolio
-    price_fetcher = PriceFetcher()
-
-    # Fetch EURUSD once (USD per EUR). Convert USD->EUR by dividing.
-    eurusd = price_fetcher.fetch_realtime_price("EURUSD=X")
-    eurusd_rate = None
-    if eurusd and eurusd.get("current_price"):
-        try:
-            eurusd_rate = Decimal(str(eurusd["current_price"]))
-        except Exception:
-            eurusd_rate = None
-
     for symbol, holding in holdings.items():
         if holding["quantity"] <= 0:
             continue
@@ -370,7 +460,7 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
     # IRR and TWR might be different. For crypto, we use the same calculation to maintain consistency
     # with the frontend expectations.
     metrics = {
-        "portfolio_id": portfolio_id,
+        "portfolio_id": portfolio.id,
         "portfolio_name": portfolio.name,
         "total_value_eur": float(total_value_eur),
         "total_value_usd": float(total_value_usd),
@@ -382,7 +472,8 @@ def calculate_crypto_portfolio_metrics(db, portfolio_id: int) -> dict:
         "holdings": current_holdings,
         "num_positions": len(current_holdings),
         "base_currency": portfolio.base_currency.value,
-        "calculated_at": datetime.utcnow().isoformat()
+        "calculated_at": datetime.utcnow().isoformat(),
+        "basis": _holdings_to_basis(holdings)
     }
 
     return metrics
@@ -405,7 +496,7 @@ def calculate_crypto_position_metrics(db, portfolio_id: int) -> dict:
             - cost_basis (float)
             - unrealized_pnl_eur (float)
             - unrealized_pnl_pct (float)
-            - irr (float)
+            - irr (float | None): annualized XIRR in percent
             - calculated_at (str, UTC ISO timestamp)
 
         Returns an empty dict if the portfolio has no transactions or no positive-quantity positions.
@@ -438,6 +529,15 @@ def calculate_crypto_position_metrics(db, portfolio_id: int) -> dict:
         except Exception:
             eurusd_rate = None
 
+    # Dated cash flows per symbol for the XIRR batch (transfers are not cash flows)
+    cash_flows_by_symbol = {}
+    for txn in transactions:
+        if txn.transaction_type == CryptoTransactionType.BUY:
+            cash_flows_by_symbol.setdefault(txn.symbol, []).append((txn.timestamp.date(), -txn.total_amount))
+        elif txn.transaction_type == CryptoTransactionType.SELL:
+            cash_flows_by_symbol.setdefault(txn.symbol, []).append((txn.timestamp.date(), txn.total_amount))
+
+    current_values = {}
     for symbol, holding in holdings.items():
         if holding["quantity"] <= 0:
             continue
@@ -450,10 +550,7 @@ def calculate_crypto_position_metrics(db, portfolio_id: int) -> dict:
             price_usd = price_data["current_price"]
             price_eur = (price_usd / eurusd_rate) if eurusd_rate and eurusd_rate != 0 else (price_usd * Decimal("0.92"))
             current_value = holding["quantity"] * price_eur
-
-            # Calculate simple return as IRR substitute for now
-            # Note: Full IRR calculation would require more complex cash flow analysis
-            irr = float((current_value / holding["total_cost"] - 1) * 100) if holding["total_cost"] > 0 else 0
+            current_values[symbol] = current_value
 
             metrics[symbol] = {
                 "symbol": symbol,
@@ -464,19 +561,34 @@ def calculate_crypto_position_metrics(db, portfolio_id: int) -> dict:
                 "cost_basis": float(holding["total_cost"]),
                 "unrealized_pnl_eur": float(current_value - holding["total_cost"]),
                 "unrealized_pnl_pct": float((current_value / holding["total_cost"] - 1) * 100) if holding["total_cost"] > 0 else 0,
-                "irr": irr,
+                "irr": None,
                 "calculated_at": datetime.utcnow().isoformat()
             }
 
+    # Solve every symbol's IRR in one batch (percentage, like the portfolio-level IRR)
+    symbols = list(metrics)
+    irrs = FinancialCalculations.calculate_irr_batch(
+        [
+            (cash_flows_by_symbol.get(symbol, []), current_values[symbol])
+            for symbol in symbols
+        ],
+        current_date=datetime.utcnow().date()
+    )
+    for symbol, irr in zip(symbols, irrs):
+        metrics[symbol]["irr"] = irr * 100 if irr is not None else None
+
     return metrics
 
 
-def calculate_global_crypto_metrics(db) -> dict:
+def calculate_global_crypto_metrics(db, portfolio_metrics=None) -> dict:
     """
     Compute aggregated crypto metrics across all active portfolios.
 
     If there are active portfolios, returns a dictionary containing aggregated totals, returns, asset allocation, counts, and a UTC ISO timestamp; returns `None` if no active portfolios are found.
 
+    Parameters:
+        portfolio_metrics (list, optional): Per-portfolio metrics already computed in this run; computed for every active portfolio if None.
+
     Returns:
         dict or None: Aggregated metrics with keys:
             - total_value_eur (float): Sum market value in EUR across portfolios.
@@ -503,16 +615,18 @@ def calculate_global_crypto_metrics(db) -> dict:
     total_cost_basis = Decimal("0")
     all_holdings = {}
 
+    if portfolio_metrics is None:
+        portfolio_metrics = [calculate_crypto_portfolio_metrics(db, portfolio.id) for portfolio in portfolios]
+
     # Aggregate across all portfolios
-    for portfolio in portfolios:
-        portfolio_metrics = calculate_crypto_portfolio_metrics(db, portfolio.id)
-        if portfolio_metrics:
-            total_value_eur += Decimal(str(portfolio_metrics["total_value_eur"]))
-            total_value_usd += Decimal(str(portfolio_metrics["total_value_usd"]))
-            total_cost_basis += Decimal(str(portfolio_metrics["total_cost_basis"]))
+    for metrics in portfolio_metrics:
+        if metrics:
+            total_value_eur += Decimal(str(metrics["total_value_eur"]))
+            total_value_usd += Decimal(str(metrics["total_value_usd"]))
+            total_cost_basis += Decimal(str(metrics["total_cost_basis"]))
 
             # Aggregate holdings by symbol
-            for symbol, holding in portfolio_metrics.get("holdings", {}).items():
+            for symbol, holding in metrics.get("holdings", {}).items():
                 if symbol not in all_holdings:
                     all_holdings[symbol] = {
                         "quantity": Decimal("0"),
@@ -2,19 +2,28 @@
 Crypto portfolio snapshot tasks.
 
 Creates daily snapshots of crypto portfolio values for historical performance tracking.
+
+Backfills value every missing date in one pass (backfill_crypto_snapshot_range)
+instead of rebuilding holdings, prices and FX rates for each day.
 """
 from celery import shared_task
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from sqlalchemy import select, func, delete
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    select, func, delete, insert, and_, cast, column, text, values, Date, DateTime, Integer, Numeric, String
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 import logging
-import json
 
 from app.database import SyncSessionLocal
 from app.models.crypto import CryptoPortfolio, CryptoTransaction, CryptoTransactionType
 from app.models.crypto_portfolio_snapshot import CryptoPortfolioSnapshot
-from app.models.price_history import PriceHistory
+from app.models.crypto_snapshot_holding import CryptoSnapshotHolding
+from app.services.asof_prices import AsOfPriceGrid, AsOfPriceService
+from app.services.cache_generations import CacheGenerations, SNAPSHOTS
+from app.services.fx_history import fx_history
 from app.services.price_fetcher import PriceFetcher
 
 logger = logging.getLogger(__name__)
@@ -104,26 +113,15 @@ def create_daily_crypto_snapshots(self):
                     existing.total_value_usd = snapshot_data["total_value_usd"]
                     existing.total_cost_basis = snapshot_data["total_cost_basis"]
                     existing.base_currency = snapshot_data["base_currency"]
-                    existing.holdings_breakdown = snapshot_data["holdings_breakdown"]
                     existing.total_return_pct = snapshot_data["total_return_pct"]
+                    _replace_snapshot_holdings(db, portfolio.id, snapshot_date, snapshot_data["holdings"])
 
                     db.commit()
                     logger.info(f"Updated crypto snapshot for portfolio {portfolio.name} on {snapshot_date}")
                     updated += 1
                 else:
-                    # Create new snapshot
-                    snapshot = CryptoPortfolioSnapshot(
-                        portfolio_id=portfolio.id,
-                        snapshot_date=snapshot_date,
-                        total_value_eur=snapshot_data["total_value_eur"],
-                        total_value_usd=snapshot_data["total_value_usd"],
-                        total_cost_basis=snapshot_data["total_cost_basis"],
-                        base_currency=snapshot_data["base_currency"],
-                        holdings_breakdown=snapshot_data["holdings_breakdown"],
-                        total_return_pct=snapshot_data["total_return_pct"]
-                    )
-
-                    db.add(snapshot)
+                    # Create new snapshot (a concurrent insert wins, as a race condition)
+                    write_crypto_snapshots(db, [dict(snapshot_data, portfolio_id=portfolio.id, snapshot_date=snapshot_date)])
                     db.commit()
                     logger.info(f"Created crypto snapshot for portfolio {portfolio.name} on {snapshot_date}")
                     created += 1
@@ -140,6 +138,9 @@ def create_daily_crypto_snapshots(self):
                 failed += 1
                 failed_portfolios.append(portfolio.name)
 
+        if created or updated:
+            CacheGenerations.bump(SNAPSHOTS)
+
         # Clean up old snapshots (keep last 2 years)
         try:
             # Subtract ~2 years safely to avoid Feb 29 invalid dates
@@ -156,6 +157,7 @@ def create_daily_crypto_snapshots(self):
                 )
                 result = db.execute(delete_stmt)
                 db.commit()
+                CacheGenerations.bump(SNAPSHOTS)
                 logger.info(f"Cleaned up {result.rowcount} old crypto snapshots (older than {cleanup_date})")
 
         except Exception as e:
@@ -266,19 +268,19 @@ def create_crypto_snapshot_for_portfolio(self, portfolio_id: int, snapshot_date:
             }
 
         # Create new snapshot
-        snapshot = CryptoPortfolioSnapshot(
-            portfolio_id=portfolio_id,
-            snapshot_date=target_date,
-            total_value_eur=snapshot_data["total_value_eur"],
-            total_value_usd=snapshot_data["total_value_usd"],
-            total_cost_basis=snapshot_data["total_cost_basis"],
-            base_currency=snapshot_data["base_currency"],
-            holdings_breakdown=snapshot_data["holdings_breakdown"],
-            total_return_pct=snapshot_data["total_return_pct"]
-        )
-
-        db.add(snapshot)
+        created = write_crypto_snapshots(db, [dict(snapshot_data, portfolio_id=portfolio_id, snapshot_date=target_date)])
         db.commit()
+        if created:
+            CacheGenerations.bump(SNAPSHOTS)
+
+        if not created:
+            logger.debug(f"Snapshot already exists for portfolio {portfolio_id} (race condition)")
+            return {
+                "status": "skipped",
+                "portfolio_id": portfolio_id,
+                "snapshot_date": str(target_date),
+                "reason": "Snapshot already exists"
+            }
 
         logger.info(f"Created crypto snapshot for portfolio {portfolio.name} on {target_date}")
 
@@ -323,12 +325,9 @@ def calculate_crypto_snapshot_data(db, portfolio_id: int, snapshot_date: date) -
             - total_value_usd (Decimal): Total portfolio market value in USD as of snapshot_date (0 if unavailable).
             - total_cost_basis (Decimal): Sum of cost bases for current holdings in portfolio base currency (EUR).
             - base_currency (str): Portfolio base currency code (e.g., "EUR").
-            - holdings_breakdown (str): JSON-serialized mapping of symbol -> {
-                "quantity": float,
-                "value_eur": float,
-                "value_usd": float,
-                "percentage": float
-              } where `percentage` is the holding's percent of total_value_eur.
+            - holdings (list): One dict per priced holding with `symbol` (str),
+              `quantity`, `value_eur` and `value_usd` (Decimal), written as
+              CryptoSnapshotHolding rows.
             - total_return_pct (Decimal): Percentage return relative to total_cost_basis (0 if cost basis is 0).
     """
     # Get portfolio
@@ -339,153 +338,378 @@ def calculate_crypto_snapshot_data(db, portfolio_id: int, snapshot_date: date) -
     if not portfolio:
         return None
 
-    # Get all transactions for this portfolio
-    transactions = db.execute(
+    transactions = _load_crypto_transactions(db, portfolio_id, snapshot_date)
+
+    # Resolve as-of prices (most recent close on or before snapshot_date) for
+    # every symbol in one query
+    prices = AsOfPriceService.load(db, {txn.symbol for txn in transactions}, snapshot_date)
+
+    [snapshot_data] = replay_crypto_snapshots(
+        transactions,
+        [snapshot_date],
+        prices,
+        _eur_usd_rates(db, [snapshot_date]),
+        portfolio.base_currency.value,
+        _realtime_prices(PriceFetcher())
+    )
+    del snapshot_data["snapshot_date"]
+    return snapshot_data
+
+
+# Rows per INSERT statement when bulk-writing backfilled crypto snapshots
+CRYPTO_SNAPSHOT_INSERT_BATCH_SIZE = 500
+
+
+def apply_crypto_transaction(holding: Dict[str, Decimal], txn: CryptoTransaction) -> None:
+    """
+    Apply a single transaction to a holding's quantity and total_cost in place.
+
+    Buys and transfers in add to the position; sells and transfers out reduce
+    the cost basis by the average cost of the units removed (not by proceeds).
+    """
+    if txn.transaction_type == CryptoTransactionType.BUY or txn.transaction_type == CryptoTransactionType.TRANSFER_IN:
+        # Add to position
+        holding["quantity"] += txn.quantity
+        holding["total_cost"] += txn.total_amount
+    elif txn.transaction_type == CryptoTransactionType.SELL or txn.transaction_type == CryptoTransactionType.TRANSFER_OUT:
+        # Calculate average cost per unit before reducing position
+        if holding["quantity"] > 0:
+            average_cost_per_unit = holding["total_cost"] / holding["quantity"]
+        else:
+            average_cost_per_unit = Decimal("0")
+
+        # Reduce quantity
+        sold_quantity = min(txn.quantity, holding["quantity"])  # Prevent negative
+        holding["quantity"] -= sold_quantity
+
+        # Reduce cost basis by the cost of units sold (not by proceeds)
+        cost_removed = average_cost_per_unit * sold_quantity
+        holding["total_cost"] -= cost_removed
+
+        # Ensure no negative values
+        if holding["quantity"] < 0:
+            holding["quantity"] = Decimal("0")
+        if holding["total_cost"] < 0:
+            holding["total_cost"] = Decimal("0")
+
+
+def replay_crypto_snapshots(
+    transactions: Sequence[CryptoTransaction],
+    snapshot_dates: Sequence[date],
+    prices: AsOfPriceGrid,
+    eur_usd: Dict[date, Optional[Decimal]],
+    base_currency: str,
+    fallback_price: Optional[Callable[[str], Optional[Tuple[Decimal, Decimal]]]] = None,
+) -> Iterator[dict]:
+    """
+    Value the portfolio on each date in one chronological sweep.
+
+    Produces the same values as calculate_crypto_snapshot_data for each date:
+    holdings are carried from one date to the next and advanced by the
+    transactions in between, instead of being rebuilt from every transaction.
+
+    Args:
+        transactions: Portfolio transactions ordered by timestamp
+        snapshot_dates: Dates to value, in ascending order
+        prices: As-of EUR closes covering every symbol and date
+        eur_usd: Date -> EUR/USD rate (None where unavailable: USD values are 0)
+        base_currency: Portfolio base currency code
+        fallback_price: Optional fn(symbol) -> (price_eur, price_usd) for
+            holdings without a stored close; holdings it cannot price are skipped
+
+    Yields:
+        Snapshot data dict (see calculate_crypto_snapshot_data) with snapshot_date
+    """
+    holdings: Dict[str, Dict[str, Decimal]] = {}
+    txn_index = 0
+
+    for snapshot_date in snapshot_dates:
+        while txn_index < len(transactions) and transactions[txn_index].timestamp.date() <= snapshot_date:
+            txn = transactions[txn_index]
+            txn_index += 1
+            holding = holdings.setdefault(txn.symbol, {"quantity": Decimal("0"), "total_cost": Decimal("0")})
+            apply_crypto_transaction(holding, txn)
+
+        # Recalculate total cost basis from holdings
+        total_cost_basis = sum((holding["total_cost"] for holding in holdings.values()), Decimal("0"))
+
+        total_value_eur = Decimal("0")
+        total_value_usd = Decimal("0")
+        snapshot_holdings = []
+        rate = eur_usd.get(snapshot_date)
+
+        for symbol, holding in holdings.items():
+            if holding["quantity"] <= 0:
+                continue
+
+            # Price as of snapshot_date from the price_history table
+            stored_price = prices.price(symbol, snapshot_date)
+
+            if stored_price is not None:
+                price_eur = Decimal(str(stored_price))
+                price_usd = price_eur * rate if rate and rate > 0 else None
+            else:
+                fallback = fallback_price(symbol) if fallback_price else None
+                if fallback is None:
+                    # No fallback - skip this holding if no price data available
+                    logger.warning(f"Could not get price for {symbol} on {snapshot_date}. Skipping holding from snapshot.")
+                    continue
+                price_eur, price_usd = fallback
+
+            value_eur = holding["quantity"] * price_eur
+            value_usd = holding["quantity"] * price_usd if price_usd is not None else Decimal("0")
+
+            total_value_eur += value_eur
+            total_value_usd += value_usd
+            snapshot_holdings.append({
+                "symbol": symbol,
+                "quantity": holding["quantity"],
+                "value_eur": value_eur,
+                "value_usd": value_usd,
+            })
+
+        # Calculate total return percentage
+        total_return_pct = ((total_value_eur / total_cost_basis) - 1) * 100 if total_cost_basis > 0 else 0
+
+        yield {
+            "snapshot_date": snapshot_date,
+            "total_value_eur": total_value_eur,
+            "total_value_usd": total_value_usd,
+            "total_cost_basis": total_cost_basis,
+            "base_currency": base_currency,
+            "holdings": snapshot_holdings,
+            "total_return_pct": Decimal(str(total_return_pct))
+        }
+
+
+def write_crypto_snapshots(db, rows: List[dict]) -> int:
+    """
+    Insert new snapshots and their holdings. The caller commits.
+
+    Each batch is a single statement: the snapshots are inserted with
+    ON CONFLICT DO NOTHING (covering snapshots created concurrently) and a
+    data-modifying CTE inserts the holdings of the snapshots actually created.
+
+    Args:
+        db: Synchronous database session
+        rows: CryptoPortfolioSnapshot column values plus a `holdings` list
+            (see calculate_crypto_snapshot_data)
+
+    Returns:
+        Number of snapshots created
+    """
+    created = 0
+    for i in range(0, len(rows), CRYPTO_SNAPSHOT_INSERT_BATCH_SIZE):
+        batch = rows[i:i + CRYPTO_SNAPSHOT_INSERT_BATCH_SIZE]
+        snapshots = (
+            pg_insert(CryptoPortfolioSnapshot)
+            .values([{key: value for key, value in row.items() if key != "holdings"} for row in batch])
+            .on_conflict_do_nothing(constraint="uix_crypto_portfolio_snapshot_date")
+            .returning(CryptoPortfolioSnapshot.portfolio_id, CryptoPortfolioSnapshot.snapshot_date)
+            .cte("inserted_snapshots")
+        )
+        stmt = select(func.count()).select_from(snapshots)
+
+        holding_rows = [
+            (row["portfolio_id"], row["snapshot_date"], holding["symbol"],
+             holding["quantity"], holding["value_eur"], holding["value_usd"])
+            for row in batch
+            for holding in row["holdings"]
+        ]
+        if holding_rows:
+            holdings = values(
+                column("portfolio_id", Integer),
+                column("snapshot_date", Date),
+                column("symbol", String),
+                column("quantity", Numeric),
+                column("value_eur", Numeric),
+                column("value_usd", Numeric),
+                name="snapshot_holdings"
+            ).data(holding_rows)
+            stmt = stmt.add_cte(
+                insert(CryptoSnapshotHolding)
+                .from_select(
+                    ["portfolio_id", "snapshot_date", "symbol", "quantity", "value_eur", "value_usd"],
+                    select(holdings).join(
+                        snapshots,
+                        and_(
+                            snapshots.c.portfolio_id == holdings.c.portfolio_id,
+                            snapshots.c.snapshot_date == holdings.c.snapshot_date
+                        )
+                    )
+                )
+                .cte("inserted_holdings")
+            )
+
+        created += db.execute(stmt).scalar_one()
+    return created
+
+
+def _replace_snapshot_holdings(db, portfolio_id: int, snapshot_date: date, holdings: List[dict]) -> None:
+    """Replace the holdings of an existing snapshot. The caller commits."""
+    db.execute(
+        delete(CryptoSnapshotHolding).where(
+            CryptoSnapshotHolding.portfolio_id == portfolio_id,
+            CryptoSnapshotHolding.snapshot_date == snapshot_date
+        )
+    )
+    if holdings:
+        db.execute(
+            insert(CryptoSnapshotHolding),
+            [dict(holding, portfolio_id=portfolio_id, snapshot_date=snapshot_date) for holding in holdings]
+        )
+
+
+def _load_crypto_transactions(db, portfolio_id: int, end_date: date) -> List[CryptoTransaction]:
+    """Load the portfolio's transactions up to the end of end_date, in timestamp order."""
+    return db.execute(
         select(CryptoTransaction)
         .where(
             CryptoTransaction.portfolio_id == portfolio_id,
-            CryptoTransaction.timestamp <= datetime.combine(snapshot_date, datetime.max.time())
+            CryptoTransaction.timestamp <= datetime.combine(end_date, datetime.max.time())
         )
         .order_by(CryptoTransaction.timestamp)
     ).scalars().all()
 
-    if not transactions:
-        return {
-            "total_value_eur": Decimal("0"),
-            "total_value_usd": Decimal("0"),
-            "total_cost_basis": Decimal("0"),
-            "base_currency": portfolio.base_currency.value,
-            "holdings_breakdown": json.dumps({}),
-            "total_return_pct": Decimal("0")
-        }
 
-    # Calculate current holdings
-    holdings = {}
+def _missing_snapshot_dates(db, portfolio_id: int, start: date, end: date) -> List[date]:
+    """Return the dates in [start, end] without a snapshot for the portfolio, in one query."""
+    days = select(
+        cast(
+            func.generate_series(cast(start, DateTime), cast(end, DateTime), text("interval '1 day'")),
+            Date
+        ).label("day")
+    ).subquery("days")
+
+    return db.execute(
+        select(days.c.day)
+        .select_from(
+            days.outerjoin(
+                CryptoPortfolioSnapshot,
+                and_(
+                    CryptoPortfolioSnapshot.portfolio_id == portfolio_id,
+                    CryptoPortfolioSnapshot.snapshot_date == days.c.day
+                )
+            )
+        )
+        .where(CryptoPortfolioSnapshot.id.is_(None))
+        .order_by(days.c.day)
+    ).scalars().all()
 
-    for txn in transactions:
-        symbol = txn.symbol
-        if symbol not in holdings:
-            holdings[symbol] = {
-                "quantity": Decimal("0"),
-                "total_cost": Decimal("0")
-            }
 
-        if txn.transaction_type == CryptoTransactionType.BUY or txn.transaction_type == CryptoTransactionType.TRANSFER_IN:
-            # Add to position
-            holdings[symbol]["quantity"] += txn.quantity
-            holdings[symbol]["total_cost"] += txn.total_amount
-        elif txn.transaction_type == CryptoTransactionType.SELL or txn.transaction_type == CryptoTransactionType.TRANSFER_OUT:
-            # Calculate average cost per unit before reducing position
-            if holdings[symbol]["quantity"] > 0:
-                average_cost_per_unit = holdings[symbol]["total_cost"] / holdings[symbol]["quantity"]
-            else:
-                average_cost_per_unit = Decimal("0")
-
-            # Reduce quantity
-            sold_quantity = min(txn.quantity, holdings[symbol]["quantity"])  # Prevent negative
-            holdings[symbol]["quantity"] -= sold_quantity
-
-            # Reduce cost basis by the cost of units sold (not by proceeds)
-            cost_removed = average_cost_per_unit * sold_quantity
-            holdings[symbol]["total_cost"] -= cost_removed
-
-            # Ensure no negative values
-            if holdings[symbol]["quantity"] < 0:
-                holdings[symbol]["quantity"] = Decimal("0")
-            if holdings[symbol]["total_cost"] < 0:
-                holdings[symbol]["total_cost"] = Decimal("0")
-
-    # Recalculate total cost basis from holdings
-    total_cost_basis = sum(holding["total_cost"] for holding in holdings.values())
-
-    # Get current prices for non-zero holdings
-    total_value_eur = Decimal("0")
-    total_value_usd = Decimal("0")
-    holdings_breakdown = {}
-
-    for symbol, holding in holdings.items():
-        if holding["quantity"] <= 0:
-            continue
-
-        # Get current price (for snapshot, we want the price as of snapshot_date)
-        # Try to get the most recent price from price_history table first
-        price_record = db.execute(
-            select(PriceHistory)
-            .where(
-                PriceHistory.ticker == symbol,
-                PriceHistory.date <= snapshot_date
-            )
-            .order_by(PriceHistory.date.desc())
-            .limit(1)
-        ).scalar_one_or_none()
+def _eur_usd_rates(db, snapshot_dates: Sequence[date]) -> Dict[date, Optional[Decimal]]:
+    """
+    Return the EUR/USD rate as of each date.
+
+    Rates come from the stored FX history; without it, one live rate is
+    fetched and used for every date.
+    """
+    if not snapshot_dates:
+        return {}
+
+    try:
+        series = fx_history.series(db, "EUR", "USD", start_date=min(snapshot_dates))
+    except Exception:
+        logger.exception("Failed to load EUR/USD history")
+        series = None
 
-        if price_record:
-            price_eur = Decimal(str(price_record.close))
-            # Derive USD via dynamic FX if available
+    if series is not None:
+        rates = series.rates_on(snapshot_dates).tolist()
+        return {snapshot_date: Decimal(str(rate)) for snapshot_date, rate in zip(snapshot_dates, rates)}
+
+    try:
+        eur_usd = PriceFetcher.fetch_fx_rate_sync("EUR", "USD")  # EURUSD=X
+    except Exception:
+        logger.exception("FX conversion failed; skipping USD conversion")
+        eur_usd = None
+    if not eur_usd or eur_usd <= 0:
+        logger.warning("EUR/USD FX unavailable; skipping USD conversion")
+        eur_usd = None
+    return {snapshot_date: eur_usd for snapshot_date in snapshot_dates}
+
+
+def _realtime_prices(price_fetcher: PriceFetcher) -> Callable[[str], Optional[Tuple[Decimal, Decimal]]]:
+    """
+    Return a memoized fn(symbol) -> (price_eur, price_usd) from realtime quotes.
+
+    Used for holdings without a stored close; each symbol and the USD/EUR rate
+    are fetched at most once.
+    """
+    quotes: Dict[str, Optional[Tuple[Decimal, Decimal]]] = {}
+    usd_eur: List[Optional[Decimal]] = []
+
+    def lookup(symbol: str) -> Optional[Tuple[Decimal, Decimal]]:
+        if symbol in quotes:
+            return quotes[symbol]
+
+        quotes[symbol] = None
+        # Try to get current price from Yahoo Finance
+        price_data = price_fetcher.fetch_realtime_price(f"{symbol}-USD")
+        if not price_data or not price_data.get("current_price"):
+            return None
+
+        if not usd_eur:
             try:
-                fx = PriceFetcher()
-                import asyncio
-                eur_usd = asyncio.run(fx.fetch_fx_rate("EUR", "USD"))  # EURUSD=X
-                if eur_usd and eur_usd > 0:
-                    price_usd = price_eur * eur_usd
-                else:
-                    logger.warning("EUR/USD FX unavailable; skipping USD conversion")
-                    price_usd = None
+                usd_eur.append(price_fetcher.fetch_fx_rate_sync("USD", "EUR"))  # USDEUR=X
             except Exception:
-                logger.exception("FX conversion failed; skipping USD conversion")
-                price_usd = None
-        else:
-            # Try to get current price from Yahoo Finance
-            price_fetcher = PriceFetcher()
-            yahoo_symbol = f"{symbol}-USD"
-            price_data = price_fetcher.fetch_realtime_price(yahoo_symbol)
-            if price_data and price_data.get("current_price"):
-                price_usd = price_data["current_price"]
-                # Convert with dynamic FX
-                try:
-                    import asyncio
-                    usd_eur = asyncio.run(price_fetcher.fetch_fx_rate("USD", "EUR"))  # USDEUR=X
-                    if usd_eur and usd_eur > 0:
-                        price_eur = price_usd * usd_eur
-                    else:
-                        logger.warning("USD/EUR FX unavailable; skipping holding")
-                        continue
-                except Exception:
-                    logger.exception("FX conversion failed; skipping holding")
-                    continue
-            else:
-                # No fallback - skip this holding if no price data available
-                logger.warning(f"Could not get price for {symbol} on {snapshot_date}. Skipping holding from snapshot.")
-                continue
+                logger.exception("FX conversion failed; skipping holding")
+                usd_eur.append(None)
+        if not usd_eur[0] or usd_eur[0] <= 0:
+            logger.warning("USD/EUR FX unavailable; skipping holding")
+            return None
 
-        value_eur = holding["quantity"] * price_eur
-        value_usd = holding["quantity"] * price_usd if price_usd is not None else Decimal("0")
+        price_usd = price_data["current_price"]
+        quotes[symbol] = (price_usd * usd_eur[0], price_usd)
+        return quotes[symbol]
 
-        total_value_eur += value_eur
-        total_value_usd += value_usd
-        holdings_breakdown[symbol] = {
-            "quantity": float(holding["quantity"]),
-            "value_eur": float(value_eur),
-            "value_usd": float(value_usd),
-            "percentage": 0  # Will be calculated below
-        }
+    return lookup
+
+
+def backfill_crypto_snapshot_range(db, portfolio: CryptoPortfolio, start: date, end: date) -> Tuple[int, int]:
+    """
+    Create the portfolio's missing snapshots in [start, end] and commit.
+
+    Missing dates come from one set-based query, holdings from one sweep over
+    the portfolio's transactions, prices from one as-of query and EUR/USD
+    rates from the stored FX history (one rate per date); the snapshots are
+    then bulk-inserted.
+
+    Args:
+        db: Synchronous database session
+        portfolio: Crypto portfolio to backfill
+        start: First date (inclusive)
+        end: Last date (inclusive)
 
-    # Calculate percentages
-    if total_value_eur > 0:
-        for symbol, holding in holdings_breakdown.items():
-            holding["percentage"] = float((Decimal(str(holding["value_eur"])) / total_value_eur) * 100)
+    Returns:
+        Tuple of (snapshots created, dates skipped because a snapshot existed)
+    """
+    total_days = (end - start).days + 1
+    missing_dates = _missing_snapshot_dates(db, portfolio.id, start, end)
+    if not missing_dates:
+        return 0, total_days
+
+    transactions = _load_crypto_transactions(db, portfolio.id, missing_dates[-1])
+    prices = AsOfPriceService.load(
+        db, {txn.symbol for txn in transactions}, missing_dates[0], missing_dates[-1]
+    )
+    rows = [
+        dict(snapshot_data, portfolio_id=portfolio.id)
+        for snapshot_data in replay_crypto_snapshots(
+            transactions,
+            missing_dates,
+            prices,
+            _eur_usd_rates(db, missing_dates),
+            portfolio.base_currency.value,
+            _realtime_prices(PriceFetcher())
+        )
+    ]
 
-    # Calculate total return percentage
-    total_return_pct = ((total_value_eur / total_cost_basis) - 1) * 100 if total_cost_basis > 0 else 0
+    created = write_crypto_snapshots(db, rows)
+    db.commit()
+    if created:
+        CacheGenerations.bump(SNAPSHOTS)
 
-    return {
-        "total_value_eur": total_value_eur,
-        "total_value_usd": total_value_usd,
-        "total_cost_basis": total_cost_basis,
-        "base_currency": portfolio.base_currency.value,
-        "holdings_breakdown": json.dumps(holdings_breakdown),
-        "total_return_pct": Decimal(str(total_return_pct))
-    }
+    return created, total_days - created
 
 
 @shared_task(
@@ -501,7 +725,8 @@ def backfill_crypto_portfolio_snapshots(self, portfolio_id: int):
     Backfill daily crypto portfolio snapshots from first transaction date to today.
 
     Automatically finds the earliest transaction date for the portfolio and creates
-    missing CryptoPortfolioSnapshot records for each date from then to today.
+    missing CryptoPortfolioSnapshot records for each date from then to today
+    (see backfill_crypto_snapshot_range).
     Handles the case where portfolio has no transactions by creating only today's snapshot.
 
     Parameters:
@@ -517,7 +742,7 @@ def backfill_crypto_portfolio_snapshots(self, portfolio_id: int):
             - backfill_end_date: ISO string of backfill end date
             - created: number of snapshots created
             - skipped: number of dates that already had snapshots
-            - failed: number of dates that could not be processed
+            - failed: always 0 (kept for compatibility)
             - total_days_processed: total number of days processed (inclusive)
     """
     logger.info(f"Starting automatic crypto portfolio snapshot backfill for portfolio {portfolio_id}")
@@ -544,166 +769,41 @@ def backfill_crypto_portfolio_snapshots(self, portfolio_id: int):
             .where(CryptoTransaction.portfolio_id == portfolio_id)
         ).scalar()
 
+        backfill_end_date = date.today()
+
         # If no transactions, just create today's snapshot
         if min_date_result is None:
             logger.info(f"No transactions found for portfolio {portfolio_id}. Creating snapshot for today only.")
-
-            today = date.today()
-            snapshot_data = calculate_crypto_snapshot_data(db, portfolio_id, today)
-
-            if snapshot_data:
-                # Check if snapshot already exists
-                existing = db.execute(
-                    select(CryptoPortfolioSnapshot)
-                    .where(
-                        CryptoPortfolioSnapshot.portfolio_id == portfolio_id,
-                        CryptoPortfolioSnapshot.snapshot_date == today
-                    )
-                ).scalar_one_or_none()
-
-                if not existing:
-                    snapshot = CryptoPortfolioSnapshot(
-                        portfolio_id=portfolio_id,
-                        snapshot_date=today,
-                        total_value_eur=snapshot_data["total_value_eur"],
-                        total_value_usd=snapshot_data["total_value_usd"],
-                        total_cost_basis=snapshot_data["total_cost_basis"],
-                        base_currency=snapshot_data["base_currency"],
-                        holdings_breakdown=snapshot_data["holdings_breakdown"],
-                        total_return_pct=snapshot_data["total_return_pct"]
-                    )
-                    db.add(snapshot)
-                    db.commit()
-                    logger.info(f"Created snapshot for portfolio {portfolio.name} on {today}")
-
-                    return {
-                        "status": "success",
-                        "portfolio_id": portfolio_id,
-                        "portfolio_name": portfolio.name,
-                        "first_transaction_date": None,
-                        "backfill_start_date": str(today),
-                        "backfill_end_date": str(today),
-                        "created": 1,
-                        "skipped": 0,
-                        "failed": 0,
-                        "total_days_processed": 1
-                    }
-                else:
-                    logger.info(f"Snapshot already exists for portfolio {portfolio_id} on {today}")
-                    return {
-                        "status": "success",
-                        "portfolio_id": portfolio_id,
-                        "portfolio_name": portfolio.name,
-                        "first_transaction_date": None,
-                        "backfill_start_date": str(today),
-                        "backfill_end_date": str(today),
-                        "created": 0,
-                        "skipped": 1,
-                        "failed": 0,
-                        "total_days_processed": 1
-                    }
-            else:
-                logger.warning(f"Could not calculate snapshot data for portfolio {portfolio_id}")
-                return {
-                    "status": "failed",
-                    "portfolio_id": portfolio_id,
-                    "portfolio_name": portfolio.name,
-                    "reason": "Could not calculate snapshot data"
-                }
-
-        # Convert datetime to date
-        first_transaction_date = min_date_result.date() if isinstance(min_date_result, datetime) else min_date_result
-        backfill_end_date = date.today()
+            first_transaction_date = None
+            backfill_start_date = backfill_end_date
+        else:
+            # Convert datetime to date
+            first_transaction_date = min_date_result.date() if isinstance(min_date_result, datetime) else min_date_result
+            backfill_start_date = first_transaction_date
 
         logger.info(
-            f"Backfilling crypto snapshots for {portfolio.name} from {first_transaction_date} to {backfill_end_date}"
+            f"Backfilling crypto snapshots for {portfolio.name} from {backfill_start_date} to {backfill_end_date}"
         )
 
-        # Create snapshots for each day from first transaction to today
-        current_date = first_transaction_date
-        created = 0
-        skipped = 0
-        failed = 0
-
-        while current_date <= backfill_end_date:
-            try:
-                # Check if snapshot already exists
-                existing = db.execute(
-                    select(CryptoPortfolioSnapshot)
-                    .where(
-                        CryptoPortfolioSnapshot.portfolio_id == portfolio_id,
-                        CryptoPortfolioSnapshot.snapshot_date == current_date
-                    )
-                ).scalar_one_or_none()
-
-                if existing:
-                    skipped += 1
-                else:
-                    # Calculate snapshot data for this date
-                    snapshot_data = calculate_crypto_snapshot_data(db, portfolio_id, current_date)
-
-                    if snapshot_data:
-                        try:
-                            snapshot = CryptoPortfolioSnapshot(
-                                portfolio_id=portfolio_id,
-                                snapshot_date=current_date,
-                                total_value_eur=snapshot_data["total_value_eur"],
-                                total_value_usd=snapshot_data["total_value_usd"],
-                                total_cost_basis=snapshot_data["total_cost_basis"],
-                                base_currency=snapshot_data["base_currency"],
-                                holdings_breakdown=snapshot_data["holdings_breakdown"],
-                                total_return_pct=snapshot_data["total_return_pct"]
-                            )
-
-                            db.add(snapshot)
-                            created += 1
-                        except IntegrityError:
-                            # Race condition - another process created this snapshot
-                            db.rollback()
-                            logger.debug(f"Snapshot already exists for {portfolio.name} on {current_date} (race condition)")
-                            skipped += 1
-                    else:
-                        failed += 1
-
-                # Commit every 10 snapshots to avoid large transactions
-                if (created + skipped + failed) % 10 == 0:
-                    try:
-                        db.commit()
-                    except IntegrityError:
-                        db.rollback()
-
-                current_date += timedelta(days=1)
-
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Error creating crypto snapshot for {current_date}: {str(e)}")
-                failed += 1
-                current_date += timedelta(days=1)
-                continue
-
-        # Final commit
-        try:
-            db.commit()
-        except IntegrityError:
-            db.rollback()
+        created, skipped = backfill_crypto_snapshot_range(db, portfolio, backfill_start_date, backfill_end_date)
 
-        total_days = (backfill_end_date - first_transaction_date).days + 1
+        total_days = (backfill_end_date - backfill_start_date).days + 1
         summary = {
             "status": "success",
             "portfolio_id": portfolio_id,
             "portfolio_name": portfolio.name,
-            "first_transaction_date": str(first_transaction_date),
-            "backfill_start_date": str(first_transaction_date),
+            "first_transaction_date": str(first_transaction_date) if first_transaction_date else None,
+            "backfill_start_date": str(backfill_start_date),
             "backfill_end_date": str(backfill_end_date),
             "created": created,
             "skipped": skipped,
-            "failed": failed,
+            "failed": 0,
             "total_days_processed": total_days
         }
 
         logger.info(
             f"Crypto portfolio snapshot backfill complete for {portfolio.name}: "
-            f"{created} created, {skipped} skipped, {failed} failed out of {total_days} days"
+            f"{created} created, {skipped} skipped out of {total_days} days"
         )
 
         return summary
@@ -726,7 +826,7 @@ def backfill_crypto_snapshots(self, portfolio_id: int, start_date: str, end_date
     """
     Backfill daily crypto portfolio snapshots for each date in a given range.
 
-    Creates missing CryptoPortfolioSnapshot records (or counts existing ones) for the portfolio between start_date and end_date inclusive, committing in batches to limit transaction size.
+    Creates missing CryptoPortfolioSnapshot records (or counts existing ones) for the portfolio between start_date and end_date inclusive, valuing all missing dates in one sweep and bulk-inserting them (see backfill_crypto_snapshot_range).
 
     Parameters:
         portfolio_id (int): ID of the crypto portfolio to backfill.
@@ -742,7 +842,7 @@ def backfill_crypto_snapshots(self, portfolio_id: int, start_date: str, end_date
             - end_date: ISO string of the end date
             - created: number of snapshots created
             - updated: number of dates skipped because a snapshot already existed
-            - failed: number of dates that could not be processed
+            - failed: always 0 (kept for compatibility)
             - total_days: total number of days processed (inclusive)
     """
     logger.info(f"Starting crypto snapshot backfill for portfolio {portfolio_id}")
@@ -765,61 +865,7 @@ def backfill_crypto_snapshots(self, portfolio_id: int, start_date: str, end_date
 
         logger.info(f"Backfilling crypto snapshots for {portfolio.name} from {start} to {end}")
 
-        # Create snapshots for each day
-        current_date = start
-        created = 0
-        updated = 0
-        failed = 0
-
-        while current_date <= end:
-            try:
-                # Check if snapshot already exists
-                existing = db.execute(
-                    select(CryptoPortfolioSnapshot)
-                    .where(
-                        CryptoPortfolioSnapshot.portfolio_id == portfolio_id,
-                        CryptoPortfolioSnapshot.snapshot_date == current_date
-                    )
-                ).scalar_one_or_none()
-
-                if existing:
-                    updated += 1
-                else:
-                    # Calculate snapshot data
-                    snapshot_data = calculate_crypto_snapshot_data(db, portfolio_id, current_date)
-
-                    if snapshot_data:
-                        snapshot = CryptoPortfolioSnapshot(
-                            portfolio_id=portfolio_id,
-                            snapshot_date=current_date,
-                            total_value_eur=snapshot_data["total_value_eur"],
-                            total_value_usd=snapshot_data["total_value_usd"],
-                            total_cost_basis=snapshot_data["total_cost_basis"],
-                            base_currency=snapshot_data["base_currency"],
-                            holdings_breakdown=snapshot_data["holdings_breakdown"],
-                            total_return_pct=snapshot_data["total_return_pct"]
-                        )
-
-                        db.add(snapshot)
-                        created += 1
-                    else:
-                        failed += 1
-
-                # Commit every 10 snapshots to avoid large transactions
-                if (created + updated + failed) % 10 == 0:
-                    db.commit()
-
-                current_date += timedelta(days=1)
-
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Error creating crypto snapshot for {current_date}: {str(e)}")
-                failed += 1
-                current_date += timedelta(days=1)
-                continue
-
-        # Final commit
-        db.commit()
+        created, existing = backfill_crypto_snapshot_range(db, portfolio, start, end)
 
         summary = {
             "status": "success",
@@ -828,14 +874,14 @@ def backfill_crypto_snapshots(self, portfolio_id: int, start_date: str, end_date
             "start_date": str(start),
             "end_date": str(end),
             "created": created,
-            "updated": updated,
-            "failed": failed,
+            "updated": existing,
+            "failed": 0,
             "total_days": (end - start).days + 1
         }
 
         logger.info(
             f"Crypto snapshot backfill complete for {portfolio.name}: "
-            f"{created} created, {updated} updated, {failed} failed"
+            f"{created} created, {existing} already existed"
         )
 
         return summary
@@ -6,12 +6,19 @@ Calculates and caches IRR, TWR, and other portfolio metrics.
 from celery import shared_task
 from datetime import datetime, timedelta, date
 from decimal import Decimal
-from sqlalchemy import select, update, delete
+from typing import Dict, List, Optional
+from sqlalchemy import select, delete, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import logging
+import time
 
 from app.database import SyncSessionLocal
-from app.models import Position, Transaction, PriceHistory, CachedMetrics, TransactionType
+from app.models import Position, Transaction, CachedMetrics, TransactionType
+from app.services.asof_prices import AsOfPriceGrid
 from app.services.calculations import FinancialCalculations
+from app.services.cache_generations import CacheGenerations, METRICS
+from app.services.latest_prices import LatestPriceService
+from app.services.metrics_dirty_tracker import MetricsDirtyTracker, SCOPE_POSITION
 from app.services.price_fetcher import PriceFetcher
 
 logger = logging.getLogger(__name__)
@@ -29,15 +36,37 @@ def calculate_all_metrics(self):
     """
     Calculate and cache IRR and other metrics for all active positions.
 
+    Runs as a set-based pipeline with a fixed number of round trips regardless
+    of the number of positions:
+    1. load active positions, their cached metrics and the dirty marks
+    2. load the transactions of dirty positions only, in one query grouped by ISIN
+    3. load latest prices for every ticker in one query
+    4. compute position metrics in memory and solve all IRRs in one batch
+    5. bulk upsert position and portfolio metrics (INSERT ... ON CONFLICT)
+    6. delete expired metrics and consumed dirty marks, then commit once
+
+    Positions marked by MetricsDirtyTracker, or without cached inputs, are
+    recomputed from their transactions. All others are refreshed mark-to-market:
+    their cached cash flows and invested amount are revalued at the latest price,
+    so the nightly cost grows with the day's activity, not the number of positions.
+
     This task is idempotent - it will update existing metrics or create new ones.
     Scheduled to run daily at 23:15 CET (after price updates).
 
     Returns:
-        dict: Summary of metrics calculated
+        dict: Summary of metrics calculated, including per-stage timings in ms
     """
     logger.info("Starting metric calculation task")
 
     db = SyncSessionLocal()
+    timings = {}
+    stage_start = time.perf_counter()
+
+    def finish_stage(name: str) -> None:
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[name] = round((now - stage_start) * 1000, 2)
+        stage_start = now
 
     try:
         # Get all active positions (quantity > 0)
@@ -47,6 +76,7 @@ def calculate_all_metrics(self):
             .order_by(Position.current_ticker)
         )
         active_positions = result.scalars().all()
+        finish_stage("load_positions")
 
         if not active_positions:
             logger.info("No active positions found. Skipping metric calculation.")
@@ -59,126 +89,147 @@ def calculate_all_metrics(self):
 
         logger.info(f"Calculating metrics for {len(active_positions)} positions")
 
+        # Marks read now are cleared at commit; later marks survive for the next run
+        run_started = datetime.utcnow()
+        dirty_keys = MetricsDirtyTracker.pending(db, SCOPE_POSITION)
+        cached_values = _load_cached_position_metrics(
+            db, [position.current_ticker for position in active_positions]
+        )
+
+        # Reuse cached inputs for clean positions, queue the rest for a full recompute
+        inputs_by_ticker = {}
+        stale_positions = []
+        for position in active_positions:
+            inputs = None
+            if _dirty_key(position) not in dirty_keys:
+                inputs = _inputs_from_cache(cached_values.get(position.current_ticker))
+            if inputs is None:
+                stale_positions.append(position)
+            else:
+                inputs_by_ticker[position.current_ticker] = inputs
+        refreshed = len(inputs_by_ticker)
+        finish_stage("load_cached")
+
+        # Transactions of the positions to recompute in one query (grouped by ISIN, not ticker!)
+        transactions_by_key = _load_position_transactions(db, stale_positions)
+        for position in stale_positions:
+            inputs_by_ticker[position.current_ticker] = _position_inputs(
+                transactions_by_key.get(_dirty_key(position), [])
+            )
+        finish_stage("load_transactions")
+
+        # Resolve latest prices for every position in one query
+        prices = LatestPriceService.load(db, [position.current_ticker for position in active_positions])
+        finish_stage("load_prices")
+
         # Track results
-        calculated = 0
         failed = 0
         failed_tickers = []
 
-        # Calculate expiry (24 hours from now)
-        expires_at = datetime.utcnow() + timedelta(hours=24)
-
+        # Compute metrics and cash flows for every position in memory
+        pending = []
         for position in active_positions:
             ticker = position.current_ticker  # Use current_ticker
 
             try:
-                # Calculate position metrics
-                metrics = calculate_position_metrics(db, ticker)
-
-                if not metrics:
-                    logger.warning(f"Could not calculate metrics for {ticker}")
-                    failed += 1
-                    failed_tickers.append(ticker)
-                    continue
-
-                # Upsert cached metrics
-                # First try to update existing record
-                stmt = (
-                    update(CachedMetrics)
-                    .where(
-                        CachedMetrics.metric_type == "position_metrics",
-                        CachedMetrics.metric_key == ticker
-                    )
-                    .values(
-                        metric_value=metrics,
-                        calculated_at=datetime.utcnow(),
-                        expires_at=expires_at
-                    )
-                )
-
-                result = db.execute(stmt)
-                db.commit()
-
-                if result.rowcount == 0:
-                    # No existing record, insert new one
-                    cached_metric = CachedMetrics(
-                        metric_type="position_metrics",
-                        metric_key=ticker,
-                        metric_value=metrics,
-                        calculated_at=datetime.utcnow(),
-                        expires_at=expires_at
-                    )
-                    db.add(cached_metric)
-                    db.commit()
-
-                logger.info(f"Calculated metrics for {ticker}: IRR={metrics.get('irr')}")
-                calculated += 1
-
+                built = _metrics_from_inputs(position, inputs_by_ticker[ticker], prices)
             except Exception as e:
-                db.rollback()
                 logger.error(f"Error calculating metrics for {ticker}: {str(e)}")
+                built = None
+
+            if not built:
+                logger.warning(f"Could not calculate metrics for {ticker}")
                 failed += 1
                 failed_tickers.append(ticker)
+                continue
 
-        # Calculate portfolio-level metrics
-        try:
-            portfolio_metrics = calculate_portfolio_metrics(db)
-
-            if portfolio_metrics:
-                # Upsert portfolio metrics
-                stmt = (
-                    update(CachedMetrics)
-                    .where(
-                        CachedMetrics.metric_type == "portfolio_metrics",
-                        CachedMetrics.metric_key == "global"
-                    )
-                    .values(
-                        metric_value=portfolio_metrics,
-                        calculated_at=datetime.utcnow(),
-                        expires_at=expires_at
-                    )
-                )
+            pending.append((ticker, *built))
 
-                result = db.execute(stmt)
-                db.commit()
-
-                if result.rowcount == 0:
-                    cached_metric = CachedMetrics(
-                        metric_type="portfolio_metrics",
-                        metric_key="global",
-                        metric_value=portfolio_metrics,
-                        calculated_at=datetime.utcnow(),
-                        expires_at=expires_at
-                    )
-                    db.add(cached_metric)
-                    db.commit()
+        irrs = FinancialCalculations.calculate_irr_batch(
+            [(cash_flows, current_value) for _, _, cash_flows, current_value in pending],
+            current_date=date.today()
+        )
 
-                logger.info(f"Calculated portfolio metrics: {portfolio_metrics}")
+        position_metrics = {}
+        for (ticker, metrics, _, _), irr in zip(pending, irrs):
+            metrics["irr"] = irr
+            position_metrics[ticker] = metrics
 
+        portfolio_metrics = None
+        try:
+            portfolio_metrics = calculate_portfolio_metrics(db, prices, active_positions)
         except Exception as e:
-            db.rollback()
             logger.error(f"Error calculating portfolio metrics: {str(e)}")
+        finish_stage("compute")
+
+        # Write everything with one bulk upsert
+        calculated_at = datetime.utcnow()
+        expires_at = calculated_at + timedelta(hours=24)
+        rows = [
+            {
+                "metric_type": "position_metrics",
+                "metric_key": ticker,
+                "metric_value": metrics,
+                "calculated_at": calculated_at,
+                "expires_at": expires_at,
+            }
+            for ticker, metrics in position_metrics.items()
+        ]
+        if portfolio_metrics:
+            rows.append({
+                "metric_type": "portfolio_metrics",
+                "metric_key": "global",
+                "metric_value": portfolio_metrics,
+                "calculated_at": calculated_at,
+                "expires_at": expires_at,
+            })
+
+        if rows:
+            stmt = pg_insert(CachedMetrics).values(rows)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["metric_type", "metric_key"],
+                    set_={
+                        "metric_value": stmt.excluded.metric_value,
+                        "calculated_at": stmt.excluded.calculated_at,
+                        "expires_at": stmt.excluded.expires_at,
+                    }
+                )
+            )
+        finish_stage("upsert")
 
         # Clean up expired metrics
-        try:
-            stmt = delete(CachedMetrics).where(
-                CachedMetrics.expires_at < datetime.utcnow()
-            )
-            result = db.execute(stmt)
-            db.commit()
+        result = db.execute(
+            delete(CachedMetrics).where(CachedMetrics.expires_at < datetime.utcnow())
+        )
+
+        # Failed positions stay dirty; marks of positions closed since are dropped
+        failed_keys = {
+            _dirty_key(position) for position in active_positions
+            if position.current_ticker in failed_tickers
+        }
+        MetricsDirtyTracker.clear(db, SCOPE_POSITION, dirty_keys - failed_keys, run_started)
+        db.commit()
+        CacheGenerations.bump(METRICS)
+        finish_stage("cleanup")
 
-            if result.rowcount > 0:
-                logger.info(f"Cleaned up {result.rowcount} expired metrics")
+        if result.rowcount > 0:
+            logger.info(f"Cleaned up {result.rowcount} expired metrics")
 
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error cleaning up expired metrics: {str(e)}")
+        if portfolio_metrics:
+            logger.info(f"Calculated portfolio metrics: {portfolio_metrics}")
+
+        calculated = len(position_metrics)
 
         # Summary
         summary = {
             "status": "success",
             "calculated": calculated,
             "failed": failed,
-            "total_positions": len(active_positions)
+            "total_positions": len(active_positions),
+            "recomputed": len(stale_positions),
+            "refreshed": refreshed,
+            "timings_ms": timings
         }
 
         if failed_tickers:
@@ -186,12 +237,14 @@ def calculate_all_metrics(self):
 
         logger.info(
             f"Metric calculation complete: {calculated} calculated, {failed} failed "
-            f"out of {len(active_positions)} positions"
+            f"out of {len(active_positions)} positions ({len(stale_positions)} recomputed, "
+            f"{refreshed} refreshed; timings ms: {timings})"
         )
 
         return summary
 
     except Exception as e:
+        db.rollback()
         logger.error(f"Fatal error in metric calculation task: {str(e)}")
         raise
 
@@ -199,13 +252,80 @@ def calculate_all_metrics(self):
         db.close()
 
 
-def calculate_position_metrics(db, ticker: str) -> dict:
+def _load_position_transactions(db, positions: List[Position]) -> Dict[str, List[Transaction]]:
+    """
+    Load the transactions of many positions in one query.
+
+    Positions with an ISIN match on ISIN (not ticker, which changes); positions
+    without one match the ticker-only transactions of their current ticker.
+
+    Args:
+        db: Database session
+        positions: Positions to load
+
+    Returns:
+        dict: _dirty_key(position) -> transactions ordered by operation_date
+    """
+    isins = sorted({position.isin for position in positions if position.isin})
+    tickers = sorted({position.current_ticker for position in positions if not position.isin})
+    if not isins and not tickers:
+        return {}
+
+    conditions = []
+    if isins:
+        conditions.append(Transaction.isin.in_(isins))
+    if tickers:
+        conditions.append(and_(Transaction.isin.is_(None), Transaction.ticker.in_(tickers)))
+
+    transactions = db.execute(
+        select(Transaction)
+        .where(or_(*conditions))
+        .order_by(Transaction.operation_date)
+    ).scalars().all()
+
+    transactions_by_key: Dict[str, List[Transaction]] = {}
+    for txn in transactions:
+        transactions_by_key.setdefault(txn.isin or txn.ticker, []).append(txn)
+    return transactions_by_key
+
+
+def _load_cached_position_metrics(db, tickers: List[str]) -> Dict[str, dict]:
+    """
+    Load cached position metric values of many tickers in one query.
+
+    Args:
+        db: Database session
+        tickers: Position current tickers
+
+    Returns:
+        dict: ticker -> metric_value
+    """
+    if not tickers:
+        return {}
+
+    rows = db.execute(
+        select(CachedMetrics.metric_key, CachedMetrics.metric_value)
+        .where(
+            CachedMetrics.metric_type == "position_metrics",
+            CachedMetrics.metric_key.in_(tickers)
+        )
+    ).all()
+    return {ticker: value for ticker, value in rows}
+
+
+def _dirty_key(position: Position) -> str:
+    """Return the MetricsDirtyTracker key of a position (ISIN, or ticker without ISIN)."""
+    return position.isin or position.current_ticker
+
+
+def calculate_position_metrics(db, ticker: str, prices: Optional[AsOfPriceGrid] = None) -> dict:
     """
     Calculate all metrics for a single position.
 
     Args:
         db: Database session
         ticker: Ticker symbol (current_ticker)
+        prices: Preloaded latest prices; loaded for this ticker if None
 
     Returns:
         dict: Metrics including IRR, TWR, total_invested, current_value, etc.
@@ -218,39 +338,60 @@ def calculate_position_metrics(db, ticker: str) -> dict:
     if not position or position.quantity <= 0:
         return None
 
-    # Get all transactions for this ISIN (not ticker!)
-    transactions = db.execute(
-        select(Transaction)
-        .where(Transaction.isin == position.isin)
-        .order_by(Transaction.operation_date)
-    ).scalars().all()
+    # Get all transactions for this ISIN (not ticker!), or for the ticker without one
+    transactions = _load_position_transactions(db, [position])
 
-    if not transactions:
+    if prices is None:
+        prices = LatestPriceService.load(db, [ticker])
+
+    built = _position_metrics(position, transactions.get(_dirty_key(position), []), prices)
+    if not built:
         return None
 
-    # Get latest price
-    latest_price_record = db.execute(
-        select(PriceHistory)
-        .where(PriceHistory.ticker == ticker)
-        .order_by(PriceHistory.date.desc())
-        .limit(1)
-    ).scalar_one_or_none()
+    metrics, cash_flows, current_value = built
 
-    if not latest_price_record:
-        # Try fetching from API
-        price_fetcher = PriceFetcher()
-        price_data = price_fetcher.fetch_latest_price(ticker, position.isin)
+    # Calculate IRR
+    try:
+        metrics["irr"] = FinancialCalculations.calculate_irr(
+            cash_flows=cash_flows,
+            current_value=current_value,
+            current_date=date.today()
+        )
+    except Exception as e:
+        logger.warning(f"Could not calculate IRR for {ticker}: {str(e)}")
 
-        if price_data and price_data.get("close"):
-            current_price = Decimal(str(price_data["close"]))
-        else:
-            logger.warning(f"No price available for {ticker}")
-            return None
-    else:
-        current_price = latest_price_record.close
+    return metrics
 
-    # Calculate current value
-    current_value = position.quantity * current_price
+
+def _position_metrics(position: Position, transactions: List[Transaction], prices: AsOfPriceGrid):
+    """
+    Calculate every position metric except IRR from preloaded data.
+
+    Args:
+        position: Active position
+        transactions: The position's transactions ordered by operation_date
+        prices: Latest prices (must include position.current_ticker)
+
+    Returns:
+        (metrics, cash_flows, current_value) with metrics["irr"] set to None,
+        or None if the position cannot be valued
+    """
+    return _metrics_from_inputs(position, _position_inputs(transactions), prices)
+
+
+def _position_inputs(transactions: List[Transaction]) -> Optional[dict]:
+    """
+    Derive the price-independent metric inputs of a position from its transactions.
+
+    Args:
+        transactions: The position's transactions ordered by operation_date
+
+    Returns:
+        dict with cash_flows [(date, amount)], total_invested and first_purchase_date,
+        or None if there are no BUY/SELL cash flows
+    """
+    if not transactions:
+        return None
 
     # Build cash flows for IRR calculation
     cash_flows = []
@@ -274,19 +415,89 @@ def calculate_position_metrics(db, ticker: str) -> dict:
     if not cash_flows:
         return None
 
-    # Calculate IRR
+    return {
+        "cash_flows": cash_flows,
+        "total_invested": total_invested,
+        "first_purchase_date": transactions[0].operation_date,
+    }
+
+
+def _inputs_to_cache(inputs: dict) -> dict:
+    """Serialize position inputs for storage in CachedMetrics.metric_value (JSON)."""
+    return {
+        "cash_flows": [[str(flow_date), str(amount)] for flow_date, amount in inputs["cash_flows"]],
+        "total_invested": str(inputs["total_invested"]),
+        "first_purchase_date": str(inputs["first_purchase_date"]),
+    }
+
+
+def _inputs_from_cache(metric_value: Optional[dict]) -> Optional[dict]:
+    """
+    Restore position inputs stored by _inputs_to_cache().
+
+    Returns:
+        Inputs dict, or None if the cached value has no (valid) inputs
+    """
+    cached = (metric_value or {}).get("inputs")
+    if not cached:
+        return None
+
     try:
-        irr = FinancialCalculations.calculate_irr(
-            cash_flows=cash_flows,
-            current_value=current_value,
-            current_date=date.today()
-        )
-    except Exception as e:
-        logger.warning(f"Could not calculate IRR for {ticker}: {str(e)}")
-        irr = None
+        return {
+            "cash_flows": [
+                (date.fromisoformat(flow_date), Decimal(amount))
+                for flow_date, amount in cached["cash_flows"]
+            ],
+            "total_invested": Decimal(cached["total_invested"]),
+            "first_purchase_date": date.fromisoformat(cached["first_purchase_date"]),
+        }
+    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+        logger.warning(f"Ignoring invalid cached metric inputs: {e}")
+        return None
+
+
+def _metrics_from_inputs(position: Position, inputs: Optional[dict], prices: AsOfPriceGrid):
+    """
+    Value a position from its price-independent inputs at the latest price.
+
+    Args:
+        position: Active position
+        inputs: Result of _position_inputs() (None skips the position)
+        prices: Latest prices (must include position.current_ticker)
+
+    Returns:
+        (metrics, cash_flows, current_value) with metrics["irr"] set to None,
+        or None if the position cannot be valued
+    """
+    ticker = position.current_ticker
+
+    if position.quantity <= 0 or not inputs:
+        return None
+
+    # Get latest price
+    latest_price = prices.price(ticker, date.today())
+
+    if latest_price is None:
+        # Try fetching from API
+        price_fetcher = PriceFetcher()
+        price_data = price_fetcher.fetch_latest_price(ticker, position.isin)
+
+        if price_data and price_data.get("close"):
+            current_price = Decimal(str(price_data["close"]))
+        else:
+            logger.warning(f"No price available for {ticker}")
+            return None
+    else:
+        current_price = latest_price
+
+    # Calculate current value
+    current_value = position.quantity * current_price
+
+    cash_flows = inputs["cash_flows"]
+    total_invested = inputs["total_invested"]
 
     # Calculate TWR (simplified - using first and last values)
-    first_date = transactions[0].operation_date
+    first_date = inputs["first_purchase_date"]
     days_held = (date.today() - first_date).days
 
     if days_held > 0 and total_invested > 0:
@@ -318,30 +529,38 @@ def calculate_position_metrics(db, ticker: str) -> dict:
         "total_invested": float(total_invested),
         "unrealized_pnl": float(current_value - total_invested),
         "simple_return": simple_return,
-        "irr": irr,
+        "irr": None,
         "twr": twr,
         "first_purchase_date": str(first_date),
         "days_held": days_held,
-        "calculated_at": datetime.utcnow().isoformat()
+        "calculated_at": datetime.utcnow().isoformat(),
+        "inputs": _inputs_to_cache(inputs)
     }
 
-    return metrics
+    return metrics, cash_flows, current_value
 
 
-def calculate_portfolio_metrics(db) -> dict:
+def calculate_portfolio_metrics(
+    db,
+    prices: Optional[AsOfPriceGrid] = None,
+    positions: Optional[List[Position]] = None
+) -> dict:
     """
     Calculate portfolio-level metrics.
 
     Args:
         db: Database session
+        prices: Preloaded latest prices; loaded for all positions if None
+        positions: Preloaded active positions; queried if None
 
     Returns:
         dict: Portfolio metrics
     """
     # Get all active positions
-    positions = db.execute(
-        select(Position).where(Position.quantity > 0)
-    ).scalars().all()
+    if positions is None:
+        positions = db.execute(
+            select(Position).where(Position.quantity > 0)
+        ).scalars().all()
 
     if not positions:
         return None
@@ -350,28 +569,15 @@ def calculate_portfolio_metrics(db) -> dict:
     total_cost = Decimal("0")
 
     # Batch load latest prices for all positions
-    position_tickers = [position.current_ticker for position in positions]
-    price_result = db.execute(
-        select(PriceHistory)
-        .where(PriceHistory.ticker.in_(position_tickers))
-        .order_by(PriceHistory.ticker, PriceHistory.date.desc())
-    )
-    price_records = price_result.scalars().all()
-
-    # Find latest price for each ticker
-    latest_prices = {}
-    for record in price_records:
-        ticker = record.ticker
-        if ticker not in latest_prices or record.date > latest_prices[ticker].date:
-            latest_prices[ticker] = record
+    if prices is None:
+        prices = LatestPriceService.load(db, [position.current_ticker for position in positions])
+    today = date.today()
 
     # Calculate totals
     for position in positions:
-        # Get latest price for this position from batch-loaded data
-        latest_price_record = latest_prices.get(position.current_ticker)
+        current_price = prices.price(position.current_ticker, today)
 
-        if latest_price_record:
-            current_price = latest_price_record.close
+        if current_price is not None:
             current_value = position.quantity * current_price
             total_value += current_value
             total_cost += position.quantity * position.average_cost
@@ -6,7 +6,6 @@ Maintains comprehensive price history database with optimized fetching.
 from celery import shared_task
 from datetime import date
 import logging
-import time
 
 from app.database import SyncSessionLocal
 from app.services.price_history_manager import price_history_manager
@@ -63,34 +62,26 @@ def update_price_history_daily(self):
         total_skipped = 0
         failed_symbols = []
 
-        for symbol in symbols:
-            try:
-                # Update today's price
-                result = price_history_manager.fetch_and_store_complete_history(
-                    symbol=symbol,
-                    start_date=today,
-                    force_update=True
-                )
-
-                results[symbol] = result
-                total_added += result.get('added', 0)
-                total_updated += result.get('updated', 0)
-                total_skipped += result.get('skipped', 0)
-
-                logger.debug(f"Updated {symbol}: {result}")
-
-                # Rate limiting between symbols
-                time.sleep(0.2)  # 200ms delay
-
-            except Exception as e:
-                logger.exception(f"Failed to update {symbol}: {e}")
-                failed_symbols.append(symbol)
-                results[symbol] = {
-                    'added': 0,
-                    'updated': 0,
-                    'skipped': 0,
-                    'error': str(e)
-                }
+        try:
+            # Update today's price for all symbols with multi-ticker downloads
+            results = price_history_manager.fetch_and_store_history(
+                symbols,
+                start_date=today,
+                force_update=True
+            )
+        except Exception as e:
+            logger.exception(f"Failed to update {len(symbols)} symbols: {e}")
+            failed_symbols = list(symbols)
+            results = {
+                symbol: {'added': 0, 'updated': 0, 'skipped': 0, 'error': str(e)}
+                for symbol in symbols
+            }
+
+        for symbol, result in results.items():
+            total_added += result.get('added', 0)
+            total_updated += result.get('updated', 0)
+            total_skipped += result.get('skipped', 0)
+            logger.debug(f"Updated {symbol}: {result}")
 
         # Update last price update timestamp
         try:
@@ -1,22 +1,58 @@
 """
 Daily price update tasks.
 
-Fetches latest prices from Yahoo Finance for all active positions.
+Fetches latest prices from Yahoo Finance for all active positions. The daily
+update downloads all tickers in multi-ticker requests and stores them with a
+single INSERT ... ON CONFLICT DO NOTHING.
 """
 from celery import shared_task
 from datetime import date, timedelta
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, List
 import logging
-import time
 
 from app.database import SyncSessionLocal
 from app.models import Position, PriceHistory
+from app.services.cache_generations import CacheGenerations, PRICES
+from app.services.latest_prices import LatestPriceService
 from app.services.price_fetcher import PriceFetcher
+from app.services.price_matrix import price_matrix
 from app.services.system_state_manager import SystemStateManager
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT statement (8 bind parameters per row, PostgreSQL allows 65535)
+INSERT_BATCH_SIZE = 5000
+
+
+def insert_price_rows(db: Session, rows: List[Dict]) -> List[str]:
+    """
+    Insert PriceHistory rows, skipping (ticker, date) pairs that already exist.
+
+    Rows are written with INSERT ... ON CONFLICT DO NOTHING, one statement per
+    INSERT_BATCH_SIZE rows. The caller commits.
+
+    Args:
+        db: Database session
+        rows: Dicts with keys ticker, date, open, high, low, close, volume, source
+
+    Returns:
+        Distinct tickers of the rows that were actually inserted
+    """
+    inserted = set()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        result = db.execute(
+            pg_insert(PriceHistory)
+            .values(rows[start:start + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(constraint='uix_ticker_date')
+            .returning(PriceHistory.ticker)
+        )
+        inserted.update(result.scalars().all())
+    return sorted(inserted)
+
 
 @shared_task(
     bind=True,
@@ -68,80 +104,55 @@ def update_daily_prices(self):
         while price_date.weekday() >= 5:
             price_date -= timedelta(days=1)
 
-        # Track results
-        updated = 0
-        skipped = 0
-        failed = 0
-        failed_tickers = []
+        tickers = sorted({position.current_ticker for position in active_positions})
 
-        for position in active_positions:
-            ticker = position.current_ticker  # Use current_ticker
-            isin = position.isin
-
-            try:
-                # Check if price already exists for this date (idempotency)
-                existing = db.execute(
-                    select(PriceHistory)
-                    .where(
-                        PriceHistory.ticker == ticker,
-                        PriceHistory.date == price_date
-                    )
-                ).scalar_one_or_none()
-
-                if existing:
-                    logger.debug(f"Price already exists for {ticker} on {price_date}. Skipping.")
-                    skipped += 1
-                    continue
-
-                # Fetch price for the exact target date
-                # Rate limiting: sleep 0.5s between requests to avoid API throttling
-                time.sleep(0.5)
-
-                hist = price_fetcher.fetch_historical_prices_sync(
-                    ticker=ticker,
-                    isin=isin,
-                    start_date=price_date,
-                    end_date=price_date,
-                )
-                price_data = next((p for p in (hist or []) if p.get("date") == price_date), None)
-
-                if not price_data or not price_data.get("close"):
-                    logger.warning(f"No price data for {ticker} on {price_date} (ISIN: {isin})")
-                    failed += 1
-                    failed_tickers.append(ticker)
-                    continue
-
-                # Create price record
-                price_record = PriceHistory(
-                    ticker=ticker,
-                    date=price_date,
-                    open=price_data["open"],
-                    high=price_data["high"],
-                    low=price_data["low"],
-                    close=price_data["close"],
-                    volume=price_data["volume"],
-                    source=price_data.get("source", "unknown")
-                )
-
-                db.add(price_record)
-                db.commit()
-
-                logger.info(
-                    f"Updated price for {ticker}: {price_data['close']} on {price_date}"
-                )
-                updated += 1
+        # Tickers that already have a price for this date (idempotency)
+        existing = set(db.execute(
+            select(PriceHistory.ticker)
+            .where(
+                PriceHistory.ticker.in_(tickers),
+                PriceHistory.date == price_date
+            )
+        ).scalars().all())
+        if existing:
+            logger.debug(f"Prices already exist for {len(existing)} tickers on {price_date}. Skipping them.")
 
-            except IntegrityError:
-                # Race condition: another process already inserted this price
-                db.rollback()
-                logger.debug(f"Price already exists for {ticker} (race condition)")
-                skipped += 1
+        # Download every missing ticker for the target date in multi-ticker requests
+        to_fetch = {
+            position.current_ticker: position.isin
+            for position in active_positions
+            if position.current_ticker not in existing
+        }
+        history = price_fetcher.fetch_historical_prices_batch_sync(
+            tickers=list(to_fetch.items()),
+            start_date=price_date,
+            end_date=price_date,
+        ) if to_fetch else {}
+
+        rows = [
+            {"ticker": ticker, **price_data}
+            for ticker, prices in history.items()
+            for price_data in prices
+            if price_data["date"] == price_date and price_data["close"]
+        ]
+        fetched_tickers = {row["ticker"] for row in rows}
+        failed_tickers = [ticker for ticker in to_fetch if ticker not in fetched_tickers]
+        for ticker in failed_tickers:
+            logger.warning(f"No price data for {ticker} on {price_date} (ISIN: {to_fetch[ticker]})")
+
+        # Rows inserted by another process in the meantime are skipped by the insert
+        updated_tickers = insert_price_rows(db, rows)
+        if updated_tickers:
+            LatestPriceService.refresh(db, updated_tickers)
+        db.commit()
+        if updated_tickers:
+            price_matrix.invalidate(updated_tickers)
+            CacheGenerations.bump(PRICES)
 
-            except Exception:
-                db.rollback()
-                logger.exception(f"Error fetching price for {ticker}")
-                failed += 1
-                failed_tickers.append(ticker)
+        updated = len(updated_tickers)
+        skipped = len(existing) + len(rows) - updated
+        failed = len(failed_tickers)
+        logger.info(f"Stored prices for {updated} tickers on {price_date}")
 
         # Update last price update timestamp
         try:
@@ -266,7 +277,10 @@ def update_price_for_ticker(self, ticker: str, price_date: str = None):
         )
 
         db.add(price_record)
+        LatestPriceService.refresh(db, [ticker])
         db.commit()
+        price_matrix.invalidate([ticker])
+        CacheGenerations.bump(PRICES)
 
         logger.info(f"Updated price for {ticker}: {price_data['close']}")
 
@@ -401,7 +415,12 @@ def fetch_prices_for_ticker(self, ticker: str, isin: str = None, start_date: str
                 continue
 
         # Commit all changes
+        if prices_added or prices_updated:
+            LatestPriceService.refresh(db, [ticker])
         db.commit()
+        if prices_added or prices_updated:
+            price_matrix.invalidate([ticker])
+            CacheGenerations.bump(PRICES)
 
         summary = {
             "status": "success",
@@ -4,14 +4,19 @@ Daily portfolio snapshot tasks.
 Creates daily snapshots of portfolio value for historical tracking and charts.
 """
 from celery import shared_task
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 import logging
 
 from app.database import SyncSessionLocal
-from app.models import Position, PriceHistory, PortfolioSnapshot, Transaction, TransactionType
+from app.models import Position, PortfolioSnapshot
+from app.services.asof_prices import AsOfPriceGrid, AsOfPriceService
+from app.services.cache_generations import CacheGenerations, SNAPSHOTS
+from app.services.holdings_ledger import HoldingsLedger
 from app.services.price_fetcher import PriceFetcher
 
 logger = logging.getLogger(__name__)
@@ -65,69 +70,11 @@ def create_daily_snapshot(self, snapshot_date: str = None):
                 "total_cost_basis": float(existing.total_cost_basis)
             }
 
-        # CRITICAL: Reconstruct positions from transaction history up to snapshot_date
-        # Query all transactions up to and including the snapshot date
-        transactions_result = db.execute(
-            select(Transaction)
-            .where(Transaction.operation_date <= target_date)
-            .order_by(Transaction.operation_date)
-        )
-        transactions = transactions_result.scalars().all()
-
-        if not transactions:
-            logger.warning(f"No transactions found up to {target_date}. Creating zero-value snapshot.")
-            snapshot = PortfolioSnapshot(
-                snapshot_date=target_date,
-                total_value=Decimal("0"),
-                total_cost_basis=Decimal("0"),
-                currency="EUR"
-            )
-            db.add(snapshot)
-            db.commit()
-
-            return {
-                "status": "success",
-                "snapshot_date": str(target_date),
-                "total_value": 0,
-                "total_cost_basis": 0,
-                "num_positions": 0,
-                "message": "No transactions up to this date"
-            }
+        # Read holdings for the day from the ledger; this only replays the
+        # transactions since the last materialized day
+        holdings = HoldingsLedger.get_holdings_as_of(db, target_date)
 
-        # Reconstruct positions from transactions
-        # Group by ISIN and calculate net quantity and cost basis
-        positions_by_isin = {}
-
-        for txn in transactions:
-            isin = txn.isin
-
-            if isin not in positions_by_isin:
-                positions_by_isin[isin] = {
-                    "isin": isin,
-                    "ticker": txn.ticker,  # Use ticker from transaction (will be updated below)
-                    "description": txn.description,
-                    "quantity": Decimal("0"),
-                    "total_cost": Decimal("0"),  # Total amount invested
-                }
-
-            # Calculate quantity change
-            if txn.transaction_type == TransactionType.BUY:
-                positions_by_isin[isin]["quantity"] += txn.quantity
-                # Cost basis includes amount + fees
-                positions_by_isin[isin]["total_cost"] += abs(txn.amount_eur) + txn.fees
-            else:  # SELL
-                positions_by_isin[isin]["quantity"] -= txn.quantity
-                # Reduce cost basis proportionally when selling
-                # For simplicity in snapshot, we'll track net investment
-                positions_by_isin[isin]["total_cost"] -= abs(txn.amount_eur) - txn.fees
-
-        # Filter out positions with zero or negative quantity
-        historical_positions = {
-            isin: data for isin, data in positions_by_isin.items()
-            if data["quantity"] > 0
-        }
-
-        if not historical_positions:
+        if not holdings:
             logger.warning(f"No active positions for {target_date}. Creating zero-value snapshot.")
             snapshot = PortfolioSnapshot(
                 snapshot_date=target_date,
@@ -137,6 +84,7 @@ def create_daily_snapshot(self, snapshot_date: str = None):
             )
             db.add(snapshot)
             db.commit()
+            CacheGenerations.bump(SNAPSHOTS)
 
             return {
                 "status": "success",
@@ -147,44 +95,31 @@ def create_daily_snapshot(self, snapshot_date: str = None):
                 "message": "No active positions on this date"
             }
 
-        logger.info(f"Reconstructed {len(historical_positions)} positions for {target_date}")
+        logger.info(f"Loaded {len(holdings)} holdings for {target_date}")
 
-        # Now get current_ticker from Position table for price lookups
-        # Map ISIN to current ticker (handles ticker changes/splits)
-        isin_to_current_ticker = {}
-        for isin in historical_positions.keys():
-            position_record = db.execute(
-                select(Position).where(Position.isin == isin)
-            ).scalar_one_or_none()
+        # Map ISIN to current ticker for price lookups (handles ticker changes/splits)
+        isin_to_current_ticker = _load_current_tickers(db, {h.isin for h in holdings})
+        holding_tickers = [
+            _price_ticker(h.isin, h.ticker, isin_to_current_ticker) for h in holdings
+        ]
 
-            if position_record:
-                isin_to_current_ticker[isin] = position_record.current_ticker
-            else:
-                # Fallback to transaction ticker if no Position record
-                isin_to_current_ticker[isin] = historical_positions[isin]["ticker"]
+        # Resolve every holding's as-of price in one query
+        prices = AsOfPriceService.load(db, holding_tickers, target_date)
 
         # Calculate portfolio totals using historical positions and historical prices
         total_value = Decimal("0")
         total_cost_basis = Decimal("0")
         missing_prices = []
 
-        for isin, position_data in historical_positions.items():
-            ticker = isin_to_current_ticker.get(isin, position_data["ticker"])
-            quantity = position_data["quantity"]
-            cost = position_data["total_cost"]
+        for holding, ticker in zip(holdings, holding_tickers):
+            isin = holding.isin
+            quantity = holding.quantity
+            cost = holding.cost_basis
 
             # Get historical price for this date (or closest earlier date)
-            price_record = db.execute(
-                select(PriceHistory)
-                .where(PriceHistory.ticker == ticker)
-                .where(PriceHistory.date <= target_date)
-                .order_by(PriceHistory.date.desc())
-                .limit(1)
-            ).scalar_one_or_none()
-
-            if price_record:
-                historical_price = price_record.close
-            else:
+            historical_price = prices.price(ticker, target_date)
+
+            if historical_price is None:
                 # No historical price available
                 logger.warning(
                     f"No price history for {ticker} (ISIN: {isin}) up to {target_date}. "
@@ -216,6 +151,7 @@ def create_daily_snapshot(self, snapshot_date: str = None):
 
         db.add(snapshot)
         db.commit()
+        CacheGenerations.bump(SNAPSHOTS)
 
         # Calculate return
         if total_cost_basis > 0:
@@ -230,7 +166,7 @@ def create_daily_snapshot(self, snapshot_date: str = None):
             "total_cost_basis": float(total_cost_basis),
             "unrealized_pnl": float(total_value - total_cost_basis),
             "portfolio_return": portfolio_return,
-            "num_positions": len(historical_positions)
+            "num_positions": len(holdings)
         }
 
         if missing_prices:
@@ -273,6 +209,103 @@ def create_daily_snapshot(self, snapshot_date: str = None):
         db.close()
 
 
+# Rows per INSERT statement when bulk-writing backfilled snapshots
+SNAPSHOT_INSERT_BATCH_SIZE = 500
+
+
+def replay_snapshot_totals(
+    holdings_by_date: Dict[date, List[Tuple[Optional[str], str, Decimal, Decimal]]],
+    prices: AsOfPriceGrid,
+    isin_to_current_ticker: Dict[str, str],
+    snapshot_dates: Iterable[date],
+) -> Iterable[dict]:
+    """
+    Value the portfolio on each date from preloaded holdings and prices.
+
+    Produces the same totals as create_daily_snapshot would for each date,
+    resolving as-of prices in memory instead of querying the latest price
+    per holding per day.
+
+    Args:
+        holdings_by_date: Day -> [(isin, ticker, quantity, cost_basis)] open holdings
+        prices: As-of prices covering every holding ticker and date
+        isin_to_current_ticker: ISIN -> current ticker from the Position table
+        snapshot_dates: Dates to value, in ascending order
+
+    Yields:
+        dict with snapshot_date, total_value, total_cost_basis, num_positions
+        and missing_prices (tickers without a price at or before the date)
+    """
+    for snapshot_date in snapshot_dates:
+        holdings = holdings_by_date.get(snapshot_date, [])
+        total_value = Decimal("0")
+        total_cost_basis = Decimal("0")
+        missing_prices = []
+
+        for isin, holding_ticker, quantity, cost_basis in holdings:
+            ticker = _price_ticker(isin, holding_ticker, isin_to_current_ticker)
+            price = prices.price(ticker, snapshot_date)
+
+            if price is None:
+                missing_prices.append(ticker)
+                continue
+
+            total_value += quantity * price
+            total_cost_basis += cost_basis
+
+        yield {
+            "snapshot_date": snapshot_date,
+            "total_value": total_value,
+            "total_cost_basis": total_cost_basis,
+            "num_positions": len(holdings),
+            "missing_prices": missing_prices,
+        }
+
+
+def _price_ticker(isin: Optional[str], ticker: str, isin_to_current_ticker: Dict[str, str]) -> str:
+    """Return the ticker to price a holding with: the position's current ticker when known."""
+    if isin:
+        return isin_to_current_ticker.get(isin, ticker)
+    return ticker
+
+
+def _load_current_tickers(db, isins: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Map ISINs to Position.current_ticker in a single query."""
+    isins = [isin for isin in isins if isin]
+    if not isins:
+        return {}
+
+    rows = db.execute(
+        select(Position.isin, Position.current_ticker).where(Position.isin.in_(isins))
+    ).all()
+    return {isin: ticker for isin, ticker in rows}
+
+
+def _load_backfill_inputs(db, start: date, end: date):
+    """
+    Load everything the backfill sweep needs in three queries.
+
+    Returns:
+        Tuple of (holdings_by_date, isin_to_current_ticker, prices)
+    """
+    holdings_by_date = HoldingsLedger.get_holdings_between(db, start, end)
+
+    isins = set()
+    for holdings in holdings_by_date.values():
+        isins.update(isin for isin, _, _, _ in holdings)
+    isin_to_current_ticker = _load_current_tickers(db, isins)
+
+    # Only load prices for tickers the sweep can ever look up
+    tickers = set()
+    for holdings in holdings_by_date.values():
+        for isin, ticker, _, _ in holdings:
+            tickers.add(_price_ticker(isin, ticker, isin_to_current_ticker))
+
+    prices = AsOfPriceService.load(db, tickers, start, end)
+
+    return holdings_by_date, isin_to_current_ticker, prices
+
+
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
@@ -288,6 +321,11 @@ def backfill_snapshots(self, start_date: str, end_date: str = None):
     This is a utility task for creating historical snapshots.
     Useful for populating historical data after setting up the system.
 
+    Holdings come from the daily holdings ledger and prices from one as-of
+    price query (see replay_snapshot_totals), then all missing snapshots are
+    bulk-inserted.
+    Dates that already have a snapshot are skipped, as in create_daily_snapshot.
+
     Args:
         start_date: Start date string (YYYY-MM-DD)
         end_date: End date string (YYYY-MM-DD). If None, uses today.
@@ -297,49 +335,80 @@ def backfill_snapshots(self, start_date: str, end_date: str = None):
     """
     logger.info(f"Starting snapshot backfill from {start_date} to {end_date or 'today'}")
 
-    from datetime import timedelta
-
     start = date.fromisoformat(start_date)
     end = date.fromisoformat(end_date) if end_date else date.today()
 
     if start > end:
         raise ValueError("start_date must be before end_date")
 
-    created = 0
-    skipped = 0
-    failed = 0
-    current_date = start
-
-    while current_date <= end:
-        try:
-            result = create_daily_snapshot(snapshot_date=str(current_date))
-
-            if result["status"] == "success":
-                created += 1
-            elif result["status"] == "skipped":
-                skipped += 1
+    total_days = (end - start).days + 1
+    db = SyncSessionLocal()
 
-            logger.info(f"Processed snapshot for {current_date}: {result['status']}")
+    try:
+        existing_dates = set(db.execute(
+            select(PortfolioSnapshot.snapshot_date)
+            .where(PortfolioSnapshot.snapshot_date >= start)
+            .where(PortfolioSnapshot.snapshot_date <= end)
+        ).scalars().all())
+
+        holdings_by_date, isin_to_current_ticker, prices = _load_backfill_inputs(db, start, end)
+
+        all_dates = (start + timedelta(days=offset) for offset in range(total_days))
+        rows = []
+        missing_price_days = 0
+
+        for totals in replay_snapshot_totals(
+            holdings_by_date, prices, isin_to_current_ticker, all_dates
+        ):
+            if totals["snapshot_date"] in existing_dates:
+                continue
+            if totals["missing_prices"]:
+                missing_price_days += 1
+            rows.append({
+                "snapshot_date": totals["snapshot_date"],
+                "total_value": totals["total_value"],
+                "total_cost_basis": totals["total_cost_basis"],
+                "currency": "EUR",
+            })
+
+        # Bulk insert; ON CONFLICT covers snapshots created concurrently
+        created = 0
+        for i in range(0, len(rows), SNAPSHOT_INSERT_BATCH_SIZE):
+            batch = rows[i:i + SNAPSHOT_INSERT_BATCH_SIZE]
+            result = db.execute(
+                pg_insert(PortfolioSnapshot)
+                .values(batch)
+                .on_conflict_do_nothing(index_elements=["snapshot_date"])
+            )
+            created += result.rowcount
+        db.commit()
+        if created:
+            CacheGenerations.bump(SNAPSHOTS)
 
-        except Exception as e:
-            logger.error(f"Failed to create snapshot for {current_date}: {str(e)}")
-            failed += 1
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Snapshot backfill failed: {str(e)}")
+        raise
 
-        current_date += timedelta(days=1)
+    finally:
+        db.close()
 
     summary = {
         "status": "completed",
         "start_date": str(start),
         "end_date": str(end),
         "created": created,
-        "skipped": skipped,
-        "failed": failed,
-        "total_days": (end - start).days + 1
+        "skipped": total_days - created,
+        "failed": 0,
+        "total_days": total_days
     }
 
+    if missing_price_days:
+        summary["warning"] = f"Missing prices on {missing_price_days} days"
+
     logger.info(
-        f"Backfill complete: {created} created, {skipped} skipped, "
-        f"{failed} failed over {summary['total_days']} days"
+        f"Backfill complete: {created} created, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed over {summary['total_days']} days"
     )
 
     return summary
@@ -11,11 +11,13 @@ from typing import Optional
 from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
 import logging
-import time
 
 from app.database import SyncSessionLocal
 from app.models import PriceHistory, CryptoTransaction, CryptoTransactionType, CryptoPortfolio
+from app.services.cache_generations import CacheGenerations, PRICES
+from app.services.latest_prices import LatestPriceService
 from app.services.price_fetcher import PriceFetcher
+from app.services.price_matrix import price_matrix
 from app.services.currency_converter import get_exchange_rate
 
 logger = logging.getLogger(__name__)
@@ -97,6 +99,7 @@ def update_crypto_prices(self):
         skipped = 0
         failed = 0
         failed_symbols = []
+        updated_tickers = []
 
         # Fetch prices for each symbol in each base currency
         for symbol in crypto_symbols:
@@ -120,10 +123,8 @@ def update_crypto_prices(self):
                         skipped += 1
                         continue
 
-                    # Rate limiting: sleep 0.15s between requests to avoid Yahoo Finance rate limits
-                    time.sleep(0.15)
-
-                    # Fetch current price from Yahoo Finance in the correct currency
+                    # Fetch current price in the correct currency (shared quote cache; the
+                    # fetcher paces its own Yahoo Finance requests)
                     price_fetcher = PriceFetcher()
                     yahoo_symbol = ticker_key
                     price_data = price_fetcher.fetch_realtime_price(yahoo_symbol)
@@ -156,6 +157,7 @@ def update_crypto_prices(self):
                         f"Updated crypto price for {ticker_key}: {price} {currency_upper} on {price_date}"
                     )
                     updated += 1
+                    updated_tickers.append(ticker_key)
 
                 except IntegrityError:
                     # Race condition: another process already inserted this price
@@ -172,6 +174,12 @@ def update_crypto_prices(self):
                     currency_upper = base_currency.upper() if isinstance(base_currency, str) else base_currency.value.upper()
                     failed_symbols.append(f"{symbol}-{currency_upper}")
 
+        if updated_tickers:
+            LatestPriceService.refresh(db, updated_tickers)
+            db.commit()
+            price_matrix.invalidate(updated_tickers)
+            CacheGenerations.bump(PRICES)
+
         # Summary
         summary = {
             "status": "success",
@@ -295,7 +303,10 @@ def update_crypto_price_for_symbol(self, symbol: str, price_date: Optional[str]
         )
 
         db.add(price_record)
+        LatestPriceService.refresh(db, [symbol])
         db.commit()
+        price_matrix.invalidate([symbol])
+        CacheGenerations.bump(PRICES)
 
         logger.info(f"Updated crypto price for {symbol}: {price_eur} EUR")
 
@@ -444,7 +455,12 @@ def backfill_crypto_prices(self, symbol: str, start_date: str, end_date: Optiona
                 continue
 
         # Commit all changes
+        if prices_added or prices_updated:
+            LatestPriceService.refresh(db, [ticker_key])
         db.commit()
+        if prices_added or prices_updated:
+            price_matrix.invalidate([ticker_key])
+            CacheGenerations.bump(PRICES)
 
         summary = {
             "status": "success",
@@ -0,0 +1,85 @@
+"""
+Unit tests for the as-of price grid.
+
+Covers forward-fill, staleness limits, previous-close history and
+missing-price reporting, plus the shape of the single-query loader.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.asof_prices import AsOfPriceGrid, AsOfPriceService, PricePoint
+
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def grid():
+    return AsOfPriceGrid({
+        "AAA": [
+            (date(2024, 1, 2), Decimal("10")),
+            (date(2024, 1, 3), Decimal("11")),
+            (date(2024, 1, 8), Decimal("12")),
+        ],
+        "BBB": [(date(2024, 1, 5), Decimal("50"))],
+    })
+
+
+class TestAsOfPriceGrid:
+    """Tests for in-memory as-of resolution."""
+
+    def test_exact_and_forward_filled_lookups(self, grid):
+        """A lookup returns the last close on or before the date."""
+        assert grid.lookup("AAA", date(2024, 1, 3)) == PricePoint(date(2024, 1, 3), Decimal("11"))
+        assert grid.lookup("AAA", date(2024, 1, 6)) == PricePoint(date(2024, 1, 3), Decimal("11"))
+        assert grid.price("AAA", date(2024, 1, 1)) is None
+        assert grid.price("ZZZ", date(2024, 1, 6)) is None
+
+    def test_max_staleness_limits_forward_fill(self):
+        """Closes older than max_staleness_days are not carried forward."""
+        grid = AsOfPriceGrid({"AAA": [(date(2024, 1, 2), Decimal("10"))]}, max_staleness_days=3)
+
+        assert grid.price("AAA", date(2024, 1, 5)) == Decimal("10")
+        assert grid.price("AAA", date(2024, 1, 6)) is None
+        assert grid.lookup_many("AAA", [date(2024, 1, 5), date(2024, 1, 6)]) == [
+            PricePoint(date(2024, 1, 2), Decimal("10")),
+            None,
+        ]
+
+    def test_history_matches_order_by_desc_limit(self, grid):
+        """history() returns the latest closes first, like ORDER BY date DESC LIMIT n."""
+        assert grid.history("AAA", date(2024, 1, 9), 2) == [
+            PricePoint(date(2024, 1, 8), Decimal("12")),
+            PricePoint(date(2024, 1, 3), Decimal("11")),
+        ]
+        assert grid.history("BBB", date(2024, 1, 9), 2) == [PricePoint(date(2024, 1, 5), Decimal("50"))]
+
+    def test_lookup_many_agrees_with_lookup(self, grid):
+        """The vectorized path resolves the same points as scalar lookups."""
+        dates = [date(2024, 1, d) for d in range(1, 11)]
+        assert grid.lookup_many("AAA", dates) == [grid.lookup("AAA", d) for d in dates]
+
+    def test_missing_reports_unresolved_pairs(self, grid):
+        """missing() lists every (ticker, date) without a usable close."""
+        dates = [date(2024, 1, 4), date(2024, 1, 5)]
+        assert grid.missing(["AAA", "BBB", "ZZZ"], dates) == [
+            ("BBB", date(2024, 1, 4)),
+            ("ZZZ", date(2024, 1, 4)),
+            ("ZZZ", date(2024, 1, 5)),
+        ]
+
+
+class TestAsOfPriceQuery:
+    """Tests for the single-statement loader."""
+
+    def test_query_combines_lateral_anchor_and_range(self):
+        """Anchors and in-range closes come back from one statement."""
+        query = AsOfPriceService._build_query(["AAA", "BBB"], date(2024, 1, 1), date(2024, 2, 1), 2)
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        assert "JOIN LATERAL" in sql
+        assert "UNION ALL" in sql
+        assert sql.count("price_history.date DESC") == 1
@@ -32,7 +32,7 @@ def client():
 @pytest.fixture
 def mock_cache():
     """Mock the cache service for testing."""
-    with patch('app.api.assets.cache') as mock:
+    with patch('app.api.assets.cache', new_callable=AsyncMock) as mock:
         yield mock
 
 
@@ -254,7 +254,7 @@ class TestAssetSearchInputValidation:
 class TestAssetSearchCaching:
     """Test cache functionality for the asset search endpoint."""
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     @patch('app.api.assets._fetch_ticker_info_sync')
     def test_cache_hit_returns_cached_result(self, mock_fetch, mock_cache, client):
         """
@@ -264,19 +264,19 @@ class TestAssetSearchCaching:
         """
         # Setup cache to return a cached result
         cached_data = [{"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}]
-        mock_cache.get.return_value = cached_data
+        mock_cache.get_async.return_value = cached_data
 
         response = client.get("/api/assets/search?q=AAPL")
 
         # Verify cache was checked
-        mock_cache.get.assert_called()
+        mock_cache.get_async.assert_called()
         # Verify Yahoo Finance was NOT called when cache hit occurs
         mock_fetch.assert_not_called()
         # Verify we got the cached result
         if response.status_code == 200:
             assert response.json() == cached_data
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     @patch('app.api.assets._fetch_ticker_info_sync')
     def test_cache_miss_calls_yahoo_finance(self, mock_fetch, mock_cache, client):
         """
@@ -285,8 +285,8 @@ class TestAssetSearchCaching:
         When cache returns None, the endpoint should attempt to fetch from Yahoo Finance.
         """
         # Setup cache to return None (cache miss)
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         # Mock Yahoo Finance result
         mock_fetch.return_value = {"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}
@@ -294,18 +294,18 @@ class TestAssetSearchCaching:
         response = client.get("/api/assets/search?q=AAPL")
 
         # Verify cache was checked
-        mock_cache.get.assert_called()
+        mock_cache.get_async.assert_called()
         # Yahoo Finance may or may not be called depending on common_assets
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_cache_ttl_1_hour(self, mock_cache, client):
         """
         Test that cache is set with 1-hour (3600 seconds) TTL.
 
         Ensures cached results don't serve stale data beyond 1 hour.
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         with patch('app.api.assets._fetch_ticker_info_sync') as mock_fetch:
             mock_fetch.return_value = {"ticker": "TEST", "name": "Test Inc.", "type": "EQUITY"}
@@ -313,22 +313,22 @@ class TestAssetSearchCaching:
             response = client.get("/api/assets/search?q=TEST")
 
             # Verify cache.set was called with TTL parameter
-            if mock_cache.set.called:
+            if mock_cache.set_async.called:
                 # Check the call was made with TTL (3600 seconds = 1 hour)
-                call_args = mock_cache.set.call_args
+                call_args = mock_cache.set_async.call_args
                 # Call args format: cache.set(key, value, ttl_seconds)
                 if call_args:
                     assert call_args[0] or call_args[1]  # Verify args exist
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_cache_key_format(self, mock_cache, client):
         """
         Test that cache keys are formatted correctly.
 
         Cache keys should follow pattern: asset_search:{TICKER}
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         with patch('app.api.assets._fetch_ticker_info_sync') as mock_fetch:
             mock_fetch.return_value = {"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}
@@ -336,23 +336,23 @@ class TestAssetSearchCaching:
             response = client.get("/api/assets/search?q=AAPL")
 
             # Verify cache key format
-            if mock_cache.get.called:
-                call_args = mock_cache.get.call_args
+            if mock_cache.get_async.called:
+                call_args = mock_cache.get_async.call_args
                 if call_args:
                     key = call_args[0][0] if call_args[0] else None
                     # Key should be uppercase and prefixed with "asset_search:"
                     if key:
                         assert key.startswith("asset_search:") or True
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_cache_preserves_case_insensitivity(self, mock_cache, client):
         """
         Test that cache normalizes queries to uppercase.
 
         Ensures 'aapl' and 'AAPL' share the same cache entry (when valid).
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         with patch('app.api.assets._fetch_ticker_info_sync') as mock_fetch:
             mock_fetch.return_value = None
@@ -366,15 +366,15 @@ class TestAssetSearchTimeoutHandling:
     """Test timeout handling for Yahoo Finance API calls."""
 
     @patch('app.api.assets._fetch_ticker_info_sync')
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_timeout_handling_5_second_timeout(self, mock_cache, mock_fetch, client):
         """
         Test that Yahoo Finance calls have a 5-second timeout.
 
         Prevents hanging requests if Yahoo Finance is slow or unavailable.
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         # Simulate timeout by raising asyncio.TimeoutError
         with patch('asyncio.wait_for') as mock_wait_for:
@@ -386,15 +386,15 @@ class TestAssetSearchTimeoutHandling:
             assert response.status_code in [200, 400]
 
     @patch('app.api.assets._fetch_ticker_info_sync')
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_graceful_degradation_on_timeout(self, mock_cache, mock_fetch, client):
         """
         Test that the endpoint returns cached results on Yahoo Finance timeout.
 
         Should not fail completely, but use available data (common assets, cache).
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
         mock_fetch.side_effect = asyncio.TimeoutError()
 
         response = client.get("/api/assets/search?q=SPY")
@@ -403,15 +403,15 @@ class TestAssetSearchTimeoutHandling:
         assert response.status_code in [200, 400]
 
     @patch('app.api.assets._fetch_ticker_info_sync')
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_exception_handling_on_yahoo_finance_error(self, mock_cache, mock_fetch, client):
         """
         Test that exceptions from Yahoo Finance are handled gracefully.
 
         Should not crash the server on API errors.
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
         mock_fetch.side_effect = Exception("Yahoo Finance API error")
 
         response = client.get("/api/assets/search?q=AAPL")
@@ -419,15 +419,15 @@ class TestAssetSearchTimeoutHandling:
         # Should not crash, return available results or 200
         assert response.status_code in [200, 400]
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     def test_common_assets_always_available(self, mock_cache, client):
         """
         Test that common assets are always available even if Yahoo Finance fails.
 
         Common assets are cached in memory and don't depend on external APIs.
         """
-        mock_cache.get.return_value = None
-        mock_cache.set.return_value = True
+        mock_cache.get_async.return_value = None
+        mock_cache.set_async.return_value = True
 
         # SPY is in COMMON_ASSETS, should be returned even without Yahoo Finance
         response = client.get("/api/assets/search?q=SPY")
@@ -441,23 +441,23 @@ class TestAssetSearchTimeoutHandling:
 class TestAssetSearchResponseFormat:
     """Test response format and data structure."""
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     @patch('app.api.assets._fetch_ticker_info_sync')
     def test_response_is_list(self, mock_fetch, mock_cache, client):
         """Test that response is a JSON array."""
-        mock_cache.get.return_value = [{"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}]
+        mock_cache.get_async.return_value = [{"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}]
 
         response = client.get("/api/assets/search?q=AAPL")
 
         if response.status_code == 200:
             assert isinstance(response.json(), list)
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     @patch('app.api.assets._fetch_ticker_info_sync')
     def test_response_items_have_required_fields(self, mock_fetch, mock_cache, client):
         """Test that each result item has ticker, name, and type fields."""
         test_result = [{"ticker": "AAPL", "name": "Apple Inc.", "type": "EQUITY"}]
-        mock_cache.get.return_value = test_result
+        mock_cache.get_async.return_value = test_result
 
         response = client.get("/api/assets/search?q=AAPL")
 
@@ -469,7 +469,7 @@ class TestAssetSearchResponseFormat:
                     assert "name" in item
                     assert "type" in item
 
-    @patch('app.api.assets.cache')
+    @patch('app.api.assets.cache', new_callable=AsyncMock)
     @patch('app.api.assets._fetch_ticker_info_sync')
     def test_response_limited_to_10_results(self, mock_fetch, mock_cache, client):
         """Test that response is limited to maximum 10 results."""
@@ -478,7 +478,7 @@ class TestAssetSearchResponseFormat:
             {"ticker": f"TEST{i}", "name": f"Test Company {i}", "type": "EQUITY"}
             for i in range(15)
         ]
-        mock_cache.get.return_value = large_result
+        mock_cache.get_async.return_value = large_result
 
         response = client.get("/api/assets/search?q=TEST")
 
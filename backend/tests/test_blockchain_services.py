@@ -12,13 +12,13 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 from decimal import Decimal
-import time
 import redis
 import requests
 
 
 from app.services.blockchain_fetcher import BlockchainFetcherService
 from app.services.blockchain_deduplication import BlockchainDeduplicationService
+from app.services.provider_limiter import ProviderRateLimiter
 from app.models.crypto import CryptoTransactionType, CryptoCurrency
 from app.config import settings
 
@@ -36,11 +36,14 @@ class TestBlockchainFetcherService:
         Returns:
             BlockchainFetcherService: a fetcher instance that uses the mocked Redis client.
         """
-        with patch('app.services.blockchain_fetcher.redis.from_url') as mock_redis:
+        with patch('app.services.blockchain_fetcher.redis_pools.sync_client') as mock_redis:
             mock_redis.return_value.ping.return_value = True
             mock_redis.return_value.get.return_value = None
             mock_redis.return_value.setex.return_value = True
-            return BlockchainFetcherService()
+            fetcher = BlockchainFetcherService()
+        # Keep request tests from waiting on the shared blockchain.info budget
+        fetcher._limiter = ProviderRateLimiter("blockchain.test", rate=1000, burst=1000, min_rate=1000)
+        return fetcher
 
     @pytest.fixture
     def sample_blockstream_tx(self):
@@ -240,11 +243,13 @@ class TestBlockchainFetcherService:
     @patch('time.sleep')
     def test_rate_limiting(self, mock_sleep, blockchain_fetcher):
         """Test rate limiting functionality."""
-        # Set last request time to simulate rate limiting
-        blockchain_fetcher._last_request_time = time.time()
+        blockchain_fetcher._limiter = ProviderRateLimiter("blockchain.test", rate=0.1, burst=1, min_rate=0.1)
 
-        # This should trigger rate limiting
-        blockchain_fetcher._rate_limit()
+        # The first request uses the only token, the second has to wait for a refill
+        with patch('app.services.provider_limiter.cache.available', False):
+            blockchain_fetcher._rate_limit()
+            mock_sleep.assert_not_called()
+            blockchain_fetcher._rate_limit()
 
         # Verify sleep was called (rate limiting was triggered)
         mock_sleep.assert_called()
@@ -300,7 +305,7 @@ class TestBlockchainDeduplicationService:
     @pytest.fixture
     def deduplication_service(self):
         """Create a deduplication service instance for testing."""
-        with patch('app.services.blockchain_deduplication.redis.from_url') as mock_redis, \
+        with patch('app.services.blockchain_deduplication.redis_pools.sync_client') as mock_redis, \
              patch('app.services.blockchain_deduplication.SyncSessionLocal') as mock_db, \
              patch('app.services.blockchain_deduplication.BlockchainDeduplicationService._get_portfolio_hashes_from_db') as mock_get_hashes:
             # Configure Redis mocks
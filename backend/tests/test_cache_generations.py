@@ -0,0 +1,121 @@
+"""
+Tests for cache generation counters and generation-based invalidation.
+"""
+import pytest
+
+from app.services import cache_generations
+from app.services.cache_generations import (
+    CacheGenerations, TRANSACTIONS, PRICES, FX, CRYPTO, crypto
+)
+from app.services.cache_decorators import CacheManager
+
+pytestmark = pytest.mark.unit
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hincrby(self, name, field, amount):
+        self.commands.append((name, field, amount))
+
+    def execute(self):
+        return [self.client.hincrby(*command) for command in self.commands]
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the hash commands used by CacheGenerations."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hmget(self, name, fields):
+        values = self.hashes.get(name, {})
+        return [values.get(field) for field in fields]
+
+    def hincrby(self, name, field, amount):
+        values = self.hashes.setdefault(name, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class AsyncFakeRedis:
+    """Non-blocking view of a FakeRedis, as returned by cache.async_client()."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def hmget(self, name, fields):
+        return self.client.hmget(name, fields)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache_generations.cache, "available", True)
+    monkeypatch.setattr(cache_generations.cache, "redis_client", client)
+    monkeypatch.setattr(cache_generations.cache, "async_client", lambda: AsyncFakeRedis(client))
+    return client
+
+
+class TestCacheGenerations:
+    def test_unbumped_domains_start_at_zero(self, redis):
+        assert CacheGenerations.get(TRANSACTIONS, PRICES) == {TRANSACTIONS: 0, PRICES: 0}
+
+    def test_key_embeds_generations_in_domain_order(self, redis):
+        CacheGenerations.bump(PRICES)
+        CacheGenerations.bump(PRICES)
+
+        key = CacheGenerations.key("portfolio:holdings", TRANSACTIONS, PRICES, parts=("a", 1))
+
+        assert key == "portfolio:holdings:a:1:g=0.2"
+
+    def test_bump_changes_only_dependent_keys(self, redis):
+        holdings = CacheGenerations.key("holdings", TRANSACTIONS, PRICES)
+        fx_only = CacheGenerations.key("fx", FX)
+
+        assert CacheGenerations.bump(TRANSACTIONS) is True
+
+        assert CacheGenerations.key("holdings", TRANSACTIONS, PRICES) != holdings
+        assert CacheGenerations.key("fx", FX) == fx_only
+
+    def test_crypto_portfolio_bump_also_bumps_crypto(self, redis):
+        CacheGenerations.bump(crypto(7))
+
+        assert CacheGenerations.get(crypto(7), crypto(8), CRYPTO) == {
+            crypto(7): 1, crypto(8): 0, CRYPTO: 1
+        }
+
+    async def test_key_async_matches_key(self, redis):
+        CacheGenerations.bump(FX)
+
+        assert await CacheGenerations.get_async(FX, PRICES) == {FX: 1, PRICES: 0}
+        assert await CacheGenerations.key_async("summary", FX, PRICES, parts=(20,)) == (
+            CacheGenerations.key("summary", FX, PRICES, parts=(20,))
+        )
+
+    def test_without_redis_nothing_is_cached(self, monkeypatch):
+        monkeypatch.setattr(cache_generations.cache, "available", False)
+
+        assert CacheGenerations.get(PRICES) is None
+        assert CacheGenerations.key("holdings", PRICES) is None
+        assert CacheGenerations.bump(PRICES) is False
+
+
+class TestCacheManager:
+    def test_invalidate_portfolio_cache_bumps_transactions(self, redis):
+        key = CacheGenerations.key("portfolio:holdings", TRANSACTIONS, PRICES)
+
+        assert CacheManager().invalidate_portfolio_cache() == 1
+
+        assert CacheGenerations.get(TRANSACTIONS) == {TRANSACTIONS: 1}
+        assert CacheGenerations.key("portfolio:holdings", TRANSACTIONS, PRICES) != key
+
+    def test_invalidate_price_cache_bumps_prices(self, redis):
+        assert CacheManager().invalidate_price_cache() == 1
+
+        assert CacheGenerations.get(PRICES, TRANSACTIONS) == {PRICES: 1, TRANSACTIONS: 0}
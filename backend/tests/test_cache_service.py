@@ -14,7 +14,7 @@ import pytest
 import json
 import asyncio
 import time
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 from decimal import Decimal
 from typing import List, Dict, Any
 
@@ -285,7 +285,7 @@ class TestCacheMissAndExiration:
 class TestCacheErrorHandling:
     """Test error handling when Redis is unavailable or errors occur."""
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_redis_connection_failure_graceful(self, mock_redis):
         """
         Test that cache service handles connection failures gracefully.
@@ -308,7 +308,7 @@ class TestCacheErrorHandling:
         result = service.set("any_key", "any_value")
         assert result is False
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_redis_set_error_returns_false(self, mock_redis):
         """
         Test that cache.set() returns False on Redis errors.
@@ -327,7 +327,7 @@ class TestCacheErrorHandling:
         result = service.set("key", "value")
         assert result is False
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_redis_get_error_returns_none(self, mock_redis):
         """
         Test that cache.get() returns None on Redis errors.
@@ -346,7 +346,7 @@ class TestCacheErrorHandling:
         result = service.get("key")
         assert result is None
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_redis_delete_error_returns_false(self, mock_redis):
         """
         Test that cache.delete() returns False on Redis errors.
@@ -365,7 +365,7 @@ class TestCacheErrorHandling:
         result = service.delete("key")
         assert result is False
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_invalid_json_in_cache_returns_none(self, mock_redis):
         """
         Test that invalid JSON data in cache is handled gracefully.
@@ -387,7 +387,7 @@ class TestCacheErrorHandling:
         # Should handle JSON decode error gracefully
         assert result is None
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_redis_unavailable_during_startup(self, mock_redis):
         """
         Test that service starts up gracefully even if Redis is unavailable.
@@ -404,10 +404,52 @@ class TestCacheErrorHandling:
         assert service.set("key", "value") is False
 
 
+class TestCacheAsyncMethods:
+    """Test the non-blocking counterparts used from coroutines."""
+
+    def _service(self, async_client):
+        service = CacheService()
+        service.available = True
+        service.async_client = lambda: async_client
+        return service
+
+    async def test_get_async_returns_deserialized_value(self):
+        client = AsyncMock()
+        client.get.return_value = json.dumps({"a": 1})
+
+        assert await self._service(client).get_async("key") == {"a": 1}
+        client.get.assert_awaited_once_with("key")
+
+    async def test_set_async_uses_setex(self):
+        client = AsyncMock()
+
+        assert await self._service(client).set_async("key", [1, 2], ttl_seconds=30) is True
+        client.setex.assert_awaited_once_with("key", 30, "[1, 2]")
+
+    async def test_async_errors_degrade_gracefully(self):
+        client = AsyncMock()
+        client.get.side_effect = Exception("Redis error")
+        client.setex.side_effect = Exception("Redis error")
+        client.delete.side_effect = Exception("Redis error")
+        service = self._service(client)
+
+        assert await service.get_async("key") is None
+        assert await service.set_async("key", "value") is False
+        assert await service.delete_async("key") is False
+
+    async def test_async_methods_skip_redis_when_unavailable(self):
+        client = AsyncMock()
+        service = self._service(client)
+        service.available = False
+
+        assert await service.get_async("key") is None
+        client.get.assert_not_awaited()
+
+
 class TestCacheFallbackBehavior:
     """Test fallback behavior when caching fails."""
 
-    @patch('redis.from_url')
+    @patch('app.services.cache.redis_pools.sync_client')
     def test_operations_continue_when_cache_unavailable(self, mock_redis):
         """
         Test that application continues working when cache is unavailable.
@@ -437,7 +479,7 @@ class TestCacheFallbackBehavior:
 
         Should help operators debug why caching isn't working.
         """
-        with patch('redis.from_url') as mock_redis:
+        with patch('app.services.cache.redis_pools.sync_client') as mock_redis:
             mock_redis.side_effect = Exception("Connection error")
 
             with patch('app.services.cache.logger') as mock_logger:
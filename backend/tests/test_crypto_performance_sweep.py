@@ -0,0 +1,139 @@
+"""
+Unit tests for the crypto performance event sweep.
+
+The sweep must produce the same cost basis as a full FIFO rebuild
+(_calculate_holdings) on every day, while forward-filling prices.
+"""
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.crypto import _stream_performance
+from app.models.crypto import CryptoTransactionType
+from app.services.crypto_calculations import CryptoCalculationService, _FifoBook, sweep_performance
+
+
+pytestmark = pytest.mark.unit
+
+
+def _tx(day, tx_type, symbol, quantity, price):
+    return SimpleNamespace(
+        timestamp=datetime.combine(day, datetime.min.time()) + timedelta(hours=12),
+        transaction_type=tx_type,
+        symbol=symbol,
+        quantity=Decimal(quantity),
+        price_at_execution=Decimal(price),
+    )
+
+
+TRANSACTIONS = [
+    _tx(date(2024, 1, 1), CryptoTransactionType.BUY, "BTC", "1.5", "30000"),
+    _tx(date(2024, 1, 3), CryptoTransactionType.BUY, "ETH", "10", "2000"),
+    _tx(date(2024, 1, 3), CryptoTransactionType.BUY, "BTC", "0.5", "32000"),
+    _tx(date(2024, 1, 5), CryptoTransactionType.SELL, "BTC", "1.7", "35000"),
+    _tx(date(2024, 1, 6), CryptoTransactionType.TRANSFER_OUT, "ETH", "10", "2100"),
+    _tx(date(2024, 1, 7), CryptoTransactionType.TRANSFER_IN, "ETH", "2", "2200"),
+]
+
+
+def _prices(symbol, points):
+    return [{"date": d, "price": Decimal(p), "symbol": symbol} for d, p in points]
+
+
+class TestSweepPerformance:
+    """Tests for sweep_performance."""
+
+    async def test_cost_basis_matches_full_fifo_rebuild(self):
+        """Incremental FIFO agrees with re-running _calculate_holdings each day."""
+        service = CryptoCalculationService(db=None)
+        start, end = date(2023, 12, 31), date(2024, 1, 8)
+
+        points = {
+            p.date: p
+            for p in sweep_performance(TRANSACTIONS, {}, start, end, "EUR")
+        }
+
+        day = start
+        while day <= end:
+            holdings = await service._calculate_holdings(
+                [tx for tx in TRANSACTIONS if tx.timestamp.date() <= day]
+            )
+            expected = sum((h["cost_basis"] for h in holdings.values()), Decimal("0"))
+            if expected > 0:
+                assert points[day].cost_basis == expected
+            else:
+                assert day not in points
+            day += timedelta(days=1)
+
+    def test_prices_forward_fill_with_moving_index(self):
+        """Days without a price reuse the last earlier one; earlier transactions count."""
+        prices = {
+            "BTC": _prices("BTC", [(date(2024, 1, 4), "34000"), (date(2024, 1, 2), "31000")]),
+        }
+
+        points = list(sweep_performance(TRANSACTIONS[:1], prices, date(2024, 1, 2), date(2024, 1, 5), "EUR"))
+
+        assert [p.date for p in points] == [date(2024, 1, 2) + timedelta(days=i) for i in range(4)]
+        assert [p.portfolio_value for p in points] == [
+            Decimal("46500.0"), Decimal("46500.0"), Decimal("51000.0"), Decimal("51000.0"),
+        ]
+        assert points[0].cost_basis == Decimal("45000.0")
+        assert points[2].profit_loss_pct == pytest.approx(100 * 6000 / 45000)
+        assert points[0].currency == "EUR"
+
+
+class TestFifoBook:
+    """Tests for the running totals of _FifoBook."""
+
+    async def test_running_totals_match_full_fifo_rebuild(self):
+        """A DCA history with partial and full lot consumption keeps exact totals."""
+        transactions = [
+            _tx(date(2024, 1, 1) + timedelta(days=i), CryptoTransactionType.BUY, "BTC", "0.0125", str(30000 + 37 * i))
+            for i in range(60)
+        ]
+        transactions.insert(20, _tx(date(2024, 1, 21), CryptoTransactionType.SELL, "BTC", "0.1337", "33000"))
+        transactions.append(_tx(date(2024, 3, 1), CryptoTransactionType.TRANSFER_OUT, "BTC", "0.5", "35000"))
+
+        book = _FifoBook()
+        for tx in transactions:
+            book.apply(tx)
+
+        [holding] = (await CryptoCalculationService(db=None)._calculate_holdings(transactions)).values()
+        assert book.quantity == holding["quantity"]
+        assert book.cost_basis == holding["cost_basis"]
+
+    def test_selling_everything_resets_totals(self):
+        book = _FifoBook()
+        book.apply(_tx(date(2024, 1, 1), CryptoTransactionType.BUY, "ETH", "1.1", "2000"))
+        book.apply(_tx(date(2024, 1, 2), CryptoTransactionType.SELL, "ETH", "2", "2100"))
+
+        assert (book.quantity, book.cost_basis) == (Decimal("0"), Decimal("0"))
+        assert not book.lots
+
+
+class TestStreamPerformance:
+    """Tests for the NDJSON performance stream."""
+
+    async def test_failure_ends_the_stream_with_an_error_record(self):
+        """Points already sent stay; the truncation is visible as a final error line."""
+        async def failing_sweep(self, portfolio_id, start_date, end_date):
+            yield next(sweep_performance(TRANSACTIONS[:1], {}, date(2024, 1, 1), date(2024, 1, 1), "EUR"))
+            raise RuntimeError("price provider down")
+
+        session_factory = MagicMock()
+        session_factory.return_value.__aenter__ = AsyncMock(return_value=MagicMock())
+        session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("app.api.crypto.AsyncSessionLocal", session_factory), \
+             patch.object(CryptoCalculationService, "iter_performance_history", failing_sweep):
+            lines = [
+                json.loads(line)
+                async for line in _stream_performance(7, date(2024, 1, 1), date(2024, 1, 2), "EUR")
+            ]
+
+        assert len(lines) == 2
+        assert lines[0]["date"] == "2024-01-01"
+        assert lines[1] == {"error": "Failed to get portfolio performance: price provider down"}
@@ -0,0 +1,153 @@
+"""
+Unit tests for the local-first crypto price resolver.
+
+Gap detection is pure; the resolver's database and network calls are
+replaced with in-memory fakes. Also covers how resolved closes are labelled
+by CryptoCalculationService._get_historical_prices.
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.crypto_calculations import CryptoCalculationService
+from app.services.crypto_price_resolver import CryptoPriceResolver, missing_ranges
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestMissingRanges:
+    """Tests for missing_ranges."""
+
+    def test_coalesces_runs_of_missing_days(self):
+        """Missing days are grouped into inclusive contiguous ranges."""
+        present = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 6)]
+
+        assert missing_ranges(present, date(2024, 1, 1), date(2024, 1, 8)) == [
+            (date(2024, 1, 1), date(2024, 1, 1)),
+            (date(2024, 1, 4), date(2024, 1, 5)),
+            (date(2024, 1, 7), date(2024, 1, 8)),
+        ]
+
+    def test_full_and_empty_coverage(self):
+        """Complete coverage has no gaps; no coverage is one gap."""
+        days = [date(2024, 1, 1) + timedelta(days=i) for i in range(5)]
+
+        assert missing_ranges(days, days[0], days[-1]) == []
+        assert missing_ranges([], days[0], days[-1]) == [(days[0], days[-1])]
+
+
+class FakeResolver(CryptoPriceResolver):
+    """Resolver backed by an in-memory table."""
+
+    def __init__(self, table):
+        super().__init__(db=None)
+        self.table = table
+        self.fetched = []
+        self.scheduled = []
+
+    async def _load_local(self, tickers, start_date, end_date):
+        return {
+            t: [{'date': d, 'close': c, 'source': 'yahoo'} for d, c in rows if start_date <= d <= end_date]
+            for t, rows in self.table.items() if t in tickers
+        }
+
+    async def _fetch_and_store(self, gaps_by_ticker):
+        self.fetched.append(gaps_by_ticker)
+        for ticker, gaps in gaps_by_ticker.items():
+            self.table[ticker] = [(gaps[0][0], Decimal("1"))]
+
+    def _schedule_backfill(self, symbol, currency, gaps):
+        self.scheduled.append((symbol, currency, gaps))
+
+
+class TestCryptoPriceResolver:
+    """Tests for how gaps are routed."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_attempts(self, monkeypatch):
+        monkeypatch.setattr(CryptoPriceResolver, "_local_attempts", {})
+        monkeypatch.setattr("app.services.crypto_price_resolver.cache.available", False)
+
+    async def test_partial_coverage_is_served_locally_and_backfilled(self):
+        """Tickers with local rows return immediately; their gaps go to the background task."""
+        start = date(2024, 1, 1)
+        resolver = FakeResolver({"BTC-EUR": [(start, Decimal("40000")), (start + timedelta(days=2), Decimal("41000"))]})
+
+        history = await resolver.get_history(["BTC"], start, start + timedelta(days=3), "eur")
+
+        assert [p['close'] for p in history["BTC"]] == [Decimal("40000"), Decimal("41000")]
+        assert resolver.fetched == []
+        assert resolver.scheduled == [("BTC", "EUR", [
+            (start + timedelta(days=1), start + timedelta(days=1)),
+            (start + timedelta(days=3), start + timedelta(days=3)),
+        ])]
+
+    async def test_uncovered_ticker_is_fetched_once(self):
+        """A ticker with no local rows is fetched inline, and the gap is not retried immediately."""
+        start = date(2024, 1, 1)
+        resolver = FakeResolver({})
+
+        first = await resolver.get_history(["ETH"], start, start + timedelta(days=1), "USD")
+        resolver.table.clear()
+        second = await resolver.get_history(["ETH"], start, start + timedelta(days=1), "USD")
+
+        assert first == {"ETH": [{'date': start, 'close': Decimal("1"), 'source': 'yahoo'}]}
+        assert resolver.fetched == [{"ETH-USD": [(start, start + timedelta(days=1))]}]
+        assert second == {}
+
+
+class TestGapClaimsAndWrites:
+    """Tests for the Redis gap claim and the price writes."""
+
+    async def test_gap_is_claimed_with_one_atomic_set(self, monkeypatch):
+        client = MagicMock()
+        client.set = AsyncMock(side_effect=[True, None])
+        monkeypatch.setattr("app.services.crypto_price_resolver.cache.available", True)
+        monkeypatch.setattr("app.services.crypto_price_resolver.cache.async_client", lambda: client)
+        gap = (date(2024, 1, 1), date(2024, 1, 2))
+
+        assert await CryptoPriceResolver._claim_gap("BTC-EUR", gap) is True
+        assert await CryptoPriceResolver._claim_gap("BTC-EUR", gap) is False
+        assert client.set.call_args.kwargs == {"nx": True, "ex": CryptoPriceResolver.GAP_RETRY_SECONDS}
+
+    async def test_fetched_prices_are_written_through_their_own_session(self):
+        request_db = MagicMock()
+        write_db = MagicMock()
+        write_db.execute = AsyncMock()
+        write_db.run_sync = AsyncMock()
+        write_db.commit = AsyncMock()
+        session_factory = MagicMock()
+        session_factory.return_value.__aenter__ = AsyncMock(return_value=write_db)
+        session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+        day = date(2024, 1, 1)
+
+        with patch("app.services.crypto_price_resolver.AsyncSessionLocal", session_factory), \
+             patch("app.services.crypto_price_resolver.PriceFetcher.fetch_historical_prices",
+                   AsyncMock(return_value=[{"date": day, "close": Decimal("40000")}])), \
+             patch("app.services.crypto_price_resolver.price_matrix.invalidate") as invalidate, \
+             patch("app.services.crypto_price_resolver.CacheGenerations.bump_async", AsyncMock()):
+            await CryptoPriceResolver(request_db)._fetch_and_store({"BTC-EUR": [(day, day)]})
+
+        write_db.execute.assert_awaited_once()
+        write_db.commit.assert_awaited_once()
+        invalidate.assert_called_once_with(["BTC-EUR"])
+        assert not request_db.method_calls
+
+
+class TestHistoricalPriceRecords:
+    """Tests for CryptoCalculationService._get_historical_prices."""
+
+    @pytest.mark.parametrize("currency, price_usd", [("EUR", None), ("usd", Decimal("40000"))])
+    async def test_price_usd_only_for_usd_series(self, currency, price_usd):
+        history = {"BTC": [{"date": date(2024, 1, 1), "close": Decimal("40000"), "source": "yahoo"}]}
+        with patch("app.services.crypto_calculations.CryptoPriceResolver.get_history", AsyncMock(return_value=history)):
+            prices = await CryptoCalculationService(db=None)._get_historical_prices(
+                ["BTC"], date(2024, 1, 1), date(2024, 1, 1), currency
+            )
+
+        [point] = prices["BTC"]
+        assert point["price"] == Decimal("40000")
+        assert point["currency"] == currency.upper()
+        assert point["price_usd"] == price_usd
@@ -0,0 +1,176 @@
+"""
+Unit tests for the batched crypto snapshot backfill.
+
+Verifies that replay_crypto_snapshots values each date like
+calculate_crypto_snapshot_data and that backfill_crypto_snapshot_range only
+values the missing dates, writing snapshots and holdings in one statement.
+"""
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.crypto import CryptoTransactionType
+from app.services.asof_prices import AsOfPriceGrid
+from app.services.crypto_calculations import CryptoCalculationService
+from app.tasks.crypto_snapshots import (
+    _missing_snapshot_dates,
+    backfill_crypto_snapshot_range,
+    replay_crypto_snapshots,
+)
+
+
+pytestmark = pytest.mark.unit
+
+
+def _tx(day, tx_type, symbol, quantity, total):
+    return SimpleNamespace(
+        timestamp=datetime.combine(day, datetime.min.time()) + timedelta(hours=12),
+        transaction_type=tx_type,
+        symbol=symbol,
+        quantity=Decimal(quantity),
+        total_amount=Decimal(total),
+    )
+
+
+def _days(start, count):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+TRANSACTIONS = [
+    _tx(date(2024, 1, 2), CryptoTransactionType.BUY, "BTC", "2", "60000"),
+    _tx(date(2024, 1, 3), CryptoTransactionType.BUY, "ETH", "10", "20000"),
+    _tx(date(2024, 1, 4), CryptoTransactionType.SELL, "BTC", "1", "35000"),
+]
+
+PRICES = AsOfPriceGrid({
+    "BTC": [(date(2024, 1, 2), Decimal("30000")), (date(2024, 1, 4), Decimal("35000"))],
+    "ETH": [(date(2024, 1, 3), Decimal("2000"))],
+})
+
+
+class TestReplayCryptoSnapshots:
+    """Tests for replay_crypto_snapshots."""
+
+    def test_holdings_are_carried_across_dates(self):
+        """Each date sees every transaction up to its end, priced as of that date."""
+        eur_usd = {day: Decimal("1.1") for day in _days(date(2024, 1, 1), 3)}
+
+        results = list(replay_crypto_snapshots(TRANSACTIONS, _days(date(2024, 1, 1), 5), PRICES, eur_usd, "EUR"))
+
+        assert [r["total_value_eur"] for r in results] == [
+            Decimal("0"), Decimal("60000"), Decimal("80000"), Decimal("55000"), Decimal("55000")
+        ]
+        # Selling half the BTC removes half its cost
+        assert results[3]["total_cost_basis"] == Decimal("50000")
+        assert results[3]["total_return_pct"] == Decimal("10.0")
+        assert results[2]["total_value_usd"] == Decimal("88000.0")
+        assert results[3]["holdings"] == [
+            {"symbol": "BTC", "quantity": Decimal("1"), "value_eur": Decimal("35000"), "value_usd": Decimal("0")},
+            {"symbol": "ETH", "quantity": Decimal("10"), "value_eur": Decimal("20000"), "value_usd": Decimal("0")},
+        ]
+
+    def test_sparse_dates_and_missing_fx(self):
+        """Only the requested dates are valued; USD values are 0 without a rate."""
+        [result] = replay_crypto_snapshots(TRANSACTIONS, [date(2024, 1, 4)], PRICES, {}, "EUR")
+
+        assert result["snapshot_date"] == date(2024, 1, 4)
+        assert result["total_value_eur"] == Decimal("55000")
+        assert result["total_value_usd"] == Decimal("0")
+
+    def test_unpriced_holdings_use_the_fallback_or_are_skipped(self):
+        """Symbols without a stored close use the fallback price, if any."""
+        transactions = [_tx(date(2024, 1, 1), CryptoTransactionType.BUY, "SOL", "4", "400")]
+
+        [priced] = replay_crypto_snapshots(
+            transactions, [date(2024, 1, 1)], AsOfPriceGrid({}), {}, "EUR",
+            fallback_price=lambda symbol: (Decimal("90"), Decimal("100"))
+        )
+        [skipped] = replay_crypto_snapshots(transactions, [date(2024, 1, 1)], AsOfPriceGrid({}), {}, "EUR")
+
+        assert priced["total_value_eur"] == Decimal("360")
+        assert priced["total_value_usd"] == Decimal("400")
+        assert skipped["total_value_eur"] == Decimal("0")
+        assert skipped["total_cost_basis"] == Decimal("400")
+
+
+class TestBackfillCryptoSnapshotRange:
+    """Tests for backfill_crypto_snapshot_range."""
+
+    def test_missing_dates_query_is_set_based(self):
+        """Missing dates come from generate_series anti-joined with the snapshots."""
+        db = MagicMock()
+
+        _missing_snapshot_dates(db, 7, date(2024, 1, 1), date(2024, 1, 31))
+
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "generate_series" in sql
+        assert "LEFT OUTER JOIN crypto_portfolio_snapshots" in sql
+        assert "crypto_portfolio_snapshots.id IS NULL" in sql
+
+    def test_only_missing_dates_are_valued_and_bulk_inserted(self):
+        """Existing dates are skipped and the rest are written in one statement."""
+        portfolio = SimpleNamespace(id=7, base_currency=SimpleNamespace(value="EUR"))
+        db = MagicMock()
+        db.execute.return_value.scalar_one.return_value = 2
+        missing = [date(2024, 1, 2), date(2024, 1, 4)]
+
+        with patch("app.tasks.crypto_snapshots._missing_snapshot_dates", return_value=missing), \
+             patch("app.tasks.crypto_snapshots._load_crypto_transactions", return_value=TRANSACTIONS) as load_txns, \
+             patch("app.tasks.crypto_snapshots.AsOfPriceService.load", return_value=PRICES) as load_prices, \
+             patch("app.tasks.crypto_snapshots._eur_usd_rates", return_value={}) as rates:
+            created, skipped = backfill_crypto_snapshot_range(db, portfolio, date(2024, 1, 1), date(2024, 1, 5))
+
+        assert (created, skipped) == (2, 3)
+        load_txns.assert_called_once_with(db, 7, date(2024, 1, 4))
+        assert load_prices.call_args.args[1:] == ({"BTC", "ETH"}, date(2024, 1, 2), date(2024, 1, 4))
+        rates.assert_called_once_with(db, missing)
+
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uix_crypto_portfolio_snapshot_date DO NOTHING" in sql
+        # Holdings are inserted in the same statement, only for the snapshots created
+        assert "INSERT INTO crypto_snapshot_holdings" in sql
+        assert "JOIN inserted_snapshots" in sql
+        db.commit.assert_called_once()
+
+    def test_nothing_missing_writes_nothing(self):
+        """A fully covered range does not load transactions or prices."""
+        portfolio = SimpleNamespace(id=7, base_currency=SimpleNamespace(value="EUR"))
+        db = MagicMock()
+
+        with patch("app.tasks.crypto_snapshots._missing_snapshot_dates", return_value=[]), \
+             patch("app.tasks.crypto_snapshots._load_crypto_transactions") as load_txns:
+            assert backfill_crypto_snapshot_range(db, portfolio, date(2024, 1, 1), date(2024, 1, 5)) == (0, 5)
+
+        load_txns.assert_not_called()
+        db.commit.assert_not_called()
+
+
+class TestAllocationHistory:
+    """Tests for CryptoCalculationService.get_allocation_history."""
+
+    async def test_one_query_over_snapshot_holdings(self):
+        """Per-asset rows come from one query joined with the snapshot totals."""
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock())
+        db.execute.return_value.all.return_value = [SimpleNamespace(
+            snapshot_date=date(2024, 1, 4), symbol="BTC", quantity=Decimal("1"),
+            value_eur=Decimal("35000"), value_usd=Decimal("38000"), percentage=Decimal("63.6")
+        )]
+
+        rows = await CryptoCalculationService(db).get_allocation_history(
+            7, date(2024, 1, 1), date(2024, 1, 31), symbol="btc"
+        )
+
+        assert rows == [{
+            "date": date(2024, 1, 4), "symbol": "BTC", "quantity": Decimal("1"),
+            "value_eur": Decimal("35000"), "value_usd": Decimal("38000"), "percentage": Decimal("63.6"),
+        }]
+        db.execute.assert_awaited_once()
+        query = db.execute.call_args.args[0]
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert "FROM crypto_snapshot_holdings JOIN crypto_portfolio_snapshots" in sql
+        assert query.compile().params["symbol_1"] == "BTC"
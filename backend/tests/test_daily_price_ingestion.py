@@ -0,0 +1,168 @@
+"""
+Tests for the batched daily price ingestion (multi-ticker download + single insert).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.market_data import YahooProvider
+from app.services.price_fetcher import PriceFetcher
+from app.tasks.price_updates import update_daily_prices
+
+pytestmark = pytest.mark.unit
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def make_download_frame(days, symbols):
+    """Build a frame shaped like yf.download(..., group_by="ticker")."""
+    index = pd.DatetimeIndex([pd.Timestamp(day) for day in days], name="Date")
+    columns = pd.MultiIndex.from_product([list(symbols), FIELDS], names=["Ticker", "Price"])
+    data = np.array([
+        [value for symbol in symbols for value in symbols[symbol][i]]
+        for i in range(len(days))
+    ], dtype=float)
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+class TestHistoryFrameToPrices:
+    def test_converts_each_symbol_and_date(self):
+        frame = make_download_frame(
+            [date(2026, 10, 14), date(2026, 10, 15)],
+            {
+                "AAPL": [(1, 2, 0.5, 1.5, 100), (1.1, 2.1, 0.6, 1.6, 200)],
+                "IE00B4L5Y983": [(10, 11, 9, 10.5, 5), (10.5, 12, 10, 11.5, 6)],
+            },
+        )
+
+        prices = YahooProvider.frame_to_prices(frame)
+
+        assert set(prices) == {"AAPL", "IE00B4L5Y983"}
+        assert [p["date"] for p in prices["AAPL"]] == [date(2026, 10, 14), date(2026, 10, 15)]
+        assert prices["IE00B4L5Y983"][1] == {
+            "date": date(2026, 10, 15),
+            "open": Decimal("10.5"),
+            "high": Decimal("12.0"),
+            "low": Decimal("10.0"),
+            "close": Decimal("11.5"),
+            "volume": 6,
+            "source": "yahoo",
+        }
+
+    def test_drops_rows_without_close_and_fills_gaps(self):
+        nan = np.nan
+        frame = make_download_frame(
+            [date(2026, 10, 14), date(2026, 10, 15)],
+            {
+                "AAPL": [(1, 2, 0.5, 1.5, nan), (nan, nan, nan, 1.6, 200)],
+                "DELISTED": [(nan, nan, nan, nan, nan), (nan, nan, nan, nan, nan)],
+            },
+        )
+
+        prices = YahooProvider.frame_to_prices(frame)
+
+        assert list(prices) == ["AAPL"]
+        assert prices["AAPL"][0]["volume"] == 0
+        assert prices["AAPL"][1]["open"] == prices["AAPL"][1]["close"] == Decimal("1.6")
+
+    def test_empty_frame(self):
+        assert YahooProvider.frame_to_prices(pd.DataFrame()) == {}
+        assert YahooProvider.frame_to_prices(None) == {}
+
+
+class TestBatchFetch:
+    def test_downloads_in_chunks_and_maps_back_to_broker_tickers(self, monkeypatch):
+        monkeypatch.setattr(PriceFetcher, "HISTORY_BATCH_SIZE", 2)
+        day = date(2026, 10, 15)
+        calls = []
+
+        def fake_download(symbols, **kwargs):
+            calls.append((list(symbols), kwargs))
+            return make_download_frame([day], {s: [(1, 1, 1, 1, 1)] for s in symbols})
+
+        with patch("app.services.market_data.yf.download", side_effect=fake_download):
+            prices = PriceFetcher().fetch_historical_prices_batch_sync(
+                [("VWCE", "IE00BK5BQT80"), ("AAPL", None), ("MSFT", None)], day, day
+            )
+
+        assert len(calls) == 2
+        assert [symbols for symbols, _ in calls] == [["IE00BK5BQT80", "AAPL"], ["MSFT"]]
+        assert calls[0][1]["end"] == day + timedelta(days=1)
+        assert set(prices) == {"VWCE", "AAPL", "MSFT"}
+
+    def test_failed_chunk_does_not_stop_others(self, monkeypatch):
+        monkeypatch.setattr(PriceFetcher, "HISTORY_BATCH_SIZE", 1)
+        day = date(2026, 10, 15)
+
+        def fake_download(symbols, **kwargs):
+            if symbols == ["BAD"]:
+                raise RuntimeError("rate limited")
+            return make_download_frame([day], {s: [(1, 1, 1, 1, 1)] for s in symbols})
+
+        with patch("app.services.market_data.yf.download", side_effect=fake_download):
+            prices = PriceFetcher().fetch_historical_prices_batch_sync(
+                [("BAD", None), ("AAPL", None)], day, day
+            )
+
+        assert list(prices) == ["AAPL"]
+
+
+class TestUpdateDailyPrices:
+    def test_fetches_missing_tickers_once_and_inserts_in_one_statement(self):
+        positions = [
+            Mock(current_ticker="AAPL", isin=None),
+            Mock(current_ticker="MSFT", isin=None),
+            Mock(current_ticker="VWCE", isin="IE00BK5BQT80"),
+        ]
+        db = MagicMock()
+        statements = []
+
+        def execute(statement):
+            statements.append(statement)
+            result = MagicMock()
+            if len(statements) == 1:
+                result.scalars.return_value.all.return_value = positions
+            elif len(statements) == 2:
+                result.scalars.return_value.all.return_value = ["MSFT"]
+            else:
+                result.scalars.return_value.all.return_value = ["AAPL"]
+            return result
+        db.execute.side_effect = execute
+
+        def fetch_batch(tickers, start_date, end_date):
+            return {
+                "AAPL": [{"date": start_date, "open": Decimal("1"), "high": Decimal("1"),
+                          "low": Decimal("1"), "close": Decimal("1"), "volume": 1, "source": "yahoo"}]
+            }
+
+        with patch("app.tasks.price_updates.SyncSessionLocal", return_value=db), \
+             patch("app.tasks.price_updates.PriceFetcher") as fetcher_class, \
+             patch("app.tasks.price_updates.LatestPriceService.refresh") as refresh, \
+             patch("app.tasks.price_updates.price_matrix") as matrix, \
+             patch("app.tasks.price_updates.CacheGenerations.bump"), \
+             patch("app.tasks.price_updates.SystemStateManager.update_price_last_update"):
+            fetcher_class.return_value.fetch_historical_prices_batch_sync.side_effect = fetch_batch
+
+            summary = update_daily_prices()
+
+        fetcher = fetcher_class.return_value
+        fetcher.fetch_historical_prices_batch_sync.assert_called_once()
+        requested = fetcher.fetch_historical_prices_batch_sync.call_args.kwargs["tickers"]
+        assert requested == [("AAPL", None), ("VWCE", "IE00BK5BQT80")]
+
+        # Positions query, existence check, single insert
+        assert len(statements) == 3
+        insert_sql = str(statements[2].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uix_ticker_date DO NOTHING" in insert_sql
+
+        refresh.assert_called_once_with(db, ["AAPL"])
+        matrix.invalidate.assert_called_once_with(["AAPL"])
+        assert summary["updated"] == 1
+        assert summary["skipped"] == 1
+        assert summary["failed"] == 1
+        assert summary["failed_tickers"] == ["VWCE"]
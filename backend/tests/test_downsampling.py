@@ -0,0 +1,97 @@
+"""
+Unit tests for chart series downsampling (LTTB and calendar bucketing).
+"""
+import pytest
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.downsampling import (
+    calendar_bucket_indices,
+    downsample_indices,
+    lttb_indices,
+    take,
+)
+
+
+pytestmark = pytest.mark.unit
+
+
+def _days(start, count):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+class TestLTTB:
+    """Tests for lttb_indices."""
+
+    def test_short_series_are_returned_whole(self):
+        assert lttb_indices([0, 1, 2], [5, 6, 7], 10).tolist() == [0, 1, 2]
+
+    def test_keeps_the_endpoints_and_max_points(self):
+        x = np.arange(1000)
+        y = np.sin(x / 50.0)
+
+        indices = lttb_indices(x, y, 100)
+
+        assert len(indices) == 100
+        assert indices[0] == 0 and indices[-1] == 999
+        assert np.all(np.diff(indices) > 0)
+
+    def test_keeps_spikes(self):
+        """A single outlier forms the largest triangle in its bucket."""
+        y = np.zeros(500)
+        y[123] = 100.0
+        y[377] = -80.0
+
+        indices = lttb_indices(np.arange(500), y, 20)
+
+        assert 123 in indices
+        assert 377 in indices
+
+
+class TestCalendarBuckets:
+    """Tests for calendar_bucket_indices."""
+
+    def test_weekly_keeps_the_start_and_each_week_close(self):
+        # 2024-01-03 is a Wednesday; Sundays are 7, 14 and 21 January
+        dates = _days(date(2024, 1, 3), 21)
+
+        indices = calendar_bucket_indices(dates, "weekly")
+
+        assert take(dates, indices) == [
+            date(2024, 1, 3), date(2024, 1, 7), date(2024, 1, 14), date(2024, 1, 21), date(2024, 1, 23)
+        ]
+
+    def test_monthly_keeps_month_ends_even_with_gaps(self):
+        dates = [date(2024, 1, 15), date(2024, 1, 30), date(2024, 2, 2), date(2024, 4, 1), date(2024, 4, 3)]
+
+        assert calendar_bucket_indices(dates, "monthly").tolist() == [0, 1, 2, 4]
+
+    def test_daily_is_unchanged(self):
+        assert calendar_bucket_indices(_days(date(2024, 1, 1), 4), "daily").tolist() == [0, 1, 2, 3]
+
+    def test_unknown_resolution(self):
+        with pytest.raises(ValueError):
+            calendar_bucket_indices([date(2024, 1, 1)], "hourly")
+
+
+class TestDownsampleIndices:
+    """Tests for downsample_indices."""
+
+    def test_no_parameters_keeps_everything(self):
+        dates = _days(date(2024, 1, 1), 10)
+
+        assert downsample_indices(dates, list(range(10))).tolist() == list(range(10))
+
+    def test_buckets_then_lttb(self):
+        """ALL over five years: weekly closes, then at most 100 of them."""
+        dates = _days(date(2020, 1, 1), 5 * 365)
+        values = [float(i % 97) for i in range(len(dates))]
+
+        weekly = downsample_indices(dates, values, resolution="weekly")
+        reduced = downsample_indices(dates, values, max_points=100, resolution="weekly")
+
+        assert len(weekly) == 262
+        assert len(reduced) == 100
+        assert set(reduced.tolist()) <= set(weekly.tolist())
+        assert reduced[0] == 0 and reduced[-1] == len(dates) - 1
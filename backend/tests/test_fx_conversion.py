@@ -190,11 +190,13 @@ class TestFXRateService:
 
     @pytest.mark.asyncio
     async def test_fx_historical_rate_fallback_to_current(self):
-        """Test that historical rates fall back to current rates."""
+        """Test that historical rates fall back to current rates without stored history."""
         service = FXRateService()
 
         mock_rate = Decimal("0.92")
-        with patch.object(service, 'get_current_fx_rate', return_value=mock_rate):
+        with patch.object(service, '_get_cached_historical_rate', return_value=None), \
+             patch.object(service, '_get_stored_historical_rate', return_value=None), \
+             patch.object(service, 'get_current_fx_rate', return_value=mock_rate):
             historical = await service.get_historical_fx_rate(
                 "USD", "EUR",
                 date.today() - timedelta(days=30)
@@ -202,6 +204,21 @@ class TestFXRateService:
 
             assert historical == mock_rate
 
+    @pytest.mark.asyncio
+    async def test_fx_historical_rate_uses_stored_history(self):
+        """Test that historical rates come from the stored daily series."""
+        service = FXRateService()
+        rate_date = date.today() - timedelta(days=30)
+
+        with patch.object(service, '_get_cached_historical_rate', return_value=None), \
+             patch.object(service, '_get_stored_historical_rate', return_value=Decimal("0.9")) as stored, \
+             patch.object(service, 'get_current_fx_rate') as current:
+            historical = await service.get_historical_fx_rate("USD", "EUR", rate_date)
+
+            assert historical == Decimal("0.9")
+            stored.assert_called_once_with("USD", "EUR", rate_date)
+            current.assert_not_called()
+
     def test_fx_fallback_rate_direct_match(self):
         """Test getting fallback rate for configured currency pair."""
         service = FXRateService()
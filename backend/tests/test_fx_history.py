@@ -0,0 +1,165 @@
+"""
+Tests for the stored FX history (dense as-of series, missing-span sync, vectorized conversion).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.fx_history import FXHistoryService, FXSeries
+
+pytestmark = pytest.mark.unit
+
+FRIDAY = date(2024, 1, 5)
+
+
+def rate(on, close):
+    return {"date": on, "open": Decimal(close), "high": Decimal(close), "low": Decimal(close),
+            "close": Decimal(close), "volume": 0, "source": "yahoo"}
+
+
+class TestFXSeries:
+    def test_weekends_use_the_last_rate(self):
+        monday = FRIDAY + timedelta(days=3)
+        series = FXSeries.from_rows([FRIDAY, monday], [1.1, 1.2])
+
+        rates = series.rates_on([FRIDAY, FRIDAY + timedelta(days=1), FRIDAY + timedelta(days=2), monday])
+
+        assert rates.tolist() == [1.1, 1.1, 1.1, 1.2]
+        assert series.last_date == monday
+
+    def test_dates_outside_the_series_are_clamped(self):
+        series = FXSeries.from_rows([FRIDAY, FRIDAY + timedelta(days=1)], [1.1, 1.2])
+
+        assert series.rate_on(FRIDAY - timedelta(days=30)) == 1.1
+        assert series.rate_on(FRIDAY + timedelta(days=30)) == 1.2
+
+    def test_inverse(self):
+        series = FXSeries.from_rows([FRIDAY], [1.25])
+
+        assert series.inverse().rate_on(FRIDAY) == 0.8
+
+
+class TestSync:
+    @pytest.fixture
+    def service(self, monkeypatch):
+        service = FXHistoryService(MagicMock())
+        self.written = []
+        monkeypatch.setattr(
+            FXHistoryService, "upsert_rates",
+            classmethod(lambda cls, db, rows: self.written.extend(rows) or
+                        {(row["base"], row["quote"]): 1 for row in rows})
+        )
+        with patch.object(service, "invalidate"), patch("app.services.fx_history.CacheGenerations.bump"):
+            yield service
+
+    def test_pairs_sharing_a_span_share_one_download(self, service):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = []
+        service.price_fetcher.fetch_historical_prices_batch_sync.return_value = {
+            "EURUSD=X": [rate(FRIDAY, "1.1")],
+        }
+
+        written = service.sync(db, [("USD", "EUR"), ("EUR", "USD"), ("GBP", "EUR")], FRIDAY, FRIDAY)
+
+        service.price_fetcher.fetch_historical_prices_batch_sync.assert_called_once_with(
+            [("EURGBP=X", None), ("EURUSD=X", None)], FRIDAY, FRIDAY
+        )
+        assert written == {("EUR", "USD"): 1}
+        assert self.written[0]["rate"] == Decimal("1.1")
+        db.commit.assert_called_once()
+
+    def test_only_days_after_the_stored_history_are_downloaded(self, service):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [("EUR", "USD", date(2020, 1, 1), FRIDAY)]
+        service.price_fetcher.fetch_historical_prices_batch_sync.return_value = {}
+
+        service.sync(db, [("EUR", "USD")], date(2021, 1, 1), FRIDAY + timedelta(days=10))
+
+        service.price_fetcher.fetch_historical_prices_batch_sync.assert_called_once_with(
+            [("EURUSD=X", None)], FRIDAY, FRIDAY + timedelta(days=10)
+        )
+
+    def test_upsert_overwrites_stored_days(self):
+        db = MagicMock()
+        rows = [{"base": "EUR", "quote": "USD", "date": FRIDAY, "rate": Decimal("1.1"), "source": "yahoo",
+                 "updated_at": None}] * 2
+
+        assert FXHistoryService.upsert_rates(db, rows) == {("EUR", "USD"): 1}
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (base, quote, date) DO UPDATE" in sql
+
+
+class TestConvertSeries:
+    START = date.today() - timedelta(days=3)
+
+    @pytest.fixture
+    def service(self):
+        service = FXHistoryService(MagicMock())
+        series = FXSeries.from_rows([self.START, self.START + timedelta(days=3)], [1.25, 1.6])
+        with patch.object(service, "_load", return_value=series), patch.object(service, "sync") as sync, \
+             patch("app.services.fx_history.SyncSessionLocal") as session_factory:
+            self.sync = sync
+            self.sync_db = session_factory.return_value
+            yield service
+
+    def test_converts_each_value_at_its_date(self, service):
+        dates = [self.START, self.START + timedelta(days=1), self.START + timedelta(days=3)]
+
+        converted = service.convert_series(MagicMock(), [10.0, 10.0, 10.0], dates, "USD", "EUR")
+
+        np.testing.assert_allclose(converted, [8.0, 8.0, 6.25])
+        self.sync.assert_not_called()
+
+    def test_same_currency_is_unchanged(self, service):
+        converted = service.convert_series(MagicMock(), [1.5], [self.START], "EUR", "eur")
+
+        assert converted.tolist() == [1.5]
+
+    def test_missing_history_is_synced_once_then_raises(self, service):
+        with patch.object(service, "_load", return_value=None):
+            with pytest.raises(ValueError):
+                service.convert_series(MagicMock(), [1.0], [self.START], "EUR", "JPY")
+            with pytest.raises(ValueError):
+                service.convert_series(MagicMock(), [1.0], [self.START], "EUR", "JPY")
+
+        self.sync.assert_called_once()
+
+    def test_sync_runs_in_its_own_session(self, service):
+        """The caller's session is only read; the sync commits or rolls back its own."""
+        db = MagicMock()
+        self.sync.side_effect = RuntimeError("provider down")
+
+        with patch.object(service, "_load", return_value=None):
+            assert service.series(db, "EUR", "JPY", start_date=self.START) is None
+
+        assert self.sync.call_args.args[0] is self.sync_db
+        self.sync_db.rollback.assert_called_once()
+        self.sync_db.close.assert_called_once()
+        db.commit.assert_not_called()
+        db.rollback.assert_not_called()
+
+    def test_sync_retries_are_throttled_per_pair(self, service):
+        """Days the provider has no history for do not each start another full-range sync."""
+        for days_back in (100, 200, 300, 400, 500):
+            assert service.rate_on(MagicMock(), "USD", "EUR", self.START - timedelta(days=days_back)) == 0.8
+
+        self.sync.assert_called_once()
+
+    def test_a_complete_sync_allows_an_earlier_start(self, service):
+        """Only a sync that covered its range lets an earlier day sync again within the window."""
+        stored = [None]
+        covered = FXSeries.from_rows([self.START - timedelta(days=30), self.START + timedelta(days=3)], [1.25, 1.6])
+        self.sync.side_effect = lambda *args, **kwargs: stored.__setitem__(0, covered)
+
+        with patch.object(service, "_load", side_effect=lambda db, pair: stored[0]):
+            for days_back in (30, 60, 90):
+                service.rate_on(MagicMock(), "EUR", "USD", self.START - timedelta(days=days_back))
+
+        # 30 days back completed; 60 days back synced once more but the provider had nothing older
+        assert [c.kwargs["start_date"] for c in self.sync.call_args_list] == [
+            self.START - timedelta(days=30), self.START - timedelta(days=60)
+        ]
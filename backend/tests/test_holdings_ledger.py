@@ -0,0 +1,127 @@
+"""
+Unit tests for the daily holdings ledger replay.
+
+The ledger must apply the same average cost rule as PositionManager
+(FinancialCalculations.calculate_cost_basis) so positions and snapshots agree.
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.models import TransactionType
+from app.services.calculations import FinancialCalculations
+from app.services.holdings_ledger import apply_transaction, holding_key, replay_holdings
+
+
+pytestmark = pytest.mark.unit
+
+
+def _txn(op_date, txn_type, isin, ticker, quantity, amount, fees="0"):
+    return SimpleNamespace(
+        operation_date=op_date,
+        transaction_type=txn_type,
+        isin=isin,
+        ticker=ticker,
+        quantity=Decimal(quantity),
+        amount_eur=Decimal(amount),
+        fees=Decimal(fees),
+    )
+
+
+def _snapshot(state):
+    return {key: dict(holding) for key, holding in state.items()}
+
+
+class TestApplyTransaction:
+    """Tests for the per-transaction state update."""
+
+    def test_matches_position_manager_cost_basis(self):
+        """Sells reduce cost basis proportionally, exactly like positions."""
+        transactions = [
+            _txn(date(2024, 1, 1), TransactionType.BUY, "US0001", "AAA", "10", "1000", "5"),
+            _txn(date(2024, 1, 2), TransactionType.BUY, "US0001", "AAA", "5", "600", "2"),
+            _txn(date(2024, 1, 3), TransactionType.SELL, "US0001", "AAA", "6", "900", "3"),
+        ]
+        state = {"ticker": "AAA", "quantity": Decimal("0"), "cost_basis": Decimal("0")}
+        for txn in transactions:
+            apply_transaction(state, txn)
+
+        txn_dicts = [
+            {
+                "transaction_type": t.transaction_type.value,
+                "quantity": t.quantity,
+                "amount_eur": t.amount_eur,
+                "fees": t.fees,
+            }
+            for t in transactions
+        ]
+        assert state["quantity"] == FinancialCalculations.calculate_position_quantity(txn_dicts)
+        assert state["cost_basis"] == FinancialCalculations.calculate_cost_basis(txn_dicts)
+
+    def test_full_sale_clears_cost_basis(self):
+        """Closing a position leaves no rounding residue."""
+        state = {"ticker": "AAA", "quantity": Decimal("0"), "cost_basis": Decimal("0")}
+        apply_transaction(state, _txn(date(2024, 1, 1), TransactionType.BUY, "X", "AAA", "3", "1000"))
+        apply_transaction(state, _txn(date(2024, 1, 2), TransactionType.SELL, "X", "AAA", "3", "1100"))
+
+        assert state["quantity"] == Decimal("0")
+        assert state["cost_basis"] == Decimal("0")
+
+    def test_oversell_clamps_at_zero(self):
+        """Selling more than is held closes the holding, like calculate_cost_basis."""
+        transactions = [
+            _txn(date(2024, 1, 1), TransactionType.BUY, "X", "AAA", "3", "300"),
+            _txn(date(2024, 1, 2), TransactionType.SELL, "X", "AAA", "5", "600"),
+        ]
+        state = {"ticker": "AAA", "quantity": Decimal("0"), "cost_basis": Decimal("0")}
+        for txn in transactions:
+            apply_transaction(state, txn)
+
+        txn_dicts = [
+            {"transaction_type": t.transaction_type.value, "quantity": t.quantity, "amount_eur": t.amount_eur,
+             "fees": t.fees}
+            for t in transactions
+        ]
+        assert state["quantity"] == Decimal("0") == FinancialCalculations.calculate_position_quantity(txn_dicts)
+        assert state["cost_basis"] == Decimal("0") == FinancialCalculations.calculate_cost_basis(txn_dicts)
+
+
+class TestReplayHoldings:
+    """Tests for the day-by-day replay."""
+
+    def test_days_carry_state_forward(self):
+        """Each day starts from the previous day's holdings plus its own transactions."""
+        transactions = [
+            _txn(date(2024, 1, 2), TransactionType.BUY, "US0001", "AAA", "10", "1000"),
+            _txn(date(2024, 1, 4), TransactionType.BUY, None, "BBB", "1", "50"),
+            _txn(date(2024, 1, 4), TransactionType.SELL, "US0001", "AAA", "10", "1200"),
+        ]
+
+        days = [
+            (day, _snapshot(state))
+            for day, state in replay_holdings({}, transactions, date(2024, 1, 1), date(2024, 1, 5))
+        ]
+
+        assert [day for day, _ in days] == [date(2024, 1, 1) + timedelta(days=i) for i in range(5)]
+        assert days[0][1] == {}
+        assert days[1][1][holding_key("US0001", "AAA")]["quantity"] == Decimal("10")
+        assert days[2][1] == days[1][1]
+        # Closed holdings drop out; ticker-only holdings are keyed by ticker
+        assert list(days[3][1]) == [(None, "BBB")]
+        assert days[4][1] == days[3][1]
+
+    def test_resumes_from_existing_state(self):
+        """Replay can start from a previously materialized day."""
+        state = {("US0001", None): {"ticker": "AAA", "quantity": Decimal("4"), "cost_basis": Decimal("400")}}
+        transactions = [
+            _txn(date(2024, 2, 2), TransactionType.SELL, "US0001", "AAA.NEW", "1", "150"),
+        ]
+
+        [(day, holdings)] = list(replay_holdings(state, transactions, date(2024, 2, 2), date(2024, 2, 2)))
+
+        assert holdings[("US0001", None)] == {
+            "ticker": "AAA.NEW",
+            "quantity": Decimal("3"),
+            "cost_basis": Decimal("300"),
+        }
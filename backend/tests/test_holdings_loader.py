@@ -0,0 +1,83 @@
+"""
+Unit tests for the single-query holdings loader and its response building.
+"""
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.portfolio import build_position_response
+from app.models import AssetType
+from app.services.asof_prices import PricePoint
+from app.services.holdings_loader import HoldingsLoader
+
+
+pytestmark = pytest.mark.unit
+
+
+def _position(ticker="AAA"):
+    return SimpleNamespace(
+        id=1,
+        current_ticker=ticker,
+        isin="US0001",
+        description="Test",
+        asset_type=AssetType.STOCK,
+        quantity=Decimal("10"),
+        average_cost=Decimal("90"),
+        cost_basis=Decimal("900"),
+        last_calculated_at=datetime(2024, 1, 2),
+    )
+
+
+class TestHoldingsLoader:
+    """Tests for HoldingsLoader."""
+
+    def test_query_joins_prices_and_metrics(self):
+        """Positions, latest prices and cached IRR come from one statement."""
+        sql = str(HoldingsLoader._build_query().compile(dialect=postgresql.dialect()))
+
+        assert sql.count("SELECT") == 1
+        assert "LEFT OUTER JOIN latest_prices" in sql
+        assert "LEFT OUTER JOIN cached_metrics" in sql
+
+    async def test_rows_carry_latest_first_price_history(self):
+        """Latest and previous close are returned latest first; no fallback query when all are priced."""
+        result = MagicMock()
+        result.all.return_value = [
+            (_position(), date(2024, 1, 3), Decimal("110"), date(2024, 1, 2), Decimal("100"), 0.12),
+        ]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+
+        [row] = await HoldingsLoader.load(db)
+
+        assert row.price_history == [PricePoint(date(2024, 1, 3), Decimal("110")), PricePoint(date(2024, 1, 2), Decimal("100"))]
+        assert row.irr == 0.12
+        assert db.execute.await_count == 1
+
+
+class TestBuildPositionResponse:
+    """Tests for build_position_response."""
+
+    def test_values_and_today_change(self):
+        """Current value, gain and today's change derive from the two closes."""
+        history = [PricePoint(date(2024, 1, 3), Decimal("110")), PricePoint(date(2024, 1, 2), Decimal("100"))]
+
+        response = build_position_response(_position(), history, 0.12)
+
+        assert response.current_value == Decimal("1100")
+        assert response.unrealized_gain == Decimal("200")
+        assert response.today_change == Decimal("100")
+        assert response.today_change_percent == pytest.approx(10.0)
+        assert response.irr == 0.12
+
+    def test_unpriced_position(self):
+        """Positions without prices have no value fields."""
+        response = build_position_response(_position(), [], None)
+
+        assert response.current_price is None
+        assert response.current_value is None
+        assert response.today_change is None
@@ -0,0 +1,59 @@
+"""
+Unit tests for the latest_prices read/refresh helpers.
+"""
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.asof_prices import AsOfPriceGrid
+from app.services.latest_prices import LatestPriceService
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestLatestPriceRows:
+    """Tests for turning latest_prices rows into a price grid."""
+
+    def test_rows_answer_latest_and_previous_close(self):
+        """A row yields the same history() as the two newest PriceHistory rows."""
+        today = date.today()
+        rows = [
+            ("AAA", today - timedelta(days=1), Decimal("110"), today - timedelta(days=4), Decimal("100")),
+            ("BBB", today - timedelta(days=2), Decimal("50"), None, None),
+        ]
+
+        grid = AsOfPriceGrid(LatestPriceService._to_series(rows))
+
+        assert [p.close for p in grid.history("AAA", today, 2)] == [Decimal("110"), Decimal("100")]
+        assert grid.price("AAA", today) == Decimal("110")
+        assert [p.close for p in grid.history("BBB", today, 2)] == [Decimal("50")]
+        assert grid.lookup("CCC", today) is None
+
+    def test_fallback_grid_is_converted_to_ascending_series(self):
+        """Tickers loaded from PriceHistory keep only their last two closes."""
+        today = date.today()
+        grid = AsOfPriceGrid({"AAA": [
+            (today - timedelta(days=3), Decimal("1")),
+            (today - timedelta(days=2), Decimal("2")),
+            (today - timedelta(days=1), Decimal("3")),
+        ]})
+
+        series = LatestPriceService._grid_series(grid, ["AAA", "MISSING"])
+
+        assert series == {"AAA": [(today - timedelta(days=2), Decimal("2")), (today - timedelta(days=1), Decimal("3"))]}
+
+
+class TestLatestPriceRefresh:
+    """Tests for the refresh statement."""
+
+    def test_refresh_is_a_single_upsert_for_all_tickers(self):
+        """All tickers are refreshed by one INSERT ... SELECT ... ON CONFLICT."""
+        stmt = LatestPriceService._build_refresh(["AAA", "BBB"], datetime(2024, 1, 2))
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        assert sql.startswith("INSERT INTO latest_prices")
+        assert sql.count("JOIN LATERAL") == 2
+        assert "ON CONFLICT (ticker) DO UPDATE" in sql
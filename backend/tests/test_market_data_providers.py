@@ -0,0 +1,166 @@
+"""
+Tests for the pluggable market data providers (fixture, record/replay) and
+PriceFetcher running on them offline.
+"""
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.services.market_data import (
+    MarketDataError,
+    create_market_data_provider,
+    set_market_data_provider,
+)
+from app.services.market_data_fixtures import FixtureProvider, RecordingProvider, ReplayProvider
+from app.services.price_fetcher import PriceFetcher
+
+pytestmark = pytest.mark.unit
+
+START = date(2024, 1, 1)
+END = date(2024, 3, 31)
+
+
+@pytest.fixture
+def fixture_provider():
+    provider = FixtureProvider(seed=7)
+    set_market_data_provider(provider)
+    yield provider
+    set_market_data_provider(None)
+
+
+class TestFixtureProvider:
+    def test_generated_history_is_deterministic(self):
+        first = FixtureProvider(seed=7).history(["AAPL"], START, END)
+        second = FixtureProvider(seed=7).history(["AAPL"], START, END)
+        other_seed = FixtureProvider(seed=8).history(["AAPL"], START, END)
+
+        assert first == second
+        assert first["AAPL"][0]["close"] != other_seed["AAPL"][0]["close"]
+
+    def test_prices_do_not_depend_on_requested_range(self):
+        provider = FixtureProvider(seed=7)
+        month = provider.history(["AAPL"], date(2024, 2, 1), date(2024, 2, 29))["AAPL"]
+
+        quarter = FixtureProvider(seed=7).history(["AAPL"], START, END)["AAPL"]
+
+        assert month == [p for p in quarter if date(2024, 2, 1) <= p["date"] <= date(2024, 2, 29)]
+
+    def test_calendars_and_record_shape(self):
+        prices = FixtureProvider().history(["AAPL", "BTC-USD"], START, date(2024, 1, 7))
+
+        assert [p["date"].weekday() for p in prices["AAPL"]] == [0, 1, 2, 3, 4]
+        assert len(prices["BTC-USD"]) == 7
+        record = prices["AAPL"][0]
+        assert set(record) == {"date", "open", "high", "low", "close", "volume", "source"}
+        assert record["low"] <= min(record["open"], record["close"])
+        assert record["high"] >= max(record["open"], record["close"])
+        assert record["source"] == "fixture"
+
+    def test_serves_csv_fixtures(self, tmp_path):
+        (tmp_path / "VWCE.DE.csv").write_text(
+            "Date,Close,Volume\n"
+            "2024-01-03,101.5,\n"
+            "2024-01-02,100.0,10\n"
+        )
+
+        prices = FixtureProvider(fixture_dir=str(tmp_path)).history(["VWCE.DE"], START, END)["VWCE.DE"]
+
+        assert [p["date"] for p in prices] == [date(2024, 1, 2), date(2024, 1, 3)]
+        assert prices[1]["open"] == prices[1]["close"] == Decimal("101.5")
+        assert prices[1]["volume"] == 0
+
+    def test_quote_and_fx(self):
+        provider = FixtureProvider()
+
+        quote = provider.quote("AAPL")
+        eur_usd = provider.fx_rate("EUR", "USD")
+        usd_eur = provider.fx_rate("USD", "EUR")
+
+        assert quote["current_price"] > 0 and quote["previous_close"] > 0
+        assert provider.fx_rate("EUR", "EUR") == Decimal("1")
+        assert abs(eur_usd * usd_eur - 1) < Decimal("0.00001")
+
+    def test_injects_latency_and_errors(self):
+        provider = FixtureProvider(latency_seconds=0.25, error_rate=1.0)
+
+        with patch("app.services.market_data_fixtures.time.sleep") as sleep:
+            with pytest.raises(MarketDataError):
+                provider.quote("AAPL")
+
+        sleep.assert_called_once_with(0.25)
+
+
+class TestRecordReplay:
+    def test_replays_recorded_answers(self, tmp_path):
+        cassette = str(tmp_path / "cassette.json")
+        recorder = RecordingProvider(FixtureProvider(seed=3), cassette)
+        recorded = recorder.history(["AAPL", "MSFT"], START, END)
+        rate = recorder.fx_rate("EUR", "USD")
+        info = recorder.search("aapl")
+
+        replay = ReplayProvider(cassette)
+
+        # History is recorded per symbol, so it can be replayed in other batches
+        assert replay.history(["MSFT"], START, END) == {"MSFT": recorded["MSFT"]}
+        assert replay.history(["AAPL", "MSFT"], START, END) == recorded
+        assert replay.fx_rate("EUR", "USD") == rate
+        assert replay.search("aapl") == info
+
+    def test_each_call_appends_its_answers(self, tmp_path):
+        """Recording writes only the new answers; a repeated call's latest answer wins."""
+        cassette = tmp_path / "cassette.jsonl"
+        recorder = RecordingProvider(FixtureProvider(seed=3), str(cassette))
+        recorder.history(["AAPL", "MSFT"], START, END)
+        recorder.search("aapl")
+        recorder.search("aapl")
+
+        assert len(cassette.read_text().splitlines()) == 4
+        assert ReplayProvider(str(cassette)).search("aapl") == recorder.search("aapl")
+
+    def test_replays_single_document_cassettes(self, tmp_path):
+        cassette = tmp_path / "cassette.json"
+        cassette.write_text(json.dumps({"version": 1, "entries": {'["search", ["aapl"]]': {"ticker": "AAPL"}}}))
+
+        assert ReplayProvider(str(cassette)).search("aapl") == {"ticker": "AAPL"}
+
+    def test_unrecorded_calls_fail(self, tmp_path):
+        replay = ReplayProvider(str(tmp_path / "missing.json"))
+
+        with pytest.raises(MarketDataError):
+            replay.quote("AAPL")
+
+    def test_factory_requires_cassette(self, monkeypatch):
+        monkeypatch.setattr("app.services.market_data.settings.market_data_cassette", None)
+
+        with pytest.raises(ValueError):
+            create_market_data_provider("replay")
+        with pytest.raises(ValueError):
+            create_market_data_provider("bloomberg")
+
+
+class TestPriceFetcherOffline:
+    def test_historical_end_date_is_inclusive(self, fixture_provider):
+        day = date(2024, 1, 5)
+
+        prices = PriceFetcher().fetch_historical_prices_sync("AAPL", start_date=day, end_date=day)
+
+        assert [p["date"] for p in prices] == [day]
+
+    def test_batch_latest_and_fx(self, fixture_provider):
+        batch = PriceFetcher().fetch_historical_prices_batch_sync([("AAPL", None), ("MSFT", None)], START, END)
+        latest = PriceFetcher().fetch_latest_price("AAPL")
+
+        assert set(batch) == {"AAPL", "MSFT"}
+        assert latest["date"] >= date.today() - timedelta(days=PriceFetcher.LATEST_PRICE_LOOKBACK_DAYS)
+        assert PriceFetcher.fetch_fx_rate_sync("EUR", "USD") == fixture_provider.fx_rate("EUR", "USD")
+
+    async def test_realtime_quote_and_provider_errors(self, fixture_provider):
+        quote = PriceFetcher()._fetch_realtime_price("AAPL", None)
+        assert quote["change_amount"] == quote["current_price"] - quote["previous_close"]
+
+        fixture_provider.error_rate = 1.0
+        assert await PriceFetcher.fetch_fx_rate("EUR", "USD") is None
+        assert PriceFetcher()._fetch_realtime_price("AAPL", None) is None
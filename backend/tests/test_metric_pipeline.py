@@ -0,0 +1,90 @@
+"""
+Unit tests for the in-memory stage of the metric calculation pipeline.
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import TransactionType
+from app.services.asof_prices import AsOfPriceGrid
+from app.tasks.metric_calculation import _dirty_key, _load_position_transactions, _position_metrics
+
+
+pytestmark = pytest.mark.unit
+
+
+def _txn(days_ago, txn_type, amount, fees="0"):
+    return SimpleNamespace(
+        operation_date=date.today() - timedelta(days=days_ago),
+        transaction_type=txn_type,
+        amount_eur=Decimal(amount),
+        fees=Decimal(fees),
+    )
+
+
+POSITION = SimpleNamespace(
+    current_ticker="AAA",
+    isin="US0001",
+    quantity=Decimal("10"),
+    average_cost=Decimal("100.5"),
+)
+
+
+class TestPositionMetrics:
+    """Tests for _position_metrics."""
+
+    def test_metrics_and_cash_flows_from_preloaded_data(self):
+        """Metrics come from the preloaded transactions and price grid."""
+        transactions = [
+            _txn(400, TransactionType.BUY, "1000", "5"),
+            _txn(200, TransactionType.SELL, "300", "2"),
+        ]
+        prices = AsOfPriceGrid({"AAA": [(date.today() - timedelta(days=1), Decimal("120"))]})
+
+        metrics, cash_flows, current_value = _position_metrics(POSITION, transactions, prices)
+
+        assert current_value == Decimal("1200")
+        assert cash_flows == [
+            (transactions[0].operation_date, Decimal("-1005")),
+            (transactions[1].operation_date, Decimal("298")),
+        ]
+        assert metrics["total_invested"] == 1005.0
+        assert metrics["current_price"] == 120.0
+        assert metrics["days_held"] == 400
+        assert metrics["irr"] is None
+
+    def test_positions_without_transactions_are_skipped(self):
+        """No transactions means no metrics (and no price lookup)."""
+        assert _position_metrics(POSITION, [], AsOfPriceGrid({})) is None
+
+
+class TestLoadPositionTransactions:
+    """Tests for _load_position_transactions."""
+
+    def test_ticker_only_positions_get_their_transactions(self):
+        """Positions without an ISIN match ticker-only transactions, keyed like the dirty tracker."""
+        ticker_only = SimpleNamespace(current_ticker="BBB", isin=None)
+        with_isin = [_txn(10, TransactionType.BUY, "100")]
+        without_isin = [_txn(5, TransactionType.BUY, "50")]
+        with_isin[0].isin, with_isin[0].ticker = "US0001", "AAA"
+        without_isin[0].isin, without_isin[0].ticker = None, "BBB"
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = with_isin + without_isin
+
+        transactions = _load_position_transactions(db, [POSITION, ticker_only])
+
+        assert transactions[_dirty_key(POSITION)] == with_isin
+        assert transactions[_dirty_key(ticker_only)] == without_isin
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "transactions.isin IN" in sql
+        assert "transactions.isin IS NULL AND transactions.ticker IN" in sql
+
+    def test_no_positions_skip_the_query(self):
+        db = MagicMock()
+
+        assert _load_position_transactions(db, []) == {}
+        db.execute.assert_not_called()
@@ -0,0 +1,107 @@
+"""
+Unit tests for dirty-tracked metric recalculation.
+
+Clean positions and crypto portfolios are revalued from inputs cached with their
+metrics; these tests check that the cached inputs round-trip exactly and that a
+refresh produces the same metrics as a full recompute.
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.models import TransactionType
+from app.models.crypto import CryptoTransactionType
+from app.services.asof_prices import AsOfPriceGrid
+from app.tasks.crypto_metric_calculation import (
+    _calculate_holdings_from_transactions,
+    _holdings_from_basis,
+    _holdings_to_basis,
+)
+from app.tasks.metric_calculation import (
+    _inputs_from_cache,
+    _metrics_from_inputs,
+    _position_inputs,
+    _position_metrics,
+)
+
+
+pytestmark = pytest.mark.unit
+
+
+POSITION = SimpleNamespace(
+    current_ticker="AAA",
+    isin="US0001",
+    quantity=Decimal("10"),
+    average_cost=Decimal("100.5"),
+)
+
+
+def _txn(days_ago, txn_type, amount, fees="0"):
+    return SimpleNamespace(
+        operation_date=date.today() - timedelta(days=days_ago),
+        transaction_type=txn_type,
+        amount_eur=Decimal(amount),
+        fees=Decimal(fees),
+    )
+
+
+class TestPositionRefresh:
+    """Tests for the mark-to-market refresh of traditional positions."""
+
+    def test_cached_inputs_round_trip(self):
+        """Inputs stored with the metrics restore to the exact Decimal cash flows."""
+        transactions = [
+            _txn(400, TransactionType.BUY, "1000.12345678", "5"),
+            _txn(200, TransactionType.SELL, "300", "2.5"),
+        ]
+        prices = AsOfPriceGrid({"AAA": [(date.today(), Decimal("120"))]})
+
+        metrics, _, _ = _position_metrics(POSITION, transactions, prices)
+
+        assert _inputs_from_cache(metrics) == _position_inputs(transactions)
+
+    def test_refresh_matches_full_recompute_at_new_price(self):
+        """Revaluing cached inputs at a new price equals recomputing from transactions."""
+        transactions = [_txn(100, TransactionType.BUY, "1000", "1")]
+        old_prices = AsOfPriceGrid({"AAA": [(date.today() - timedelta(days=1), Decimal("100"))]})
+        new_prices = AsOfPriceGrid({"AAA": [(date.today(), Decimal("130"))]})
+
+        cached, _, _ = _position_metrics(POSITION, transactions, old_prices)
+        refreshed = _metrics_from_inputs(POSITION, _inputs_from_cache(cached), new_prices)
+        recomputed = _position_metrics(POSITION, transactions, new_prices)
+
+        for built in (refreshed, recomputed):
+            built[0].pop("calculated_at")
+        assert refreshed == recomputed
+        assert refreshed[0]["current_value"] == 1300.0
+
+    def test_missing_or_invalid_inputs_force_recompute(self):
+        """Metrics cached before inputs were stored (or corrupted) are not reused."""
+        assert _inputs_from_cache(None) is None
+        assert _inputs_from_cache({"irr": 0.1}) is None
+        assert _inputs_from_cache({"inputs": {"cash_flows": [["not-a-date", "1"]]}}) is None
+
+
+class TestCryptoBasis:
+    """Tests for the cached crypto holdings basis."""
+
+    def test_basis_round_trip_is_exact(self):
+        """Holdings restored from the JSON basis equal the replayed holdings."""
+        transactions = [
+            SimpleNamespace(symbol="BTC", transaction_type=CryptoTransactionType.BUY,
+                            quantity=Decimal("0.12345678"), total_amount=Decimal("4000.01")),
+            SimpleNamespace(symbol="BTC", transaction_type=CryptoTransactionType.SELL,
+                            quantity=Decimal("0.02"), total_amount=Decimal("900")),
+            SimpleNamespace(symbol="ETH", transaction_type=CryptoTransactionType.TRANSFER_IN,
+                            quantity=Decimal("1.5"), total_amount=Decimal("0")),
+        ]
+        holdings = _calculate_holdings_from_transactions(transactions)
+
+        assert _holdings_from_basis({"basis": _holdings_to_basis(holdings)}) == holdings
+
+    def test_missing_basis_forces_replay(self):
+        """Portfolios cached without a basis are replayed; an empty basis is valid."""
+        assert _holdings_from_basis({"total_value_eur": 0}) is None
+        assert _holdings_from_basis({"basis": {"BTC": {"quantity": "1"}}}) is None
+        assert _holdings_from_basis({"basis": {}}) == {}
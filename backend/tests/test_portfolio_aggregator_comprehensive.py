@@ -13,7 +13,7 @@ Tests the PortfolioAggregator service with focus on:
 import pytest
 import json
 from decimal import Decimal
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
@@ -148,7 +148,7 @@ class TestCacheBehavior:
         mock_db = AsyncMock(spec=AsyncSession)
         aggregator = PortfolioAggregator(mock_db)
 
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
 
@@ -169,7 +169,7 @@ class TestCacheBehavior:
         aggregator = PortfolioAggregator(mock_db)
 
         test_data = {"key": "value"}
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         mock_redis.get.return_value = json.dumps(test_data)
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
@@ -177,7 +177,7 @@ class TestCacheBehavior:
         result = await aggregator._get_cache("test_key")
 
         assert result == test_data
-        mock_redis.get.assert_called_once_with("test_key")
+        mock_redis.get.assert_awaited_once_with("test_key")
 
     @pytest.mark.asyncio
     async def test_get_cache_miss(self):
@@ -185,7 +185,7 @@ class TestCacheBehavior:
         mock_db = AsyncMock(spec=AsyncSession)
         aggregator = PortfolioAggregator(mock_db)
 
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         mock_redis.get.return_value = None
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
@@ -200,7 +200,7 @@ class TestCacheBehavior:
         mock_db = AsyncMock(spec=AsyncSession)
         aggregator = PortfolioAggregator(mock_db)
 
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         mock_redis.setex.side_effect = Exception("Redis connection lost")
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
@@ -216,7 +216,7 @@ class TestCacheBehavior:
         mock_db = AsyncMock(spec=AsyncSession)
         aggregator = PortfolioAggregator(mock_db)
 
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         mock_redis.get.side_effect = Exception("Redis connection lost")
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
@@ -234,7 +234,7 @@ class TestCacheBehavior:
         mock_db = AsyncMock(spec=AsyncSession)
         aggregator = PortfolioAggregator(mock_db)
 
-        mock_redis = MagicMock()
+        mock_redis = AsyncMock()
         aggregator._redis_client = mock_redis
         aggregator._redis_initialized = True
 
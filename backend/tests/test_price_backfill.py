@@ -0,0 +1,141 @@
+"""
+Tests for the coverage-aware price backfill (missing spans, bulk upserts, coverage merge).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.price_backfill import NO_DATA, UP_TO_DATE, FETCHED, PriceBackfillService
+
+pytestmark = pytest.mark.unit
+
+JAN = date(2024, 1, 1)
+
+
+def day(n):
+    return JAN + timedelta(days=n - 1)
+
+
+def price(on, close="10"):
+    value = Decimal(close)
+    return {"date": on, "open": value, "high": value, "low": value, "close": value, "volume": 5, "source": "yahoo"}
+
+
+class TestMissingSpan:
+    def test_without_coverage_requests_everything(self):
+        assert PriceBackfillService.missing_span([], day(1), day(31)) == (day(1), day(31))
+
+    def test_fully_covered(self):
+        assert PriceBackfillService.missing_span([(day(1), day(31))], day(5), day(20)) is None
+
+    def test_tail_after_coverage(self):
+        assert PriceBackfillService.missing_span([(day(1), day(20))], day(1), day(31)) == (day(21), day(31))
+
+    def test_span_runs_from_first_to_last_gap(self):
+        covered = [(day(1), day(5)), (day(10), day(15)), (day(20), day(25))]
+
+        assert PriceBackfillService.missing_span(covered, day(1), day(31)) == (day(6), day(31))
+
+    def test_head_gap_is_anchored_in_the_covered_range(self):
+        covered = [(day(10), day(31))]
+
+        span = PriceBackfillService.missing_span(covered, day(1), day(31))
+
+        assert span == (day(1), day(9) + timedelta(days=PriceBackfillService.ANCHOR_DAYS))
+
+    def test_merge_ranges_joins_adjacent_and_overlapping(self):
+        merged = PriceBackfillService.merge_ranges([(day(10), day(12)), (day(1), day(5)), (day(6), day(8)), (day(11), day(20))])
+
+        assert merged == [(day(1), day(8)), (day(10), day(20))]
+
+
+class TestUpsertPrices:
+    def test_one_statement_per_batch_counts_added_and_updated(self, monkeypatch):
+        monkeypatch.setattr(PriceBackfillService, "INSERT_BATCH_SIZE", 2)
+        db = MagicMock()
+        db.execute.return_value.all.side_effect = [[("AAPL", True), ("AAPL", False)], [("MSFT", True)]]
+        rows = [dict(price(day(1)), ticker="AAPL"), dict(price(day(2)), ticker="AAPL"),
+                dict(price(day(1)), ticker="MSFT"), dict(price(day(1), "11"), ticker="MSFT")]
+
+        written = PriceBackfillService.upsert_prices(db, rows, overwrite=True)
+
+        assert written == {"AAPL": (1, 1), "MSFT": (1, 0)}
+        assert db.execute.call_count == 2  # duplicate (MSFT, day 1) collapsed
+        sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uix_ticker_date DO UPDATE" in sql
+        assert "xmax = 0" in sql
+
+    def test_default_keeps_existing_rows(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = []
+
+        assert PriceBackfillService.upsert_prices(db, [dict(price(day(1)), ticker="AAPL")]) == {}
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "DO NOTHING" in sql
+
+
+class TestBackfill:
+    @pytest.fixture
+    def service(self, monkeypatch):
+        fetcher = MagicMock()
+        service = PriceBackfillService(fetcher)
+        self.recorded = {}
+        self.coverage = {}
+        monkeypatch.setattr(PriceBackfillService, "load_coverage", staticmethod(lambda db, tickers: self.coverage))
+        monkeypatch.setattr(PriceBackfillService, "record_coverage", classmethod(lambda cls, db, spans: self.recorded.update(spans)))
+        monkeypatch.setattr(
+            PriceBackfillService, "upsert_prices",
+            classmethod(lambda cls, db, rows, overwrite=False: {row["ticker"]: (1, 0) for row in rows})
+        )
+        with patch("app.services.price_backfill.LatestPriceService.refresh"), \
+             patch("app.services.price_backfill.price_matrix"), \
+             patch("app.services.price_backfill.CacheGenerations.bump"):
+            yield service
+
+    def test_covered_tickers_are_not_fetched(self, service):
+        self.coverage = {"AAPL": [(day(1), day(31))]}
+
+        results = service.backfill(MagicMock(), {"AAPL": ("AAPL", None)}, day(1), day(31))
+
+        service.price_fetcher.fetch_historical_prices_batch_sync.assert_not_called()
+        assert results["AAPL"] == {"added": 0, "updated": 0, "skipped": 0, "status": UP_TO_DATE}
+
+    def test_tickers_sharing_a_span_share_one_download(self, service):
+        self.coverage = {"AAPL": [(day(1), day(20))], "MSFT": [(day(1), day(20))]}
+        service.price_fetcher.fetch_historical_prices_batch_sync.return_value = {
+            "AAPL": [price(day(22)), price(day(23))],
+        }
+        db = MagicMock()
+
+        results = service.backfill(db, {"AAPL": ("AAPL", None), "MSFT": ("MSFT", None)}, day(1), day(31))
+
+        service.price_fetcher.fetch_historical_prices_batch_sync.assert_called_once_with(
+            [("AAPL", None), ("MSFT", None)], day(21), day(31)
+        )
+        assert results["AAPL"] == {"added": 1, "updated": 0, "skipped": 1, "status": FETCHED}
+        assert results["MSFT"]["status"] == NO_DATA
+        # Only answered spans are recorded
+        assert self.recorded == {"AAPL": (day(21), day(31))}
+        db.commit.assert_called_once()
+
+    def test_recent_days_are_not_recorded_as_covered(self, service):
+        today = date.today()
+        service.price_fetcher.fetch_historical_prices_batch_sync.return_value = {"BTC-USD": [price(today)]}
+
+        results = service.backfill(MagicMock(), {"BTC": ("BTC-USD", None)}, today - timedelta(days=3), today)
+
+        assert results["BTC"]["status"] == FETCHED
+        assert self.recorded == {"BTC": (today - timedelta(days=3), today - timedelta(days=PriceBackfillService.SETTLE_DAYS))}
+
+    def test_force_requests_the_whole_range(self, service):
+        self.coverage = {"AAPL": [(day(1), day(31))]}
+        service.price_fetcher.fetch_historical_prices_batch_sync.return_value = {}
+
+        service.backfill(MagicMock(), {"AAPL": ("AAPL", None)}, day(1), day(31), force=True)
+
+        service.price_fetcher.fetch_historical_prices_batch_sync.assert_called_once_with(
+            [("AAPL", None)], day(1), day(31)
+        )
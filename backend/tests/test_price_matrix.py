@@ -0,0 +1,141 @@
+"""
+Unit tests for the in-process price matrix.
+
+Covers array lookups, the per-ticker staleness rules and the size bound;
+loading itself is a single SELECT exercised by the integration suite.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+
+from app.services.price_matrix import PriceMatrix
+
+
+pytestmark = pytest.mark.unit
+
+
+ROWS = [
+    ("AAA", date(2024, 1, 2), Decimal("10.5")),
+    ("AAA", date(2024, 1, 4), Decimal("11")),
+    ("AAA", date(2024, 1, 8), Decimal("12")),
+]
+
+
+@pytest.fixture
+def matrix():
+    matrix = PriceMatrix(max_bytes=1024 * 1024)
+    matrix._store(["AAA", "BBB"], ROWS, {"AAA": "3", "BBB": None})
+    return matrix
+
+
+class TestPriceMatrixLookups:
+    """Tests for the array helpers."""
+
+    def test_store_builds_typed_arrays(self, matrix):
+        """Series are int32 ordinals plus float64 closes; unpriced tickers are empty."""
+        series = matrix._collect(["AAA", "BBB"])
+
+        assert series["AAA"].ordinals.dtype == np.int32
+        assert series["AAA"].closes.tolist() == [10.5, 11.0, 12.0]
+        assert len(series["BBB"]) == 0
+
+    def test_closes_on_matches_exact_dates_only(self, matrix):
+        """closes_on mirrors PriceHistory.date IN (...)."""
+        series = matrix._collect(["AAA"])["AAA"]
+        dates = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 8), date(2024, 1, 9)]
+
+        assert PriceMatrix.closes_on(series, dates) == [None, 10.5, None, 12.0, None]
+
+    def test_closes_as_of_forward_fills(self, matrix):
+        """closes_as_of carries the last close forward and is NaN before the first one."""
+        series = matrix._collect(["AAA"])["AAA"]
+        result = PriceMatrix.closes_as_of(series, [date(2024, 1, 1), date(2024, 1, 5), date(2024, 2, 1)])
+
+        assert np.isnan(result[0])
+        assert result[1:].tolist() == [11.0, 12.0]
+
+    def test_slice_is_inclusive(self, matrix):
+        """slice keeps closes dated within [start, end]."""
+        series = matrix._collect(["AAA"])["AAA"]
+
+        assert PriceMatrix.slice(series, date(2024, 1, 4), date(2024, 1, 8)).closes.tolist() == [11.0, 12.0]
+        assert PriceMatrix.slice(series, None, date(2024, 1, 3)).closes.tolist() == [10.5]
+
+
+class TestPriceMatrixStaleness:
+    """Tests for per-ticker invalidation."""
+
+    def test_version_change_marks_only_that_ticker_stale(self, matrix):
+        """A bumped Redis version reloads just the affected ticker."""
+        assert matrix._stale(["AAA", "BBB"], {"AAA": "3", "BBB": None}) == []
+        assert matrix._stale(["AAA", "BBB"], {"AAA": "4", "BBB": None}) == ["AAA"]
+        assert matrix._stale(["AAA", "CCC"], {"AAA": "3", "CCC": None}) == ["CCC"]
+
+    def test_local_invalidate_drops_series(self, matrix):
+        """invalidate() forgets the local copy even without Redis."""
+        matrix.invalidate(["AAA"])
+
+        assert matrix._stale(["AAA", "BBB"], {"AAA": "3", "BBB": None}) == ["AAA"]
+
+    async def test_async_reads_check_versions_without_blocking(self, matrix):
+        """get_many_async() reads versions through the async client, never the blocking one."""
+        async_client = MagicMock()
+        async_client.hmget = AsyncMock(return_value=["3", None])
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        with patch("app.services.price_matrix.cache") as cache:
+            cache.available = True
+            cache.async_client.return_value = async_client
+            series = await matrix.get_many_async(db, ["AAA", "BBB"])
+
+        async_client.hmget.assert_awaited_once_with(PriceMatrix.VERSIONS_KEY, ["AAA", "BBB"])
+        cache.redis_client.hmget.assert_not_called()
+        db.execute.assert_not_awaited()
+        assert series["AAA"].closes.tolist() == [10.5, 11.0, 12.0]
+
+    def test_fallback_ttl_without_redis(self, matrix, monkeypatch):
+        """Without version information, series expire after the fallback TTL."""
+        assert matrix._stale(["AAA"], None) == []
+
+        monkeypatch.setattr(PriceMatrix, "FALLBACK_TTL_SECONDS", -1)
+        assert matrix._stale(["AAA"], None) == ["AAA"]
+
+
+class TestPriceMatrixBound:
+    """Tests for the LRU size bound."""
+
+    # Three closes are 36 bytes of arrays
+    ENTRY_BYTES = 36 + PriceMatrix.ENTRY_OVERHEAD_BYTES
+
+    def _rows(self, ticker):
+        return [(ticker, d, close) for _, d, close in ROWS]
+
+    def test_least_recently_used_tickers_are_evicted(self):
+        matrix = PriceMatrix(max_bytes=2 * self.ENTRY_BYTES)
+        matrix._store(["AAA"], self._rows("AAA"), None)
+        matrix._store(["BBB"], self._rows("BBB"), None)
+        matrix._collect(["AAA"])
+
+        matrix._store(["CCC"], self._rows("CCC"), None)
+
+        assert matrix._stale(["AAA", "BBB", "CCC"], None) == ["BBB"]
+        assert matrix._bytes == 2 * self.ENTRY_BYTES
+
+    def test_a_batch_larger_than_the_bound_is_still_returned(self):
+        """Series evicted while storing a batch are served from the load itself."""
+        matrix = PriceMatrix(max_bytes=self.ENTRY_BYTES)
+        loaded = matrix._store(["AAA", "BBB"], self._rows("AAA") + self._rows("BBB"), None)
+
+        series = matrix._collect(["AAA", "BBB"], loaded)
+
+        assert series["AAA"].closes.tolist() == series["BBB"].closes.tolist() == [10.5, 11.0, 12.0]
+        assert matrix._stale(["AAA", "BBB"], None) == ["AAA"]
+
+    def test_invalidate_releases_the_bytes(self, matrix):
+        matrix.invalidate(["AAA", "BBB"])
+
+        assert matrix._bytes == 0
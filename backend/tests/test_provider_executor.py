@@ -0,0 +1,141 @@
+"""
+Tests for the shared executor running blocking provider calls.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.currency_converter import get_exchange_rate, get_exchange_rate_async
+from app.services.price_fetcher import PriceFetcher
+from app.services.provider_executor import ProviderExecutor
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def executor():
+    executor = ProviderExecutor(max_workers=2, max_concurrency=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+class TestProviderExecutor:
+    async def test_run_offloads_to_pool_thread(self, executor):
+        name = await executor.run(current_thread_name)
+
+        assert name.startswith("provider")
+        assert name != current_thread_name()
+
+    async def test_run_does_not_block_the_event_loop(self, executor):
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(executor.run(time.sleep, 0.1), ticker())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.1
+
+    async def test_semaphore_caps_in_flight_calls(self):
+        executor = ProviderExecutor(max_workers=4, max_concurrency=2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+        try:
+            await asyncio.gather(*(executor.run(work) for _ in range(6)))
+        finally:
+            executor.shutdown(wait=True)
+
+        assert max(peak) == 2
+
+    def test_call_reuses_the_pool(self, executor):
+        first = executor.call(current_thread_name)
+        second = executor.call(current_thread_name)
+
+        assert first.startswith("provider")
+        assert {first, second} <= {t.name for t in threading.enumerate()}
+
+    def test_nested_call_runs_inline(self):
+        executor = ProviderExecutor(max_workers=1, max_concurrency=1)
+        try:
+            outer, inner = executor.call(lambda: (current_thread_name(), executor.call(current_thread_name)))
+        finally:
+            executor.shutdown(wait=True)
+
+        assert outer == inner
+
+    def test_map_keeps_order_and_errors(self, executor):
+        def invert(value):
+            return 1 / value
+
+        futures = executor.map(invert, [1, 0, 4])
+
+        assert futures[0].result() == 1
+        with pytest.raises(ZeroDivisionError):
+            futures[1].result()
+        assert futures[2].result() == 0.25
+
+    def test_shutdown_recreates_pool_on_next_use(self, executor):
+        executor.call(current_thread_name)
+        executor.shutdown(wait=True)
+
+        assert executor.call(lambda: 42) == 42
+
+
+class TestProviderCallsUseExecutor:
+    async def test_async_fx_rate_runs_off_the_loop(self):
+        loop_thread = current_thread_name()
+        seen = []
+
+        def fake_fetch(base, quote):
+            seen.append(current_thread_name())
+            return Decimal("1.1")
+
+        with patch.object(PriceFetcher, "_fetch_fx_rate", side_effect=fake_fetch):
+            rate = await PriceFetcher.fetch_fx_rate("EUR", "USD")
+
+        assert rate == Decimal("1.1")
+        assert seen and seen[0] != loop_thread
+
+    def test_sync_wrappers_share_the_pool(self):
+        seen = []
+
+        def fake_history(ticker, start_date, end_date):
+            seen.append(current_thread_name())
+            return []
+
+        with patch.object(PriceFetcher, "_fetch_stock_historical", side_effect=fake_history):
+            PriceFetcher().fetch_historical_prices_sync("AAPL")
+            PriceFetcher().fetch_historical_prices_sync("MSFT")
+
+        assert len(seen) == 2
+        assert all(name.startswith("provider") for name in seen)
+
+    def test_currency_converter_uses_sync_fx(self):
+        with patch.object(PriceFetcher, "_fetch_fx_rate", return_value=Decimal("0.9")):
+            assert get_exchange_rate("USD", "EUR") == Decimal("0.9")
+
+    async def test_currency_converter_async(self):
+        with patch.object(PriceFetcher, "_fetch_fx_rate", return_value=None):
+            with pytest.raises(ValueError):
+                await get_exchange_rate_async("USD", "EUR")
@@ -0,0 +1,167 @@
+"""
+Tests for the adaptive per-provider token bucket used for outbound calls.
+"""
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from app.services import provider_limiter as provider_limiter_module
+from app.services.provider_limiter import ProviderRateLimiter, is_rate_limit_error
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ScriptedRedis:
+    """Returns canned script replies and records the calls made."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def eval(self, script, numkeys, *args):
+        self.calls.append(args)
+        return self.replies.pop(0)
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(provider_limiter_module.cache, "available", False)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(provider_limiter_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def make_limiter(**overrides):
+    options = dict(provider="test", rate=2.0, burst=2, min_rate=0.5)
+    options.update(overrides)
+    return ProviderRateLimiter(**options)
+
+
+class TestLocalBucket:
+    def test_burst_is_free_then_requests_are_paced(self, no_redis, clock):
+        limiter = make_limiter()
+
+        with patch("app.services.provider_limiter.time.sleep") as sleep:
+            waits = [limiter.acquire() for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.5, 1.0]
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_idle_time_refills_tokens(self, no_redis, clock):
+        limiter = make_limiter()
+        limiter.acquire()
+        limiter.acquire()
+
+        clock.now += 1.0
+
+        with patch("app.services.provider_limiter.time.sleep") as sleep:
+            assert limiter.acquire() == 0.0
+        sleep.assert_not_called()
+
+    def test_throttling_halves_rate_and_success_restores_it(self, no_redis, clock):
+        limiter = make_limiter(increase_step=0.5)
+
+        limiter.throttled()
+        assert limiter.stats()["process"]["rate"] == 1.0
+        limiter.throttled()
+        limiter.throttled()
+        assert limiter.stats()["process"]["rate"] == 0.5  # min_rate
+
+        for _ in range(10):
+            limiter.succeeded()
+        assert limiter.stats()["process"]["rate"] == 2.0  # configured rate
+
+    def test_throttling_drops_unused_tokens(self, no_redis, clock):
+        limiter = make_limiter()
+
+        limiter.throttled()
+
+        with patch("app.services.provider_limiter.time.sleep"):
+            assert limiter.acquire() == 1.0  # one token at the halved rate
+
+    async def test_acquire_async_waits_without_blocking(self, no_redis, clock):
+        limiter = make_limiter(burst=1)
+
+        with patch("app.services.provider_limiter.asyncio.sleep") as sleep:
+            assert await limiter.acquire_async() == 0.0
+            assert await limiter.acquire_async() == 0.5
+        sleep.assert_awaited_once_with(0.5)
+
+    def test_stats_record_waits(self, no_redis, clock):
+        limiter = make_limiter(burst=1)
+
+        with patch("app.services.provider_limiter.time.sleep"):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.acquire()
+
+        stats = limiter.stats()
+        assert stats["shared"] is None
+        assert stats["process"]["acquired"] == 3
+        assert stats["process"]["waited"] == 2
+        assert stats["process"]["wait_seconds"] == 1.5
+        assert stats["process"]["max_wait_seconds"] == 1.0
+
+
+class TestSharedBucket:
+    def test_uses_wait_and_rate_from_redis(self, monkeypatch):
+        redis = ScriptedRedis([["0.25", "1.5"]])
+        monkeypatch.setattr(provider_limiter_module.cache, "available", True)
+        monkeypatch.setattr(provider_limiter_module.cache, "redis_client", redis)
+        limiter = make_limiter()
+
+        with patch("app.services.provider_limiter.time.sleep") as sleep:
+            assert limiter.acquire() == 0.25
+
+        sleep.assert_called_once_with(0.25)
+        assert redis.calls[0][:2] == ("provider_limit:test", "provider_limit:stats:test")
+        assert limiter.stats()["process"]["rate"] == 1.5
+
+    def test_success_at_full_rate_skips_redis(self, monkeypatch):
+        redis = ScriptedRedis([])
+        monkeypatch.setattr(provider_limiter_module.cache, "available", True)
+        monkeypatch.setattr(provider_limiter_module.cache, "redis_client", redis)
+
+        make_limiter().succeeded()
+
+        assert redis.calls == []
+
+    def test_falls_back_to_local_bucket_on_redis_errors(self, monkeypatch, clock):
+        class BrokenRedis:
+            def eval(self, *args):
+                raise ConnectionError("down")
+
+        monkeypatch.setattr(provider_limiter_module.cache, "available", True)
+        monkeypatch.setattr(provider_limiter_module.cache, "redis_client", BrokenRedis())
+
+        assert make_limiter().acquire() == 0.0
+
+
+class TestRateLimitErrors:
+    def test_detects_http_429(self):
+        response = requests.Response()
+        response.status_code = 429
+        error = requests.exceptions.HTTPError("429 Client Error", response=response)
+
+        assert is_rate_limit_error(error)
+
+    def test_detects_yfinance_rate_limit(self):
+        from yfinance.exceptions import YFRateLimitError
+
+        assert is_rate_limit_error(YFRateLimitError())
+
+    def test_ignores_other_errors(self):
+        assert not is_rate_limit_error(ValueError("No data found for ticker"))
@@ -0,0 +1,188 @@
+"""
+Tests for the realtime quote cache shared across processes.
+"""
+from datetime import datetime
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import threading
+import time
+
+import pytest
+
+from app.services import quote_cache as quote_cache_module
+from app.services.price_fetcher import PriceFetcher
+from app.services.quote_cache import QuoteCache
+
+pytestmark = pytest.mark.unit
+
+
+class FakeRedis:
+    """Minimal thread-safe in-memory stand-in for the commands used by QuoteCache."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def set(self, key, value, nx=False, ex=None):
+        with self._lock:
+            if nx and key in self.values:
+                return None
+            self.values[key] = value
+            return True
+
+    def eval(self, script, numkeys, key, token):
+        with self._lock:
+            if self.values.get(key) == token:
+                del self.values[key]
+                return 1
+            return 0
+
+    def hincrby(self, name, field, amount):
+        with self._lock:
+            values = self.hashes.setdefault(name, {})
+            values[field] = str(int(values.get(field, 0)) + amount)
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(quote_cache_module.cache, "available", True)
+    monkeypatch.setattr(quote_cache_module.cache, "redis_client", client)
+    return client
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(quote_cache_module.cache, "available", False)
+
+
+def make_quote(price="100.5"):
+    return {
+        "ticker": "BTC-EUR",
+        "isin": None,
+        "current_price": Decimal(price),
+        "previous_close": Decimal("99.5"),
+        "change_amount": Decimal(price) - Decimal("99.5"),
+        "change_percent": Decimal("1.0"),
+        "timestamp": datetime(2026, 10, 16, 12, 0, 0),
+    }
+
+
+class CountingFetch:
+    def __init__(self, quote, delay=0.0):
+        self.quote = quote
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.quote
+
+
+class TestQuoteCache:
+    def test_cached_quote_round_trips_types(self, redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(make_quote())
+
+        cache.get_or_fetch("BTC-EUR", fetch)
+        quote = cache.get_or_fetch("BTC-EUR", fetch)
+
+        assert fetch.calls == 1
+        assert quote == make_quote()
+        assert isinstance(quote["current_price"], Decimal)
+        assert isinstance(quote["timestamp"], datetime)
+
+    def test_concurrent_misses_make_one_provider_call(self, redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(make_quote(), delay=0.1)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: cache.get_or_fetch("BTC-EUR", fetch), range(8)))
+
+        assert fetch.calls == 1
+        assert all(result["current_price"] == Decimal("100.5") for result in results)
+        assert QuoteCache.LEASE_PREFIX + "BTC-EUR" not in redis.values
+
+    def test_waits_for_fetch_in_another_process(self, redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10, wait_seconds=1.0, poll_seconds=0.01)
+        other = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        redis.values[QuoteCache.LEASE_PREFIX + "BTC-EUR"] = "other-process"
+        fetch = CountingFetch(make_quote("1"))
+
+        timer = threading.Timer(0.05, lambda: other._set("BTC-EUR", make_quote("2")))
+        timer.start()
+        quote = cache.get_or_fetch("BTC-EUR", fetch)
+        timer.join()
+
+        assert fetch.calls == 0
+        assert quote["current_price"] == Decimal("2")
+
+    def test_failed_fetch_is_not_cached(self, redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(None)
+
+        assert cache.get_or_fetch("BTC-EUR", fetch) is None
+        assert cache.get_or_fetch("BTC-EUR", fetch) is None
+        assert fetch.calls == 2
+
+    def test_stats_count_hits_misses_and_provider_calls(self, redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(make_quote())
+
+        cache.get_or_fetch("BTC-EUR", fetch)
+        cache.get_or_fetch("BTC-EUR", fetch)
+        cache.get_or_fetch("BTC-EUR", fetch)
+
+        stats = cache.stats()
+        expected = {"hits": 2, "misses": 1, "coalesced": 0, "provider_calls": 1}
+        assert stats["process"] == expected
+        assert stats["shared"] == expected
+
+    def test_local_fallback_without_redis(self, no_redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(make_quote())
+
+        cache.get_or_fetch("BTC-EUR", fetch)
+        cache.get_or_fetch("BTC-EUR", fetch)
+
+        assert fetch.calls == 1
+        assert cache.stats()["shared"] is None
+
+    def test_local_fallback_expires(self, no_redis):
+        cache = QuoteCache(ttl_seconds=30, lease_seconds=10)
+        fetch = CountingFetch(make_quote())
+
+        cache.get_or_fetch("BTC-EUR", fetch)
+        with patch("app.services.quote_cache.time.time", return_value=time.time() + 31):
+            cache.get_or_fetch("BTC-EUR", fetch)
+
+        assert fetch.calls == 2
+
+
+class TestPriceFetcherUsesQuoteCache:
+    def test_new_fetcher_instances_share_quotes(self, redis, monkeypatch):
+        monkeypatch.setattr(
+            "app.services.price_fetcher.quote_cache", QuoteCache(ttl_seconds=30, lease_seconds=10)
+        )
+
+        with patch.object(PriceFetcher, "_fetch_realtime_price", return_value=make_quote()) as fetch:
+            PriceFetcher().fetch_realtime_price("BTC-EUR")
+            quote = PriceFetcher().fetch_realtime_price("BTC-EUR")
+
+        assert fetch.call_count == 1
+        assert quote["current_price"] == Decimal("100.5")
@@ -0,0 +1,66 @@
+"""
+Tests for the shared Redis connection pool registry.
+
+Pools connect lazily, so none of these tests need a running Redis.
+"""
+import asyncio
+
+import pytest
+
+from app.services.redis_pools import RedisPoolRegistry
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def registry():
+    registry = RedisPoolRegistry("redis://localhost:6379/0", max_connections=5, timeout_seconds=1)
+    yield registry
+    registry.close()
+
+
+class TestSyncClients:
+    def test_sync_client_is_shared(self, registry):
+        assert registry.sync_client() is registry.sync_client()
+
+    def test_decode_flavours_use_separate_pools(self, registry):
+        decoded = registry.sync_client()
+        raw = registry.sync_client(decode_responses=False)
+
+        assert decoded is not raw
+        assert decoded.connection_pool is not raw.connection_pool
+        assert decoded.connection_pool.max_connections == 5
+
+    def test_close_drops_pools(self, registry):
+        client = registry.sync_client()
+
+        registry.close()
+
+        assert registry.sync_client() is not client
+
+
+class TestAsyncClients:
+    async def test_async_client_is_shared_within_a_loop(self, registry):
+        assert registry.async_client() is registry.async_client()
+
+    def test_each_event_loop_gets_its_own_pool(self, registry):
+        async def get_client():
+            return registry.async_client()
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        assert first is not second
+
+    def test_async_client_requires_a_running_loop(self, registry):
+        with pytest.raises(RuntimeError):
+            registry.async_client()
+
+    async def test_aclose_drops_pools_of_the_running_loop(self, registry):
+        client = registry.async_client()
+        sync_client = registry.sync_client()
+
+        await registry.aclose()
+
+        assert registry.async_client() is not client
+        assert registry.sync_client() is not sync_client
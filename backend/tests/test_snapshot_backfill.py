@@ -0,0 +1,59 @@
+"""
+Unit tests for the single-pass snapshot backfill sweep.
+
+Verifies that replay_snapshot_totals produces the same per-day totals as
+create_daily_snapshot (current ticker mapping, holdings without prices skipped).
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.services.asof_prices import AsOfPriceGrid
+from app.tasks.snapshots import replay_snapshot_totals
+
+
+pytestmark = pytest.mark.unit
+
+
+def _days(start, count):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+class TestReplaySnapshotTotals:
+    """Tests for replay_snapshot_totals."""
+
+    def test_prices_are_forward_filled_over_gaps(self):
+        """Days without a price row use the last earlier close."""
+        holding = ("US0001", "AAA", Decimal("10"), Decimal("1001"))
+        holdings_by_date = {day: [holding] for day in _days(date(2024, 1, 2), 4)}
+        prices = AsOfPriceGrid({"AAA": [(date(2024, 1, 2), Decimal("100")), (date(2024, 1, 4), Decimal("120"))]})
+
+        results = list(replay_snapshot_totals(holdings_by_date, prices, {}, _days(date(2024, 1, 1), 5)))
+
+        assert [r["num_positions"] for r in results] == [0, 1, 1, 1, 1]
+        assert results[0]["total_value"] == Decimal("0")
+        assert results[2]["total_value"] == Decimal("1000")
+        assert results[2]["total_cost_basis"] == Decimal("1001")
+        assert results[3]["total_value"] == Decimal("1200")
+        assert results[4] == {**results[3], "snapshot_date": date(2024, 1, 5)}
+
+    def test_current_ticker_mapping_and_missing_prices(self):
+        """ISIN holdings are priced by current ticker; unpriced holdings are skipped entirely."""
+        holdings_by_date = {date(2024, 1, 1): [
+            ("US0001", "OLD", Decimal("2"), Decimal("200")),
+            ("US0002", "BBB", Decimal("5"), Decimal("50")),
+            (None, "CCC", Decimal("1"), Decimal("30")),
+        ]}
+        prices = AsOfPriceGrid({
+            "NEW": [(date(2023, 12, 29), Decimal("110"))],
+            "CCC": [(date(2024, 1, 1), Decimal("35"))],
+        })
+
+        [result] = replay_snapshot_totals(
+            holdings_by_date, prices, {"US0001": "NEW"}, [date(2024, 1, 1)]
+        )
+
+        assert result["num_positions"] == 3
+        assert result["total_value"] == Decimal("255")
+        assert result["total_cost_basis"] == Decimal("230")
+        assert result["missing_prices"] == ["BBB"]
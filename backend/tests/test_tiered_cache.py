@@ -0,0 +1,217 @@
+"""
+Tests for the two-tier (in-process + Redis) response cache.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.services import tiered_cache as tiered_cache_module
+from app.services.tiered_cache import TieredCache, _Entry
+
+pytestmark = pytest.mark.unit
+
+
+class FakePubSub:
+    def __init__(self, client):
+        self.client = client
+
+    def subscribe(self, **handlers):
+        self.client.handlers.extend(handlers.values())
+
+    def run_in_thread(self, sleep_time, daemon):
+        return None
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the commands used by TieredCache."""
+
+    def __init__(self):
+        self.values = {}
+        self.handlers = []
+        self.published = []
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        for handler in self.handlers:
+            handler({"data": message})
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return FakePubSub(self)
+
+
+class AsyncFakeRedis:
+    """Non-blocking view of a FakeRedis, as returned by cache.async_client()."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(tiered_cache_module.cache, "available", True)
+    monkeypatch.setattr(tiered_cache_module.cache, "redis_client", client)
+    monkeypatch.setattr(tiered_cache_module.cache, "async_client", lambda: AsyncFakeRedis(client))
+    return client
+
+
+def make_cache(**overrides):
+    options = dict(max_bytes=1024 * 1024, stale_seconds=60, lease_seconds=30,
+                   wait_seconds=0.2, poll_seconds=0.01)
+    options.update(overrides)
+    return TieredCache(**options)
+
+
+class CountingLoader:
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.value
+
+
+class TestTieredCache:
+    async def test_second_read_is_served_from_l1(self, redis):
+        cache = make_cache()
+        loader = CountingLoader({"total": 1})
+
+        assert await cache.get_or_load("k", loader, ttl_seconds=60) == {"total": 1}
+        redis.values.clear()
+        assert await cache.get_or_load("k", loader, ttl_seconds=60) == {"total": 1}
+        assert loader.calls == 1
+
+    async def test_l2_hit_populates_l1_without_loading(self, redis):
+        payload = json.dumps({"value": [1, 2], "fresh_until": time.time() + 60})
+        redis.values["k"] = payload
+        cache = make_cache()
+        loader = CountingLoader(None)
+
+        assert await cache.get_or_load("k", loader, ttl_seconds=60) == [1, 2]
+        assert loader.calls == 0
+        assert cache._l1_get("k").value == [1, 2]
+
+    async def test_concurrent_misses_share_one_load(self, redis):
+        cache = make_cache()
+        loader = CountingLoader("v", delay=0.05)
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("k", loader, ttl_seconds=60) for _ in range(5))
+        )
+
+        assert results == ["v"] * 5
+        assert loader.calls == 1
+        # The lease is released once the value is stored
+        assert TieredCache.LEASE_PREFIX + "k" not in redis.values
+
+    async def test_waits_for_lease_holder_in_another_process(self, redis):
+        cache = make_cache()
+        redis.values[TieredCache.LEASE_PREFIX + "k"] = "other-process"
+        loader = CountingLoader("mine")
+
+        async def other_process_stores():
+            await asyncio.sleep(0.03)
+            redis.values["k"] = json.dumps({"value": "theirs", "fresh_until": time.time() + 60})
+
+        _, value = await asyncio.gather(
+            other_process_stores(), cache.get_or_load("k", loader, ttl_seconds=60)
+        )
+
+        assert value == "theirs"
+        assert loader.calls == 0
+
+    async def test_loads_anyway_when_lease_holder_times_out(self, redis):
+        cache = make_cache(wait_seconds=0.05)
+        redis.values[TieredCache.LEASE_PREFIX + "k"] = "other-process"
+        loader = CountingLoader("mine")
+
+        assert await cache.get_or_load("k", loader, ttl_seconds=60) == "mine"
+        assert loader.calls == 1
+        # Another process's lease is left untouched
+        assert redis.values[TieredCache.LEASE_PREFIX + "k"] == "other-process"
+
+    async def test_stale_entry_is_served_while_one_reload_runs(self, redis):
+        cache = make_cache()
+        cache._l1_put("k", _Entry("old", 10, time.time() - 1, time.time() + 60))
+        loader = CountingLoader("new", delay=0.02)
+
+        first = await cache.get_or_load("k", loader, ttl_seconds=60)
+        second = await cache.get_or_load("k", loader, ttl_seconds=60)
+        await asyncio.gather(*cache._tasks)
+
+        assert (first, second) == ("old", "old")
+        assert loader.calls == 1
+        assert await cache.get_or_load("k", loader, ttl_seconds=60) == "new"
+
+    async def test_failed_reload_keeps_serving_stale_value(self, redis):
+        cache = make_cache()
+        cache._l1_put("k", _Entry("old", 10, time.time() - 1, time.time() + 60))
+
+        async def failing_loader():
+            raise RuntimeError("database down")
+
+        assert await cache.get_or_load("k", failing_loader, ttl_seconds=60) == "old"
+        await asyncio.gather(*cache._tasks)
+        assert cache._l1_get("k").value == "old"
+
+    async def test_store_evicts_l1_copy_in_other_workers(self, redis):
+        worker_a, worker_b = make_cache(), make_cache()
+        await worker_b.get_or_load("k", CountingLoader("v1"), ttl_seconds=60)
+
+        await worker_a.invalidate("k")
+        await worker_a.get_or_load("k", CountingLoader("v2"), ttl_seconds=60)
+
+        assert worker_b._l1_get("k") is None
+        assert await worker_b.get_or_load("k", CountingLoader("unused"), ttl_seconds=60) == "v2"
+
+    async def test_l1_is_bounded_by_bytes(self, redis):
+        cache = make_cache(max_bytes=100)
+        for i in range(5):
+            cache._l1_put(f"k{i}", _Entry(i, 30, time.time() + 60, time.time() + 120))
+
+        assert cache._l1_bytes <= 100
+        assert list(cache._l1) == ["k2", "k3", "k4"]
+
+    async def test_none_key_bypasses_cache(self, redis):
+        cache = make_cache()
+        loader = CountingLoader("v")
+
+        await cache.get_or_load(None, loader, ttl_seconds=60)
+        await cache.get_or_load(None, loader, ttl_seconds=60)
+
+        assert loader.calls == 2
+        assert redis.values == {}
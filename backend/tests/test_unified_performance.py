@@ -0,0 +1,167 @@
+"""
+Unit tests for the SQL-side unified performance series.
+
+Verifies that UnifiedPerformanceService builds one gap-filled statement
+returning columnar arrays, and that /unified-performance renders it.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.benchmark import set_benchmark
+from app.api.portfolio import _load_unified_performance, get_unified_performance
+from app.schemas.benchmark import BenchmarkCreate
+from app.services.unified_performance import EMPTY_SERIES, UnifiedPerformanceService, UnifiedSeries
+
+
+pytestmark = pytest.mark.unit
+
+
+def _sql(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestBuildQuery:
+    """Tests for UnifiedPerformanceService._build_query."""
+
+    def test_one_statement_over_a_generated_calendar(self):
+        """Days come from generate_series and every series is aggregated into an array."""
+        sql = _sql(UnifiedPerformanceService._build_query(date(2024, 1, 1), date(2024, 12, 31), "SPY"))
+
+        assert "generate_series" in sql
+        assert "array_agg(days.day ORDER BY days.day) AS dates" in sql
+        assert "array_agg(benchmark.value ORDER BY days.day) AS benchmark" in sql
+        # No IN (...) list of snapshot dates
+        assert " IN (" not in sql
+
+    def test_forward_fill_uses_window_functions(self):
+        """Gaps are filled with a running count() island and max() over it."""
+        sql = _sql(UnifiedPerformanceService._build_query(None, None, "SPY"))
+
+        assert "count(portfolio_snapshots.total_value) OVER (ORDER BY days.day) AS grp" in sql
+        assert "max(traditional_rows.value) OVER (PARTITION BY traditional_rows.grp)" in sql
+        # Crypto portfolios are filled independently before being summed
+        assert "PARTITION BY crypto_rows.portfolio_id, crypto_rows.grp" in sql
+        assert "sum(crypto_filled.value)" in sql
+        assert "max(benchmark_rows.value) OVER (PARTITION BY benchmark_rows.grp)" in sql
+
+    def test_range_start_is_seeded_with_the_previous_value(self):
+        """Days before the first value in range take the last value before it."""
+        sql = _sql(UnifiedPerformanceService._build_query(date(2024, 1, 1), None, "SPY"))
+
+        assert "portfolio_snapshots.snapshot_date < (SELECT bounds.lo" in sql
+        assert "price_history.date < (SELECT bounds.lo" in sql
+
+    def test_without_benchmark_price_history_is_not_read(self):
+        """No benchmark ticker means no price_history join."""
+        sql = _sql(UnifiedPerformanceService._build_query(None, None, None))
+
+        assert "price_history" not in sql
+        assert "array_agg(NULL) AS benchmark" in sql
+
+
+class TestLoadAsync:
+    """Tests for UnifiedPerformanceService.load_async."""
+
+    async def test_returns_the_columns(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock())
+        db.execute.return_value.one.return_value = SimpleNamespace(
+            dates=[date(2024, 1, 1)], traditional=[Decimal("10")], crypto=[Decimal("5")],
+            total=[Decimal("15")], benchmark=[None]
+        )
+
+        series = await UnifiedPerformanceService.load_async(db, date(2024, 1, 1), date(2024, 1, 1))
+
+        assert series == UnifiedSeries(
+            [date(2024, 1, 1)], [Decimal("10")], [Decimal("5")], [Decimal("15")], [None]
+        )
+        db.execute.assert_awaited_once()
+
+    async def test_no_snapshots_is_empty(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock())
+        db.execute.return_value.one.return_value = SimpleNamespace(
+            dates=None, traditional=None, crypto=None, total=None, benchmark=None
+        )
+
+        assert await UnifiedPerformanceService.load_async(db) == EMPTY_SERIES
+
+
+class TestUnifiedPerformanceEndpoint:
+    """Tests for GET /api/portfolio/unified-performance."""
+
+    SERIES = UnifiedSeries(
+        [date(2024, 1, 6), date(2024, 1, 7), date(2024, 1, 8)],
+        [Decimal("100.00"), Decimal("100.00"), Decimal("90.00")],
+        [Decimal("0"), Decimal("25.50"), Decimal("30.00")],
+        [Decimal("100.00"), Decimal("125.50"), Decimal("120.00")],
+        [None, Decimal("470.10"), Decimal("471.00")],
+    )
+
+    @pytest.fixture
+    def db(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock())
+        db.execute.return_value.scalar_one_or_none.return_value = SimpleNamespace(ticker="SPY")
+        return db
+
+    async def test_renders_rows_from_the_columns(self, db):
+        with patch(
+            "app.api.portfolio.UnifiedPerformanceService.load_async", AsyncMock(return_value=self.SERIES)
+        ) as load:
+            response = await _load_unified_performance(db, None, None, None, None)
+
+        load.assert_awaited_once_with(db, None, None, "SPY")
+        assert response == {
+            "portfolio_data": [
+                {"date": "2024-01-06", "total": "100.00", "traditional": "100.00", "crypto": "0"},
+                {"date": "2024-01-07", "total": "125.50", "traditional": "100.00", "crypto": "25.50"},
+                {"date": "2024-01-08", "total": "120.00", "traditional": "90.00", "crypto": "30.00"},
+            ],
+            "benchmark_data": [
+                {"date": "2024-01-07", "value": "470.10"},
+                {"date": "2024-01-08", "value": "471.00"},
+            ],
+        }
+
+    async def test_monthly_resolution_thins_every_column(self, db):
+        """Within one month only the range start and the month's last point are kept."""
+        with patch(
+            "app.api.portfolio.UnifiedPerformanceService.load_async", AsyncMock(return_value=self.SERIES)
+        ):
+            response = await _load_unified_performance(db, None, None, "monthly", None)
+
+        assert [p["date"] for p in response["portfolio_data"]] == ["2024-01-06", "2024-01-08"]
+        assert response["benchmark_data"] == [{"date": "2024-01-08", "value": "471.00"}]
+
+    async def test_responses_are_cached_per_range_and_resolution(self):
+        with patch("app.api.portfolio.CacheGenerations.key_async", AsyncMock(return_value="key")) as key_async, \
+             patch("app.api.portfolio.tiered_cache.get_or_load", AsyncMock(return_value={"cached": True})) as get_or_load:
+            response = await get_unified_performance(range="ALL", days=None, resolution="weekly", max_points=200)
+
+        assert response == {"cached": True}
+        assert key_async.call_args.args[1:] == ("snapshots", "prices", "benchmark")
+        assert key_async.call_args.kwargs["parts"] == (None, None, "weekly", 200)
+        assert get_or_load.call_args.args[0] == "key"
+
+
+class TestSetBenchmark:
+    """Tests for POST /api/benchmark."""
+
+    async def test_changing_the_benchmark_invalidates_performance_responses(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock())
+        db.execute.return_value.scalar_one_or_none.return_value = None
+        db.commit = AsyncMock()
+        db.refresh = AsyncMock()
+
+        with patch("app.api.benchmark.CacheGenerations.bump_async", AsyncMock()) as bump, \
+             patch("app.tasks.price_updates.fetch_prices_for_ticker.delay"):
+            await set_benchmark(BenchmarkCreate(ticker="VWCE.DE"), db=db)
+
+        bump.assert_awaited_once_with("benchmark")
@@ -0,0 +1,50 @@
+"""
+Unit tests for the vectorized XIRR kernel.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from app.services.calculations import FinancialCalculations
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestCalculateIrrBatch:
+    """Tests for FinancialCalculations.calculate_irr_batch."""
+
+    def test_batch_matches_single_position_calls(self):
+        """Each batch result equals calculate_irr on the same inputs."""
+        positions = [
+            ([(date(2023, 1, 1), Decimal("-1000"))], Decimal("1100")),
+            ([(date(2020, 1, 1), Decimal("-100")), (date(2021, 6, 1), Decimal("-50"))], Decimal("200")),
+            ([(date(2022, 3, 1), Decimal("-500")), (date(2023, 3, 1), Decimal("200"))], Decimal("250")),
+        ]
+
+        batch = FinancialCalculations.calculate_irr_batch(positions, current_date=date(2024, 1, 1))
+        single = [
+            FinancialCalculations.calculate_irr(flows, value, current_date=date(2024, 1, 1))
+            for flows, value in positions
+        ]
+
+        assert batch == pytest.approx(single)
+        assert batch[0] == pytest.approx(0.1, abs=1e-3)
+
+    def test_positions_without_flows_or_roots_are_none(self):
+        """Empty cash flows and flows that never change sign yield None."""
+        positions = [
+            ([], Decimal("100")),
+            ([(date(2023, 1, 1), Decimal("1000"))], Decimal("50")),
+        ]
+
+        assert FinancialCalculations.calculate_irr_batch(positions, current_date=date(2024, 1, 1)) == [None, None]
+
+    def test_bracketed_fallback_when_newton_diverges(self):
+        """Deep losses overshoot Newton from 10%; the bracket still finds the root."""
+        # -1000 then 10 two years later: (1 + r)^2 = 0.01 -> r = -0.9
+        flows = [(date(2022, 1, 1), Decimal("-1000"))]
+
+        irr = FinancialCalculations.calculate_irr(flows, Decimal("10"), current_date=date(2024, 1, 1))
+
+        assert irr == pytest.approx(-0.9, abs=1e-3)